@@ -0,0 +1,29 @@
+"""
+Construction de l'index de recherche de l'aide
+
+À lancer au déploiement (après mise à jour des pages d'aide ou des
+guides) : l'index est enregistré dans aide.recherche.FICHIER_INDEX et relu
+par chaque processus au lieu de relire et découper les sources.
+
+Exemple :
+    python manage.py indexer_aide
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from aide.recherche import FICHIER_INDEX, construire_index, enregistrer_index
+
+
+class Command(BaseCommand):
+    help = "Construit et enregistre l'index de recherche de l'aide"
+
+    def handle(self, *args, **options):
+        debut = time.perf_counter()
+        index = construire_index()
+        enregistrer_index(index)
+        self.stdout.write(
+            f"{len(index.sections)} section(s), {len(index.postings)} racine(s)  "
+            f"{time.perf_counter() - debut:8.2f} s"
+        )
+        self.stdout.write(self.style.SUCCESS(f"Index de l'aide enregistré dans {FICHIER_INDEX}"))
@@ -0,0 +1,254 @@
+"""
+Recherche dans l'aide : index inversé en mémoire
+
+Les sections de aide/sources.py (pages d'aide et guides Markdown) sont
+découpées en mots, ramenés à leur racine par un raciniseur léger du
+français (minuscules, sans accents, pluriels et suffixes courants :
+« factures », « facturer » et « facturation » donnent « factur »). L'index
+associe chaque racine aux sections qui la contiennent, avec sa fréquence
+(les mots du titre comptent POIDS_TITRE fois).
+
+Une recherche ne lit que les listes des racines demandées : les sections
+sont classées par nombre de mots de la requête trouvés, puis par score
+BM25. L'extrait affiché est la fenêtre de FENETRE_EXTRAIT mots qui
+contient le plus de mots recherchés, mis en évidence.
+
+L'index est chargé au premier appel dans chaque processus et gardé en
+mémoire ; il est reconstruit si un fichier source change. La commande
+`indexer_aide` le construit au déploiement et l'enregistre dans
+FICHIER_INDEX : les processus le relisent alors tel quel au lieu de
+découper les sources. Aucune requête en base.
+"""
+import json
+import math
+import re
+import threading
+import unicodedata
+from collections import Counter, defaultdict
+from pathlib import Path
+
+from django.conf import settings
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .sources import fichiers_sources, toutes_les_sections
+
+
+FICHIER_INDEX = Path(getattr(settings, 'AIDE_INDEX_FICHIER', Path(settings.BASE_DIR) / 'aide_index.json'))
+
+VERSION_INDEX = 1
+
+POIDS_TITRE = 3
+FENETRE_EXTRAIT = 30
+NOMBRE_RESULTATS = 20
+
+# Paramètres BM25
+K1 = 1.2
+B = 0.75
+
+_MOTS = re.compile(r'[^\W_]+')
+
+MOTS_VIDES = frozenset("""
+    a à au aux avec ce ces cet cette comme comment dans de des du elle en est et
+    il ils je la le les leur leurs lui ma mais me mes mon ne nos notre nous on ou
+    où par pas pour qu que quel quelle qui sa se ses si son sont sur ta te tes
+    ton tu un une vos votre vous y d l j m n s t c
+""".split())
+
+# Suffixes retirés (après le pluriel), du plus long au plus court, s'il
+# reste au moins 3 lettres
+SUFFIXES = (
+    'issements', 'issement', 'atrices', 'atrice', 'ations', 'ateurs', 'ements',
+    'ation', 'ateur', 'ement', 'ments', 'ances', 'ences', 'ables', 'iques', 'euses',
+    'ment', 'ance', 'ence', 'able', 'ique', 'euse', 'eurs', 'ites', 'ives',
+    'eur', 'ite', 'ive', 'ifs', 'ees', 'ee', 'er', 'ez', 'es', 'if', 'e',
+)
+
+
+def sans_accents(texte):
+    decompose = unicodedata.normalize('NFKD', texte.casefold())
+    return ''.join(c for c in decompose if not unicodedata.combining(c))
+
+
+def racine(mot):
+    """Racine d'un mot (minuscules, sans accents)"""
+    mot = sans_accents(mot)
+    if mot.isdigit() or len(mot) <= 3:
+        return mot
+    if mot.endswith('aux') and len(mot) > 5:
+        mot = mot[:-3] + 'al'
+    elif mot[-1] in 'sx':
+        mot = mot[:-1]
+    for suffixe in SUFFIXES:
+        if mot.endswith(suffixe) and len(mot) - len(suffixe) >= 3:
+            return mot[:-len(suffixe)]
+    return mot
+
+
+def _mots(texte):
+    """(racine ou None pour un mot vide, début, fin) de chaque mot du texte"""
+    for correspondance in _MOTS.finditer(texte):
+        mot = correspondance.group()
+        cle = None if sans_accents(mot) in MOTS_VIDES else racine(mot)
+        yield cle, correspondance.start(), correspondance.end()
+
+
+def racines(texte):
+    return [cle for cle, _, _ in _mots(texte) if cle]
+
+
+class IndexAide:
+    """Index inversé des sections : racine -> [(section, fréquence)]"""
+
+    def __init__(self, sections, postings, longueurs, signature=0):
+        self.sections = sections
+        self.postings = postings
+        self.longueurs = longueurs
+        self.longueur_moyenne = (sum(longueurs) / len(longueurs)) if longueurs else 0
+        self.signature = signature
+
+    @classmethod
+    def construire(cls, sections, signature=0):
+        postings = defaultdict(list)
+        longueurs = []
+        for numero, section in enumerate(sections):
+            frequences = Counter(racines(section['texte']))
+            for cle in racines(section['titre']):
+                frequences[cle] += POIDS_TITRE
+            for cle, frequence in frequences.items():
+                postings[cle].append((numero, frequence))
+            longueurs.append(sum(frequences.values()))
+        return cls(sections, dict(postings), longueurs, signature)
+
+    def en_dict(self):
+        return {
+            'version': VERSION_INDEX,
+            'signature': self.signature,
+            'sections': self.sections,
+            'postings': self.postings,
+            'longueurs': self.longueurs,
+        }
+
+    @classmethod
+    def depuis_dict(cls, donnees):
+        postings = {cle: [tuple(entree) for entree in liste] for cle, liste in donnees['postings'].items()}
+        return cls(donnees['sections'], postings, donnees['longueurs'], donnees['signature'])
+
+    def rechercher(self, requete, limite=NOMBRE_RESULTATS):
+        """
+        Sections correspondant à la requête, les plus pertinentes d'abord
+
+        Retourne une liste de dictionnaires (titre, source, url, extrait
+        HTML, score).
+        """
+        cles = set(racines(requete or ''))
+        if not cles:
+            return []
+
+        total = len(self.sections)
+        scores = defaultdict(float)
+        couverture = Counter()
+        for cle in cles:
+            liste = self.postings.get(cle, ())
+            if not liste:
+                continue
+            idf = math.log(1 + (total - len(liste) + 0.5) / (len(liste) + 0.5))
+            for numero, frequence in liste:
+                norme = K1 * (1 - B + B * self.longueurs[numero] / self.longueur_moyenne)
+                scores[numero] += idf * frequence * (K1 + 1) / (frequence + norme)
+                couverture[numero] += 1
+
+        classement = sorted(scores, key=lambda numero: (-couverture[numero], -scores[numero]))[:limite]
+        resultats = []
+        for numero in classement:
+            section = self.sections[numero]
+            resultats.append({
+                'titre': section['titre'],
+                'source': section['source'],
+                'url': section['url'],
+                'extrait': extrait(section['texte'], cles),
+                'score': round(scores[numero], 3),
+            })
+        return resultats
+
+
+def extrait(texte, cles, fenetre=FENETRE_EXTRAIT):
+    """Passage du texte le plus riche en mots recherchés, mots trouvés en <mark>"""
+    mots = list(_mots(texte))
+    if not mots:
+        return ''
+
+    trouves = [position for position, (cle, _, _) in enumerate(mots) if cle in cles]
+    debut = 0
+    meilleur = (0, 0)
+    for position in trouves:
+        candidat = max(position - fenetre // 4, 0)
+        dans_fenetre = [mots[i][0] for i in trouves if candidat <= i < candidat + fenetre]
+        valeur = (len(set(dans_fenetre)), len(dans_fenetre))
+        if valeur > meilleur:
+            meilleur, debut = valeur, candidat
+    fin = min(debut + fenetre, len(mots))
+
+    morceaux = ['… '] if debut else []
+    curseur = mots[debut][1]
+    for cle, depart, arrivee in mots[debut:fin]:
+        morceaux.append(escape(texte[curseur:depart]))
+        mot = escape(texte[depart:arrivee])
+        morceaux.append(f'<mark>{mot}</mark>' if cle in cles else mot)
+        curseur = arrivee
+    if fin < len(mots):
+        morceaux.append(' …')
+    return mark_safe(''.join(morceaux).replace('\n', ' '))
+
+
+# ---------------------------------------------------------------------------
+# Index du processus
+# ---------------------------------------------------------------------------
+
+_verrou = threading.Lock()
+_index = None
+
+
+def signature_sources():
+    """Date de la dernière modification des fichiers sources"""
+    return max((chemin.stat().st_mtime_ns for chemin in fichiers_sources()), default=0)
+
+
+def construire_index():
+    signature = signature_sources()
+    return IndexAide.construire(toutes_les_sections(), signature)
+
+
+def enregistrer_index(index, chemin=FICHIER_INDEX):
+    chemin.parent.mkdir(parents=True, exist_ok=True)
+    chemin.write_text(json.dumps(index.en_dict(), ensure_ascii=False), encoding='utf-8')
+
+
+def _lire_index(signature):
+    """Index enregistré par `indexer_aide`, s'il est à jour"""
+    try:
+        donnees = json.loads(FICHIER_INDEX.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return None
+    if donnees.get('version') != VERSION_INDEX or donnees.get('signature') != signature:
+        return None
+    return IndexAide.depuis_dict(donnees)
+
+
+def index_courant():
+    """Index à jour des sources (relu ou reconstruit si nécessaire)"""
+    global _index
+
+    signature = signature_sources()
+    index = _index
+    if index is not None and index.signature == signature:
+        return index
+
+    with _verrou:
+        if _index is None or _index.signature != signature:
+            _index = _lire_index(signature) or construire_index()
+        return _index
+
+
+def rechercher_aide(requete, limite=NOMBRE_RESULTATS):
+    return index_courant().rechercher(requete, limite)
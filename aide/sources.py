@@ -0,0 +1,233 @@
+"""
+Contenus indexés par la recherche de l'aide
+
+Deux sources, découpées en sections (titre, texte, lien) :
+
+- les pages de templates/aide/ (bloc content, texte sans balises ni
+  syntaxe de template), une section par titre <h1> à <h5> ;
+- les guides Markdown du projet (GUIDES, ou settings.AIDE_GUIDES), une
+  section par titre, affichés par la vue aide:guide avec une ancre par
+  section.
+"""
+import re
+from html.parser import HTMLParser
+from pathlib import Path
+
+from django.conf import settings
+from django.urls import reverse
+from django.utils.text import slugify
+
+
+# Pages d'aide : template -> (titre, nom d'URL)
+PAGES = {
+    'aide/index.html': ("Centre d'aide", 'aide:index'),
+    'aide/utilisation.html': ("Guide d'utilisation", 'aide:utilisation'),
+    'aide/faq.html': ("FAQ", 'aide:faq'),
+    'aide/contact.html': ("Contact et support", 'aide:contact'),
+    'aide/a_propos.html': ("À propos", 'aide:a_propos'),
+}
+
+# Guides Markdown (à la racine du projet) : nom dans l'URL -> fichier
+GUIDES = getattr(settings, 'AIDE_GUIDES', {
+    'utilisation': 'GUIDE_UTILISATION.md',
+    'presentation': 'README.md',
+    'parametres': 'PARAMETRES_README.md',
+    'roles-permissions': 'SYSTEME_ROLES_PERMISSIONS_README.md',
+    'impression-devis': 'IMPRESSION_DEVIS_README.md',
+    'suppression-devis': 'SUPPRESSION_DEVIS_README.md',
+    'cachet-signature': 'CACHET_SIGNATURE_README.md',
+    'symbole-monetaire': 'SYMBOLE_MONETAIRE_README.md',
+    'navigation': 'NAVIGATION_AMELIORATIONS.md',
+})
+
+_BLOC_CONTENU = re.compile(r'\{%\s*block\s+content\s*%\}(.*?)\{%\s*endblock', re.S)
+_SYNTAXE_TEMPLATE = re.compile(r'\{%.*?%\}|\{\{.*?\}\}|\{#.*?#\}', re.S)
+_TITRE_MARKDOWN = re.compile(r'^(#{1,6})\s+(.*?)\s*#*\s*$')
+_LIEN_MARKDOWN = re.compile(r'!?\[([^\]]*)\]\([^)]*\)')
+_EMPHASE_MARKDOWN = re.compile(r'(\*\*|__|\*|`)')
+_ESPACES = re.compile(r'[ \t\r\f\v]+')
+_LIGNES_VIDES = re.compile(r'\n\s*\n+')
+
+
+def _nettoyer(texte):
+    texte = _ESPACES.sub(' ', texte)
+    texte = '\n'.join(ligne.strip() for ligne in texte.split('\n'))
+    return _LIGNES_VIDES.sub('\n', texte).strip()
+
+
+def _chemin_template(nom):
+    for dossier in settings.TEMPLATES[0]['DIRS']:
+        chemin = Path(dossier) / nom
+        if chemin.exists():
+            return chemin
+    return None
+
+
+def _chemin_guide(fichier):
+    return Path(settings.BASE_DIR) / fichier
+
+
+def fichiers_sources():
+    """Fichiers lus par l'index (pour détecter leurs modifications)"""
+    chemins = [_chemin_template(nom) for nom in PAGES]
+    chemins += [_chemin_guide(fichier) for fichier in GUIDES.values()]
+    return [chemin for chemin in chemins if chemin and chemin.exists()]
+
+
+# ---------------------------------------------------------------------------
+# Pages HTML
+# ---------------------------------------------------------------------------
+
+class _LecteurPage(HTMLParser):
+    """Découpe le texte d'une page en sections aux titres <h1> à <h5>"""
+
+    TITRES = {'h1', 'h2', 'h3', 'h4', 'h5'}
+    BLOCS = {'p', 'div', 'li', 'br', 'tr', 'h6', 'dt', 'dd', 'ul', 'ol', 'table'}
+    IGNORES = {'script', 'style'}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.sections = []
+        self._titre = None
+        self._texte = []
+        self._dans_titre = False
+        self._titre_en_cours = []
+        self._ignore = 0
+
+    def _fermer_section(self):
+        texte = _nettoyer(''.join(self._texte))
+        if self._titre is not None or texte:
+            self.sections.append((self._titre or '', texte))
+        self._texte = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.IGNORES:
+            self._ignore += 1
+        elif tag in self.TITRES:
+            self._dans_titre = True
+            self._titre_en_cours = []
+        elif tag in self.BLOCS:
+            self._texte.append('\n')
+
+    def handle_endtag(self, tag):
+        if tag in self.IGNORES:
+            self._ignore = max(self._ignore - 1, 0)
+        elif tag in self.TITRES and self._dans_titre:
+            self._dans_titre = False
+            titre = _nettoyer(''.join(self._titre_en_cours)).replace('\n', ' ')
+            if self._titre is not None and not _nettoyer(''.join(self._texte)):
+                # Titre suivi directement d'un sous-titre : les deux sont gardés
+                self._titre = f"{self._titre} › {titre}" if self._titre else titre
+            else:
+                self._fermer_section()
+                self._titre = titre
+        elif tag in self.BLOCS:
+            self._texte.append('\n')
+
+    def handle_data(self, data):
+        if self._ignore:
+            return
+        if self._dans_titre:
+            self._titre_en_cours.append(data)
+        else:
+            self._texte.append(data)
+
+    def close(self):
+        super().close()
+        self._fermer_section()
+
+
+def sections_page(nom):
+    """Sections d'une page d'aide (liste de dictionnaires titre, source, url, texte)"""
+    titre_page, nom_url = PAGES[nom]
+    chemin = _chemin_template(nom)
+    if chemin is None:
+        return []
+    source = chemin.read_text(encoding='utf-8')
+    bloc = _BLOC_CONTENU.search(source)
+    lecteur = _LecteurPage()
+    lecteur.feed(_SYNTAXE_TEMPLATE.sub(' ', bloc.group(1) if bloc else source))
+    lecteur.close()
+
+    url = reverse(nom_url)
+    return [
+        {'titre': titre or titre_page, 'source': titre_page, 'url': url, 'texte': texte}
+        for titre, texte in lecteur.sections
+        if texte
+    ]
+
+
+# ---------------------------------------------------------------------------
+# Guides Markdown
+# ---------------------------------------------------------------------------
+
+def _texte_markdown(ligne):
+    return _EMPHASE_MARKDOWN.sub('', _LIEN_MARKDOWN.sub(r'\1', ligne))
+
+
+def lire_guide(nom):
+    """
+    (titre du guide, sections) d'un guide Markdown
+
+    Chaque section est un dictionnaire titre, niveau, ancre, texte ; le
+    titre du guide est son premier titre de niveau 1.
+    """
+    chemin = _chemin_guide(GUIDES[nom])
+    if not chemin.exists():
+        return nom, []
+
+    sections = []
+    ancres = set()
+    titre, niveau, lignes = '', 0, []
+    dans_code = False
+
+    def fermer():
+        texte = _nettoyer('\n'.join(lignes))
+        if titre or texte:
+            ancre = base = slugify(titre) or 'section'
+            numero = 1
+            while ancre in ancres:
+                numero += 1
+                ancre = f"{base}-{numero}"
+            ancres.add(ancre)
+            sections.append({'titre': titre, 'niveau': niveau, 'ancre': ancre, 'texte': texte})
+
+    for ligne in chemin.read_text(encoding='utf-8').splitlines():
+        if ligne.lstrip().startswith('```'):
+            dans_code = not dans_code
+            continue
+        entete = None if dans_code else _TITRE_MARKDOWN.match(ligne)
+        if entete:
+            fermer()
+            titre, niveau, lignes = _texte_markdown(entete.group(2)).strip(), len(entete.group(1)), []
+        else:
+            lignes.append(ligne if dans_code else _texte_markdown(ligne))
+    fermer()
+
+    titre_guide = next((section['titre'] for section in sections if section['niveau'] == 1), nom)
+    return titre_guide, sections
+
+
+def sections_guide(nom):
+    """Sections d'un guide pour l'index (titre, source, url avec ancre, texte)"""
+    titre_guide, sections = lire_guide(nom)
+    url = reverse('aide:guide', args=[nom])
+    return [
+        {
+            'titre': section['titre'] or titre_guide,
+            'source': titre_guide,
+            'url': f"{url}#{section['ancre']}",
+            'texte': section['texte'],
+        }
+        for section in sections
+        if section['texte']
+    ]
+
+
+def toutes_les_sections():
+    sections = []
+    for nom in PAGES:
+        sections.extend(sections_page(nom))
+    for nom in GUIDES:
+        sections.extend(sections_guide(nom))
+    return sections
@@ -13,6 +13,9 @@ urlpatterns = [
     path('contact/', views.AideContactView.as_view(), name='contact'),
     path('a-propos/', views.AideAProposView.as_view(), name='a_propos'),
     
+    # Guides (documentation Markdown du projet)
+    path('guides/<slug:nom>/', views.aide_guide, name='guide'),
+    
     # Recherche
     path('recherche/', views.aide_recherche, name='recherche'),
 ]
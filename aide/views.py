@@ -1,8 +1,13 @@
+from django.contrib import messages
+from django.http import Http404
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.views.generic import TemplateView
 
+from .recherche import rechercher_aide
+from .sources import GUIDES, lire_guide
+
 class AideIndexView(LoginRequiredMixin, TemplateView):
     """Page d'accueil de l'aide"""
     template_name = 'aide/index.html'
@@ -25,13 +30,25 @@ class AideAProposView(LoginRequiredMixin, TemplateView):
 
 @login_required
 def aide_recherche(request):
-    """Recherche dans l'aide"""
-    query = request.GET.get('q', '')
+    """Recherche dans l'aide (pages d'aide et guides, index en mémoire)"""
+    query = request.GET.get('q', '').strip()
+    results = []
+    if query:
+        try:
+            results = rechercher_aide(query)
+        except Exception as e:
+            print(f"Erreur lors de la recherche dans l'aide: {e}")
+            messages.error(request, "La recherche dans l'aide est momentanément indisponible.")
     context = {
         'query': query,
-        'results': []
+        'results': results,
     }
-    
-    # Ici on pourrait implémenter une recherche dans la documentation
-    # Pour l'instant, on retourne une page simple
-    return render(request, 'aide/recherche.html', context)
\ No newline at end of file
+    return render(request, 'aide/recherche.html', context)
+
+@login_required
+def aide_guide(request, nom):
+    """Affichage d'un guide Markdown, une section par titre"""
+    if nom not in GUIDES:
+        raise Http404("Guide introuvable")
+    titre, sections = lire_guide(nom)
+    return render(request, 'aide/guide.html', {'titre': titre, 'sections': sections})
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Categorie, Article
+from .models import Categorie, Article, ImportExcel
 
 
 @admin.register(Categorie)
@@ -37,4 +37,13 @@ class ArticleAdmin(admin.ModelAdmin):
             'fields': ('date_creation', 'date_modification'),
             'classes': ('collapse',)
         }),
-    )
\ No newline at end of file
+    )
+
+
+@admin.register(ImportExcel)
+class ImportExcelAdmin(admin.ModelAdmin):
+    list_display = ['nom_fichier', 'type_import', 'statut', 'lignes_traitees', 'total_lignes', 'crees', 'mis_a_jour', 'nombre_erreurs', 'cree_par', 'date_creation']
+    list_filter = ['type_import', 'statut', 'date_creation']
+    search_fields = ['nom_fichier', 'cree_par__username']
+    readonly_fields = ['date_creation', 'date_debut', 'date_fin', 'date_maj', 'erreurs', 'message_erreur']
+    ordering = ['-date_creation']
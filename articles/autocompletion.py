@@ -0,0 +1,106 @@
+"""
+Autocomplétion des désignations d'articles
+
+Les désignations des articles actifs sont gardées en mémoire dans deux
+listes triées de clés normalisées (minuscules, sans accents) : la
+désignation entière, et chacun de ses mots suivants (« rigide » trouve
+« Câble rigide 3G2,5 »). Une recherche par préfixe est une recherche
+dichotomique suivie de la lecture des `limite` entrées suivantes : son
+coût ne dépend pas de la taille du catalogue.
+
+L'index est propre à chaque processus. Sa génération est gardée en base
+(core.generations), commune à tous les processus : tout changement
+d'article (signaux, imports en masse) appelle invalider(), et chaque
+processus reconstruit son index au prochain appel. La génération sert
+aussi d'ETag aux réponses de l'API.
+"""
+import bisect
+import threading
+import unicodedata
+
+from core import generations
+
+from .models import Article
+
+
+CLE_GENERATION = 'articles:designations:generation'
+
+LIMITE_DEFAUT = 20
+LIMITE_MAX = 100
+
+_verrou = threading.Lock()
+_index = None
+
+
+def normaliser(texte):
+    """Clé de comparaison : minuscules, sans accents ni espaces superflus"""
+    decompose = unicodedata.normalize('NFKD', texte.casefold())
+    return ' '.join(''.join(c for c in decompose if not unicodedata.combining(c)).split())
+
+
+class _Index:
+    """Listes triées (clé, désignation) des débuts de désignation et des mots suivants"""
+
+    def __init__(self, generation, designations):
+        self.generation = generation
+        debuts = []
+        mots = []
+        for designation in designations:
+            cle = normaliser(designation)
+            debuts.append((cle, designation))
+            position = cle.find(' ')
+            while position != -1:
+                mots.append((cle[position + 1:], designation))
+                position = cle.find(' ', position + 1)
+        debuts.sort()
+        mots.sort()
+        self.debuts = debuts
+        self.cles_debuts = [cle for cle, _ in debuts]
+        self.mots = mots
+        self.cles_mots = [cle for cle, _ in mots]
+
+
+def invalider():
+    """À appeler après toute modification des articles"""
+    generations.invalider(CLE_GENERATION)
+
+
+def index_courant():
+    """Index à jour de la génération courante (reconstruit si nécessaire)"""
+    global _index
+
+    generation = generations.generation(CLE_GENERATION)
+    index = _index
+    if index is not None and index.generation == generation:
+        return index
+
+    with _verrou:
+        if _index is None or _index.generation != generation:
+            designations = Article.objects.filter(actif=True).values_list('designation', flat=True)
+            _index = _Index(generation, designations.iterator())
+        return _index
+
+
+def _lire(cles, entrees, prefixe, limite, vues, resultats):
+    for position in range(bisect.bisect_left(cles, prefixe), len(entrees)):
+        cle, designation = entrees[position]
+        if len(resultats) >= limite or not cle.startswith(prefixe):
+            return
+        if designation not in vues:
+            vues.add(designation)
+            resultats.append(designation)
+
+
+def completer(prefixe, limite=LIMITE_DEFAUT, index=None):
+    """
+    Désignations commençant par `prefixe`, puis celles dont un mot suivant
+    commence par `prefixe` (ordre alphabétique, au plus `limite`)
+    """
+    index = index or index_courant()
+    prefixe = normaliser(prefixe or '')
+    resultats = []
+    vues = set()
+    _lire(index.cles_debuts, index.debuts, prefixe, limite, vues, resultats)
+    if prefixe:
+        _lire(index.cles_mots, index.mots, prefixe, limite, vues, resultats)
+    return resultats
@@ -0,0 +1,258 @@
+"""
+Imports Excel / CSV en arrière-plan (articles, catégories, clients, fournisseurs)
+
+Le fichier envoyé est enregistré avec un ImportExcel « en attente », puis
+traité hors du serveur web par le worker `reprendre_imports --continu`
+(voir core/arriere_plan.py). Les lignes sont lues au fil de l'eau
+(core.import_fichiers) et enregistrées par morceaux de TAILLE_MORCEAU
+lignes ; chaque morceau est validé dans une transaction qui met aussi à
+jour le point de reprise (lignes_traitees) et les compteurs de l'import.
+
+Chaque type d'import est décrit par le TRAITEMENTS_IMPORT du module
+utils de son application (MODULES_IMPORT).
+
+Si le processus s'arrête pendant un import, celui-ci reste « en cours »
+sans nouveau point de reprise. Après DELAI_REPRISE, il est repris à partir
+du dernier morceau validé par le worker `reprendre_imports`.
+
+Configuration (settings.py, optionnelle) :
+    IMPORTS_TAILLE_MORCEAU = 5000   # lignes par transaction
+    IMPORTS_WORKERS = 1             # imports traités simultanément par un worker
+    IMPORTS_SYNCHRONE = False       # traitement dans la requête (développement, sans worker)
+"""
+from datetime import timedelta
+from importlib import import_module
+from itertools import islice
+
+from django.conf import settings
+from django.contrib import messages
+from django.db import transaction
+from django.db.models import Q
+from django.shortcuts import redirect
+from django.utils import timezone
+
+from core.import_fichiers import EXTENSIONS_IMPORT, ouvrir_tableau, reperer_colonnes
+from core.recherche_globale import indexer, modele_source
+from .models import ImportExcel
+
+
+TAILLE_MORCEAU = getattr(settings, 'IMPORTS_TAILLE_MORCEAU', 5000)
+
+WORKERS_IMPORTS = getattr(settings, 'IMPORTS_WORKERS', 1)
+
+# Durée sans point de reprise au-delà de laquelle un import en cours est
+# considéré comme interrompu
+DELAI_REPRISE = timedelta(minutes=5)
+
+# Nombre maximal de messages d'erreur conservés par import
+MAX_ERREURS_CONSERVEES = 500
+
+# Type de la recherche globale des objets créés par chaque import
+# (chargés en masse, sans signal : indexés en fin d'import)
+TYPES_RECHERCHE = {
+    'articles': 'article',
+    'clients': 'client',
+    'fournisseurs': 'fournisseur',
+}
+
+# Module fournissant les traitements de chaque type d'import (TRAITEMENTS_IMPORT)
+MODULES_IMPORT = {
+    'articles': 'articles.utils',
+    'categories': 'articles.utils',
+    'clients': 'clients.utils',
+    'fournisseurs': 'fournisseurs.utils',
+}
+
+
+def traitement(type_import):
+    """(colonnes, colonnes requises, analyse, enregistrement) d'un type d'import"""
+    return import_module(MODULES_IMPORT[type_import]).TRAITEMENTS_IMPORT[type_import]
+
+
+def colonnes_manquantes(en_tetes, type_import):
+    """Libellés des colonnes requises absentes des en-têtes"""
+    colonnes, requises, _, _ = traitement(type_import)
+    trouvees = reperer_colonnes(en_tetes, colonnes)
+    return [colonnes[champ][0] for champ in requises if champ not in trouvees]
+
+
+def verifier_fichier(fichier, type_import):
+    """Colonnes requises absentes d'un fichier envoyé (relu ensuite depuis le début)"""
+    with ouvrir_tableau(fichier, fichier.name) as (en_tetes, _, _):
+        manquantes = colonnes_manquantes(en_tetes, type_import)
+    fichier.seek(0)
+    return manquantes
+
+
+def reserver(import_id):
+    """
+    Réserve un import en attente ou interrompu pour le traiter
+
+    La réservation se fait par un UPDATE conditionnel : un seul processus
+    peut la remporter. Retourne l'import réservé ou None.
+    """
+    maintenant = timezone.now()
+    reserve = ImportExcel.objects.filter(
+        Q(statut='en_attente') | Q(statut='en_cours', date_maj__lt=maintenant - DELAI_REPRISE),
+        pk=import_id
+    ).update(statut='en_cours', date_maj=maintenant)
+    if not reserve:
+        return None
+    return ImportExcel.objects.get(pk=import_id)
+
+
+def traiter_import(job):
+    """
+    Traite un import réservé à partir de son point de reprise
+
+    Chaque morceau et l'avancement correspondant sont validés ensemble :
+    un morceau n'est jamais enregistré deux fois.
+    """
+    _, _, analyser, enregistrer = traitement(job.type_import)
+    if not job.date_debut:
+        job.date_debut = timezone.now()
+        job.save(update_fields=['date_debut'])
+
+    try:
+        with job.fichier.open('rb') as fichier, ouvrir_tableau(fichier, job.nom_fichier) as (en_tetes, lignes, total):
+            manquantes = colonnes_manquantes(en_tetes, job.type_import)
+            if manquantes:
+                raise ValueError(f"Format de fichier invalide. Colonnes requises: {', '.join(manquantes)}")
+
+            if job.total_lignes is None and total is not None:
+                job.total_lignes = total
+                job.save(update_fields=['total_lignes'])
+
+            # Reprise : les lignes déjà validées sont sautées
+            lignes = islice(lignes, job.lignes_traitees, None)
+            while True:
+                morceau = list(islice(lignes, TAILLE_MORCEAU))
+                if not morceau:
+                    break
+                valides, erreurs = analyser(en_tetes, morceau, premiere_ligne=job.lignes_traitees + 2)
+                with transaction.atomic():
+                    crees, mis_a_jour = enregistrer(valides)
+                    job.lignes_traitees += len(morceau)
+                    job.crees += crees
+                    job.mis_a_jour += mis_a_jour
+                    job.nombre_erreurs += len(erreurs)
+                    job.erreurs = (job.erreurs + erreurs)[:MAX_ERREURS_CONSERVEES]
+                    job.date_maj = timezone.now()
+                    job.save(update_fields=[
+                        'lignes_traitees', 'crees', 'mis_a_jour',
+                        'nombre_erreurs', 'erreurs', 'date_maj',
+                    ])
+
+        indexer_import(job)
+        job.statut = 'termine'
+        job.total_lignes = job.lignes_traitees
+        # Le fichier n'est plus nécessaire une fois l'import terminé
+        job.fichier.delete(save=False)
+    except Exception as e:
+        print(f"Erreur lors de l'import {job.pk}: {e}")
+        job.statut = 'erreur'
+        job.message_erreur = str(e)
+
+    job.date_fin = timezone.now()
+    job.save(update_fields=['statut', 'total_lignes', 'fichier', 'message_erreur', 'date_fin'])
+    return job
+
+
+def _signaler_activite(job):
+    """Renouvelle date_maj : l'import n'est pas considéré comme interrompu"""
+    job.date_maj = timezone.now()
+    ImportExcel.objects.filter(pk=job.pk).update(date_maj=job.date_maj)
+
+
+def indexer_import(job):
+    """
+    Indexe pour la recherche globale les objets créés ou modifiés par l'import
+
+    date_maj est renouvelée après chaque morceau indexé : une indexation
+    plus longue que DELAI_REPRISE n'est pas prise pour un import interrompu
+    (et reprise en parallèle).
+    """
+    type_objet = TYPES_RECHERCHE.get(job.type_import)
+    if type_objet:
+        modele = modele_source(type_objet)
+        _signaler_activite(job)
+        indexer(
+            type_objet,
+            modele.objects.filter(date_modification__gte=job.date_debut),
+            apres_morceau=lambda: _signaler_activite(job),
+        )
+
+
+def reprendre(import_id):
+    """Tâche du worker : réserve l'import et le traite (None s'il a déjà été pris)"""
+    job = reserver(import_id)
+    return traiter_import(job) if job else None
+
+
+def lancer_import(job):
+    """
+    Laisse l'import en attente du worker `reprendre_imports`
+
+    Avec IMPORTS_SYNCHRONE = True, l'import est traité immédiatement.
+    """
+    if getattr(settings, 'IMPORTS_SYNCHRONE', False):
+        return reprendre(job.pk)
+    return job
+
+
+def creer_import(fichier, type_import, utilisateur):
+    """Enregistre le fichier envoyé et planifie son import"""
+    job = ImportExcel(type_import=type_import, nom_fichier=fichier.name, cree_par=utilisateur)
+    job.fichier.save(fichier.name, fichier, save=False)
+    job.save()
+    lancer_import(job)
+    return job
+
+
+def est_interrompu(job):
+    """Indique si l'import n'a plus de point de reprise récent (processus arrêté)"""
+    return (
+        job.statut == 'en_cours'
+        and job.date_maj is not None
+        and job.date_maj < timezone.now() - DELAI_REPRISE
+    )
+
+
+def imports_a_reprendre():
+    """Imports en attente ou interrompus"""
+    return ImportExcel.objects.filter(
+        Q(statut='en_attente') | Q(statut='en_cours', date_maj__lt=timezone.now() - DELAI_REPRISE)
+    ).order_by('date_creation')
+
+
+def demarrer_import(request, type_import, url_retour):
+    """
+    Vue commune des formulaires d'import : vérifie le fichier envoyé,
+    l'enregistre et redirige vers la page de suivi de l'import
+    """
+    if request.method != 'POST':
+        return redirect(url_retour)
+
+    try:
+        fichier = request.FILES.get('excel_file')
+        if not fichier:
+            messages.error(request, 'Aucun fichier sélectionné.')
+            return redirect(url_retour)
+
+        # Vérifier l'extension
+        if not fichier.name.lower().endswith(EXTENSIONS_IMPORT):
+            messages.error(request, 'Veuillez sélectionner un fichier Excel (.xlsx) ou CSV (.csv).')
+            return redirect(url_retour)
+
+        # Vérifier les en-têtes avant d'enregistrer le fichier
+        manquantes = verifier_fichier(fichier, type_import)
+        if manquantes:
+            messages.error(request, f'Format de fichier invalide. Colonnes requises: {", ".join(manquantes)}')
+            return redirect(url_retour)
+
+        job = creer_import(fichier, type_import, request.user)
+        return redirect('articles:import_suivi', pk=job.pk)
+
+    except Exception as e:
+        messages.error(request, f'Erreur lors de l\'import: {str(e)}')
+        return redirect(url_retour)
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.4 on 2026-10-19 06:53
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportExcel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('type_import', models.CharField(choices=[('articles', 'Articles'), ('categories', 'Catégories')], max_length=20, verbose_name="Type d'import")),
+                ('fichier', models.FileField(blank=True, upload_to='imports/', verbose_name='Fichier importé')),
+                ('nom_fichier', models.CharField(max_length=255, verbose_name='Nom du fichier')),
+                ('statut', models.CharField(choices=[('en_attente', 'En attente'), ('en_cours', 'En cours'), ('termine', 'Terminé'), ('erreur', 'Erreur')], default='en_attente', max_length=20, verbose_name='Statut')),
+                ('total_lignes', models.PositiveIntegerField(blank=True, null=True, verbose_name='Nombre de lignes')),
+                ('lignes_traitees', models.PositiveIntegerField(default=0, verbose_name='Lignes traitées')),
+                ('crees', models.PositiveIntegerField(default=0, verbose_name='Créés')),
+                ('mis_a_jour', models.PositiveIntegerField(default=0, verbose_name='Mis à jour')),
+                ('nombre_erreurs', models.PositiveIntegerField(default=0, verbose_name='Lignes en erreur')),
+                ('erreurs', models.JSONField(blank=True, default=list, verbose_name='Détail des erreurs')),
+                ('message_erreur', models.TextField(blank=True, verbose_name="Message d'erreur")),
+                ('date_creation', models.DateTimeField(auto_now_add=True, verbose_name='Date de création')),
+                ('date_debut', models.DateTimeField(blank=True, null=True, verbose_name='Début du traitement')),
+                ('date_fin', models.DateTimeField(blank=True, null=True, verbose_name='Fin du traitement')),
+                ('date_maj', models.DateTimeField(blank=True, null=True, verbose_name='Dernier point de reprise')),
+                ('cree_par', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL, verbose_name='Créé par')),
+            ],
+            options={
+                'verbose_name': 'Import Excel',
+                'verbose_name_plural': 'Imports Excel',
+                'ordering': ['-date_creation'],
+                'indexes': [models.Index(fields=['statut', 'date_maj'], name='articles_im_statut_59a564_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-19 07:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0002_importexcel'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='importexcel',
+            name='type_import',
+            field=models.CharField(choices=[('articles', 'Articles'), ('categories', 'Catégories'), ('clients', 'Clients'), ('fournisseurs', 'Fournisseurs')], max_length=20, verbose_name="Type d'import"),
+        ),
+    ]
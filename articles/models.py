@@ -1,4 +1,5 @@
 from django.db import models
+from django.contrib.auth.models import User
 from django.utils import timezone
 
 
@@ -80,4 +81,123 @@ class Article(models.Model):
         ]
     
     def __str__(self):
-        return f"{self.designation} ({self.categorie.libelle})"
\ No newline at end of file
+        return f"{self.designation} ({self.categorie.libelle})"
+
+class ImportExcel(models.Model):
+    """Import Excel / CSV (articles, catégories, clients, fournisseurs) traité en arrière-plan"""
+    
+    TYPE_IMPORT_CHOICES = [
+        ('articles', 'Articles'),
+        ('categories', 'Catégories'),
+        ('clients', 'Clients'),
+        ('fournisseurs', 'Fournisseurs'),
+    ]
+    
+    STATUT_CHOICES = [
+        ('en_attente', 'En attente'),
+        ('en_cours', 'En cours'),
+        ('termine', 'Terminé'),
+        ('erreur', 'Erreur'),
+    ]
+    
+    type_import = models.CharField(
+        max_length=20,
+        choices=TYPE_IMPORT_CHOICES,
+        verbose_name="Type d'import"
+    )
+    fichier = models.FileField(
+        upload_to='imports/',
+        blank=True,
+        verbose_name="Fichier importé"
+    )
+    nom_fichier = models.CharField(
+        max_length=255,
+        verbose_name="Nom du fichier"
+    )
+    statut = models.CharField(
+        max_length=20,
+        choices=STATUT_CHOICES,
+        default='en_attente',
+        verbose_name="Statut"
+    )
+    
+    # Avancement : lignes_traitees est le point de reprise (lignes validées
+    # dans des transactions terminées)
+    total_lignes = models.PositiveIntegerField(
+        blank=True,
+        null=True,
+        verbose_name="Nombre de lignes"
+    )
+    lignes_traitees = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Lignes traitées"
+    )
+    crees = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Créés"
+    )
+    mis_a_jour = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Mis à jour"
+    )
+    nombre_erreurs = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Lignes en erreur"
+    )
+    erreurs = models.JSONField(
+        default=list,
+        blank=True,
+        verbose_name="Détail des erreurs"
+    )
+    message_erreur = models.TextField(
+        blank=True,
+        verbose_name="Message d'erreur"
+    )
+    
+    # Métadonnées
+    cree_par = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        verbose_name="Créé par"
+    )
+    date_creation = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="Date de création"
+    )
+    date_debut = models.DateTimeField(
+        blank=True,
+        null=True,
+        verbose_name="Début du traitement"
+    )
+    date_fin = models.DateTimeField(
+        blank=True,
+        null=True,
+        verbose_name="Fin du traitement"
+    )
+    date_maj = models.DateTimeField(
+        blank=True,
+        null=True,
+        verbose_name="Dernier point de reprise"
+    )
+    
+    class Meta:
+        verbose_name = "Import Excel"
+        verbose_name_plural = "Imports Excel"
+        ordering = ['-date_creation']
+        indexes = [
+            models.Index(fields=['statut', 'date_maj']),
+        ]
+    
+    def __str__(self):
+        return f"Import {self.get_type_import_display().lower()} - {self.nom_fichier}"
+    
+    @property
+    def pourcentage(self):
+        """Avancement en pourcentage (None si le nombre de lignes est inconnu)"""
+        if self.statut == 'termine':
+            return 100
+        if not self.total_lignes:
+            return None
+        return min(int(self.lignes_traitees * 100 / self.total_lignes), 99)
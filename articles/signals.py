@@ -0,0 +1,11 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .autocompletion import invalider
+from .models import Article
+
+
+@receiver([post_save, post_delete], sender=Article)
+def invalider_designations(sender, instance, **kwargs):
+    """Un article modifié invalide l'index d'autocomplétion des désignations"""
+    invalider()
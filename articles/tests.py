@@ -1,3 +1,21 @@
+from django.contrib.auth.models import User
 from django.test import TestCase
+from django.urls import reverse
 
-# Create your tests here.
+
+class DesignationsApiTests(TestCase):
+    """ETag de l'API d'autocomplétion des désignations"""
+
+    def setUp(self):
+        self.client.force_login(User.objects.create_user('test', password='test'))
+        self.url = reverse('articles:article_designations_api')
+
+    def test_etag_avec_guillemet_et_accent(self):
+        response = self.client.get(self.url, {'q': 'ciment "42" béton'})
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        etag.encode('ascii')
+        self.assertEqual(etag.count('"'), 2)
+
+        response = self.client.get(self.url, {'q': 'ciment "42" béton'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
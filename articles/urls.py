@@ -24,6 +24,8 @@ urlpatterns = [
     path('export/', views.export_articles_excel, name='export_articles_excel'),
     path('import/', views.import_articles_excel, name='import_articles_excel'),
     path('modele/', views.download_template_articles, name='download_template_articles'),
+    path('imports/<int:pk>/', views.import_suivi, name='import_suivi'),
+    path('imports/<int:pk>/statut/', views.import_statut, name='import_statut'),
     
     # Aperçu de la liste des articles
     path('liste-print/', views.article_liste_print, name='article_liste_print'),
@@ -0,0 +1,209 @@
+"""
+Fonctions utilitaires pour les articles (import Excel / CSV en masse)
+
+Les lignes sont d'abord validées (analyser_lignes_*), puis enregistrées par
+lots (enregistrer_*). Le traitement en arrière-plan et la reprise des
+imports sont dans imports.py.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from core.chargement import charger_en_masse
+from core.import_fichiers import reperer_colonnes, texte_cellule, valeur_booleenne
+from .autocompletion import invalider as invalider_designations
+from .models import Categorie, Article
+
+
+# Nombre d'objets par requête bulk_create / bulk_update
+TAILLE_LOT = 1000
+
+# Colonnes des fichiers importés : champ -> libellés acceptés
+COLONNES_ARTICLES = {
+    'designation': ('Désignation', 'Designation'),
+    'categorie': ('Catégorie', 'Categorie'),
+    'actif': ('Actif',),
+}
+COLONNES_REQUISES_ARTICLES = ('designation', 'categorie')
+
+COLONNES_CATEGORIES = {
+    'libelle': ('Libellé', 'Libelle'),
+    'actif': ('Actif',),
+}
+COLONNES_REQUISES_CATEGORIES = ('libelle',)
+
+
+def _par_tranches(valeurs, taille=TAILLE_LOT):
+    """Découpe une liste en tranches (filtres __in de taille bornée)"""
+    valeurs = list(valeurs)
+    for debut in range(0, len(valeurs), taille):
+        yield valeurs[debut:debut + taille]
+
+
+def analyser_lignes_articles(en_tetes, lignes, premiere_ligne=2):
+    """
+    Valide les lignes d'un fichier d'articles
+
+    Les colonnes sont repérées par leur en-tête (Désignation, Catégorie,
+    Actif optionnel) : le modèle d'import et le fichier d'export sont tous
+    deux acceptés. Retourne (valides, erreurs) où valides est une liste de
+    (numéro de ligne, désignation, libellé de catégorie, actif ou None).
+    """
+    colonnes = reperer_colonnes(en_tetes, COLONNES_ARTICLES)
+    colonne_designation = colonnes['designation']
+    colonne_categorie = colonnes['categorie']
+    colonne_actif = colonnes.get('actif')
+
+    longueur_designation = Article._meta.get_field('designation').max_length
+    longueur_libelle = Categorie._meta.get_field('libelle').max_length
+
+    valides = []
+    erreurs = []
+    for numero, ligne in enumerate(lignes, premiere_ligne):
+        designation = texte_cellule(ligne, colonne_designation)
+        libelle = texte_cellule(ligne, colonne_categorie)
+
+        if not designation and not libelle:
+            continue
+        if not designation:
+            erreurs.append(f"Ligne {numero}: désignation manquante")
+        elif not libelle:
+            erreurs.append(f"Ligne {numero}: catégorie manquante pour « {designation} »")
+        elif len(designation) > longueur_designation:
+            erreurs.append(f"Ligne {numero}: désignation trop longue ({longueur_designation} caractères maximum)")
+        elif len(libelle) > longueur_libelle:
+            erreurs.append(f"Ligne {numero}: libellé de catégorie trop long ({longueur_libelle} caractères maximum)")
+        else:
+            actif = valeur_booleenne(texte_cellule(ligne, colonne_actif))
+            valides.append((numero, designation, libelle, actif))
+
+    return valides, erreurs
+
+
+@transaction.atomic
+def enregistrer_articles(valides):
+    """
+    Crée et met à jour les articles validés en masse
+
+    Les catégories et les articles existants des désignations du lot sont
+    préchargés en dictionnaires ; les catégories manquantes sont créées par
+    bulk_create, les nouveaux articles chargés par charger_en_masse (COPY
+    sur PostgreSQL) et les modifications appliquées par bulk_update. Une désignation présente plusieurs fois dans la base
+    correspond à son premier article. Retourne (créés, mis à jour).
+    """
+    maintenant = timezone.now()
+
+    categories = dict(Categorie.objects.values_list('libelle', 'id'))
+    manquantes = {libelle for _, _, libelle, _ in valides if libelle not in categories}
+    if manquantes:
+        Categorie.objects.bulk_create(
+            [Categorie(libelle=libelle, actif=True) for libelle in sorted(manquantes)],
+            batch_size=TAILLE_LOT,
+            ignore_conflicts=True
+        )
+        categories.update(Categorie.objects.filter(libelle__in=manquantes).values_list('libelle', 'id'))
+
+    existants = {}
+    for designations in _par_tranches({designation for _, designation, _, _ in valides}):
+        articles = Article.objects.filter(designation__in=designations).only(
+            'id', 'designation', 'categorie_id', 'actif'
+        ).order_by('id')
+        for article in articles:
+            existants.setdefault(article.designation, article)
+
+    nouveaux = {}
+    modifies = {}
+    for _, designation, libelle, actif in valides:
+        categorie_id = categories[libelle]
+        article = existants.get(designation)
+        if article is None:
+            article = nouveaux.get(designation)
+            if article is None:
+                nouveaux[designation] = Article(
+                    designation=designation,
+                    categorie_id=categorie_id,
+                    actif=True if actif is None else actif
+                )
+            else:
+                # Désignation répétée dans le fichier : la dernière ligne l'emporte
+                article.categorie_id = categorie_id
+                if actif is not None:
+                    article.actif = actif
+            continue
+
+        if article.categorie_id != categorie_id or (actif is not None and article.actif != actif):
+            article.categorie_id = categorie_id
+            if actif is not None:
+                article.actif = actif
+            article.date_modification = maintenant
+            modifies[article.pk] = article
+
+    charger_en_masse(Article, nouveaux.values())
+    Article.objects.bulk_update(modifies.values(), ['categorie', 'actif', 'date_modification'], batch_size=TAILLE_LOT)
+    # Chargement sans signaux : l'index d'autocomplétion est invalidé ici
+    transaction.on_commit(invalider_designations)
+    return len(nouveaux), len(modifies)
+
+
+def analyser_lignes_categories(en_tetes, lignes, premiere_ligne=2):
+    """
+    Valide les lignes d'un fichier de catégories
+
+    Retourne (valides, erreurs) où valides est une liste de
+    (numéro de ligne, libellé, actif ou None).
+    """
+    colonnes = reperer_colonnes(en_tetes, COLONNES_CATEGORIES)
+    colonne_libelle = colonnes['libelle']
+    colonne_actif = colonnes.get('actif')
+    longueur_libelle = Categorie._meta.get_field('libelle').max_length
+
+    valides = []
+    erreurs = []
+    for numero, ligne in enumerate(lignes, premiere_ligne):
+        libelle = texte_cellule(ligne, colonne_libelle)
+        if not libelle:
+            continue
+        if len(libelle) > longueur_libelle:
+            erreurs.append(f"Ligne {numero}: libellé trop long ({longueur_libelle} caractères maximum)")
+        else:
+            valides.append((numero, libelle, valeur_booleenne(texte_cellule(ligne, colonne_actif))))
+
+    return valides, erreurs
+
+
+@transaction.atomic
+def enregistrer_categories(valides):
+    """
+    Crée les catégories absentes et met à jour leur statut en masse
+
+    Une catégorie existante n'est modifiée que si la colonne Actif est
+    renseignée et diffère. Retourne (créées, mises à jour).
+    """
+    maintenant = timezone.now()
+
+    existantes = {}
+    for libelles in _par_tranches({libelle for _, libelle, _ in valides}):
+        for categorie in Categorie.objects.filter(libelle__in=libelles).only('id', 'libelle', 'actif'):
+            existantes[categorie.libelle] = categorie
+
+    nouvelles = {}
+    modifiees = {}
+    for _, libelle, actif in valides:
+        categorie = existantes.get(libelle)
+        if categorie is None:
+            nouvelles[libelle] = Categorie(libelle=libelle, actif=True if actif is None else actif)
+        elif actif is not None and categorie.actif != actif:
+            categorie.actif = actif
+            categorie.date_modification = maintenant
+            modifiees[categorie.pk] = categorie
+
+    Categorie.objects.bulk_create(nouvelles.values(), batch_size=TAILLE_LOT, ignore_conflicts=True)
+    Categorie.objects.bulk_update(modifiees.values(), ['actif', 'date_modification'], batch_size=TAILLE_LOT)
+    return len(nouvelles), len(modifiees)
+
+
+# Traitements d'import fournis par ce module (voir imports.py) :
+# type -> (colonnes, colonnes requises, analyse, enregistrement)
+TRAITEMENTS_IMPORT = {
+    'articles': (COLONNES_ARTICLES, COLONNES_REQUISES_ARTICLES, analyser_lignes_articles, enregistrer_articles),
+    'categories': (COLONNES_CATEGORIES, COLONNES_REQUISES_CATEGORIES, analyser_lignes_categories, enregistrer_categories),
+}
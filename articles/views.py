@@ -5,15 +5,22 @@ from django.contrib import messages
 from django.views.generic import ListView, CreateView, UpdateView, DeleteView
 from django.urls import reverse_lazy
 from django.template.loader import render_to_string
-from django.db import transaction
-from django.utils import timezone
-from .models import Categorie, Article
+from django.views.decorators.http import condition
+from .models import Categorie, Article, ImportExcel
+from .autocompletion import LIMITE_DEFAUT, LIMITE_MAX, completer, index_courant, normaliser
 from .forms import CategorieForm, ArticleForm
+from .imports import demarrer_import, est_interrompu
+from core.export_excel import reponse_export_excel
 import openpyxl
 from openpyxl.styles import Font, PatternFill, Alignment
 from openpyxl.utils import get_column_letter
 import io
 import os
+from urllib.parse import quote
+
+
+# Nombre d'erreurs d'import détaillées sur la page de suivi
+MAX_ERREURS_AFFICHEES = 50
 
 
 # ===== VUES POUR LES CATÉGORIES =====
@@ -301,15 +308,40 @@ def get_societe_info():
     }
 
 
+def _parametres_autocompletion(request):
+    """(préfixe, limite) de la requête d'autocomplétion"""
+    try:
+        limite = int(request.GET.get('limite', LIMITE_DEFAUT))
+    except ValueError:
+        limite = LIMITE_DEFAUT
+    return request.GET.get('q', ''), max(1, min(limite, LIMITE_MAX))
+
+
+def _etag_designations(request):
+    """
+    Même génération d'index et mêmes paramètres : même réponse
+
+    Le préfixe est encodé (comme les paramètres de core.selection) : un
+    guillemet ou un caractère non ASCII donnerait un en-tête ETag invalide.
+    """
+    prefixe, limite = _parametres_autocompletion(request)
+    return f"{index_courant().generation}:{limite}:{quote(normaliser(prefixe), safe='')}"
+
+
 @login_required
+@condition(etag_func=_etag_designations)
 def article_designations_api(request):
-    """Retourne la liste des désignations d'articles (JSON) pour l'autocomplétion."""
-    designations = list(
-        Article.objects.filter(actif=True)
-        .order_by('designation')
-        .values_list('designation', flat=True)
-    )
-    return JsonResponse({'designations': designations})
+    """
+    Désignations d'articles actifs commençant par `q` (JSON) pour l'autocomplétion
+
+    Au plus `limite` résultats (20 par défaut, 100 au maximum), servis par
+    l'index en mémoire de autocompletion.py. L'ETag permet au navigateur de
+    revalider sa copie (304) tant que les articles ne changent pas.
+    """
+    prefixe, limite = _parametres_autocompletion(request)
+    response = JsonResponse({'designations': completer(prefixe, limite)})
+    response['Cache-Control'] = 'private, no-cache'
+    return response
 
 @login_required
 def article_create_popup(request):
@@ -408,43 +440,21 @@ def article_delete_popup(request, pk):
 
 @login_required
 def export_categories_excel(request):
-    """Exporte toutes les catégories vers un fichier Excel"""
+    """Exporte toutes les catégories vers un fichier Excel (écriture seule)"""
     try:
-        # Créer un nouveau workbook
-        wb = openpyxl.Workbook()
-        ws = wb.active
-        ws.title = "Catégories"
-        
-        # En-têtes
-        headers = ['ID', 'Libellé', 'Actif', 'Date de création', 'Date de modification']
-        for col, header in enumerate(headers, 1):
-            cell = ws.cell(row=1, column=col, value=header)
-            cell.font = Font(bold=True, color="FFFFFF")
-            cell.fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-            cell.alignment = Alignment(horizontal="center")
-        
-        # Données
-        categories = Categorie.objects.all().order_by('libelle')
-        for row, categorie in enumerate(categories, 2):
-            ws.cell(row=row, column=1, value=categorie.id)
-            ws.cell(row=row, column=2, value=categorie.libelle)
-            ws.cell(row=row, column=3, value="Oui" if categorie.actif else "Non")
-            ws.cell(row=row, column=4, value=categorie.date_creation.strftime('%d/%m/%Y %H:%M'))
-            ws.cell(row=row, column=5, value=categorie.date_modification.strftime('%d/%m/%Y %H:%M'))
-        
-        # Ajuster la largeur des colonnes
-        for col in range(1, len(headers) + 1):
-            ws.column_dimensions[get_column_letter(col)].width = 20
-        
-        # Préparer la réponse
-        response = HttpResponse(
-            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        return reponse_export_excel(
+            Categorie.objects.order_by('libelle'),
+            ['id', 'libelle', 'actif', 'date_creation', 'date_modification'],
+            [
+                ('ID', 20, None),
+                ('Libellé', 20, None),
+                ('Actif', 20, 'oui_non'),
+                ('Date de création', 20, 'date'),
+                ('Date de modification', 20, 'date'),
+            ],
+            "Catégories",
+            "categories"
         )
-        response['Content-Disposition'] = f'attachment; filename="categories_{timezone.now().strftime("%Y%m%d_%H%M%S")}.xlsx"'
-        
-        # Sauvegarder dans la réponse
-        wb.save(response)
-        return response
         
     except Exception as e:
         messages.error(request, f'Erreur lors de l\'export: {str(e)}')
@@ -453,44 +463,22 @@ def export_categories_excel(request):
 
 @login_required
 def export_articles_excel(request):
-    """Exporte tous les articles vers un fichier Excel"""
+    """Exporte tous les articles vers un fichier Excel (écriture seule)"""
     try:
-        # Créer un nouveau workbook
-        wb = openpyxl.Workbook()
-        ws = wb.active
-        ws.title = "Articles"
-        
-        # En-têtes
-        headers = ['ID', 'Désignation', 'Catégorie', 'Actif', 'Date de création', 'Date de modification']
-        for col, header in enumerate(headers, 1):
-            cell = ws.cell(row=1, column=col, value=header)
-            cell.font = Font(bold=True, color="FFFFFF")
-            cell.fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-            cell.alignment = Alignment(horizontal="center")
-        
-        # Données
-        articles = Article.objects.select_related('categorie').all().order_by('designation')
-        for row, article in enumerate(articles, 2):
-            ws.cell(row=row, column=1, value=article.id)
-            ws.cell(row=row, column=2, value=article.designation)
-            ws.cell(row=row, column=3, value=article.categorie.libelle)
-            ws.cell(row=row, column=4, value="Oui" if article.actif else "Non")
-            ws.cell(row=row, column=5, value=article.date_creation.strftime('%d/%m/%Y %H:%M'))
-            ws.cell(row=row, column=6, value=article.date_modification.strftime('%d/%m/%Y %H:%M'))
-        
-        # Ajuster la largeur des colonnes
-        for col in range(1, len(headers) + 1):
-            ws.column_dimensions[get_column_letter(col)].width = 25
-        
-        # Préparer la réponse
-        response = HttpResponse(
-            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        return reponse_export_excel(
+            Article.objects.order_by('designation'),
+            ['id', 'designation', 'categorie__libelle', 'actif', 'date_creation', 'date_modification'],
+            [
+                ('ID', 25, None),
+                ('Désignation', 25, None),
+                ('Catégorie', 25, None),
+                ('Actif', 25, 'oui_non'),
+                ('Date de création', 25, 'date'),
+                ('Date de modification', 25, 'date'),
+            ],
+            "Articles",
+            "articles"
         )
-        response['Content-Disposition'] = f'attachment; filename="articles_{timezone.now().strftime("%Y%m%d_%H%M%S")}.xlsx"'
-        
-        # Sauvegarder dans la réponse
-        wb.save(response)
-        return response
         
     except Exception as e:
         messages.error(request, f'Erreur lors de l\'export: {str(e)}')
@@ -499,173 +487,42 @@ def export_articles_excel(request):
 
 @login_required
 def import_categories_excel(request):
-    """Importe des catégories depuis un fichier Excel"""
-    if request.method == 'POST':
-        try:
-            uploaded_file = request.FILES.get('excel_file')
-            if not uploaded_file:
-                messages.error(request, 'Aucun fichier sélectionné.')
-                return redirect('articles:categorie_list')
-            
-            # Vérifier l'extension
-            if not uploaded_file.name.endswith(('.xlsx', '.xls')):
-                messages.error(request, 'Veuillez sélectionner un fichier Excel (.xlsx ou .xls).')
-                return redirect('articles:categorie_list')
-            
-            # Lire le fichier Excel
-            wb = openpyxl.load_workbook(uploaded_file)
-            ws = wb.active
-            
-            # Vérifier les en-têtes
-            expected_headers = ['ID', 'Libellé', 'Actif', 'Date de création', 'Date de modification']
-            headers = [cell.value for cell in ws[1]]
-            
-            if not all(header in headers for header in ['Libellé']):
-                messages.error(request, 'Format de fichier invalide. Colonnes requises: Libellé')
-                return redirect('articles:categorie_list')
-            
-            # Traitement des données
-            created_count = 0
-            updated_count = 0
-            errors = []
-            
-            with transaction.atomic():
-                for row_num, row in enumerate(ws.iter_rows(min_row=2, values_only=True), 2):
-                    try:
-                        if not row[1]:  # Libellé vide
-                            continue
-                            
-                        libelle = str(row[1]).strip()
-                        if not libelle:
-                            continue
-                        
-                        # Vérifier si la catégorie existe déjà
-                        categorie, created = Categorie.objects.get_or_create(
-                            libelle=libelle,
-                            defaults={
-                                'actif': True,
-                                'date_creation': timezone.now(),
-                                'date_modification': timezone.now()
-                            }
-                        )
-                        
-                        if created:
-                            created_count += 1
-                        else:
-                            # Mettre à jour si nécessaire
-                            if len(row) > 2 and row[2] is not None:
-                                actif = str(row[2]).lower() in ['oui', 'yes', 'true', '1', 'actif']
-                                if categorie.actif != actif:
-                                    categorie.actif = actif
-                                    categorie.date_modification = timezone.now()
-                                    categorie.save()
-                                    updated_count += 1
-                    
-                    except Exception as e:
-                        errors.append(f"Ligne {row_num}: {str(e)}")
-            
-            # Messages de résultat
-            if created_count > 0:
-                messages.success(request, f'{created_count} catégorie(s) créée(s) avec succès.')
-            if updated_count > 0:
-                messages.info(request, f'{updated_count} catégorie(s) mise(s) à jour.')
-            if errors:
-                messages.warning(request, f'Erreurs rencontrées: {len(errors)} ligne(s) ignorée(s).')
-            
-        except Exception as e:
-            messages.error(request, f'Erreur lors de l\'import: {str(e)}')
-    
-    return redirect('articles:categorie_list')
+    """Importe des catégories depuis un fichier Excel (traitement en arrière-plan)"""
+    return demarrer_import(request, 'categories', 'articles:categorie_list')
 
 
 @login_required
 def import_articles_excel(request):
-    """Importe des articles depuis un fichier Excel"""
-    if request.method == 'POST':
-        try:
-            uploaded_file = request.FILES.get('excel_file')
-            if not uploaded_file:
-                messages.error(request, 'Aucun fichier sélectionné.')
-                return redirect('articles:article_list')
-            
-            # Vérifier l'extension
-            if not uploaded_file.name.endswith(('.xlsx', '.xls')):
-                messages.error(request, 'Veuillez sélectionner un fichier Excel (.xlsx ou .xls).')
-                return redirect('articles:article_list')
-            
-            # Lire le fichier Excel
-            wb = openpyxl.load_workbook(uploaded_file)
-            ws = wb.active
-            
-            # Vérifier les en-têtes
-            headers = [cell.value for cell in ws[1]]
-            
-            if not all(header in headers for header in ['Désignation', 'Catégorie']):
-                messages.error(request, 'Format de fichier invalide. Colonnes requises: Désignation, Catégorie')
-                return redirect('articles:article_list')
-            
-            # Traitement des données
-            created_count = 0
-            updated_count = 0
-            errors = []
-            
-            with transaction.atomic():
-                for row_num, row in enumerate(ws.iter_rows(min_row=2, values_only=True), 2):
-                    try:
-                        if not row[1] or not row[2]:  # Désignation ou Catégorie vide
-                            continue
-                            
-                        designation = str(row[1]).strip()
-                        categorie_libelle = str(row[2]).strip()
-                        
-                        if not designation or not categorie_libelle:
-                            continue
-                        
-                        # Récupérer ou créer la catégorie
-                        try:
-                            categorie = Categorie.objects.get(libelle=categorie_libelle)
-                        except Categorie.DoesNotExist:
-                            categorie = Categorie.objects.create(
-                                libelle=categorie_libelle,
-                                actif=True
-                            )
-                        
-                        # Vérifier si l'article existe déjà
-                        article, created = Article.objects.get_or_create(
-                            designation=designation,
-                            defaults={
-                                'categorie': categorie,
-                                'actif': True,
-                                'date_creation': timezone.now(),
-                                'date_modification': timezone.now()
-                            }
-                        )
-                        
-                        if created:
-                            created_count += 1
-                        else:
-                            # Mettre à jour si nécessaire
-                            if article.categorie != categorie:
-                                article.categorie = categorie
-                                article.date_modification = timezone.now()
-                                article.save()
-                                updated_count += 1
-                    
-                    except Exception as e:
-                        errors.append(f"Ligne {row_num}: {str(e)}")
-            
-            # Messages de résultat
-            if created_count > 0:
-                messages.success(request, f'{created_count} article(s) créé(s) avec succès.')
-            if updated_count > 0:
-                messages.info(request, f'{updated_count} article(s) mis à jour.')
-            if errors:
-                messages.warning(request, f'Erreurs rencontrées: {len(errors)} ligne(s) ignorée(s).')
-            
-        except Exception as e:
-            messages.error(request, f'Erreur lors de l\'import: {str(e)}')
-    
-    return redirect('articles:article_list')
+    """Importe des articles depuis un fichier Excel (traitement en arrière-plan)"""
+    return demarrer_import(request, 'articles', 'articles:article_list')
+
+
+@login_required
+def import_suivi(request, pk):
+    """Page de suivi d'un import Excel"""
+    job = get_object_or_404(ImportExcel, pk=pk, cree_par=request.user)
+    return render(request, 'articles/import_suivi.html', {'import': job})
+
+
+@login_required
+def import_statut(request, pk):
+    """API de suivi d'un import (la reprise d'un import interrompu revient au worker)"""
+    job = get_object_or_404(ImportExcel, pk=pk, cree_par=request.user)
+    
+    return JsonResponse({
+        'success': True,
+        'statut': job.statut,
+        'interrompu': est_interrompu(job),
+        'statut_display': job.get_statut_display(),
+        'total_lignes': job.total_lignes,
+        'lignes_traitees': job.lignes_traitees,
+        'pourcentage': job.pourcentage,
+        'crees': job.crees,
+        'mis_a_jour': job.mis_a_jour,
+        'nombre_erreurs': job.nombre_erreurs,
+        'erreurs': job.erreurs[:MAX_ERREURS_AFFICHEES],
+        'message_erreur': job.message_erreur,
+    })
 
 
 @login_required
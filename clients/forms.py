@@ -2,6 +2,7 @@ from django import forms
 from django.core.validators import EmailValidator
 from django.core.exceptions import ValidationError
 from .models import Client
+from core.doublons import controler_doublons
 import re
 
 
@@ -130,6 +131,13 @@ class ClientForm(forms.ModelForm):
 		})
 	)
 
+	# Confirmation demandée quand un client ressemblant existe déjà
+	confirmer_doublon = forms.BooleanField(
+		required=False,
+		label="Enregistrer même si un client ressemblant existe",
+		widget=forms.CheckboxInput(attrs={'class': 'form-check-input'})
+	)
+
 	class Meta:
 		model = Client
 		fields = ['nom_complet', 'type_client', 'telephone', 'email', 'adresse', 'actif']
@@ -197,6 +205,8 @@ class ClientForm(forms.ModelForm):
 			country = f'+{country}'
 		cleaned['telephone'] = f"{country} {number_value}".strip()
 		
+		# Doublons probables (téléphone, nom phonétique, domaine email)
+		controler_doublons(self, Client, "Client", ('nom_complet', 'email', 'phone_country_code', 'phone_number'))
 		return cleaned
 
 	def save(self, commit=True):
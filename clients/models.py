@@ -1,8 +1,12 @@
 from django.db import models
+from django.db.models.functions import Lower
 from django.core.validators import EmailValidator
 from django.utils import timezone
 import re
 
+from core.doublons import cles_doublons
+from core.recherche import chiffres
+
 
 class Client(models.Model):
 	TYPE_CHOICES = [
@@ -44,6 +48,10 @@ class Client(models.Model):
 		null=True,
 		validators=[EmailValidator()]
 	)
+	# Clés de blocage de la détection des doublons (voir core.doublons)
+	telephone_cle = models.CharField(max_length=32, editable=False, blank=True, default='', db_index=True)
+	nom_phonetique = models.CharField(max_length=100, editable=False, blank=True, default='', db_index=True)
+	domaine_email = models.CharField(max_length=100, editable=False, blank=True, default='', db_index=True)
 	adresse = models.TextField(
 		verbose_name="Adresse complète",
 		blank=True,
@@ -78,19 +86,17 @@ class Client(models.Model):
 			models.Index(fields=['telephone']),
 			models.Index(fields=['telephone_normalise']),
 			models.Index(fields=['email']),
+			# Doublons à l'import : email comparé sans tenir compte de la casse
+			models.Index(Lower('email'), name='client_email_min_idx'),
 			models.Index(fields=['type_client']),
 			models.Index(fields=['actif']),
+			# Liste des clients : tri (et pagination par clé) sur la date de création
+			models.Index(fields=['date_creation', 'id'], name='client_creation_idx'),
 		]
 	
 	def __str__(self):
 		return self.nom_complet
 	
-	@staticmethod
-	def _normalize_digits(value: str) -> str:
-		if not value:
-			return ''
-		return re.sub(r'[^\d]', '', value)
-	
 	@staticmethod
 	def _format_with_country(value: str) -> str:
 		"""Formate un numéro stocké pour affichage: +CCC groups."""
@@ -99,10 +105,10 @@ class Client(models.Model):
 		m = re.match(r'^(\+\d{1,3})\s*(.*)$', value.strip())
 		if m:
 			country = m.group(1)
-			rest_digits = re.sub(r'[^\d]', '', m.group(2))
+			rest_digits = chiffres(m.group(2))
 		else:
 			# Pas d'indicatif stocké
-			digits = re.sub(r'[^\d]', '', value)
+			digits = chiffres(value)
 			if len(digits) > 3:
 				country = f"+{digits[:3]}"
 				rest_digits = digits[3:]
@@ -125,9 +131,15 @@ class Client(models.Model):
 		local_fmt = group_digits(rest_digits)
 		return f"{country} {local_fmt}".strip()
 	
+	def calculer_cles_doublons(self):
+		"""Renseigne les clés de blocage (à appeler aussi avant un chargement en masse)"""
+		for champ, valeur in cles_doublons(self.nom_complet, self.telephone, self.email).items():
+			setattr(self, champ, valeur)
+	
 	def save(self, *args, **kwargs):
 		# Met à jour le champ normalisé
-		self.telephone_normalise = self._normalize_digits(self.telephone)
+		self.telephone_normalise = chiffres(self.telephone)
+		self.calculer_cles_doublons()
 		super().save(*args, **kwargs)
 	
 	def get_telephone_formatted(self):
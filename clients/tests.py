@@ -1,3 +1,43 @@
 from django.test import TestCase
 
-# Create your tests here.
+from .models import Client
+from .utils import analyser_lignes_clients, normaliser_telephones
+
+
+EN_TETES = ['Nom', 'Téléphone', 'Email']
+
+
+class ImportDoublonsTests(TestCase):
+	"""Doublons écartés à l'import des clients (clients.utils)"""
+
+	@classmethod
+	def setUpTestData(cls):
+		Client.objects.create(nom_complet="Jean Dupont", telephone="+224 620 00 00 01", email="Jean.Dupont@Example.com")
+
+	def test_email_existant_avec_une_autre_casse(self):
+		valides, erreurs = analyser_lignes_clients(EN_TETES, [
+			['Jean D.', '', 'jean.dupont@example.com'],
+		])
+		self.assertEqual(valides, [])
+		self.assertEqual(erreurs, ["Ligne 2: doublon, l'email jean.dupont@example.com existe déjà"])
+
+	def test_doublons_dans_le_fichier(self):
+		valides, erreurs = analyser_lignes_clients(EN_TETES, [
+			['Awa Camara', '+224 621 11 11 11', 'Awa@Exemple.gn'],
+			['Awa C.', '', 'awa@exemple.gn'],
+			['Awa Camara bis', '224-621-11-11-11', ''],
+		])
+		self.assertEqual([client.nom_complet for client in valides], ['Awa Camara'])
+		# L'email est enregistré tel que saisi
+		self.assertEqual(valides[0].email, 'Awa@Exemple.gn')
+		self.assertEqual(len(erreurs), 2)
+
+	def test_telephone_existant_autrement_formate(self):
+		valides, erreurs = analyser_lignes_clients(EN_TETES, [
+			['Autre', '224-620-000-001', ''],
+		])
+		self.assertEqual(valides, [])
+		self.assertIn("le téléphone 224-620-000-001 existe déjà", erreurs[0])
+
+	def test_normaliser_telephones(self):
+		self.assertEqual(normaliser_telephones(['+224 620-00', None, '']), ['22462000', '', ''])
@@ -25,9 +25,15 @@ urlpatterns = [
     # Export des clients
     path('export/', views.client_export, name='client_export'),
     
+    # Import des clients (Excel / CSV)
+    path('import/', views.client_import, name='client_import'),
+    
     # Statistiques des clients (AJAX)
     path('statistics/', views.client_statistics, name='client_statistics'),
     
+    # API de recherche (sélections des formulaires)
+    path('api/', views.client_api, name='client_api'),
+    
     # Aperçu de la liste des clients
     path('liste-print/', views.client_liste_print, name='client_liste_print'),
 ]
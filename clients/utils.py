@@ -0,0 +1,197 @@
+"""
+Utilitaires pour la gestion des clients
+"""
+from django.db import transaction
+
+from core.chargement import charger_en_masse
+from core.import_fichiers import (
+	avec_email_minuscule, email_valide, reperer_colonnes, texte_cellule, valeur_booleenne, valeur_choix, valeurs_existantes,
+)
+from core.recherche import chiffres, rechercher
+from core.selection import invalider as invalider_selection
+
+
+# En dessous de ce nombre de chiffres (ex. indicatif seul « +224 »), le
+# téléphone n'est pas utilisé pour détecter les doublons
+LONGUEUR_MIN_TELEPHONE = 8
+
+# Colonnes des fichiers importés : champ -> libellés acceptés
+COLONNES_CLIENTS = {
+	'nom_complet': ('Nom complet/Raison sociale', 'Nom complet', 'Raison sociale', 'Nom'),
+	'type_client': ('Type', 'Type de client'),
+	'telephone': ('Téléphone', 'Telephone', 'Tél', 'Tel'),
+	'email': ('Email', 'E-mail', 'Adresse e-mail', 'Courriel'),
+	'adresse': ('Adresse',),
+	'pays': ('Pays',),
+	'actif': ('Statut', 'Actif'),
+}
+COLONNES_REQUISES_CLIENTS = ('nom_complet',)
+
+
+def normaliser_telephones(telephones):
+	"""Chiffres de chaque numéro d'un lot (même règle que Client.save)"""
+	return [chiffres(telephone) for telephone in telephones]
+
+
+def filtrer_clients(queryset, params):
+	"""
+	Applique les filtres de la liste des clients (recherche, type, statut, dates)
+
+	`params` est un QueryDict (request.GET) ou un simple dictionnaire ; les
+	valeurs sont validées par ClientSearchForm comme dans la liste.
+	"""
+	from .forms import ClientSearchForm
+
+	search_form = ClientSearchForm(params)
+	if not search_form.is_valid():
+		return queryset
+
+	search_term = search_form.cleaned_data.get('search_term')
+	search_by = search_form.cleaned_data.get('search_by')
+	type_client = search_form.cleaned_data.get('type_client')
+	statut = search_form.cleaned_data.get('statut')
+	date_debut = search_form.cleaned_data.get('date_debut')
+	date_fin = search_form.cleaned_data.get('date_fin')
+
+	# Recherche par terme (index trigrammes sur PostgreSQL, voir core.recherche)
+	if search_term:
+		# Recherche tolérante sur le téléphone: on normalise en chiffres
+		n = chiffres(search_term)
+		if search_by == 'nom':
+			queryset = rechercher(queryset, {'nom_complet': search_term})
+		elif search_by == 'telephone':
+			if n:
+				queryset = rechercher(queryset, {'telephone_normalise': n})
+		elif search_by == 'email':
+			queryset = rechercher(queryset, {'email': search_term})
+		else:
+			# Recherche globale
+			queryset = rechercher(queryset, {
+				'nom_complet': search_term,
+				'email': search_term,
+				'telephone_normalise': n,
+			})
+
+	# Filtre par type de client
+	if type_client:
+		queryset = queryset.filter(type_client=type_client)
+
+	# Filtre par statut
+	if statut == 'actif':
+		queryset = queryset.filter(actif=True)
+	elif statut == 'inactif':
+		queryset = queryset.filter(actif=False)
+
+	# Filtre par date
+	if date_debut:
+		queryset = queryset.filter(date_creation__date__gte=date_debut)
+	if date_fin:
+		queryset = queryset.filter(date_creation__date__lte=date_fin)
+
+	return queryset
+
+
+def analyser_lignes_clients(en_tetes, lignes, premiere_ligne=2):
+	"""
+	Valide les lignes d'un fichier de clients
+
+	Les téléphones du lot sont normalisés en une passe, puis les doublons
+	(même téléphone normalisé ou même email, dans le fichier ou en base)
+	sont écartés ; la base n'est interrogée qu'une fois par lot, sur les
+	index telephone_normalise et Lower('email'). Les emails sont comparés
+	sans tenir compte de la casse mais enregistrés tels que saisis, comme
+	dans le formulaire. Retourne (clients à créer, erreurs).
+	"""
+	from .models import Client
+
+	colonnes = reperer_colonnes(en_tetes, COLONNES_CLIENTS)
+	longueurs = {
+		champ: Client._meta.get_field(champ).max_length
+		for champ in ('nom_complet', 'telephone', 'pays')
+	}
+	longueurs['email'] = Client._meta.get_field('email').max_length
+
+	erreurs = []
+	candidats = []
+	for numero, ligne in enumerate(lignes, premiere_ligne):
+		valeurs = {champ: texte_cellule(ligne, indice) for champ, indice in colonnes.items()}
+		nom_complet = valeurs.get('nom_complet', '')
+		if not any(valeurs.values()):
+			continue
+		if not nom_complet:
+			erreurs.append(f"Ligne {numero}: nom manquant")
+			continue
+
+		type_client = valeur_choix(valeurs.get('type_client'), Client.TYPE_CHOICES, 'particulier')
+		email = valeurs.get('email') or None
+		trop_long = next(
+			(champ for champ, longueur in longueurs.items()
+			 if longueur and len(valeurs.get(champ) or '') > longueur),
+			None
+		)
+		if type_client is None:
+			erreurs.append(f"Ligne {numero}: type de client inconnu « {valeurs['type_client']} »")
+		elif trop_long:
+			erreurs.append(f"Ligne {numero}: {trop_long} trop long ({longueurs[trop_long]} caractères maximum)")
+		elif email and not email_valide(email):
+			erreurs.append(f"Ligne {numero}: adresse e-mail invalide « {email} »")
+		else:
+			actif = valeur_booleenne(valeurs.get('actif'))
+			candidats.append((numero, Client(
+				nom_complet=nom_complet,
+				type_client=type_client,
+				telephone=valeurs.get('telephone') or '+224 ',
+				email=email,
+				adresse=valeurs.get('adresse') or None,
+				pays=valeurs.get('pays') or 'Guinée',
+				actif=True if actif is None else actif,
+			)))
+
+	normalises = normaliser_telephones(client.telephone for _, client in candidats)
+	for (_, client), telephone_normalise in zip(candidats, normalises):
+		client.telephone_normalise = telephone_normalise
+
+	existants = valeurs_existantes(avec_email_minuscule(Client.objects.all()), {
+		'telephone_normalise': {
+			client.telephone_normalise for _, client in candidats
+			if len(client.telephone_normalise) >= LONGUEUR_MIN_TELEPHONE
+		},
+		'email_minuscule': {client.email.lower() for _, client in candidats if client.email},
+	})
+	telephones_vus = existants['telephone_normalise']
+	emails_vus = existants['email_minuscule']
+
+	valides = []
+	for numero, client in candidats:
+		telephone = client.telephone_normalise if len(client.telephone_normalise) >= LONGUEUR_MIN_TELEPHONE else None
+		if telephone and telephone in telephones_vus:
+			erreurs.append(f"Ligne {numero}: doublon, le téléphone {client.telephone} existe déjà")
+		elif client.email and client.email.lower() in emails_vus:
+			erreurs.append(f"Ligne {numero}: doublon, l'email {client.email} existe déjà")
+		else:
+			if telephone:
+				telephones_vus.add(telephone)
+			if client.email:
+				emails_vus.add(client.email.lower())
+			valides.append(client)
+
+	return valides, erreurs
+
+
+def enregistrer_clients(valides):
+	"""Crée les clients validés en masse (COPY sur PostgreSQL). Retourne (créés, mis à jour)."""
+	from .models import Client
+
+	for client in valides:
+		client.calculer_cles_doublons()
+	crees = charger_en_masse(Client, valides)
+	# Chargement sans signaux : les réponses de l'API de sélection sont invalidées ici
+	transaction.on_commit(lambda: invalider_selection(Client))
+	return crees, 0
+
+
+# Traitements d'import fournis par ce module (voir articles/imports.py) :
+# type -> (colonnes, colonnes requises, analyse, enregistrement)
+TRAITEMENTS_IMPORT = {
+	'clients': (COLONNES_CLIENTS, COLONNES_REQUISES_CLIENTS, analyser_lignes_clients, enregistrer_clients),
+}
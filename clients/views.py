@@ -3,25 +3,23 @@ from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.http import JsonResponse, HttpResponse
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
-from django.db.models import Q
 from django.views.decorators.http import require_POST
 from django.views.decorators.csrf import csrf_exempt
 from django.utils import timezone
 from datetime import datetime, timedelta
 import json
-import re
 
 from .models import Client
 from .forms import ClientForm, ClientSearchForm
+from .utils import filtrer_clients
+from core.export_csv import reponse_export_csv
+from core.pagination import compter, paginer_par_cle, pagination_par_cle
+from core.recherche import chiffres
+from core.selection import page_selection, reponse_conditionnelle
+from articles.imports import demarrer_import
 from utilisateurs.decorators import permission_required
 
 
-def _normalize_digits(value: str) -> str:
-	if not value:
-		return ''
-	return re.sub(r'[^\d]', '', value)
-
-
 @login_required
 @permission_required('clients.view')
 def client_list(request):
@@ -31,78 +29,36 @@ def client_list(request):
 	search_form = ClientSearchForm(request.GET)
 	clients = Client.objects.all()
 	
-	# Application des filtres
-	if search_form.is_valid():
-		search_term = search_form.cleaned_data.get('search_term')
-		search_by = search_form.cleaned_data.get('search_by')
-		type_client = search_form.cleaned_data.get('type_client')
-		statut = search_form.cleaned_data.get('statut')
-		date_debut = search_form.cleaned_data.get('date_debut')
-		date_fin = search_form.cleaned_data.get('date_fin')
-		
-		# Recherche par terme
-		if search_term:
-			if search_by == 'nom':
-				clients = clients.filter(nom_complet__icontains=search_term)
-			elif search_by == 'telephone':
-				# Recherche tolérante: on normalise en chiffres
-				n = _normalize_digits(search_term)
-				if n:
-					# Match sur telephone normalisé qui contient n
-					clients = clients.filter(telephone_normalise__icontains=n)
-				else:
-					clients = clients
-			elif search_by == 'email':
-				clients = clients.filter(email__icontains=search_term)
-			else:
-				# Recherche globale
-				n = _normalize_digits(search_term)
-				q = Q(nom_complet__icontains=search_term) | Q(email__icontains=search_term)
-				if n:
-					q |= Q(telephone_normalise__icontains=n)
-				clients = clients.filter(q)
-		
-		# Filtre par type de client
-		if type_client:
-			clients = clients.filter(type_client=type_client)
-		
-		# Filtre par statut
-		if statut:
-			if statut == 'actif':
-				clients = clients.filter(actif=True)
-			elif statut == 'inactif':
-				clients = clients.filter(actif=False)
-		
-		# Filtre par date
-		if date_debut:
-			clients = clients.filter(date_creation__date__gte=date_debut)
-		if date_fin:
-			clients = clients.filter(date_creation__date__lte=date_fin)
+	# Application des filtres (partagés avec l'export)
+	clients = filtrer_clients(clients, request.GET)
 	
 	# Tri par défaut
-	clients = clients.order_by('-date_creation')
+	clients = clients.order_by('-date_creation', '-id')
 	
-	# Pagination
-	page = request.GET.get('page', 1)
-	paginator = Paginator(clients, 10)  # 10 clients par page
-	
-	try:
-		clients_page = paginator.page(page)
-	except PageNotAnInteger:
-		clients_page = paginator.page(1)
-	except EmptyPage:
-		clients_page = paginator.page(paginator.num_pages)
+	# Pagination (par clé si activée, voir core.pagination)
+	if pagination_par_cle(request):
+		clients_page = paginer_par_cle(request, clients, 10)
+	else:
+		page = request.GET.get('page', 1)
+		paginator = Paginator(clients, 10)  # 10 clients par page
+		
+		try:
+			clients_page = paginator.page(page)
+		except PageNotAnInteger:
+			clients_page = paginator.page(1)
+		except EmptyPage:
+			clients_page = paginator.page(paginator.num_pages)
 	
 	# Statistiques
-	total_clients = clients.count()
-	clients_actifs = clients.filter(actif=True).count()
-	clients_inactifs = clients.filter(actif=False).count()
-	particuliers = clients.filter(type_client='particulier').count()
-	entreprises = clients.filter(type_client='entreprise').count()
+	total_clients = compter(clients)
+	clients_actifs = compter(clients.filter(actif=True))
+	clients_inactifs = compter(clients.filter(actif=False))
+	particuliers = compter(clients.filter(type_client='particulier'))
+	entreprises = compter(clients.filter(type_client='entreprise'))
 	
 	# Clients récents (7 derniers jours)
 	date_limite = timezone.now() - timedelta(days=7)
-	clients_recents = clients.filter(date_creation__gte=date_limite).count()
+	clients_recents = compter(clients.filter(date_creation__gte=date_limite))
 	
 	context = {
 		'clients': clients_page,
@@ -125,48 +81,13 @@ def client_liste_print(request):
 	from datetime import datetime, timedelta
 	from django.utils import timezone
 	
-	# Récupération des paramètres de recherche
-	search_form = ClientSearchForm(request.GET)
-	clients = Client.objects.all()
-	
 	# Application des filtres (même logique que client_list)
-	if search_form.is_valid():
-		search_term = search_form.cleaned_data.get('search_term')
-		search_by = search_form.cleaned_data.get('search_by')
-		type_client = search_form.cleaned_data.get('type_client')
-		statut = search_form.cleaned_data.get('statut')
-		date_debut = search_form.cleaned_data.get('date_debut')
-		date_fin = search_form.cleaned_data.get('date_fin')
-		
-		# Recherche par terme
-		if search_term:
-			if search_by == 'nom':
-				clients = clients.filter(nom_complet__icontains=search_term)
-			elif search_by == 'telephone':
-				n = _normalize_digits(search_term)
-				if n:
-					clients = clients.filter(telephone_normalise__icontains=n)
-			elif search_by == 'email':
-				clients = clients.filter(email__icontains=search_term)
-			else:
-				n = _normalize_digits(search_term)
-				q = Q(nom_complet__icontains=search_term) | Q(email__icontains=search_term)
-				if n:
-					q |= Q(telephone_normalise__icontains=n)
-				clients = clients.filter(q)
-		
-		# Filtres
-		if type_client:
-			clients = clients.filter(type_client=type_client)
-		if statut:
-			if statut == 'actif':
-				clients = clients.filter(actif=True)
-			elif statut == 'inactif':
-				clients = clients.filter(actif=False)
-		if date_debut:
-			clients = clients.filter(date_creation__date__gte=date_debut)
-		if date_fin:
-			clients = clients.filter(date_creation__date__lte=date_fin)
+	search_form = ClientSearchForm(request.GET)
+	clients = filtrer_clients(Client.objects.all(), request.GET)
+	filtres = search_form.cleaned_data if search_form.is_valid() else {}
+	date_debut = filtres.get('date_debut')
+	date_fin = filtres.get('date_fin')
+	type_client = filtres.get('type_client')
 	
 	# Tri par défaut
 	clients = clients.order_by('type_client', 'nom_complet')
@@ -330,82 +251,15 @@ def client_toggle_status(request, pk):
 @login_required
 @permission_required('clients.export')
 def client_export(request):
-	"""Vue pour exporter la liste des clients"""
-	from django.http import HttpResponse
-	import csv
-	
-	# Récupération des clients avec les mêmes filtres que la liste
-	search_form = ClientSearchForm(request.GET)
-	clients = Client.objects.all()
-	
-	if search_form.is_valid():
-		# Application des mêmes filtres que dans client_list
-		search_term = search_form.cleaned_data.get('search_term')
-		search_by = search_form.cleaned_data.get('search_by')
-		type_client = search_form.cleaned_data.get('type_client')
-		statut = search_form.cleaned_data.get('statut')
-		date_debut = search_form.cleaned_data.get('date_debut')
-		date_fin = search_form.cleaned_data.get('date_fin')
-		
-		if search_term:
-			if search_by == 'nom':
-				clients = clients.filter(nom_complet__icontains=search_term)
-			elif search_by == 'telephone':
-				n = _normalize_digits(search_term)
-				if n:
-					clients = clients.filter(telephone_normalise__icontains=n)
-			elif search_by == 'email':
-				clients = clients.filter(email__icontains=search_term)
-			else:
-				n = _normalize_digits(search_term)
-				q = Q(nom_complet__icontains=search_term) | Q(email__icontains=search_term)
-				if n:
-					q |= Q(telephone_normalise__icontains=n)
-				clients = clients.filter(q)
-		
-		if type_client:
-			clients = clients.filter(type_client=type_client)
-		
-		if statut:
-			if statut == 'actif':
-				clients = clients.filter(actif=True)
-			elif statut == 'inactif':
-				clients = clients.filter(actif=False)
-		
-		if date_debut:
-			clients = clients.filter(date_creation__date__gte=date_debut)
-		if date_fin:
-			clients = clients.filter(date_creation__date__lte=date_fin)
-	
-	# Création du fichier CSV
-	response = HttpResponse(content_type='text/csv')
-	response['Content-Disposition'] = f'attachment; filename="clients_{timezone.now().strftime("%Y%m%d_%H%M%S")}.csv"'
-	
-	writer = csv.writer(response)
-	writer.writerow([
-		'Nom complet/Raison sociale',
-		'Type',
-		'Téléphone',
-		'Email',
-		'Adresse',
-		'Statut',
-		'Date de création',
-		'Dernière modification'
-	])
-	
-	for client in clients:
-		writer.writerow([
-			client.nom_complet,
-			client.get_type_display_short(),
-			client.telephone,
-			client.email or '',
-			client.adresse or '',
-			'Actif' if client.actif else 'Inactif',
-			client.date_creation.strftime('%d/%m/%Y %H:%M'),
-			client.date_modification.strftime('%d/%m/%Y %H:%M')
-		])
-	
-	return response
+	"""Vue pour exporter la liste des clients (CSV diffusé en flux)"""
+	return reponse_export_csv('clients', request.GET)
+
+
+@login_required
+@permission_required('clients.add')
+def client_import(request):
+	"""Vue pour importer des clients depuis un fichier Excel ou CSV (en arrière-plan)"""
+	return demarrer_import(request, 'clients', 'clients:client_list')
 
 
 @login_required
@@ -444,3 +298,32 @@ def client_statistics(request):
 		'entreprises': entreprises,
 		'evolution_mensuelle': evolution_mensuelle
 	})
+
+
+@login_required
+@reponse_conditionnelle(Client)
+def client_api(request):
+	"""
+	API de recherche des clients actifs (AJAX, sélections des formulaires)
+
+	Paramètres : `q` (nom, email ou téléphone), `limite` et `apres`
+	(curseur `suivant` de la page précédente), voir core.selection.
+	"""
+	terme = request.GET.get('q', '').strip()
+	clients, suivant = page_selection(
+		request,
+		Client.objects.filter(actif=True),
+		{'nom_complet': terme, 'email': terme, 'telephone_normalise': chiffres(terme)},
+	)
+
+	data = []
+	for client in clients:
+		data.append({
+			'id': client.id,
+			'nom_complet': client.nom_complet,
+			'type_client': client.get_type_client_display(),
+			'telephone': client.get_telephone_formatted(),
+			'email': client.email or '',
+		})
+
+	return JsonResponse({'clients': data, 'suivant': suivant})
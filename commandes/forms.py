@@ -1,7 +1,9 @@
 from django import forms
 from django.forms import inlineformset_factory
+from django.urls import reverse_lazy
 from .models import BonCommande, LigneCommande
 from clients.models import Client
+from core.selection import SelectionDistante
 from devis.models import Devis
 from fournisseurs.models import Fournisseur
 
@@ -24,11 +26,11 @@ class BonCommandeForm(forms.ModelForm):
                 'class': 'form-control',
                 'onchange': 'toggleCommandeType()'
             }),
-            'fournisseur': forms.Select(attrs={
+            'fournisseur': SelectionDistante(reverse_lazy('fournisseurs:fournisseur_api'), 'fournisseurs', attrs={
                 'class': 'form-control',
                 'data-placeholder': 'Sélectionner un fournisseur'
             }),
-            'client': forms.Select(attrs={
+            'client': SelectionDistante(reverse_lazy('clients:client_api'), 'clients', attrs={
                 'class': 'form-control',
                 'data-placeholder': 'Sélectionner un client'
             }),
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.4 on 2026-10-19 07:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0004_client_cles_doublons'),
+        ('commandes', '0006_alter_boncommande_montant_ht_and_more'),
+        ('devis', '0006_devis_index_listes'),
+        ('fournisseurs', '0005_fournisseur_cles_doublons'),
+    ]
+
+    operations = [
+        # Index composites créés avant de retirer les index simples des clés
+        # étrangères qu'ils remplacent
+        migrations.AddIndex(
+            model_name='boncommande',
+            index=models.Index(fields=['date_creation', 'id'], name='commande_creation_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='boncommande',
+            index=models.Index(fields=['statut', 'date_creation', 'id'], name='commande_statut_creation_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='boncommande',
+            index=models.Index(fields=['client', 'date_creation', 'id'], name='commande_client_creation_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='boncommande',
+            index=models.Index(fields=['fournisseur', 'date_creation', 'id'], name='commande_fourn_creation_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lignecommande',
+            index=models.Index(fields=['commande'], include=('description', 'quantite', 'montant_ht'), name='lignecommande_cmd_idx'),
+        ),
+        migrations.AlterField(
+            model_name='boncommande',
+            name='client',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, to='clients.client', verbose_name='Client'),
+        ),
+        migrations.AlterField(
+            model_name='boncommande',
+            name='fournisseur',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, to='fournisseurs.fournisseur', verbose_name='Fournisseur'),
+        ),
+        migrations.AlterField(
+            model_name='lignecommande',
+            name='commande',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='lignes', to='commandes.boncommande', verbose_name='Commande'),
+        ),
+    ]
@@ -38,6 +38,8 @@ class BonCommande(models.Model):
         on_delete=models.CASCADE, 
         blank=True, 
         null=True,
+        # Recherches par fournisseur servies par commande_fourn_creation_idx
+        db_index=False,
         verbose_name="Fournisseur"
     )
     client = models.ForeignKey(
@@ -45,6 +47,8 @@ class BonCommande(models.Model):
         on_delete=models.CASCADE, 
         blank=True, 
         null=True,
+        # Recherches par client servies par commande_client_creation_idx
+        db_index=False,
         verbose_name="Client"
     )
     devis = models.ForeignKey(
@@ -120,6 +124,14 @@ class BonCommande(models.Model):
         verbose_name = "Bon de commande"
         verbose_name_plural = "Bons de commande"
         ordering = ['-date_creation']
+        indexes = [
+            # Liste des commandes : tri (et pagination par clé) sur la date
+            # de création, seule ou après un filtre
+            models.Index(fields=['date_creation', 'id'], name='commande_creation_idx'),
+            models.Index(fields=['statut', 'date_creation', 'id'], name='commande_statut_creation_idx'),
+            models.Index(fields=['client', 'date_creation', 'id'], name='commande_client_creation_idx'),
+            models.Index(fields=['fournisseur', 'date_creation', 'id'], name='commande_fourn_creation_idx'),
+        ]
     
     def __str__(self):
         if self.type_commande == 'achat' and self.fournisseur:
@@ -246,6 +258,8 @@ class LigneCommande(models.Model):
         BonCommande, 
         on_delete=models.CASCADE, 
         related_name='lignes',
+        # Recherches par commande servies par lignecommande_cmd_idx
+        db_index=False,
         verbose_name="Commande"
     )
     description = models.CharField(max_length=200, verbose_name="Description")
@@ -271,6 +285,15 @@ class LigneCommande(models.Model):
     class Meta:
         verbose_name = "Ligne de commande"
         verbose_name_plural = "Lignes de commande"
+        indexes = [
+            # Lignes d'une commande ; colonnes incluses pour les cumuls des
+            # rapports (parcours de l'index seul sous PostgreSQL)
+            models.Index(
+                fields=['commande'],
+                include=['description', 'quantite', 'montant_ht'],
+                name='lignecommande_cmd_idx'
+            ),
+        ]
     
     def __str__(self):
         return f"{self.description} - {self.quantite} {self.unite}"
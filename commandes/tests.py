@@ -1,3 +1,25 @@
+from unittest import skipUnless
+
+from django.db import connection
 from django.test import TestCase
 
-# Create your tests here.
+from core.management.commands.verifier_index import index_utilises, requetes_listes
+from .models import BonCommande, LigneCommande
+
+
+@skipUnless(connection.vendor == 'postgresql', "Plans d'exécution PostgreSQL uniquement")
+class IndexListesCommandesTests(TestCase):
+    """Les requêtes de la liste des commandes passent par leurs index (EXPLAIN)"""
+
+    def setUp(self):
+        # Parcours séquentiels découragés : l'index doit être utilisable
+        # même sur la base de test presque vide (réglage limité au test)
+        with connection.cursor() as curseur:
+            curseur.execute("SET LOCAL enable_seqscan = off")
+
+    def test_requetes_des_listes(self):
+        for libelle, queryset, index in requetes_listes():
+            if queryset.model not in (BonCommande, LigneCommande):
+                continue
+            with self.subTest(libelle):
+                self.assertIn(index, index_utilises(queryset))
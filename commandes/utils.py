@@ -37,9 +37,12 @@ def get_societe_info():
         'pied_page_document': None,
     }
 
-def generer_pdf_commande(commande, lignes, societe, mode='inline'):
+def generer_pdf_commande(commande, lignes, societe, mode='inline', grand_document=None, fichier=False):
     """
     Génère un PDF avec ReportLab pour un bon de commande
+
+    Les documents volumineux sont rendus en tableau découpé aux sauts de page (voir core.pdf).
+    Avec fichier=True, retourne le fichier temporaire du PDF au lieu des bytes.
     """
     from reportlab.lib.pagesizes import A4
     from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
@@ -47,11 +50,14 @@ def generer_pdf_commande(commande, lignes, societe, mode='inline'):
     from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
     from reportlab.lib import colors
     from reportlab.lib.enums import TA_CENTER, TA_RIGHT, TA_LEFT
-    from io import BytesIO
     from datetime import datetime
+    from core.pdf import (
+        compter_lignes, est_grand_document, tableau_pagine, valeurs_lignes,
+        tampon_pdf, terminer_pdf
+    )
     
-    # Créer un buffer pour le PDF
-    buffer = BytesIO()
+    # Créer un buffer pour le PDF (bascule sur disque pour les gros documents)
+    buffer = tampon_pdf()
     
     # Créer le document PDF
     doc = SimpleDocTemplate(
@@ -129,7 +135,8 @@ def generer_pdf_commande(commande, lignes, societe, mode='inline'):
             if soc and hasattr(soc, 'bandeau_entete') and soc.bandeau_entete:
                 try:
                     from reportlab.lib.utils import ImageReader
-                    img = ImageReader(soc.bandeau_entete.path)
+                    from parametres.images import chemin_image_pdf
+                    img = ImageReader(chemin_image_pdf('bandeau_entete', soc.bandeau_entete.name))
                     # Dessiner l'image en haut de la page (pleine largeur, hauteur 100px)
                     canvas.drawImage(img, 0, A4[1] - 100, width=A4[0], height=100, preserveAspectRatio=False, mask='auto')
                 except Exception:
@@ -144,6 +151,7 @@ def generer_pdf_commande(commande, lignes, societe, mode='inline'):
         try:
             from parametres.models import InformationsSociete
             from reportlab.lib.utils import ImageReader
+            from parametres.images import chemin_image_pdf, chemin_cachet_pdf
             import os
             
             soc = InformationsSociete.objects.first()
@@ -151,7 +159,7 @@ def generer_pdf_commande(commande, lignes, societe, mode='inline'):
             # Dessiner le bandeau de pied de page s'il existe
             if soc and hasattr(soc, 'bandeau_pied') and soc.bandeau_pied:
                 try:
-                    img = ImageReader(soc.bandeau_pied.path)
+                    img = ImageReader(chemin_image_pdf('bandeau_pied', soc.bandeau_pied.name))
                     # Dessiner l'image en bas de la page (pleine largeur, hauteur 80px)
                     canvas.drawImage(img, 0, 0, width=A4[0], height=80, preserveAspectRatio=False, mask='auto')
                 except Exception:
@@ -159,10 +167,8 @@ def generer_pdf_commande(commande, lignes, societe, mode='inline'):
             
             # Ajouter le cachet DEVDRECO
             try:
-                # Chemin absolu vers l'image du cachet
-                from django.conf import settings
-                media_root = getattr(settings, 'MEDIA_ROOT', 'media')
-                cachet_path = os.path.join(media_root, 'cachets_signatures', 'cachet_devdreco.png')
+                # Chemin absolu vers l'image du cachet (variante préparée si disponible)
+                cachet_path = chemin_cachet_pdf()
                 
                 # Dimensions du cachet (encore plus grande)
                 cachet_width = 6*cm
@@ -276,23 +282,25 @@ def generer_pdf_commande(commande, lignes, societe, mode='inline'):
     story.append(Spacer(1, 10))
     
     # Tableau des lignes de commande
-    if lignes:
+    nombre_lignes = compter_lignes(lignes)
+    
+    if nombre_lignes:
         # En-têtes du tableau
-        table_data = [['Description', 'Quantité', 'Unité', 'Prix unitaire HT', 'Montant HT']]
+        en_tete = ['Description', 'Quantité', 'Unité', 'Prix unitaire HT', 'Montant HT']
         
         # Lignes de données
-        for ligne in lignes:
-            table_data.append([
-                ligne.description,
-                str(ligne.quantite),
-                ligne.unite,
-                f"{ligne.prix_unitaire_ht:.2f}",
-                f"{ligne.montant_ht:.2f}"
-            ])
+        table_data = (
+            [
+                description,
+                str(quantite),
+                unite,
+                f"{prix_unitaire:.2f}",
+                f"{montant:.2f}"
+            ]
+            for description, quantite, unite, prix_unitaire, montant in valeurs_lignes(lignes)
+        )
         
-        # Créer le tableau
-        table = Table(table_data, colWidths=[6*cm, 2*cm, 2*cm, 3*cm, 3*cm])
-        table.setStyle(TableStyle([
+        style_lignes = [
             # Style général
             ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#f8f9fa')),
             ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
@@ -305,9 +313,21 @@ def generer_pdf_commande(commande, lignes, societe, mode='inline'):
             ('TOPPADDING', (0, 0), (-1, 0), 12),
             ('GRID', (0, 0), (-1, -1), 1, colors.black),
             ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ]))
+        ]
         
-        story.append(table)
+        if est_grand_document(nombre_lignes, grand_document):
+            # Grand document : tableau découpé aux sauts de page, en-tête répété
+            story.append(tableau_pagine(
+                en_tete,
+                table_data,
+                [6*cm, 2*cm, 2*cm, 3*cm, 3*cm],
+                style_lignes
+            ))
+        else:
+            # Créer le tableau
+            table = Table([en_tete] + list(table_data), colWidths=[6*cm, 2*cm, 2*cm, 3*cm, 3*cm])
+            table.setStyle(TableStyle(style_lignes))
+            story.append(table)
     else:
         story.append(Paragraph('<i>Aucune ligne de commande</i>', normal_style))
     
@@ -362,8 +382,5 @@ def generer_pdf_commande(commande, lignes, societe, mode='inline'):
     
     doc.build(story, onFirstPage=on_page, onLaterPages=on_page)
     
-    # Récupérer le contenu du PDF
-    pdf_content = buffer.getvalue()
-    buffer.close()
-    
-    return pdf_content
+    # Récupérer le PDF (fichier temporaire ou contenu)
+    return terminer_pdf(buffer, fichier)
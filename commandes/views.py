@@ -14,9 +14,10 @@ from clients.models import Client
 from devis.models import Devis
 from fournisseurs.models import Fournisseur
 from utilisateurs.decorators import class_permission_required
+from core.pagination import PaginationParCleMixin, compter
 
 @class_permission_required('commandes.view')
-class BonCommandeListView(LoginRequiredMixin, ListView):
+class BonCommandeListView(LoginRequiredMixin, PaginationParCleMixin, ListView):
     """Vue pour lister tous les bons de commande"""
     model = BonCommande
     template_name = 'commandes/commande_list.html'
@@ -74,13 +75,13 @@ class BonCommandeListView(LoginRequiredMixin, ListView):
         context = super().get_context_data(**kwargs)
         
         # Statistiques
-        context['total_commandes'] = BonCommande.objects.count()
-        context['commandes_brouillon'] = BonCommande.objects.filter(statut='brouillon').count()
-        context['commandes_envoyees'] = BonCommande.objects.filter(statut='envoye').count()
-        context['commandes_confirmees'] = BonCommande.objects.filter(statut='confirme').count()
-        context['commandes_en_cours'] = BonCommande.objects.filter(statut='en_cours').count()
-        context['commandes_livrees'] = BonCommande.objects.filter(statut='livre').count()
-        context['commandes_annulees'] = BonCommande.objects.filter(statut='annule').count()
+        context['total_commandes'] = compter(BonCommande.objects.all())
+        context['commandes_brouillon'] = compter(BonCommande.objects.filter(statut='brouillon'))
+        context['commandes_envoyees'] = compter(BonCommande.objects.filter(statut='envoye'))
+        context['commandes_confirmees'] = compter(BonCommande.objects.filter(statut='confirme'))
+        context['commandes_en_cours'] = compter(BonCommande.objects.filter(statut='en_cours'))
+        context['commandes_livrees'] = compter(BonCommande.objects.filter(statut='livre'))
+        context['commandes_annulees'] = compter(BonCommande.objects.filter(statut='annule'))
         
         # Commandes du mois en cours
         current_month = datetime.now().month
@@ -330,14 +331,11 @@ def imprimer_commande(request, pk):
         from .utils import generer_pdf_commande
         
         # Générer le PDF
-        pdf_content = generer_pdf_commande(commande, lignes, get_societe_info(), mode='inline')
+        pdf_fichier = generer_pdf_commande(commande, lignes, get_societe_info(), mode='inline', fichier=True)
         
-        # Réponse HTTP avec le PDF
-        from django.http import HttpResponse
-        response = HttpResponse(pdf_content, content_type='application/pdf')
-        response['Content-Disposition'] = f'inline; filename="bon_commande_{commande.numero}.pdf"'
-        
-        return response
+        # Réponse HTTP diffusant le PDF
+        from core.pdf import reponse_pdf
+        return reponse_pdf(pdf_fichier, f"bon_commande_{commande.numero}.pdf", mode='inline')
         
     except Exception as e:
         # En cas d'erreur, afficher un message d'erreur
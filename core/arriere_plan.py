@@ -0,0 +1,61 @@
+"""
+Exécution des travaux longs hors du serveur web (rapports, imports)
+
+Les vues se contentent d'enregistrer le travail à faire (statut « en
+attente ») ; un processus worker distinct le traite :
+
+    python manage.py generer_rapports --continu
+    python manage.py reprendre_imports --continu
+    python manage.py planifier_rapports
+
+Chaque worker réserve ses travaux en base (mise à jour conditionnelle du
+statut), ce qui permet d'en lancer plusieurs, puis les exécute avec au
+plus `workers` tâches simultanées (executer_en_parallele).
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from django.db import connections
+
+
+def _dans_thread(tache, element):
+    """Tâche du pool : les connexions ouvertes par le thread sont fermées en fin d'exécution"""
+    try:
+        return tache(element)
+    finally:
+        # Django ne réutilise pas les connexions d'un thread du pool
+        connections.close_all()
+
+
+def executer_en_parallele(tache, elements, workers=1, nom='worker'):
+    """
+    Applique `tache` à chaque élément avec au plus `workers` exécutions simultanées
+
+    Retourne les résultats dans l'ordre des éléments. Avec un seul worker
+    (ou un seul élément), les tâches s'exécutent dans le thread courant.
+    """
+    elements = list(elements)
+    if workers <= 1 or len(elements) <= 1:
+        return [tache(element) for element in elements]
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix=nom) as pool:
+        return list(pool.map(partial(_dans_thread, tache), elements))
+
+
+def boucle_worker(passage, intervalle, continu=True):
+    """
+    Appelle `passage()` puis attend `intervalle` secondes, jusqu'à Ctrl+C
+
+    Sans `continu`, un seul passage est fait (tâche cron). Les connexions
+    sont fermées entre deux passages pour ne pas garder une connexion
+    inactive ouverte pendant l'attente.
+    """
+    try:
+        while True:
+            passage()
+            if not continu:
+                break
+            connections.close_all()
+            time.sleep(intervalle)
+    except KeyboardInterrupt:
+        pass
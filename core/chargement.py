@@ -0,0 +1,140 @@
+"""
+Chargement en masse de lignes dans une table
+
+Sur PostgreSQL, les objets sont envoyés par `COPY ... FROM STDIN` (format
+CSV) au fil de leur production : ni requête INSERT par lot, ni liste
+complète en mémoire. Sur les autres moteurs (SQLite en développement), le
+chargement se fait par bulk_create par lots de TAILLE_LOT.
+
+Comme bulk_create, le chargement n'appelle ni save() ni les signaux : les
+champs calculés dans save() (ex. telephone_normalise, montant_ht des
+lignes) doivent être renseignés par l'appelant. Les champs auto_now et
+auto_now_add sont remplis comme par bulk_create. COPY ne renvoie pas les
+identifiants créés : les objets chargés n'ont pas de pk, sauf s'ils en
+avaient un avant le chargement (reprise de données), auquel cas la
+séquence de la table est recalée.
+"""
+import json
+from itertools import chain, islice
+
+from django.core.management.color import no_style
+from django.db import connections, models, router, transaction
+
+
+# Objets par lot pour bulk_create, et lignes par envoi pour COPY
+TAILLE_LOT = 1000
+
+
+def _echapper(valeur):
+    """Valeur CSV pour COPY (NULL = champ vide non entre guillemets)"""
+    if valeur is None:
+        return ''
+    if isinstance(valeur, bool):
+        return 't' if valeur else 'f'
+    if isinstance(valeur, (int, float)):
+        return str(valeur)
+    texte = valeur.isoformat() if hasattr(valeur, 'isoformat') else str(valeur)
+    return '"' + texte.replace('"', '""') + '"'
+
+
+def _valeurs(objet, champs, connexion):
+    """Valeurs d'un objet prêtes pour la base, comme pour un INSERT"""
+    valeurs = []
+    for champ in champs:
+        valeur = champ.pre_save(objet, add=True)
+        if isinstance(champ, models.JSONField):
+            valeur = None if valeur is None else json.dumps(valeur, cls=champ.encoder)
+        else:
+            valeur = champ.get_db_prep_save(valeur, connexion)
+        valeurs.append(valeur)
+    return valeurs
+
+
+class _FluxCopy:
+    """Fichier en lecture produisant les lignes CSV à la demande (COPY psycopg2)"""
+
+    def __init__(self, lignes):
+        self._lignes = lignes
+        self._reste = b''
+
+    def read(self, taille=-1):
+        while taille < 0 or len(self._reste) < taille:
+            morceau = list(islice(self._lignes, TAILLE_LOT))
+            if not morceau:
+                break
+            self._reste += ''.join(morceau).encode('utf-8')
+        if taille < 0:
+            taille = len(self._reste)
+        donnees, self._reste = self._reste[:taille], self._reste[taille:]
+        return donnees
+
+
+def _copier(modele, objets, champs, connexion):
+    """Envoie les objets par COPY ; retourne le nombre de lignes chargées"""
+    qn = connexion.ops.quote_name
+    requete = 'COPY {} ({}) FROM STDIN WITH (FORMAT csv)'.format(
+        qn(modele._meta.db_table), ', '.join(qn(champ.column) for champ in champs)
+    )
+    compteur = [0]
+
+    def lignes():
+        for objet in objets:
+            compteur[0] += 1
+            yield ','.join(_echapper(valeur) for valeur in _valeurs(objet, champs, connexion)) + '\n'
+
+    flux = lignes()
+    with connexion.cursor() as cursor:
+        if hasattr(cursor.cursor, 'copy_expert'):
+            cursor.cursor.copy_expert(requete, _FluxCopy(flux))
+        else:
+            # psycopg 3
+            with cursor.cursor.copy(requete) as copie:
+                for morceau in iter(lambda: ''.join(islice(flux, TAILLE_LOT)), ''):
+                    copie.write(morceau)
+    return compteur[0]
+
+
+def _recaler_sequence(modele, connexion):
+    """Recale la séquence de la clé primaire après un chargement avec pk explicites"""
+    requetes = connexion.ops.sequence_reset_sql(no_style(), [modele])
+    if requetes:
+        with connexion.cursor() as cursor:
+            for requete in requetes:
+                cursor.execute(requete)
+
+
+def charger_en_masse(modele, objets, using=None, taille_lot=TAILLE_LOT):
+    """
+    Insère des objets non enregistrés du modèle, en flux
+
+    `objets` peut être une liste ou un générateur. Les clés primaires sont
+    chargées si le premier objet en a une (tous les objets doivent alors en
+    avoir), sinon laissées à la base. Retourne le nombre de lignes chargées.
+    """
+    using = using or router.db_for_write(modele)
+    connexion = connections[using]
+    objets = iter(objets)
+    premier = next(objets, None)
+    if premier is None:
+        return 0
+    objets = chain([premier], objets)
+
+    if connexion.vendor != 'postgresql':
+        total = 0
+        while True:
+            lot = list(islice(objets, taille_lot))
+            if not lot:
+                return total
+            modele._default_manager.db_manager(using).bulk_create(lot, batch_size=taille_lot)
+            total += len(lot)
+
+    avec_pk = premier.pk is not None
+    champs = [
+        champ for champ in modele._meta.concrete_fields
+        if avec_pk or not champ.primary_key
+    ]
+    with transaction.atomic(using=using, savepoint=False):
+        total = _copier(modele, objets, champs, connexion)
+        if avec_pk:
+            _recaler_sequence(modele, connexion)
+    return total
@@ -0,0 +1,236 @@
+"""
+Détection des doublons probables (clients, fournisseurs)
+
+Chaque fiche porte trois clés de blocage, calculées dans save() et par les
+chargements en masse, stockées dans des colonnes indexées :
+
+- telephone_cle : les CHIFFRES_TELEPHONE derniers chiffres du téléphone
+  (« +224 626 40 20 00 » et « 626402000 » ont la même clé) ;
+- nom_phonetique : clé phonétique du nom (français simplifié, sans
+  accents ni formes juridiques, mots triés : « Ets Touré Mamadou » et
+  « Mamadou TOUREY » ont la même clé) ;
+- domaine_email : domaine de l'email, sauf messageries grand public
+  (gmail.com, yahoo.fr...) qui ne distinguent personne.
+
+Deux fiches ne sont comparées que si elles partagent au moins une clé :
+la recherche lit chaque clé dans l'ordre de son index et compare les
+fiches bloc par bloc, soit un coût quasi linéaire au lieu de n² paires.
+Les blocs de plus de TAILLE_BLOC_MAX fiches (clé trop commune) ne sont
+pas comparés et sont signalés.
+
+La comparaison combine la ressemblance des noms (difflib) et l'égalité
+du téléphone, de l'email et du domaine ; une paire est un doublon
+probable à partir de SEUIL_DOUBLON.
+"""
+import re
+import unicodedata
+from difflib import SequenceMatcher
+from itertools import combinations, groupby
+from operator import itemgetter
+
+from .recherche import chiffres
+
+
+CHIFFRES_TELEPHONE = 8
+SEUIL_DOUBLON = 0.6
+TAILLE_BLOC_MAX = 50
+
+CLES_BLOCAGE = ('telephone_cle', 'nom_phonetique', 'domaine_email')
+CHAMPS_COMPARES = ('pk', 'nom_complet', 'email') + CLES_BLOCAGE
+
+# Fiches candidates lues au plus pour le contrôle d'un formulaire
+CANDIDATS_MAX = 200
+
+MOTS_IGNORES = frozenset("""
+    sarl sarlu sa sas sasu suarl eurl sci gie snc ets etablissement etablissements
+    ste societe cie compagnie et de du des la le les l d
+""".split())
+
+DOMAINES_GENERIQUES = frozenset("""
+    gmail.com googlemail.com yahoo.com yahoo.fr ymail.com hotmail.com hotmail.fr
+    outlook.com outlook.fr live.com live.fr msn.com icloud.com me.com aol.com
+    orange.fr wanadoo.fr free.fr sfr.fr laposte.net gmx.fr gmx.com
+    protonmail.com proton.me
+""".split())
+
+# Règles phonétiques, appliquées dans l'ordre (G : « gu » dur, protégé de
+# la règle g -> j)
+_REGLES_PHONETIQUES = [(re.compile(motif), remplacement) for motif, remplacement in (
+    (r'gu(?=[eiy])', 'G'),
+    (r'ph', 'f'),
+    (r'dj', 'j'),
+    (r'sch', 'ch'),
+    (r'ck|qu|q', 'k'),
+    (r'c(?=[eiy])', 's'),
+    (r'c', 'k'),
+    (r'g(?=[eiy])', 'j'),
+    (r'w', 'ou'),
+    (r'y', 'i'),
+    (r'eau|au', 'o'),
+    (r'ou', 'u'),
+    (r'ai|ei', 'e'),
+    (r'x', 'ks'),
+    (r'z', 's'),
+    (r'h', ''),
+    (r'(.)\1+', r'\1'),
+    (r'(?<=...)[stdx]$', ''),
+    (r'(?<=..)e$', ''),
+)]
+
+_NON_LETTRES = re.compile(r'[^a-z0-9]+')
+
+
+def _mots(nom):
+    decompose = unicodedata.normalize('NFKD', (nom or '').casefold())
+    texte = ''.join(c for c in decompose if not unicodedata.combining(c))
+    return [mot for mot in _NON_LETTRES.split(texte) if mot and mot not in MOTS_IGNORES]
+
+
+def _phonetiser(mot):
+    for motif, remplacement in _REGLES_PHONETIQUES:
+        mot = motif.sub(remplacement, mot)
+    return mot.lower()
+
+
+def cle_phonetique(nom):
+    """Clé phonétique d'un nom (mots phonétisés, triés, sans doublon)"""
+    mots = {_phonetiser(mot) for mot in _mots(nom) if len(mot) > 1 or mot.isdigit()}
+    return ' '.join(sorted(mot for mot in mots if mot))[:100]
+
+
+def cle_telephone(telephone):
+    numero = chiffres(telephone)
+    return numero[-CHIFFRES_TELEPHONE:] if len(numero) >= CHIFFRES_TELEPHONE else ''
+
+
+def domaine_email(email):
+    domaine = (email or '').rpartition('@')[2].strip().lower()
+    return '' if domaine in DOMAINES_GENERIQUES else domaine[:100]
+
+
+def cles_doublons(nom, telephone, email):
+    """Valeurs des colonnes de blocage d'une fiche"""
+    return {
+        'telephone_cle': cle_telephone(telephone),
+        'nom_phonetique': cle_phonetique(nom),
+        'domaine_email': domaine_email(email),
+    }
+
+
+# ---------------------------------------------------------------------------
+# Comparaison
+# ---------------------------------------------------------------------------
+
+def comparer(a, b):
+    """
+    (score entre 0 et 1, raisons) pour deux fiches
+
+    `a` et `b` sont des dictionnaires avec les champs de CHAMPS_COMPARES.
+    """
+    nom_a = ' '.join(sorted(_mots(a['nom_complet'])))
+    nom_b = ' '.join(sorted(_mots(b['nom_complet'])))
+    ressemblance = SequenceMatcher(None, nom_a, nom_b).ratio() if nom_a and nom_b else 0
+    if a['nom_phonetique'] and a['nom_phonetique'] == b['nom_phonetique']:
+        ressemblance = max(ressemblance, 0.9)
+
+    score = 0.6 * ressemblance
+    raisons = ['nom'] if ressemblance >= 0.85 else []
+    if a['telephone_cle'] and a['telephone_cle'] == b['telephone_cle']:
+        score += 0.4
+        raisons.append('téléphone')
+    if a['email'] and (a['email'] or '').lower() == (b['email'] or '').lower():
+        score += 0.4
+        raisons.append('email')
+    elif a['domaine_email'] and a['domaine_email'] == b['domaine_email']:
+        score += 0.1
+        raisons.append('domaine')
+    return min(round(score, 3), 1.0), raisons
+
+
+def detecter_doublons(queryset, seuil=SEUIL_DOUBLON, taille_bloc_max=TAILLE_BLOC_MAX):
+    """
+    Doublons probables parmi les fiches du queryset
+
+    Retourne (paires, blocs ignorés) : les paires sont des dictionnaires
+    (a, b, score, raisons), les plus probables d'abord ; les blocs ignorés
+    des tuples (clé, valeur, nombre de fiches).
+    """
+    queryset = queryset.order_by()
+    paires = {}
+    blocs_ignores = []
+    for cle in CLES_BLOCAGE:
+        lignes = queryset.exclude(**{cle: ''}).order_by(cle, 'pk').values(*CHAMPS_COMPARES).iterator(chunk_size=2000)
+        for valeur, bloc in groupby(lignes, key=itemgetter(cle)):
+            bloc = list(bloc)
+            if len(bloc) < 2:
+                continue
+            if len(bloc) > taille_bloc_max:
+                blocs_ignores.append((cle, valeur, len(bloc)))
+                continue
+            for a, b in combinations(bloc, 2):
+                if (a['pk'], b['pk']) in paires:
+                    continue
+                score, raisons = comparer(a, b)
+                if score >= seuil:
+                    paires[(a['pk'], b['pk'])] = {'a': a, 'b': b, 'score': score, 'raisons': raisons}
+    return sorted(paires.values(), key=lambda paire: -paire['score']), blocs_ignores
+
+
+def doublons_probables(modele, nom, telephone, email, exclure_pk=None, seuil=SEUIL_DOUBLON, limite=5):
+    """
+    Fiches existantes qui ressemblent à une fiche en cours de saisie
+
+    Une requête par clé de blocage non vide, chacune servie par l'index de
+    sa colonne et limitée à CANDIDATS_MAX fiches (un domaine email très
+    répandu ne masque pas les fiches de même téléphone). Retourne des
+    dictionnaires (champs de CHAMPS_COMPARES, score, raisons).
+    """
+    fiche = {'pk': exclure_pk, 'nom_complet': nom or '', 'email': email or ''}
+    fiche.update(cles_doublons(nom, telephone, email))
+
+    candidats = {}
+    for cle in CLES_BLOCAGE:
+        if not fiche[cle]:
+            continue
+        bloc = modele._default_manager.filter(**{cle: fiche[cle]})
+        if exclure_pk:
+            bloc = bloc.exclude(pk=exclure_pk)
+        for candidat in bloc.order_by().values(*CHAMPS_COMPARES)[:CANDIDATS_MAX]:
+            candidats[candidat['pk']] = candidat
+
+    resultats = []
+    for candidat in candidats.values():
+        score, raisons = comparer(fiche, candidat)
+        if score >= seuil:
+            resultats.append(dict(candidat, score=score, raisons=raisons))
+    resultats.sort(key=lambda resultat: -resultat['score'])
+    return resultats[:limite]
+
+
+def controler_doublons(form, modele, libelle, champs_surveilles):
+    """
+    Contrôle des doublons probables pour un formulaire (à appeler en fin de clean())
+
+    Le formulaire doit avoir un champ booléen `confirmer_doublon` : s'il
+    n'est pas coché et qu'une fiche ressemblante existe, l'erreur est
+    posée sur ce champ. En modification, le contrôle n'a lieu que si l'un
+    des `champs_surveilles` a changé.
+    """
+    cleaned = form.cleaned_data
+    if form.errors or cleaned.get('confirmer_doublon'):
+        return
+    if form.instance.pk and not any(champ in form.changed_data for champ in champs_surveilles):
+        return
+
+    doublons = doublons_probables(
+        modele, cleaned.get('nom_complet'), cleaned.get('telephone'), cleaned.get('email'),
+        exclure_pk=form.instance.pk,
+    )
+    if doublons:
+        fiches = ', '.join(
+            f"« {doublon['nom_complet']} » ({', '.join(doublon['raisons']) or 'nom proche'})" for doublon in doublons[:3]
+        )
+        form.add_error(
+            'confirmer_doublon',
+            f"{libelle} probablement déjà enregistré : {fiches}. Cochez cette case pour enregistrer quand même.",
+        )
@@ -0,0 +1,180 @@
+"""
+Export CSV en flux des listes (clients, fournisseurs, devis, factures)
+
+Les lignes sont lues par morceaux avec values_list().iterator() (curseur
+côté serveur sous PostgreSQL) et envoyées au fur et à mesure dans une
+StreamingHttpResponse : la mémoire utilisée ne dépend pas du nombre de
+lignes et le téléchargement commence immédiatement.
+
+Chaque export réutilise la fonction de filtrage de la liste correspondante
+(filtrer_clients, filtrer_fournisseurs, filtrer_devis, filtrer_factures).
+"""
+import csv
+import io
+from datetime import date, datetime
+
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+
+# Nombre de lignes lues en base par requête
+TAILLE_MORCEAU = 2000
+
+# Nombre de lignes CSV envoyées par morceau de réponse
+LIGNES_PAR_ENVOI = 500
+
+
+def _date(valeur):
+    """Date au format français (les datetime sont convertis en heure locale)"""
+    if isinstance(valeur, datetime):
+        if timezone.is_aware(valeur):
+            valeur = timezone.localtime(valeur)
+        return valeur.strftime('%d/%m/%Y %H:%M')
+    if isinstance(valeur, date):
+        return valeur.strftime('%d/%m/%Y')
+    return valeur or ''
+
+
+def _actif(valeur):
+    return 'Actif' if valeur else 'Inactif'
+
+
+def _choix(choices):
+    """Formateur affichant le libellé d'un champ à choix"""
+    libelles = dict(choices)
+    return lambda valeur: libelles.get(valeur, valeur or '')
+
+
+# ---------------------------------------------------------------------------
+# Définition des exports : (queryset filtré et trié, colonnes)
+# Une colonne est (en-tête, champ values_list, formateur ou None)
+# ---------------------------------------------------------------------------
+
+def _export_clients(params, queryset=None):
+    from clients.models import Client
+    from clients.utils import filtrer_clients
+
+    if queryset is None:
+        queryset = Client.objects.all()
+    queryset = filtrer_clients(queryset, params).order_by('-date_creation', '-id')
+    return queryset, [
+        ('Nom complet/Raison sociale', 'nom_complet', None),
+        ('Type', 'type_client', _choix(Client.TYPE_CHOICES)),
+        ('Téléphone', 'telephone', None),
+        ('Email', 'email', None),
+        ('Adresse', 'adresse', None),
+        ('Statut', 'actif', _actif),
+        ('Date de création', 'date_creation', _date),
+        ('Dernière modification', 'date_modification', _date),
+    ]
+
+
+def _export_fournisseurs(params, queryset=None):
+    from fournisseurs.models import Fournisseur
+    from fournisseurs.utils import filtrer_fournisseurs
+
+    if queryset is None:
+        queryset = Fournisseur.objects.all()
+    queryset = filtrer_fournisseurs(queryset, params).order_by('nom_complet', 'id')
+    return queryset, [
+        ('Nom complet/Raison sociale', 'nom_complet', None),
+        ('Type', 'type_fournisseur', _choix(Fournisseur.TYPE_FOURNISSEUR_CHOICES)),
+        ('Téléphone', 'telephone', None),
+        ('Email', 'email', None),
+        ('Contact principal', 'contact_principal', None),
+        ('Ville', 'ville', None),
+        ('Pays', 'pays', None),
+        ('Statut', 'actif', _actif),
+        ('Date de création', 'date_creation', _date),
+    ]
+
+
+def _export_devis(params, queryset=None):
+    from devis.models import Devis
+    from core.export_pdf import documents_filtres
+
+    return documents_filtres('devis', params, queryset), [
+        ('Numéro', 'numero', None),
+        ('Date de création', 'date_creation', _date),
+        ('Client', 'client__nom_complet', None),
+        ('Objet', 'objet', None),
+        ('Statut', 'statut', _choix(Devis.STATUT_CHOICES)),
+        ('Date de validité', 'date_validite', _date),
+        ('Montant HT', 'montant_ht', None),
+        ('Montant TVA', 'montant_tva', None),
+        ('Montant TTC', 'montant_ttc', None),
+    ]
+
+
+def _export_factures(params, queryset=None):
+    from factures.models import Facture
+    from core.export_pdf import documents_filtres
+
+    return documents_filtres('factures', params, queryset), [
+        ('Numéro', 'numero', None),
+        ('Fournisseur', 'fournisseur__nom_complet', None),
+        ('Objet', 'objet', None),
+        ('Statut', 'statut', _choix(Facture.STATUT_CHOICES)),
+        ("Date d'émission", 'date_emission', _date),
+        ("Date d'échéance", 'date_echeance', _date),
+        ('Montant HT', 'montant_ht', None),
+        ('Montant TVA', 'montant_tva', None),
+        ('Montant TTC', 'montant_ttc', None),
+    ]
+
+
+EXPORTS = {
+    'clients': _export_clients,
+    'fournisseurs': _export_fournisseurs,
+    'devis': _export_devis,
+    'factures': _export_factures,
+}
+
+
+# ---------------------------------------------------------------------------
+# Écriture en flux
+# ---------------------------------------------------------------------------
+
+def lignes_csv(queryset, colonnes, taille_morceau=TAILLE_MORCEAU):
+    """
+    Générateur des morceaux de texte CSV (BOM UTF-8 et en-tête compris)
+
+    Les lignes sont regroupées par LIGNES_PAR_ENVOI pour limiter le nombre
+    d'écritures sur la connexion.
+    """
+    tampon = io.StringIO()
+    writer = csv.writer(tampon)
+    formateurs = [formateur for _, _, formateur in colonnes]
+
+    tampon.write('\ufeff')
+    writer.writerow([en_tete for en_tete, _, _ in colonnes])
+
+    champs = [champ for _, champ, _ in colonnes]
+    for index, ligne in enumerate(queryset.values_list(*champs).iterator(chunk_size=taille_morceau), 1):
+        writer.writerow([
+            formateur(valeur) if formateur else ('' if valeur is None else valeur)
+            for formateur, valeur in zip(formateurs, ligne)
+        ])
+        if index % LIGNES_PAR_ENVOI == 0:
+            yield tampon.getvalue()
+            tampon.seek(0)
+            tampon.truncate()
+
+    yield tampon.getvalue()
+
+
+def reponse_export_csv(type_export, params, queryset=None):
+    """
+    Réponse HTTP diffusant l'export CSV de la liste `type_export`
+
+    `params` sont les filtres de la liste (request.GET) ; `queryset` permet
+    de partir d'une sélection déjà restreinte (permissions utilisateur).
+    """
+    queryset, colonnes = EXPORTS[type_export](params, queryset)
+    horodatage = timezone.now().strftime('%Y%m%d_%H%M%S')
+    response = StreamingHttpResponse(
+        lignes_csv(queryset, colonnes),
+        content_type='text/csv; charset=utf-8'
+    )
+    response['Content-Disposition'] = f'attachment; filename="{type_export}_{horodatage}.csv"'
+    return response
@@ -0,0 +1,141 @@
+"""
+Export Excel en écriture seule (catalogues d'articles, catégories)
+
+Le classeur est produit avec openpyxl en mode write_only : chaque ligne est
+sérialisée dès son ajout, sans garder de cellules en mémoire. Les lignes
+viennent d'un values_list().iterator() et le fichier est écrit dans un
+SpooledTemporaryFile (en mémoire, puis sur disque au-delà du seuil) renvoyé
+par FileResponse.
+
+Les styles sont des NamedStyle enregistrés une fois dans le classeur ; une
+cellule stylée est préparée par colonne puis réutilisée pour chaque ligne,
+au lieu de styliser chaque cellule.
+"""
+import tempfile
+from datetime import datetime
+
+from django.http import FileResponse
+from django.utils import timezone
+
+
+# Lignes lues en base par requête
+TAILLE_MORCEAU = 2000
+
+# Taille au-delà de laquelle le classeur est écrit sur disque
+SEUIL_MEMOIRE_EXCEL = 10 * 1024 * 1024
+
+CONTENT_TYPE_XLSX = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+STYLE_EN_TETE = 'export_en_tete'
+STYLE_DATE = 'export_date'
+
+
+def _styles_export():
+    """Styles nommés des exports (en-tête, date et heure)"""
+    from openpyxl.styles import Alignment, Font, NamedStyle, PatternFill
+
+    return [
+        NamedStyle(
+            name=STYLE_EN_TETE,
+            font=Font(bold=True, color="FFFFFF"),
+            fill=PatternFill(start_color="366092", end_color="366092", fill_type="solid"),
+            alignment=Alignment(horizontal="center")
+        ),
+        NamedStyle(name=STYLE_DATE, number_format='DD/MM/YYYY HH:MM'),
+    ]
+
+
+def _date_locale(valeur):
+    """Datetime en heure locale sans fuseau (Excel ne gère pas les fuseaux)"""
+    if isinstance(valeur, datetime) and timezone.is_aware(valeur):
+        return timezone.localtime(valeur).replace(tzinfo=None)
+    return valeur
+
+
+def oui_non(valeur):
+    return "Oui" if valeur else "Non"
+
+
+# Formateurs des colonnes : (fonction de conversion, style nommé de la cellule)
+FORMATS = {
+    'date': (_date_locale, STYLE_DATE),
+    'oui_non': (oui_non, None),
+}
+
+
+def ecrire_classeur(fichier, titre_feuille, colonnes, lignes):
+    """
+    Écrit une feuille en écriture seule ; retourne le nombre de lignes
+
+    `colonnes` est une liste de (en-tête, largeur, format) où format est
+    une clé de FORMATS ou None ; `lignes` un itérable de tuples.
+    """
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.utils import get_column_letter
+
+    classeur = Workbook(write_only=True)
+    for style in _styles_export():
+        classeur.add_named_style(style)
+    feuille = classeur.create_sheet(title=titre_feuille)
+
+    for index, (_, largeur, _) in enumerate(colonnes, 1):
+        feuille.column_dimensions[get_column_letter(index)].width = largeur
+
+    en_tetes = []
+    for en_tete, _, _ in colonnes:
+        cellule = WriteOnlyCell(feuille, value=en_tete)
+        cellule.style = STYLE_EN_TETE
+        en_tetes.append(cellule)
+    feuille.append(en_tetes)
+
+    # Une cellule préparée par colonne stylée, réutilisée à chaque ligne
+    # (en écriture seule, la ligne est sérialisée dès l'appel à append)
+    convertisseurs = []
+    cellules = []
+    for _, _, format_colonne in colonnes:
+        conversion, style = FORMATS.get(format_colonne, (None, None))
+        convertisseurs.append(conversion)
+        if style:
+            cellule = WriteOnlyCell(feuille)
+            cellule.style = style
+            cellules.append(cellule)
+        else:
+            cellules.append(None)
+
+    total = 0
+    for ligne in lignes:
+        valeurs = []
+        for valeur, conversion, cellule in zip(ligne, convertisseurs, cellules):
+            if conversion:
+                valeur = conversion(valeur)
+            if cellule is not None:
+                cellule.value = valeur
+                valeur = cellule
+            valeurs.append(valeur)
+        feuille.append(valeurs)
+        total += 1
+
+    classeur.save(fichier)
+    return total
+
+
+def reponse_export_excel(queryset, champs, colonnes, titre_feuille, prefixe_fichier):
+    """
+    Réponse HTTP d'un export Excel de `queryset`
+
+    `champs` sont les champs values_list, dans l'ordre des `colonnes`
+    (voir ecrire_classeur).
+    """
+    sortie = tempfile.SpooledTemporaryFile(max_size=SEUIL_MEMOIRE_EXCEL)
+    lignes = queryset.values_list(*champs).iterator(chunk_size=TAILLE_MORCEAU)
+    ecrire_classeur(sortie, titre_feuille, colonnes, lignes)
+    sortie.seek(0)
+
+    horodatage = timezone.now().strftime('%Y%m%d_%H%M%S')
+    return FileResponse(
+        sortie,
+        as_attachment=True,
+        filename=f"{prefixe_fichier}_{horodatage}.xlsx",
+        content_type=CONTENT_TYPE_XLSX
+    )
@@ -0,0 +1,216 @@
+"""
+Export par lot des documents PDF (devis, factures)
+
+Depuis les listes, les documents sont rendus un par un dans le worker web :
+l'archive ZIP est diffusée au fil du rendu et un seul PDF est en mémoire à
+la fois. Le PDF fusionné garde toutes ses pages jusqu'à son écriture ; il
+est donc limité à EXPORT_PDF_FUSION_MAX documents, les lots plus gros
+passant par le ZIP ou par la commande `exporter_pdf_lot`, qui rend les
+documents en parallèle dans un ProcessPoolExecutor hors du serveur web et
+écrit un PDF fusionné par tranche d'au plus EXPORT_PDF_FUSION_MAX
+documents.
+"""
+import os
+import tempfile
+import zipfile
+from collections import deque
+from itertools import chain, islice
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.http import StreamingHttpResponse, FileResponse
+from django.utils import timezone
+
+
+TYPES_DOCUMENTS = ('devis', 'factures')
+
+# Nombre maximal de documents d'un PDF fusionné construit dans une requête
+EXPORT_PDF_FUSION_MAX = getattr(settings, 'EXPORT_PDF_FUSION_MAX', 200)
+
+# Nombre de documents rendus d'avance par processus de rendu
+DOCUMENTS_EN_VOL_PAR_WORKER = 2
+
+
+def documents_filtres(type_document, params, queryset=None):
+    """
+    Retourne le queryset des documents filtrés avec les mêmes critères
+    que DevisListView / FactureListView
+    """
+    if type_document == 'devis':
+        from devis.models import Devis
+        from devis.utils import filtrer_devis
+        if queryset is None:
+            queryset = Devis.objects.all()
+        return filtrer_devis(queryset, params).order_by('-date_creation', '-id')
+    elif type_document == 'factures':
+        from factures.models import Facture
+        from factures.utils import filtrer_factures
+        if queryset is None:
+            queryset = Facture.objects.all()
+        return filtrer_factures(queryset, params).order_by('-date_emission', '-id')
+    raise ValueError(f"Type de document inconnu: {type_document}")
+
+
+def rendre_document(type_document, pk):
+    """Rend un document en PDF et retourne (nom_fichier, contenu)"""
+    if type_document == 'devis':
+        from devis.utils import generer_pdf_reportlab, donnees_rendu_devis
+        devis, lignes, societe, empreinte = donnees_rendu_devis(pk)
+        contenu = generer_pdf_reportlab(devis, lignes, societe)
+        return f"devis_{devis.numero}.pdf", contenu
+    elif type_document == 'factures':
+        from factures.utils import generer_pdf_facture, donnees_rendu_facture
+        facture, lignes, societe, empreinte = donnees_rendu_facture(pk)
+        contenu = generer_pdf_facture(facture, lignes, societe)
+        return f"facture_{facture.numero}.pdf", contenu
+    raise ValueError(f"Type de document inconnu: {type_document}")
+
+
+def _initialiser_worker():
+    """Prépare Django dans un processus de rendu (nécessaire en mode spawn)"""
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'devdreco_soft.settings')
+        django.setup()
+
+
+def rendre_documents(type_document, pks, workers=None):
+    """
+    Rend les documents en parallèle et les restitue dans l'ordre des `pks`
+
+    Au plus `workers * DOCUMENTS_EN_VOL_PAR_WORKER` PDF sont en attente à
+    un instant donné, ce qui borne la mémoire utilisée.
+    """
+    from django.db import connections
+
+    workers = workers or min(4, os.cpu_count() or 1)
+    fenetre = workers * DOCUMENTS_EN_VOL_PAR_WORKER
+
+    # Les processus ne doivent pas hériter d'une connexion ouverte
+    pks = list(pks)
+    connections.close_all()
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_initialiser_worker) as executor:
+        en_cours = deque()
+        for pk in pks:
+            en_cours.append(executor.submit(rendre_document, type_document, pk))
+            if len(en_cours) >= fenetre:
+                yield en_cours.popleft().result()
+        while en_cours:
+            yield en_cours.popleft().result()
+
+
+def _documents_ou_erreurs(type_document, pks):
+    """
+    Rend les documents un par un pour une archive déjà en cours d'envoi
+
+    Le statut HTTP est parti : un document en erreur est remplacé dans
+    l'archive par un fichier texte qui décrit l'erreur.
+    """
+    for pk in pks:
+        try:
+            yield rendre_document(type_document, pk)
+        except Exception as e:
+            print(f"Erreur lors du rendu PDF ({type_document} {pk}): {e}")
+            yield f"ERREUR_{type_document}_{pk}.txt", f"Document {pk} non exporté : {e}\n".encode('utf-8')
+
+
+class _FluxEcriture:
+    """Tampon non positionnable : zipfile écrit alors l'archive en flux"""
+
+    def __init__(self):
+        self._morceaux = []
+
+    def write(self, data):
+        self._morceaux.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def vider(self):
+        data = b''.join(self._morceaux)
+        self._morceaux = []
+        return data
+
+
+def flux_zip(documents):
+    """Générateur des octets d'une archive ZIP construite document par document"""
+    tampon = _FluxEcriture()
+    with zipfile.ZipFile(tampon, mode='w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for nom_fichier, contenu in documents:
+            archive.writestr(nom_fichier, contenu)
+            yield tampon.vider()
+    yield tampon.vider()
+
+
+def par_lots(documents, taille):
+    """
+    Découpe un itérable en lots successifs d'au plus `taille` éléments
+
+    Les lots sont eux-mêmes des itérateurs : chacun doit être parcouru
+    entièrement avant de passer au suivant.
+    """
+    documents = iter(documents)
+    for premier in documents:
+        yield chain([premier], islice(documents, taille - 1))
+
+
+def fusionner_pdf(documents, sortie):
+    """
+    Fusionne les PDF dans le fichier `sortie` (nécessite pypdf)
+
+    Les pages sont ajoutées au fur et à mesure du rendu mais restent en
+    mémoire : le fichier final n'est écrit qu'une fois tous les documents
+    rendus.
+    """
+    try:
+        from pypdf import PdfReader, PdfWriter
+    except ImportError:
+        raise RuntimeError("La fusion PDF nécessite le paquet pypdf (pip install pypdf)")
+
+    import io
+    writer = PdfWriter()
+    for nom_fichier, contenu in documents:
+        writer.append(PdfReader(io.BytesIO(contenu)))
+    writer.write(sortie)
+    return sortie
+
+
+def reponse_export_lot(type_document, queryset, format_sortie='zip'):
+    """
+    Construit la réponse HTTP d'un export par lot (ZIP en flux ou PDF fusionné)
+
+    Les documents sont rendus dans le worker, sans pool de processus. Lève
+    ValueError si le PDF fusionné dépasse EXPORT_PDF_FUSION_MAX documents.
+    """
+    horodatage = timezone.now().strftime('%Y%m%d_%H%M%S')
+    pks = queryset.values_list('pk', flat=True)
+
+    if format_sortie == 'pdf':
+        total = queryset.count()
+        if total > EXPORT_PDF_FUSION_MAX:
+            raise ValueError(
+                f"Le PDF fusionné est limité à {EXPORT_PDF_FUSION_MAX} documents ({total} sélectionnés) : "
+                f"exportez en ZIP ou utilisez la commande exporter_pdf_lot"
+            )
+        sortie = tempfile.SpooledTemporaryFile(max_size=10 * 1024 * 1024)
+        fusionner_pdf((rendre_document(type_document, pk) for pk in pks), sortie)
+        sortie.seek(0)
+        return FileResponse(
+            sortie,
+            as_attachment=True,
+            filename=f"{type_document}_{horodatage}.pdf",
+            content_type='application/pdf'
+        )
+
+    pks = iter(pks)
+    premier = next(pks, None)
+    # Le premier document est rendu avant la réponse : une erreur générale
+    # (rendu impossible) remonte encore à la vue au lieu d'un ZIP tronqué
+    documents = [rendre_document(type_document, premier)] if premier is not None else []
+    documents = chain(documents, _documents_ou_erreurs(type_document, pks))
+    response = StreamingHttpResponse(flux_zip(documents), content_type='application/zip')
+    response['Content-Disposition'] = f'attachment; filename="{type_document}_{horodatage}.zip"'
+    return response
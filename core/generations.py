@@ -0,0 +1,43 @@
+"""
+Générations des contenus mis en cache, communes à tous les processus
+
+Une génération est un nombre associé à un nom (ex. « selection:clients.client »)
+et renouvelé à chaque modification du contenu qu'elle désigne. Les caches
+propres à un processus (index d'autocomplétion, résultats de rapports) et
+les ETag des API sont construits sur la génération courante : dès qu'elle
+change, ils sont reconstruits, dans tous les processus.
+
+Les générations sont gardées en base (core.models.Generation) et non dans
+le cache Django, propre à chaque processus sans configuration CACHES
+partagée. Une invalidation demandée dans une transaction n'est appliquée
+qu'après sa validation : les autres processus ne reconstruisent pas leur
+cache avant de pouvoir lire les nouvelles données, et les transactions
+concurrentes ne se disputent pas la ligne de la génération.
+"""
+import time
+
+from django.db import IntegrityError, transaction
+
+from .models import Generation
+
+
+def generation(nom):
+    """Génération courante (créée à la première lecture)"""
+    valeur = Generation.objects.filter(nom=nom).values_list('valeur', flat=True).first()
+    if valeur is not None:
+        return valeur
+    try:
+        with transaction.atomic():
+            return Generation.objects.create(nom=nom, valeur=time.time_ns()).valeur
+    except IntegrityError:
+        # Créée entre-temps par un autre processus
+        return Generation.objects.get(nom=nom).valeur
+
+
+def _renouveler(nom):
+    Generation.objects.update_or_create(nom=nom, defaults={'valeur': time.time_ns()})
+
+
+def invalider(nom):
+    """Renouvelle la génération (après la validation de la transaction en cours)"""
+    transaction.on_commit(lambda: _renouveler(nom))
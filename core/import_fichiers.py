@@ -0,0 +1,170 @@
+"""
+Lecture des fichiers importés (Excel .xlsx ou CSV)
+
+Les deux formats sont lus ligne à ligne sans charger le fichier en mémoire :
+openpyxl en lecture seule pour Excel, le module csv pour CSV (séparateur
+« ; » ou « , » détecté, UTF-8 avec ou sans BOM, sinon Windows-1252).
+
+Fonctions communes aux imports en masse : repérage des colonnes par leur
+en-tête, lecture des cellules et recherche ensembliste des doublons.
+"""
+import csv
+import io
+from contextlib import contextmanager
+
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db.models import Q
+from django.db.models.functions import Lower
+
+
+EXTENSIONS_IMPORT = ('.xlsx', '.csv')
+
+VALEURS_VRAIES = ('oui', 'yes', 'true', '1', 'actif')
+
+# Taille de l'échantillon lu pour détecter l'encodage et le séparateur
+TAILLE_ECHANTILLON = 64 * 1024
+
+
+def est_csv(nom_fichier):
+    return nom_fichier.lower().endswith('.csv')
+
+
+def _normaliser_en_tete(valeur):
+    return str(valeur).strip().lower() if valeur is not None else ''
+
+
+def _encodage_csv(echantillon):
+    """UTF-8 si l'échantillon se décode (coupure de fin tolérée), sinon Windows-1252"""
+    try:
+        echantillon.decode('utf-8')
+    except UnicodeDecodeError as e:
+        if e.start < len(echantillon) - 3:
+            return 'cp1252'
+    return 'utf-8-sig'
+
+
+@contextmanager
+def ouvrir_tableau(fichier, nom_fichier):
+    """
+    Ouvre un fichier .xlsx ou .csv (fichier binaire)
+
+    Produit (en_tetes, lignes, total) : les en-têtes de la première ligne,
+    un itérateur des lignes suivantes (tuples) et le nombre de lignes de
+    données s'il est connu sans lecture complète (sinon None).
+    """
+    if est_csv(nom_fichier):
+        echantillon = fichier.read(TAILLE_ECHANTILLON)
+        fichier.seek(0)
+        encodage = _encodage_csv(echantillon)
+        texte = io.TextIOWrapper(fichier, encoding=encodage, newline='')
+        try:
+            try:
+                dialecte = csv.Sniffer().sniff(echantillon.decode(encodage, errors='ignore'), delimiters=';,\t')
+            except csv.Error:
+                dialecte = csv.excel
+            lignes = csv.reader(texte, dialecte)
+            en_tetes = [valeur.strip() for valeur in next(lignes, [])]
+            yield en_tetes, (tuple(ligne) for ligne in lignes), None
+        finally:
+            texte.detach()
+        return
+
+    import openpyxl
+
+    classeur = openpyxl.load_workbook(fichier, read_only=True, data_only=True)
+    try:
+        feuille = classeur.active
+        lignes = feuille.iter_rows(values_only=True)
+        en_tetes = [str(valeur).strip() if valeur is not None else '' for valeur in next(lignes, ())]
+        total = max(feuille.max_row - 1, 0) if feuille.max_row else None
+        yield en_tetes, lignes, total
+    finally:
+        classeur.close()
+
+
+def reperer_colonnes(en_tetes, colonnes):
+    """
+    Position de chaque colonne attendue dans les en-têtes
+
+    `colonnes` associe un champ à ses libellés acceptés (comparés sans
+    casse ni espaces autour). Retourne {champ: indice} pour les colonnes
+    présentes.
+    """
+    positions = {_normaliser_en_tete(en_tete): indice for indice, en_tete in enumerate(en_tetes)}
+    trouvees = {}
+    for champ, libelles in colonnes.items():
+        for libelle in libelles:
+            indice = positions.get(_normaliser_en_tete(libelle))
+            if indice is not None:
+                trouvees[champ] = indice
+                break
+    return trouvees
+
+
+def texte_cellule(ligne, indice):
+    """Texte d'une cellule ('' si la colonne est absente ou vide)"""
+    if indice is None or indice >= len(ligne) or ligne[indice] is None:
+        return ''
+    return str(ligne[indice]).strip()
+
+
+def valeur_booleenne(texte):
+    """Interprète une cellule Oui/Non, Actif/Inactif (None si vide)"""
+    if not texte:
+        return None
+    return texte.strip().lower() in VALEURS_VRAIES
+
+
+def valeur_choix(texte, choix, defaut):
+    """Code d'un choix à partir de son code ou de son libellé (None si inconnu)"""
+    if not texte:
+        return defaut
+    texte = texte.strip().lower()
+    for code, libelle in choix:
+        if texte in (code, libelle.lower()):
+            return code
+    return None
+
+
+def email_valide(email):
+    try:
+        validate_email(email)
+    except ValidationError:
+        return False
+    return True
+
+
+def avec_email_minuscule(queryset):
+    """
+    Queryset annoté de `email_minuscule` (index Lower('email') du modèle)
+
+    Les emails sont enregistrés tels que saisis : les doublons se comparent
+    sur cette annotation et sur email.lower() des lignes importées.
+    """
+    return queryset.annotate(email_minuscule=Lower('email'))
+
+
+def valeurs_existantes(queryset, valeurs_par_champ):
+    """
+    Valeurs déjà présentes en base, en une seule requête
+
+    `valeurs_par_champ` associe un champ indexé à un ensemble de valeurs ;
+    la requête combine les filtres `champ__in` par OU. Retourne
+    {champ: ensemble des valeurs trouvées}.
+    """
+    filtre = Q()
+    for champ, valeurs in valeurs_par_champ.items():
+        if valeurs:
+            filtre |= Q(**{f'{champ}__in': list(valeurs)})
+
+    trouvees = {champ: set() for champ in valeurs_par_champ}
+    if not filtre:
+        return trouvees
+
+    champs = list(valeurs_par_champ)
+    for ligne in queryset.filter(filtre).values_list(*champs).iterator():
+        for champ, valeur in zip(champs, ligne):
+            if valeur in valeurs_par_champ[champ]:
+                trouvees[champ].add(valeur)
+    return trouvees
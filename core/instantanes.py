@@ -0,0 +1,153 @@
+"""
+Instantanés figés des documents (devis envoyés, factures validées)
+
+Un instantané regroupe tout ce qu'il faut pour rendre le document :
+en-tête, bloc client/fournisseur, lignes, totaux et informations de la
+société. Il est écrit au passage au statut figé (envoi du devis,
+validation de la facture) ; le rendu PDF et l'aperçu HTML le relisent
+sans toucher aux données vivantes, et un affichage (GET) n'en écrit
+jamais.
+
+L'application permet de corriger un document déjà envoyé ou validé
+(formulaire de modification, administration) : l'instantané doit alors
+suivre la correction, sans quoi le PDF renvoyé au client montrerait
+l'ancienne version. Il est donc refait à l'enregistrement du formulaire
+(figer_document), mais seulement si son contenu a changé : sinon
+l'instantané existant, sa date de génération et son empreinte sont
+conservés, et le même document donne toujours le même PDF.
+
+Son empreinte sert d'ETag : le navigateur revalide à chaque affichage et
+reçoit un 304 sans nouveau rendu tant que l'instantané n'a pas changé.
+"""
+import datetime
+import hashlib
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.utils import timezone
+
+from core.pdf import CHAMPS_LIGNE
+
+
+# Version du format des instantanés
+VERSION_INSTANTANE = 1
+
+
+def serialiser_objet(obj, exclure=()):
+    """Valeurs des champs simples d'un objet modèle (sans clé primaire ni relations)"""
+    donnees = {}
+    for champ in obj._meta.concrete_fields:
+        if champ.primary_key or champ.is_relation or champ.name in exclure:
+            continue
+        valeur = champ.value_from_object(obj)
+        # Un DateField peut contenir un datetime (ex. default=timezone.now)
+        if (isinstance(champ, models.DateField) and not isinstance(champ, models.DateTimeField)
+                and isinstance(valeur, datetime.datetime)):
+            valeur = valeur.date()
+        donnees[champ.name] = valeur
+    return donnees
+
+
+def restaurer_objet(modele, donnees):
+    """Instance non enregistrée de `modele` reconstruite depuis serialiser_objet"""
+    valeurs = {}
+    for nom, valeur in donnees.items():
+        try:
+            champ = modele._meta.get_field(nom)
+        except Exception:
+            continue
+        valeurs[nom] = champ.to_python(valeur)
+    return modele(**valeurs)
+
+
+# Champs non repris : ils changent à chaque enregistrement sans être rendus
+CHAMPS_NON_FIGES = ('date_modification',)
+
+
+def _horodatage():
+    return timezone.localtime().strftime('%d/%m/%Y à %H:%M')
+
+
+def construire_instantane(document, tiers, lignes, societe, date_generation=None):
+    """Construit le contenu d'un instantané (dictionnaire sérialisable en JSON)"""
+    from core.pdf import valeurs_lignes
+
+    societe = dict(societe)
+    societe['date_generation'] = date_generation or _horodatage()
+
+    return {
+        'version': VERSION_INSTANTANE,
+        'entete': serialiser_objet(document, exclure=CHAMPS_NON_FIGES),
+        'tiers': serialiser_objet(tiers, exclure=CHAMPS_NON_FIGES) if tiers else None,
+        'lignes': [list(ligne) for ligne in valeurs_lignes(lignes)],
+        'societe': societe,
+    }
+
+
+def encoder_instantane(donnees):
+    """Sérialise l'instantané et calcule son empreinte (sert d'ETag)"""
+    contenu = json.loads(json.dumps(donnees, cls=DjangoJSONEncoder))
+    empreinte = hashlib.sha1(
+        json.dumps(contenu, sort_keys=True).encode('utf-8')
+    ).hexdigest()
+    return contenu, empreinte
+
+
+def figer_document(modele_instantane, document, tiers, lignes, societe):
+    """
+    Enregistre l'instantané de `document` (champ OneToOne du nom de son modèle)
+
+    L'instantané existant est conservé s'il a le même contenu : il est
+    reconstruit avec sa date de génération et comparé par empreinte. Sinon
+    il est remplacé, daté du moment présent. Retourne l'instantané.
+    """
+    filtre = {document._meta.model_name: document}
+    existant = modele_instantane.objects.filter(**filtre).first()
+    date_generation = existant.donnees['societe'].get('date_generation') if existant else None
+    donnees = construire_instantane(document, tiers, lignes, societe, date_generation)
+    contenu, empreinte = encoder_instantane(donnees)
+    if existant and existant.empreinte == empreinte:
+        return existant
+    if existant:
+        donnees['societe']['date_generation'] = _horodatage()
+        contenu, empreinte = encoder_instantane(donnees)
+
+    instantane, _ = modele_instantane.objects.update_or_create(**filtre, defaults={
+        'donnees': contenu,
+        'empreinte': empreinte,
+        'version_parametres': contenu['societe'].get('version') or '',
+    })
+    return instantane
+
+
+def restaurer_document(donnees, pk, modele, modele_tiers, champ_tiers, modele_ligne):
+    """
+    Reconstruit (document, lignes, societe) depuis un instantané
+
+    Les objets retournés ne sont pas enregistrés en base : ils ne servent
+    qu'au rendu (générateurs PDF et templates d'aperçu).
+    """
+    document = restaurer_objet(modele, donnees['entete'])
+    document.pk = pk
+    if donnees.get('tiers'):
+        setattr(document, champ_tiers, restaurer_objet(modele_tiers, donnees['tiers']))
+    lignes = [
+        restaurer_objet(modele_ligne, dict(zip(CHAMPS_LIGNE, ligne)))
+        for ligne in donnees['lignes']
+    ]
+    return document, lignes, donnees['societe']
+
+
+def appliquer_cache(response, empreinte):
+    """En-têtes de cache d'un rendu issu d'un instantané (revalidé par son ETag)"""
+    response['ETag'] = f'"{empreinte}"'
+    # L'instantané est refait si le document est corrigé : pas de mise en
+    # cache sans revalidation
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def non_modifie(request, empreinte):
+    """Indique si le client possède déjà la version `empreinte` du rendu"""
+    return request.headers.get('If-None-Match', '').strip() in (f'"{empreinte}"', f'W/"{empreinte}"')
@@ -0,0 +1,69 @@
+"""
+Mesure du temps de rendu PDF d'un devis selon le nombre de lignes
+
+Compare le rendu standard (un Table de Paragraph) et le mode grand
+document (tableau découpé aux sauts de page, texte brut quand il tient dans la cellule).
+Aucune donnée n'est écrite en base.
+
+Exemple :
+    python manage.py bench_pdf_lignes --tailles 100 1000 10000
+"""
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = "Compare le temps de rendu PDF d'un devis en mode standard et grand document"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tailles', type=int, nargs='+', default=[100, 1000, 10000],
+                            help="Nombres de lignes à tester")
+        parser.add_argument('--sans-standard', action='store_true',
+                            help="Ne mesure que le mode grand document")
+
+    def handle(self, *args, **options):
+        from clients.models import Client
+        from devis.models import Devis, LigneDevis
+        from devis.utils import generer_pdf_reportlab, get_societe_info
+
+        societe = get_societe_info()
+        client = Client(nom_complet="Client de test", telephone="+224 600 00 00 00")
+
+        for taille in options['tailles']:
+            lignes = [
+                LigneDevis(
+                    description=f"Article {i} - fourniture et pose de matériel électrique" + (
+                        " avec câblage complet et raccordement au tableau" if i % 5 == 0 else ""
+                    ),
+                    quantite=Decimal(i % 10 + 1),
+                    unite="unité",
+                    prix_unitaire_ht=Decimal(15000),
+                    montant_ht=Decimal(15000 * (i % 10 + 1)),
+                )
+                for i in range(taille)
+            ]
+            devis = Devis(
+                numero=f"BENCH-{taille}",
+                client=client,
+                objet="Banc d'essai rendu PDF",
+                date_creation=timezone.now(),
+                date_validite=timezone.now().date(),
+                montant_ht=sum(ligne.montant_ht for ligne in lignes),
+            )
+            devis.montant_tva = devis.montant_ht * devis.taux_tva / 100
+            devis.montant_ttc = devis.montant_ht + devis.montant_tva
+
+            modes = [('grand document', True)]
+            if not options['sans_standard']:
+                modes.insert(0, ('standard', False))
+
+            for libelle, grand_document in modes:
+                debut = time.perf_counter()
+                contenu = generer_pdf_reportlab(devis, lignes, societe, grand_document=grand_document)
+                duree = time.perf_counter() - debut
+                self.stdout.write(
+                    f"{taille:>6} lignes  {libelle:<15} {duree:8.2f} s  {len(contenu) / 1024:8.0f} Ko"
+                )
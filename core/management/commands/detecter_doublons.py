@@ -0,0 +1,72 @@
+"""
+Rapport des doublons probables parmi les clients ou les fournisseurs
+
+Les fiches ne sont comparées qu'à l'intérieur des blocs partageant une clé
+(téléphone, nom phonétique, domaine email ; voir core.doublons). Le
+rapport est affiché, ou écrit en CSV (séparateur « ; ») avec --fichier.
+
+Exemples :
+    python manage.py detecter_doublons client
+    python manage.py detecter_doublons fournisseur --seuil 0.8 --fichier doublons.csv
+"""
+import csv
+import time
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from core.doublons import SEUIL_DOUBLON, TAILLE_BLOC_MAX, detecter_doublons
+
+
+MODELES = {
+    'client': 'clients.Client',
+    'fournisseur': 'fournisseurs.Fournisseur',
+}
+
+
+class Command(BaseCommand):
+    help = "Liste les doublons probables parmi les clients ou les fournisseurs"
+
+    def add_arguments(self, parser):
+        parser.add_argument('type', choices=list(MODELES), help="Fiches à analyser")
+        parser.add_argument('--seuil', type=float, default=SEUIL_DOUBLON,
+                            help=f"Score minimal d'une paire, entre 0 et 1 ({SEUIL_DOUBLON} par défaut)")
+        parser.add_argument('--bloc-max', type=int, default=TAILLE_BLOC_MAX,
+                            help=f"Taille maximale d'un bloc comparé ({TAILLE_BLOC_MAX} par défaut)")
+        parser.add_argument('--actifs', action='store_true', help="Fiches actives uniquement")
+        parser.add_argument('--fichier', help="Écrit le rapport en CSV dans ce fichier")
+
+    def handle(self, *args, **options):
+        modele = apps.get_model(MODELES[options['type']])
+        queryset = modele.objects.all()
+        if options['actifs']:
+            queryset = queryset.filter(actif=True)
+
+        debut = time.perf_counter()
+        paires, blocs_ignores = detecter_doublons(queryset, options['seuil'], options['bloc_max'])
+        duree = time.perf_counter() - debut
+
+        if options['fichier']:
+            with open(options['fichier'], 'w', newline='', encoding='utf-8-sig') as fichier:
+                writer = csv.writer(fichier, delimiter=';')
+                writer.writerow(['Score', 'Raisons', 'ID 1', 'Nom 1', 'Email 1', 'ID 2', 'Nom 2', 'Email 2'])
+                for paire in paires:
+                    a, b = paire['a'], paire['b']
+                    writer.writerow([
+                        paire['score'], ', '.join(paire['raisons']),
+                        a['pk'], a['nom_complet'], a['email'] or '',
+                        b['pk'], b['nom_complet'], b['email'] or '',
+                    ])
+        else:
+            for paire in paires:
+                a, b = paire['a'], paire['b']
+                self.stdout.write(
+                    f"{paire['score']:.2f}  #{a['pk']} {a['nom_complet']}  <->  #{b['pk']} {b['nom_complet']}"
+                    f"  ({', '.join(paire['raisons'])})"
+                )
+
+        for cle, valeur, taille in blocs_ignores:
+            self.stdout.write(self.style.WARNING(f"Bloc non comparé : {cle} = « {valeur} » ({taille} fiches)"))
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(paires)} doublon(s) probable(s) parmi {queryset.count()} fiche(s) en {duree:.2f} s"
+        ))
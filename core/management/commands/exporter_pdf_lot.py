@@ -0,0 +1,96 @@
+"""
+Commande d'export par lot des devis ou factures en PDF
+
+Exemples :
+    python manage.py exporter_pdf_lot devis --date-debut 2025-01-01 --date-fin 2025-01-31
+    python manage.py exporter_pdf_lot factures --statut validee --format pdf --sortie factures.pdf
+
+En format pdf, la fusion garde en mémoire les pages du fichier en cours :
+au-delà de --par-fichier documents, la sortie est découpée en plusieurs
+fichiers numérotés (factures_001.pdf, factures_002.pdf...).
+"""
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core.export_pdf import (
+    EXPORT_PDF_FUSION_MAX, TYPES_DOCUMENTS, documents_filtres, rendre_documents, flux_zip, fusionner_pdf,
+    par_lots,
+)
+
+
+class Command(BaseCommand):
+    help = "Exporte en PDF (archive ZIP ou PDF fusionné) les devis ou factures filtrés"
+
+    def add_arguments(self, parser):
+        parser.add_argument('type_document', choices=TYPES_DOCUMENTS)
+        parser.add_argument('--format', dest='format_sortie', choices=['zip', 'pdf'], default='zip')
+        parser.add_argument('--sortie', help="Fichier de sortie (par défaut <type>_<horodatage>.<format>)")
+        parser.add_argument('--workers', type=int, default=None, help="Nombre de processus de rendu")
+        parser.add_argument('--par-fichier', dest='par_fichier', type=int, default=EXPORT_PDF_FUSION_MAX,
+                            help="Documents au plus par PDF fusionné (format pdf)")
+
+        # Mêmes filtres que les listes DevisListView / FactureListView
+        parser.add_argument('--statut')
+        parser.add_argument('--client', help="ID du client (devis)")
+        parser.add_argument('--fournisseur', help="ID du fournisseur (factures)")
+        parser.add_argument('--date-debut', dest='date_debut')
+        parser.add_argument('--date-fin', dest='date_fin')
+        parser.add_argument('--q', help="Recherche textuelle")
+
+    def handle(self, *args, **options):
+        type_document = options['type_document']
+        format_sortie = options['format_sortie']
+        sortie = options['sortie'] or (
+            f"{type_document}_{timezone.now().strftime('%Y%m%d_%H%M%S')}.{format_sortie}"
+        )
+
+        params = {
+            cle: options[cle]
+            for cle in ('statut', 'client', 'fournisseur', 'date_debut', 'date_fin', 'q')
+            if options.get(cle)
+        }
+        queryset = documents_filtres(type_document, params)
+        total = queryset.count()
+        if not total:
+            raise CommandError("Aucun document ne correspond aux filtres.")
+
+        self.stdout.write(f"Export de {total} document(s) vers {sortie}...")
+        documents = self._suivre(
+            rendre_documents(type_document, queryset.values_list('pk', flat=True), options['workers']),
+            total
+        )
+
+        if format_sortie == 'pdf':
+            fichiers = self._fusionner(documents, sortie, total, options['par_fichier'])
+        else:
+            with open(sortie, 'wb') as fichier:
+                for morceau in flux_zip(documents):
+                    fichier.write(morceau)
+            fichiers = [sortie]
+
+        self.stdout.write(self.style.SUCCESS(f"{total} document(s) exporté(s) dans {', '.join(fichiers)}"))
+
+    def _fusionner(self, documents, sortie, total, par_fichier):
+        """Écrit un PDF fusionné par tranche de `par_fichier` documents ; retourne les fichiers écrits"""
+        if par_fichier < 1:
+            raise CommandError("--par-fichier doit être au moins 1")
+        base, extension = os.path.splitext(sortie)
+        fichiers = []
+        for numero, lot in enumerate(par_lots(documents, par_fichier), 1):
+            nom = sortie if total <= par_fichier else f"{base}_{numero:03d}{extension}"
+            with open(nom, 'wb') as fichier:
+                try:
+                    fusionner_pdf(lot, fichier)
+                except RuntimeError as e:
+                    raise CommandError(str(e))
+            fichiers.append(nom)
+        return fichiers
+
+    def _suivre(self, documents, total):
+        """Affiche la progression toutes les 50 pièces"""
+        for numero, document in enumerate(documents, 1):
+            if numero % 50 == 0 or numero == total:
+                self.stdout.write(f"  {numero}/{total}")
+            yield document
@@ -0,0 +1,149 @@
+"""
+Génération de données fictives (essais de charge, démonstration)
+
+Crée des catégories, articles, clients, devis et lignes de devis aléatoires
+(reproductibles avec --graine). Les lignes sont produites au fil de l'eau
+et chargées par core.chargement (COPY sur PostgreSQL, bulk_create sinon) :
+plusieurs centaines de milliers de lignes se chargent en quelques minutes.
+Les objets créés sont ensuite indexés pour la recherche globale.
+
+Exemple :
+    python manage.py generer_donnees --clients 200000 --articles 50000 --devis 10000 --lignes 20
+"""
+import random
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from core.chargement import charger_en_masse
+from core.recherche import chiffres
+from core.recherche_globale import indexer
+from core.selection import invalider as invalider_selection
+
+
+PRENOMS = ['Mamadou', 'Fatoumata', 'Ibrahima', 'Aïssatou', 'Alpha', 'Mariama', 'Ousmane', 'Kadiatou', 'Sékou', 'Hawa']
+NOMS = ['Diallo', 'Barry', 'Bah', 'Camara', 'Soumah', 'Sylla', 'Touré', 'Keïta', 'Condé', 'Kouyaté']
+ACTIVITES = ['Électricité', 'Bâtiment', 'Transport', 'Informatique', 'Import-Export', 'Sécurité', 'Froid']
+CATEGORIES = ['Câblage', 'Éclairage', 'Protection', 'Appareillage', 'Climatisation', 'Réseau', 'Outillage']
+PRODUITS = ['Câble', 'Disjoncteur', 'Lampe LED', 'Prise', 'Interrupteur', 'Tableau', 'Climatiseur', 'Switch']
+UNITES = ['unité', 'm', 'lot', 'forfait']
+
+
+class Command(BaseCommand):
+    help = "Génère des données fictives en masse (articles, clients, devis et lignes)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--articles', type=int, default=1000, help="Nombre d'articles")
+        parser.add_argument('--clients', type=int, default=1000, help="Nombre de clients")
+        parser.add_argument('--devis', type=int, default=100, help="Nombre de devis")
+        parser.add_argument('--lignes', type=int, default=10, help="Nombre de lignes par devis")
+        parser.add_argument('--graine', type=int, default=0, help="Graine du générateur aléatoire")
+
+    def _mesurer(self, libelle, fonction, *args):
+        debut = time.perf_counter()
+        total = fonction(*args)
+        self.stdout.write(f"{libelle:<16} {total:>9} ligne(s)  {time.perf_counter() - debut:8.2f} s")
+        return total
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        from articles.autocompletion import invalider as invalider_designations
+        from articles.models import Categorie, Article
+        from clients.models import Client
+        from devis.models import Devis, LigneDevis
+
+        graine = options['graine']
+        debut = timezone.now()
+        lot = debut.strftime('%y%m%d%H%M%S')
+
+        Categorie.objects.bulk_create(
+            [Categorie(libelle=libelle) for libelle in CATEGORIES], ignore_conflicts=True
+        )
+        categories = list(Categorie.objects.filter(libelle__in=CATEGORIES).values_list('id', flat=True))
+
+        def articles():
+            alea = random.Random(graine)
+            for i in range(options['articles']):
+                yield Article(
+                    designation=f"{alea.choice(PRODUITS)} {lot}-{i}",
+                    categorie_id=alea.choice(categories),
+                )
+
+        def clients():
+            alea = random.Random(graine + 1)
+            for i in range(options['clients']):
+                entreprise = alea.random() < 0.3
+                if entreprise:
+                    nom = f"{alea.choice(ACTIVITES)} {alea.choice(NOMS)} SARL {lot}-{i}"
+                else:
+                    nom = f"{alea.choice(PRENOMS)} {alea.choice(NOMS)} {lot}-{i}"
+                telephone = f"+224 6{alea.randrange(10 ** 8):08d}"
+                client = Client(
+                    nom_complet=nom,
+                    type_client='entreprise' if entreprise else 'particulier',
+                    telephone=telephone,
+                    telephone_normalise=chiffres(telephone),
+                    email=f"client{lot}-{i}@exemple.gn" if alea.random() < 0.5 else None,
+                )
+                client.calculer_cles_doublons()
+                yield client
+
+        def lignes_du_devis(i):
+            alea = random.Random(f"{graine}-{i}")
+            for _ in range(options['lignes']):
+                quantite = Decimal(alea.randint(1, 50))
+                prix = Decimal(alea.randrange(1000, 500000, 500))
+                yield f"{alea.choice(PRODUITS)} - fourniture et pose", quantite, alea.choice(UNITES), prix
+
+        def devis(ids_clients):
+            alea = random.Random(graine + 2)
+            aujourd_hui = timezone.now().date()
+            for i in range(options['devis']):
+                montant_ht = sum((quantite * prix for _, quantite, _, prix in lignes_du_devis(i)), Decimal('0'))
+                montant_tva = montant_ht * Decimal('18.00') / 100
+                yield Devis(
+                    numero=f"G{lot}-{i:06d}",
+                    client_id=alea.choice(ids_clients),
+                    objet=f"Devis {alea.choice(ACTIVITES).lower()}",
+                    date_validite=aujourd_hui,
+                    montant_ht=montant_ht,
+                    montant_tva=montant_tva,
+                    montant_ttc=montant_ht + montant_tva,
+                )
+
+        def lignes(ids_devis):
+            for i, devis_id in enumerate(ids_devis):
+                for description, quantite, unite, prix in lignes_du_devis(i):
+                    yield LigneDevis(
+                        devis_id=devis_id,
+                        description=description,
+                        quantite=quantite,
+                        unite=unite,
+                        prix_unitaire_ht=prix,
+                        montant_ht=quantite * prix,
+                    )
+
+        self._mesurer('Articles', charger_en_masse, Article, articles())
+        transaction.on_commit(invalider_designations)
+        self._mesurer('Clients', charger_en_masse, Client, clients())
+        transaction.on_commit(lambda: invalider_selection(Client))
+
+        ids_clients = list(Client.objects.values_list('id', flat=True)) if options['devis'] else []
+        if options['devis'] and not ids_clients:
+            self.stdout.write(self.style.WARNING("Aucun client : les devis ne sont pas générés"))
+        elif options['devis']:
+            self._mesurer('Devis', charger_en_masse, Devis, devis(ids_clients))
+            # COPY ne renvoie pas les identifiants : ils sont relus par numéro
+            ids_devis = list(
+                Devis.objects.filter(numero__startswith=f"G{lot}-").order_by('numero').values_list('id', flat=True)
+            )
+            self._mesurer('Lignes de devis', charger_en_masse, LigneDevis, lignes(ids_devis))
+
+        # Chargés sans save() : indexés ici pour la recherche globale
+        for type_objet, modele in (('article', Article), ('client', Client), ('devis', Devis)):
+            self._mesurer(f'Index {type_objet}', indexer, type_objet, modele.objects.filter(date_modification__gte=debut))
+
+        self.stdout.write(self.style.SUCCESS("Données générées"))
@@ -0,0 +1,96 @@
+"""
+Génère les fichiers des rapports (ventes, clients, articles, financiers)
+
+C'est le worker des rapports : les vues ne font que mettre les rapports
+en attente (rapports.moteur.lancer_generation). Avec --continu, la
+commande tourne en permanence et traite les rapports en attente toutes
+les `--intervalle` secondes ; sans option, elle fait un seul passage qui
+reprend aussi les rapports en erreur (tâche planifiée, rattrapage).
+
+Chaque rapport est réservé avant génération : plusieurs workers peuvent
+tourner en parallèle sans générer deux fois le même rapport.
+
+Exemples :
+    python manage.py generer_rapports --continu --workers 2
+    python manage.py generer_rapports
+    python manage.py generer_rapports --type ventes --id 12
+    python manage.py generer_rapports --vider-cache
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from core.arriere_plan import boucle_worker, executer_en_parallele
+from rapports.agregats import invalider
+from rapports.moteur import MODELES_RAPPORTS, WORKERS_RAPPORTS, generer_rapport, reserver_rapport
+
+
+class Command(BaseCommand):
+    help = "Génère les fichiers des rapports en attente (ou d'un rapport donné)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--type', dest='type_rapport', choices=list(MODELES_RAPPORTS))
+        parser.add_argument('--id', dest='rapport_id', type=int, help="ID du rapport (avec --type)")
+        parser.add_argument('--inclure-en-cours', action='store_true',
+                            help="Reprend aussi les rapports restés 'en cours'")
+        parser.add_argument('--vider-cache', action='store_true',
+                            help="Supprime les résultats en cache et les agrégats mensuels avant génération")
+        parser.add_argument('--continu', action='store_true',
+                            help="Tourne en worker et traite les rapports en attente au fil de l'eau")
+        parser.add_argument('--intervalle', type=int, default=10,
+                            help="Secondes entre deux passages avec --continu (défaut : 10)")
+        parser.add_argument('--workers', type=int, default=WORKERS_RAPPORTS,
+                            help="Nombre maximal de rapports générés simultanément")
+
+    def handle(self, *args, **options):
+        type_rapport = options['type_rapport']
+        rapport_id = options['rapport_id']
+        if rapport_id and not type_rapport:
+            raise CommandError("--id nécessite --type")
+
+        if options['vider_cache']:
+            invalider(mois=None)
+            self.stdout.write("Cache des rapports et agrégats mensuels vidés")
+
+        if rapport_id:
+            rapport = MODELES_RAPPORTS[type_rapport].objects.filter(pk=rapport_id).first()
+            if rapport is None:
+                raise CommandError(f"Rapport {type_rapport} #{rapport_id} introuvable")
+            self.afficher(type_rapport, generer_rapport(rapport))
+            return
+
+        # En continu, un rapport en erreur n'est pas retenté à chaque passage
+        statuts = ['en_attente'] if options['continu'] else ['en_attente', 'erreur']
+        if options['inclure_en_cours']:
+            statuts.append('en_cours')
+        types = [type_rapport] if type_rapport else list(MODELES_RAPPORTS)
+
+        def passage():
+            a_generer = [
+                (cle, pk)
+                for cle in types
+                for pk in MODELES_RAPPORTS[cle].objects.filter(
+                    statut_generation__in=statuts
+                ).order_by('date_creation').values_list('pk', flat=True)
+            ]
+
+            def tache(element):
+                cle, pk = element
+                rapport = reserver_rapport(cle, pk, statuts)
+                return cle, generer_rapport(rapport) if rapport else None
+
+            total = 0
+            for cle, rapport in executer_en_parallele(tache, a_generer, options['workers'], 'rapports'):
+                if rapport is not None:
+                    self.afficher(cle, rapport)
+                    total += 1
+            if total or not options['continu']:
+                self.stdout.write(self.style.SUCCESS(f"{total} rapport(s) traité(s)"))
+
+        boucle_worker(passage, options['intervalle'], options['continu'])
+
+    def afficher(self, cle, rapport):
+        if rapport.statut_generation == 'termine':
+            self.stdout.write(
+                f"{cle} #{rapport.pk} : {rapport.nombre_lignes} lignes en {rapport.duree_generation:.2f} s"
+            )
+        else:
+            self.stdout.write(self.style.ERROR(f"{cle} #{rapport.pk} : {rapport.message_erreur}"))
@@ -0,0 +1,41 @@
+"""
+Reconstruction des documents de la recherche globale
+
+À lancer après la mise en place (migration de core) et après les
+chargements qui ne passent pas par save() : chargements en masse,
+commande generer_donnees, reprise de données. Les imports d'articles, de
+clients et de fournisseurs indexent eux-mêmes les lignes créées.
+
+Exemples :
+    python manage.py indexer_recherche
+    python manage.py indexer_recherche --type client --type devis
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.models import DocumentRecherche
+from core.recherche_globale import SOURCES, indexer, modele_source
+
+
+class Command(BaseCommand):
+    help = "Reconstruit les documents de la recherche globale"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--type', dest='types', action='append', choices=list(SOURCES),
+                            help="Type à indexer (répétable ; tous par défaut)")
+
+    def handle(self, *args, **options):
+        for type_objet in options['types'] or list(SOURCES):
+            debut = time.perf_counter()
+            total = indexer(type_objet)
+            # Documents d'objets supprimés sans signal (suppressions en masse)
+            existants = modele_source(type_objet)._default_manager.values('pk')
+            orphelins, _ = DocumentRecherche.objects.filter(type_objet=type_objet).exclude(
+                objet_id__in=existants
+            ).delete()
+            self.stdout.write(
+                f"{type_objet:<12} {total:>9} document(s)  {orphelins:>6} supprimé(s)  "
+                f"{time.perf_counter() - debut:8.2f} s"
+            )
+        self.stdout.write(self.style.SUCCESS("Index de recherche à jour"))
@@ -0,0 +1,67 @@
+"""
+Planificateur des rapports de ventes récurrents
+
+Génère, pendant la plage horaire creuse, les rapports récurrents dont la
+période est échue (voir rapports/planificateur.py). Sans option, la
+commande tourne en continu et vérifie les échéances toutes les
+`--intervalle` secondes ; avec --une-fois, elle fait un seul passage
+(tâche cron).
+
+Exemples :
+    python manage.py planifier_rapports
+    python manage.py planifier_rapports --une-fois --ignorer-horaire
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from rapports.planificateur import (
+    HEURES_CREUSES, acquerir_verrou, en_heures_creuses, executer_echeances,
+    identifiant_processus, liberer_verrou,
+)
+
+
+class Command(BaseCommand):
+    help = "Génère les rapports récurrents échus pendant les heures creuses"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--une-fois', action='store_true',
+                            help="Un seul passage puis arrêt")
+        parser.add_argument('--intervalle', type=int, default=300,
+                            help="Secondes entre deux passages (défaut : 300)")
+        parser.add_argument('--workers', type=int, default=None,
+                            help="Nombre maximal de rapports générés simultanément")
+        parser.add_argument('--ignorer-horaire', action='store_true',
+                            help="Ne pas attendre la plage horaire creuse")
+
+    def handle(self, *args, **options):
+        detenteur = identifiant_processus()
+        try:
+            while True:
+                self.passage(detenteur, options)
+                if options['une_fois']:
+                    break
+                time.sleep(options['intervalle'])
+        except KeyboardInterrupt:
+            self.stdout.write("Arrêt du planificateur")
+        finally:
+            liberer_verrou(detenteur)
+
+    def passage(self, detenteur, options):
+        """Un passage : vérifie l'horaire et le verrou, puis traite les échéances"""
+        if not options['ignorer_horaire'] and not en_heures_creuses():
+            if options['une_fois']:
+                debut, fin = HEURES_CREUSES
+                self.stdout.write(f"Hors plage horaire creuse ({debut}h-{fin}h), rien à faire")
+            return
+
+        if not acquerir_verrou(detenteur):
+            self.stdout.write(self.style.WARNING("Un autre planificateur est actif, passage ignoré"))
+            return
+
+        for execution in executer_echeances(workers=options['workers'], detenteur=detenteur):
+            libelle = f"{execution.modele.nom} ({execution.periode_debut} à {execution.periode_fin})"
+            if execution.statut == 'termine':
+                self.stdout.write(f"{libelle} : généré en {execution.duree:.2f} s")
+            else:
+                self.stdout.write(self.style.ERROR(f"{libelle} : {execution.message_erreur}"))
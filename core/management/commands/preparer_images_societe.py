@@ -0,0 +1,24 @@
+"""
+Génère les variantes optimisées des images de la société
+
+Les variantes sont normalement produites à l'enregistrement des
+informations de la société ; cette commande sert pour les images déjà en
+place et pour le cachet produit par process_cachet_signature.py.
+
+Exemple :
+    python manage.py preparer_images_societe
+"""
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = "Génère les variantes (PDF, web) du logo, des bandeaux et du cachet"
+
+    def handle(self, *args, **options):
+        from parametres.models import InformationsSociete
+        from parametres.images import generer_variantes_societe
+
+        generees = generer_variantes_societe(InformationsSociete.objects.first())
+        for chemin in generees:
+            self.stdout.write(f"  {chemin}")
+        self.stdout.write(self.style.SUCCESS(f"{len(generees)} variante(s) à jour"))
@@ -0,0 +1,50 @@
+"""
+Traitement des imports Excel en attente ou interrompus
+
+C'est le worker des imports : les vues ne font qu'enregistrer le fichier
+(import « en attente »). La commande traite ces imports ainsi que ceux
+interrompus en cours de traitement, à partir de leur dernier morceau
+validé (voir articles/imports.py). Avec --continu, elle tourne en
+permanence et vérifie les imports à traiter toutes les `--intervalle`
+secondes ; sans option, elle fait un seul passage (tâche cron).
+
+Exemples :
+    python manage.py reprendre_imports --continu
+    python manage.py reprendre_imports
+"""
+from django.core.management.base import BaseCommand
+
+from articles.imports import WORKERS_IMPORTS, imports_a_reprendre, reprendre
+from core.arriere_plan import boucle_worker, executer_en_parallele
+
+
+class Command(BaseCommand):
+    help = "Traite les imports Excel en attente ou interrompus"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--continu', action='store_true',
+                            help="Tourne en worker et traite les imports au fil de l'eau")
+        parser.add_argument('--intervalle', type=int, default=5,
+                            help="Secondes entre deux passages avec --continu (défaut : 5)")
+        parser.add_argument('--workers', type=int, default=WORKERS_IMPORTS,
+                            help="Nombre maximal d'imports traités simultanément")
+
+    def handle(self, *args, **options):
+        def passage():
+            a_traiter = list(imports_a_reprendre().values_list('pk', flat=True))
+            traites = 0
+            for job in executer_en_parallele(reprendre, a_traiter, options['workers'], 'imports'):
+                if job is None:
+                    continue
+                traites += 1
+                self.stdout.write(f"Import {job.pk} ({job.nom_fichier})")
+                if job.statut == 'termine':
+                    self.stdout.write(self.style.SUCCESS(
+                        f"  {job.crees} créé(s), {job.mis_a_jour} mis à jour, {job.nombre_erreurs} ligne(s) en erreur"
+                    ))
+                else:
+                    self.stdout.write(self.style.ERROR(f"  Erreur : {job.message_erreur}"))
+            if traites or not options['continu']:
+                self.stdout.write(f"{traites} import(s) traité(s)")
+
+        boucle_worker(passage, options['intervalle'], options['continu'])
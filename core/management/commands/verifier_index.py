@@ -0,0 +1,120 @@
+"""
+Vérifie que les requêtes des listes passent par leurs index (PostgreSQL)
+
+Chaque requête principale des listes de devis, de commandes, de clients
+et de factures (première page, page suivante par clé, filtres par statut,
+client ou fournisseur, devis en retard, lignes d'un document) est passée
+à EXPLAIN : la commande échoue si l'index attendu n'apparaît pas dans le
+plan.
+
+Par défaut, les parcours séquentiels sont découragés (enable_seqscan =
+off) pour vérifier que l'index est utilisable même sur une base presque
+vide ; avec --plan-reel, le plan est celui que le planificateur choisit
+sur les données et statistiques présentes (à lancer sur une copie de la
+production).
+
+Exemples :
+    python manage.py verifier_index
+    python manage.py verifier_index --plan-reel --details
+"""
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from core.pagination import filtrer_apres
+
+
+def _index_du_plan(noeud):
+    """Noms des index lus par un nœud du plan et ses descendants"""
+    noms = {noeud['Index Name']} if 'Index Name' in noeud else set()
+    for enfant in noeud.get('Plans', ()):
+        noms |= _index_du_plan(enfant)
+    return noms
+
+
+def index_utilises(queryset):
+    """Noms des index lus par le plan d'exécution du queryset (EXPLAIN, PostgreSQL)"""
+    plan = json.loads(queryset.explain(format='json'))
+    if isinstance(plan, list):
+        plan = plan[0]
+    return _index_du_plan(plan['Plan'])
+
+
+def requetes_listes():
+    """(libellé, queryset, index attendu) des requêtes principales des listes"""
+    from clients.models import Client
+    from commandes.models import BonCommande, LigneCommande
+    from devis.models import Devis, LigneDevis
+    from devis.utils import devis_en_retard
+    from factures.models import Facture
+
+    maintenant = timezone.now()
+    devis = Devis.objects.select_related('client')
+    commandes = BonCommande.objects.select_related('client', 'fournisseur', 'devis')
+    return [
+        ("Devis : première page", devis.order_by('-date_creation')[:20], 'devis_creation_idx'),
+        ("Devis : page suivante (par clé)",
+         filtrer_apres(devis, maintenant, 1).order_by('-date_creation', '-pk')[:20], 'devis_creation_idx'),
+        ("Devis : filtre par statut",
+         devis.filter(statut='envoye').order_by('-date_creation')[:20], 'devis_statut_creation_idx'),
+        ("Devis : filtre par client",
+         devis.filter(client_id=1).order_by('-date_creation')[:20], 'devis_client_creation_idx'),
+        ("Devis en retard", devis_en_retard(Devis.objects.all()), 'devis_ouverts_validite_idx'),
+        ("Lignes d'un devis", LigneDevis.objects.filter(devis_id=1), 'lignedevis_devis_idx'),
+        ("Commandes : première page", commandes.order_by('-date_creation')[:20], 'commande_creation_idx'),
+        ("Commandes : page suivante (par clé)",
+         filtrer_apres(commandes, maintenant.date(), 1).order_by('-date_creation', '-pk')[:20],
+         'commande_creation_idx'),
+        ("Commandes : filtre par statut",
+         commandes.filter(statut='confirme').order_by('-date_creation')[:20], 'commande_statut_creation_idx'),
+        ("Commandes : filtre par client",
+         commandes.filter(client_id=1).order_by('-date_creation')[:20], 'commande_client_creation_idx'),
+        ("Commandes : filtre par fournisseur",
+         commandes.filter(fournisseur_id=1).order_by('-date_creation')[:20], 'commande_fourn_creation_idx'),
+        ("Lignes d'une commande", LigneCommande.objects.filter(commande_id=1), 'lignecommande_cmd_idx'),
+        ("Clients : première page", Client.objects.order_by('-date_creation', '-id')[:10], 'client_creation_idx'),
+        ("Clients : page suivante (par clé)",
+         filtrer_apres(Client.objects.all(), maintenant, 1).order_by('-date_creation', '-pk')[:10],
+         'client_creation_idx'),
+        ("Factures : première page",
+         Facture.objects.order_by('-date_emission', '-id')[:20], 'facture_emission_idx'),
+        ("Factures : page suivante (par clé)",
+         filtrer_apres(Facture.objects.all(), maintenant.date(), 1, champ='date_emission')
+         .order_by('-date_emission', '-pk')[:20], 'facture_emission_idx'),
+    ]
+
+
+class Command(BaseCommand):
+    help = "Vérifie avec EXPLAIN que les requêtes des listes utilisent leurs index (PostgreSQL)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--plan-reel', action='store_true',
+                            help="Plan choisi sur les données présentes (sans décourager les parcours séquentiels)")
+        parser.add_argument('--details', action='store_true', help="Affiche le plan de chaque requête")
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError("Cette vérification nécessite PostgreSQL (plans d'exécution)")
+
+        echecs = []
+        with transaction.atomic():
+            if not options['plan_reel']:
+                with connection.cursor() as curseur:
+                    curseur.execute("SET LOCAL enable_seqscan = off")
+
+            for libelle, queryset, index in requetes_listes():
+                utilises = index_utilises(queryset)
+                if index in utilises:
+                    self.stdout.write(f"{self.style.SUCCESS('OK   ')} {libelle} ({index})")
+                else:
+                    echecs.append(libelle)
+                    lus = ', '.join(sorted(utilises)) or 'aucun index'
+                    self.stdout.write(f"{self.style.ERROR('ÉCHEC')} {libelle} : {index} attendu, {lus}")
+                if options['details']:
+                    self.stdout.write(queryset.explain())
+
+        if echecs:
+            raise CommandError(f"{len(echecs)} requête(s) sans leur index : {', '.join(echecs)}")
+        self.stdout.write(self.style.SUCCESS("Toutes les requêtes des listes utilisent leurs index"))
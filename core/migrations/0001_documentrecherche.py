@@ -0,0 +1,66 @@
+# Generated by Django 5.2.4 on 2026-10-19 07:06
+
+import django.contrib.postgres.search
+from django.db import migrations, models
+
+
+def configurer_postgres(apps, schema_editor):
+    """
+    Configuration plein texte « francais_sans_accents » (français + unaccent)
+    et index GIN du vecteur, sous PostgreSQL uniquement
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS unaccent')
+    schema_editor.execute("""
+        DO $$
+        BEGIN
+            IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = 'francais_sans_accents') THEN
+                CREATE TEXT SEARCH CONFIGURATION francais_sans_accents (COPY = french);
+                ALTER TEXT SEARCH CONFIGURATION francais_sans_accents
+                    ALTER MAPPING FOR hword, hword_part, word WITH unaccent, french_stem;
+            END IF;
+        END
+        $$
+    """)
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS core_documentrecherche_vecteur_gin '
+        'ON core_documentrecherche USING gin (vecteur)'
+    )
+
+
+def supprimer_configuration(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS core_documentrecherche_vecteur_gin')
+    schema_editor.execute('DROP TEXT SEARCH CONFIGURATION IF EXISTS francais_sans_accents')
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentRecherche',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('type_objet', models.CharField(choices=[('client', 'Client'), ('fournisseur', 'Fournisseur'), ('article', 'Article'), ('devis', 'Devis'), ('facture', 'Facture'), ('commande', 'Bon de commande')], max_length=20, verbose_name='Type')),
+                ('objet_id', models.PositiveBigIntegerField(verbose_name='Identifiant')),
+                ('titre', models.CharField(max_length=255, verbose_name='Titre')),
+                ('detail', models.CharField(blank=True, default='', max_length=255, verbose_name='Détail')),
+                ('contenu', models.TextField(blank=True, default='', verbose_name='Contenu indexé')),
+                ('vecteur', django.contrib.postgres.search.SearchVectorField(editable=False, null=True)),
+                ('date_maj', models.DateTimeField(auto_now=True, verbose_name='Dernière mise à jour')),
+            ],
+            options={
+                'verbose_name': 'Document de recherche',
+                'verbose_name_plural': 'Documents de recherche',
+                'constraints': [models.UniqueConstraint(fields=('type_objet', 'objet_id'), name='document_recherche_unique')],
+            },
+        ),
+        migrations.RunPython(configurer_postgres, supprimer_configuration),
+    ]
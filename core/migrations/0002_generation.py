@@ -0,0 +1,24 @@
+# Generated by Django 5.2.4 on 2026-10-19 07:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_documentrecherche'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Generation',
+            fields=[
+                ('nom', models.CharField(max_length=100, primary_key=True, serialize=False, verbose_name='Nom')),
+                ('valeur', models.BigIntegerField(verbose_name='Valeur')),
+            ],
+            options={
+                'verbose_name': 'Génération',
+                'verbose_name_plural': 'Générations',
+            },
+        ),
+    ]
@@ -1,3 +1,58 @@
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 
-# Create your models here.
+
+class DocumentRecherche(models.Model):
+    """
+    Document de la recherche globale (un par client, fournisseur, article,
+    devis, facture ou bon de commande), tenu à jour par core/signals.py
+
+    Le vecteur plein texte n'est renseigné que sous PostgreSQL
+    (voir core/recherche_globale.py).
+    """
+
+    TYPE_CHOICES = [
+        ('client', 'Client'),
+        ('fournisseur', 'Fournisseur'),
+        ('article', 'Article'),
+        ('devis', 'Devis'),
+        ('facture', 'Facture'),
+        ('commande', 'Bon de commande'),
+    ]
+
+    type_objet = models.CharField(max_length=20, choices=TYPE_CHOICES, verbose_name="Type")
+    objet_id = models.PositiveBigIntegerField(verbose_name="Identifiant")
+    titre = models.CharField(max_length=255, verbose_name="Titre")
+    detail = models.CharField(max_length=255, blank=True, default='', verbose_name="Détail")
+    contenu = models.TextField(blank=True, default='', verbose_name="Contenu indexé")
+    vecteur = SearchVectorField(null=True, editable=False)
+    date_maj = models.DateTimeField(auto_now=True, verbose_name="Dernière mise à jour")
+
+    class Meta:
+        verbose_name = "Document de recherche"
+        verbose_name_plural = "Documents de recherche"
+        constraints = [
+            models.UniqueConstraint(fields=['type_objet', 'objet_id'], name='document_recherche_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_type_objet_display()} - {self.titre}"
+
+
+class Generation(models.Model):
+    """
+    Numéro de génération d'un contenu mis en cache (voir core/generations.py)
+
+    Gardé en base pour être commun à tous les processus (workers, imports,
+    planificateur de rapports).
+    """
+
+    nom = models.CharField(max_length=100, primary_key=True, verbose_name="Nom")
+    valeur = models.BigIntegerField(verbose_name="Valeur")
+
+    class Meta:
+        verbose_name = "Génération"
+        verbose_name_plural = "Générations"
+
+    def __str__(self):
+        return f"{self.nom} : {self.valeur}"
@@ -0,0 +1,220 @@
+"""
+Pagination par clé (keyset) des listes et comptages estimés
+
+Les listes (devis, factures, commandes, clients) paginent par défaut avec
+OFFSET et un COUNT(*) complet : la base parcourt et jette toutes les
+lignes des pages précédentes, puis recompte la table à chaque affichage.
+
+Avec PAGINATION_PAR_CLE, elles sont triées sur (date_creation, id)
+décroissants (date_emission pour les factures, comme en pagination
+classique), chaque liste ayant un index sur ce couple, et chaque page est lue à partir d'un curseur (valeurs de la
+dernière ligne affichée) passé dans l'URL : `apres` pour la page
+suivante, `avant` pour la précédente. Une page coûte une lecture d'index,
+quel que soit son rang, et un lien reste stable si des lignes sont
+ajoutées en tête de liste entre deux clics. Un lien à curseur reste
+valable si le réglage est désactivé.
+
+Avec PAGINATION_COMPTAGE_ESTIME, les totaux des en-têtes de liste sont
+lus dans les statistiques du planificateur de PostgreSQL (pg_class pour
+une table entière, estimation d'EXPLAIN pour une liste filtrée) au lieu
+d'un COUNT(*) ; un total estimé sous SEUIL_COMPTAGE_EXACT est recompté
+exactement. Les autres bases comptent toujours exactement.
+"""
+import base64
+import json
+import logging
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import DatabaseError, connections
+from django.db.models import Q
+
+
+logger = logging.getLogger(__name__)
+
+PAGINATION_PAR_CLE = getattr(settings, 'PAGINATION_PAR_CLE', False)
+COMPTAGE_ESTIME = getattr(settings, 'PAGINATION_COMPTAGE_ESTIME', False)
+
+SEUIL_COMPTAGE_EXACT = 1000
+
+CHAMP_PAGINATION = 'date_creation'
+
+
+# ---------------------------------------------------------------------------
+# Comptage
+# ---------------------------------------------------------------------------
+
+def _estimation_postgresql(queryset):
+    """Nombre de lignes estimé par le planificateur, None s'il est inconnu"""
+    connexion = connections[queryset.db]
+    with connexion.cursor() as curseur:
+        if not queryset.query.where and not queryset.query.distinct:
+            # Table entière : estimation tenue à jour par ANALYZE / autovacuum
+            curseur.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                [connexion.ops.quote_name(queryset.model._meta.db_table)],
+            )
+            ligne = curseur.fetchone()
+            # -1 : table jamais analysée
+            return ligne[0] if ligne and ligne[0] >= 0 else None
+
+        sql, params = queryset.order_by().values('pk').query.sql_with_params()
+        curseur.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = curseur.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
+
+
+def compter(queryset, estime=None):
+    """
+    Nombre de lignes du queryset, estimé si le mode le permet
+
+    `estime` vaut par défaut PAGINATION_COMPTAGE_ESTIME.
+    """
+    if estime is None:
+        estime = COMPTAGE_ESTIME
+    if estime and connections[queryset.db].vendor == 'postgresql':
+        try:
+            estimation = _estimation_postgresql(queryset)
+        except DatabaseError as e:
+            logger.warning("Estimation du nombre de lignes impossible : %s", e)
+            estimation = None
+        if estimation is not None and estimation >= SEUIL_COMPTAGE_EXACT:
+            return estimation
+    return queryset.count()
+
+
+# ---------------------------------------------------------------------------
+# Pagination par clé
+# ---------------------------------------------------------------------------
+
+def pagination_par_cle(request):
+    """Pagination par clé pour cette requête (réglage ou lien à curseur)"""
+    return PAGINATION_PAR_CLE or 'apres' in request.GET or 'avant' in request.GET
+
+
+def _encoder_curseur(objet, champ):
+    valeur = getattr(objet, champ)
+    donnees = json.dumps([valeur.isoformat(), objet.pk]).encode('utf-8')
+    return base64.urlsafe_b64encode(donnees).decode('ascii')
+
+
+def _decoder_curseur(curseur, modele, champ):
+    """(valeur, pk) du curseur, None s'il est absent ou illisible"""
+    if not curseur:
+        return None
+    try:
+        valeur, pk = json.loads(base64.urlsafe_b64decode(curseur.encode('ascii')))
+        valeur = modele._meta.get_field(champ).to_python(valeur)
+        return (valeur, int(pk)) if valeur is not None else None
+    except (ValueError, TypeError, ValidationError):
+        return None
+
+
+class PageParCle:
+    """
+    Page d'une liste paginée par clé
+
+    S'itère comme une page de Paginator ; `lien_suivant`, `lien_precedent`
+    et `lien_premiere` sont les chaînes de requête des pages voisines
+    (autres paramètres conservés), `total` le nombre de lignes de la liste
+    en mode comptage estimé (None sinon).
+    """
+
+    par_cle = True
+
+    def __init__(self, object_list, has_previous, has_next, liens, total=None):
+        self.object_list = object_list
+        self._has_previous = has_previous
+        self._has_next = has_next
+        self.lien_precedent, self.lien_suivant, self.lien_premiere = liens
+        self.total = total
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __repr__(self):
+        return f'<PageParCle ({len(self)} objets)>'
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_next(self):
+        return self._has_next
+
+    def has_other_pages(self):
+        return self._has_previous or self._has_next
+
+
+def _lien(request, **curseurs):
+    parametres = request.GET.copy()
+    for nom in ('page', 'apres', 'avant'):
+        parametres.pop(nom, None)
+    for nom, valeur in curseurs.items():
+        parametres[nom] = valeur
+    return f'?{parametres.urlencode()}'
+
+
+def filtrer_apres(queryset, valeur, pk, champ=CHAMP_PAGINATION):
+    """Objets qui suivent (valeur, pk) dans l'ordre décroissant de (champ, id)"""
+    # La borne large (lte) seule porte sur l'index : le planificateur
+    # démarre le parcours au curseur et n'écarte que les égalités de date
+    return queryset.filter(Q(**{f'{champ}__lte': valeur}) & (Q(**{f'{champ}__lt': valeur}) | Q(pk__lt=pk)))
+
+
+def paginer_par_cle(request, queryset, taille, champ=CHAMP_PAGINATION):
+    """
+    Page de `taille` objets du queryset, triés sur (champ, id) décroissants
+
+    La position est lue dans les paramètres `apres` (page suivante) ou
+    `avant` (page précédente) de la requête ; sans curseur valide, la
+    première page est renvoyée.
+    """
+    modele = queryset.model
+    total = compter(queryset) if COMPTAGE_ESTIME else None
+    apres = _decoder_curseur(request.GET.get('apres'), modele, champ)
+    avant = None if apres else _decoder_curseur(request.GET.get('avant'), modele, champ)
+
+    if avant:
+        # Page précédente : même borne dans l'autre sens, puis remise dans l'ordre
+        valeur, pk = avant
+        objets = list(
+            queryset.filter(Q(**{f'{champ}__gte': valeur}) & (Q(**{f'{champ}__gt': valeur}) | Q(pk__gt=pk)))
+            .order_by(champ, 'pk')[:taille + 1]
+        )
+        has_previous, has_next = len(objets) > taille, True
+        objets = objets[:taille][::-1]
+    else:
+        if apres:
+            queryset = filtrer_apres(queryset, *apres, champ=champ)
+        objets = list(queryset.order_by(f'-{champ}', '-pk')[:taille + 1])
+        has_previous, has_next = apres is not None, len(objets) > taille
+        objets = objets[:taille]
+
+    liens = (
+        _lien(request, avant=_encoder_curseur(objets[0], champ)) if has_previous and objets else _lien(request),
+        _lien(request, apres=_encoder_curseur(objets[-1], champ)) if has_next and objets else None,
+        _lien(request),
+    )
+    return PageParCle(objets, has_previous, has_next, liens, total)
+
+
+class PaginationParCleMixin:
+    """
+    Pagination par clé pour une ListView (si pagination_par_cle())
+
+    Le template reçoit la PageParCle dans `page_obj` (page_obj.par_cle
+    vrai) et ses objets dans la liste habituelle.
+    """
+
+    champ_pagination = CHAMP_PAGINATION
+
+    def paginate_queryset(self, queryset, page_size):
+        if not pagination_par_cle(self.request):
+            return super().paginate_queryset(queryset, page_size)
+        page = paginer_par_cle(self.request, queryset, page_size, self.champ_pagination)
+        return None, page, page.object_list, page.has_other_pages()
@@ -0,0 +1,236 @@
+"""
+Briques communes aux générateurs PDF ReportLab (devis, factures, commandes)
+"""
+import tempfile
+from itertools import islice
+from xml.sax.saxutils import escape
+
+from reportlab.platypus import Flowable
+
+
+# Au-delà de ce nombre de lignes, le tableau passe en mode "grand document"
+SEUIL_GRAND_DOCUMENT = 150
+
+# Lignes mises en page d'avance sur la première page d'un TableauPagine
+# (la fenêtre est ensuite ajustée page par page)
+LIGNES_FENETRE = 64
+
+# Taille au-delà de laquelle un PDF en cours de génération bascule sur disque
+SEUIL_MEMOIRE_PDF = 2 * 1024 * 1024
+
+# Champs lus pour chaque ligne de document (LigneDevis, LigneFacture, LigneCommande)
+CHAMPS_LIGNE = ('description', 'quantite', 'unite', 'prix_unitaire_ht', 'montant_ht')
+
+
+def compter_lignes(lignes):
+    """Compte les lignes sans charger un queryset non évalué"""
+    from django.db.models import QuerySet
+    if isinstance(lignes, QuerySet):
+        return lignes.count()
+    return len(lignes)
+
+
+def est_grand_document(nombre_lignes, grand_document=None):
+    """Indique si le mode grand document doit être utilisé (forçable)"""
+    if grand_document is not None:
+        return grand_document
+    return nombre_lignes > SEUIL_GRAND_DOCUMENT
+
+
+def valeurs_lignes(lignes):
+    """
+    Itère sur les lignes sous forme de tuples (description, quantite, unite, prix, montant)
+
+    Un queryset est parcouru via values_list().iterator() pour ne pas
+    instancier des milliers d'objets modèle.
+    """
+    from django.db.models import QuerySet
+    if isinstance(lignes, QuerySet):
+        return lignes.values_list(*CHAMPS_LIGNE).iterator(chunk_size=2000)
+    return (tuple(getattr(ligne, champ) for champ in CHAMPS_LIGNE) for ligne in lignes)
+
+
+def cellule(texte, style, largeur, police='Helvetica', taille=10):
+    """
+    Retourne le texte brut s'il tient dans la colonne, sinon un Paragraph
+
+    Un Paragraph coûte cher à mettre en page : on ne l'utilise que pour
+    les cellules qui doivent réellement passer à la ligne. Le texte brut
+    est dessiné avec la police du tableau (FONTNAME / FONTSIZE), c'est
+    donc elle qui sert à le mesurer, et non celle de `style`.
+    """
+    from reportlab.pdfbase.pdfmetrics import stringWidth
+    from reportlab.platypus import Paragraph
+
+    texte = '' if texte is None else str(texte)
+    if stringWidth(texte, police, taille) <= largeur:
+        return texte
+    return Paragraph(escape(texte), style)
+
+
+class LignesTamponnees:
+    """
+    Lignes d'un itérable lues à la demande par les pages d'un TableauPagine
+
+    Seules les lignes de la fenêtre en cours de mise en page sont gardées
+    en mémoire : celles déjà placées sur une page précédente sont libérées.
+    """
+
+    def __init__(self, lignes):
+        self._source = iter(lignes)
+        self._tampon = []
+        self._decalage = 0  # index de la première ligne du tampon
+        self._epuise = False
+
+    def _charger(self, fin):
+        manquantes = fin - (self._decalage + len(self._tampon))
+        if manquantes > 0 and not self._epuise:
+            lues = list(islice(self._source, manquantes))
+            self._tampon.extend(lues)
+            self._epuise = len(lues) < manquantes
+
+    def tranche(self, debut, fin):
+        """Lignes [debut:fin] (moins en fin de source)"""
+        self._charger(fin)
+        return self._tampon[debut - self._decalage:fin - self._decalage]
+
+    def terminees(self, index):
+        """Indique qu'il n'y a plus de ligne à partir de `index`"""
+        self._charger(index + 1)
+        return index >= self._decalage + len(self._tampon)
+
+    def liberer(self, debut):
+        """Oublie les lignes avant `debut` (placées sur les pages précédentes)"""
+        if debut > self._decalage:
+            del self._tampon[:debut - self._decalage]
+            self._decalage = debut
+
+
+class TableauPagine(Flowable):
+    """
+    Grand tableau découpé aux seuls sauts de page, en-tête répété
+
+    Un LongTable unique recalcule toutes les lignes restantes à chaque
+    page ; ici, seule une fenêtre de lignes un peu plus haute que la place
+    disponible est mise en page, puis coupée par Table.split à l'endroit
+    exact du saut de page. Le coût reste linéaire en nombre de lignes et
+    l'en-tête n'apparaît qu'en haut de chaque page.
+
+    Les lignes (LignesTamponnees) sont lues au fil des pages : un rapport
+    de plusieurs centaines de milliers de lignes n'est jamais chargé en
+    entier en mémoire.
+    """
+
+    def __init__(self, en_tete, lignes, col_widths, style_commandes,
+                 pied=None, style_pied=None, debut=0, fenetre=LIGNES_FENETRE):
+        super().__init__()
+        self.en_tete = en_tete
+        self.lignes = lignes
+        self.col_widths = col_widths
+        self.style_commandes = style_commandes
+        self.pied = pied
+        self.style_pied = style_pied
+        self.debut = debut
+        self.fenetre = fenetre
+        self._table = None
+        self._place = None
+
+    def _construire(self, fin):
+        """LongTable de l'en-tête et des lignes [debut:fin] (avec le pied en fin de tableau)"""
+        from reportlab.platypus import LongTable, TableStyle
+
+        donnees = [self.en_tete] + self.lignes.tranche(self.debut, fin)
+        avec_pied = self.pied is not None and self.lignes.terminees(fin)
+        if avec_pied:
+            donnees.append(self.pied)
+        table = LongTable(donnees, colWidths=self.col_widths, repeatRows=1)
+        table.setStyle(TableStyle(self.style_commandes))
+        if avec_pied and self.style_pied:
+            table.setStyle(TableStyle(self.style_pied))
+        return table
+
+    def wrap(self, availWidth, availHeight):
+        if self._table is not None and self._place == (availWidth, availHeight):
+            return self.width, self.height
+        self._place = (availWidth, availHeight)
+        # Cette partie n'est mise en page qu'une fois la précédente placée
+        self.lignes.liberer(self.debut)
+        # Fenêtre agrandie jusqu'à dépasser la place disponible (ou tout contenir)
+        while True:
+            fin = self.debut + self.fenetre
+            self._table = self._construire(fin)
+            largeur, hauteur = self._table.wrap(availWidth, availHeight)
+            if hauteur > availHeight or self.lignes.terminees(fin):
+                self.width, self.height = largeur, hauteur
+                return largeur, hauteur
+            self.fenetre *= 2
+
+    def split(self, availWidth, availHeight):
+        self.wrap(availWidth, availHeight)
+        parties = self._table.split(availWidth, availHeight)
+        if len(parties) < 2:
+            return parties
+        # Lignes de données placées sur cette page (en-tête exclu)
+        placees = len(parties[0]._cellvalues) - 1
+        premiere = parties[0]
+        if self.pied is not None and placees > 1 and self.lignes.terminees(self.debut + placees):
+            # Le pied ne se retrouve jamais seul sous l'en-tête : la dernière
+            # ligne passe avec lui sur la page suivante
+            placees -= 1
+            premiere = self._construire(self.debut + placees)
+        # Fenêtre de la page suivante ajustée sur le remplissage de celle-ci
+        fenetre = max(placees + placees // 4 + 2, 8)
+        return [premiere, TableauPagine(
+            self.en_tete, self.lignes, self.col_widths, self.style_commandes,
+            self.pied, self.style_pied, self.debut + placees, fenetre
+        )]
+
+    def drawOn(self, canvas, x, y, _sW=0):
+        self._table.drawOn(canvas, x, y, _sW)
+
+
+def tableau_pagine(en_tete, lignes, col_widths, style_commandes, pied=None, style_pied=None):
+    """
+    Construit le tableau d'un grand document (voir TableauPagine)
+
+    `lignes` peut être un générateur : il est consommé page par page. La
+    ligne de pied (ex. TOTAL) est ajoutée en fin de tableau avec ses
+    propres commandes de style.
+    """
+    return TableauPagine(en_tete, LignesTamponnees(lignes), col_widths, style_commandes, pied, style_pied)
+
+
+def tampon_pdf():
+    """Fichier temporaire recevant le PDF : en mémoire, puis sur disque au-delà du seuil"""
+    return tempfile.SpooledTemporaryFile(max_size=SEUIL_MEMOIRE_PDF)
+
+
+def terminer_pdf(buffer, fichier=False):
+    """
+    Retourne le PDF généré dans `buffer`
+
+    Avec fichier=True, le fichier est rembobiné et renvoyé tel quel (à
+    passer à reponse_pdf) ; sinon son contenu est renvoyé en bytes.
+    """
+    buffer.seek(0)
+    if fichier:
+        return buffer
+    pdf_content = buffer.read()
+    buffer.close()
+    return pdf_content
+
+
+def reponse_pdf(fichier, nom_fichier, mode='inline'):
+    """
+    Réponse HTTP diffusant un PDF généré en mode fichier
+
+    FileResponse lit le fichier par morceaux, renseigne Content-Length et
+    ferme le fichier temporaire en fin de réponse.
+    """
+    from django.http import FileResponse
+    return FileResponse(
+        fichier,
+        as_attachment=(mode == 'attachment'),
+        filename=nom_fichier,
+        content_type='application/pdf'
+    )
@@ -0,0 +1,123 @@
+"""
+Recherche par sous-chaîne dans les listes (clients, fournisseurs, devis, factures)
+
+Sur PostgreSQL, `champ__icontains` produit `UPPER(champ::text) LIKE
+UPPER('%terme%')` : un index B-tree ne sert pas, mais un index GIN
+trigrammes (extension pg_trgm) sur UPPER(champ) si. Ces index sont créés
+par les migrations avec l'opération IndexTrigrammes, sur PostgreSQL
+uniquement. Les champs d'une même table sont combinés par OU (BitmapOr
+sur les index) ; chaque champ d'une table liée (ex. client__nom_complet)
+forme une branche séparée, réunie aux autres par UNION, pour que chaque
+table utilise ses propres index.
+
+Sur les autres moteurs (SQLite en développement), la recherche reste un
+simple OU de `icontains`, sans index.
+
+Les termes de moins de 3 caractères ne produisent pas de trigramme : la
+recherche reste correcte mais parcourt tout l'index.
+"""
+import re
+
+from django.db import connections
+from django.db.migrations.operations.base import Operation
+from django.db.models import Q
+
+
+_NON_CHIFFRES = re.compile(r'[^\d]')
+
+
+def chiffres(valeur):
+    """
+    Chiffres seuls d'une valeur (téléphone saisi ou recherché, colonne telephone_normalise)
+
+    Règle unique de normalisation des téléphones : Client.save,
+    Fournisseur.save, imports (normaliser_telephones) et clés de doublons.
+    """
+    if not valeur:
+        return ''
+    return _NON_CHIFFRES.sub('', valeur)
+
+
+def rechercher(queryset, termes):
+    """
+    Filtre `queryset` sur les lignes dont au moins un champ contient son terme
+
+    `termes` associe un chemin de champ (éventuellement à travers une
+    relation) au terme recherché ; les termes vides sont ignorés.
+    """
+    termes = {champ: terme for champ, terme in termes.items() if terme}
+    if not termes:
+        return queryset
+
+    directs = Q()
+    lies = []
+    for champ, terme in termes.items():
+        condition = Q(**{f'{champ}__icontains': terme})
+        if '__' in champ:
+            lies.append(condition)
+        else:
+            directs |= condition
+
+    if not lies or connections[queryset.db].vendor != 'postgresql':
+        for condition in lies:
+            directs |= condition
+        return queryset.filter(directs)
+
+    base = queryset.model._base_manager.using(queryset.db).order_by()
+    branches = [base.filter(condition).values('pk') for condition in lies]
+    if directs:
+        branches.insert(0, base.filter(directs).values('pk'))
+    return queryset.filter(pk__in=branches[0].union(*branches[1:]))
+
+
+def _nom_index(table, colonne):
+    # Les identifiants PostgreSQL sont limités à 63 caractères
+    return f'{table}_{colonne}_trgm'[:63]
+
+
+class IndexTrigrammes(Operation):
+    """
+    Opération de migration : index GIN trigrammes sur UPPER(champ)
+
+    Active l'extension pg_trgm si nécessaire. Sans effet hors PostgreSQL ;
+    les index ne font pas partie de l'état des modèles.
+    """
+
+    reversible = True
+
+    def __init__(self, model_name, champs):
+        self.model_name = model_name
+        self.champs = champs
+
+    def state_forwards(self, app_label, state):
+        pass
+
+    def _index(self, app_label, state):
+        model = state.apps.get_model(app_label, self.model_name)
+        table = model._meta.db_table
+        for champ in self.champs:
+            colonne = model._meta.get_field(champ).column
+            yield table, colonne, _nom_index(table, colonne)
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        qn = schema_editor.quote_name
+        schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        for table, colonne, nom in self._index(app_label, to_state):
+            schema_editor.execute(
+                f'CREATE INDEX IF NOT EXISTS {qn(nom)} ON {qn(table)} USING gin (UPPER({qn(colonne)}) gin_trgm_ops)'
+            )
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        for _, _, nom in self._index(app_label, from_state):
+            schema_editor.execute(f'DROP INDEX IF EXISTS {schema_editor.quote_name(nom)}')
+
+    def describe(self):
+        return f"Index trigrammes sur {self.model_name} ({', '.join(self.champs)})"
+
+    @property
+    def migration_name_fragment(self):
+        return f'{self.model_name.lower()}_trgm'
@@ -0,0 +1,255 @@
+"""
+Recherche globale (clients, fournisseurs, articles, devis, factures, commandes)
+
+Chaque objet recherché a un DocumentRecherche (titre, détail, contenu),
+tenu à jour par les signaux de core/signals.py et reconstruit en masse par
+la commande `indexer_recherche` (imports, chargements en masse).
+
+Sous PostgreSQL, le document porte un vecteur plein texte pondéré (titre A,
+détail B, contenu C) calculé avec la configuration francais_sans_accents
+(français + unaccent, créée par la migration de core) et indexé en GIN :
+la recherche est une seule requête `vecteur @@ requête` classée par
+ts_rank, limitée aux types que l'utilisateur peut consulter. Sur les
+autres moteurs, chaque mot doit figurer dans le titre, le détail ou le
+contenu (icontains), les résultats les plus récents en premier.
+"""
+import re
+from urllib.parse import urlencode
+
+from django.apps import apps
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.urls import reverse
+
+from utilisateurs.utils import user_has_permission
+from .models import DocumentRecherche
+
+
+CONFIG_RECHERCHE = 'francais_sans_accents'
+
+# Objets indexés par requête lors d'une reconstruction
+TAILLE_MORCEAU = 1000
+
+NOMBRE_RESULTATS = 20
+
+_MOTS = re.compile(r'\w+')
+
+VECTEUR = (
+    SearchVector('titre', weight='A', config=CONFIG_RECHERCHE)
+    + SearchVector('detail', weight='B', config=CONFIG_RECHERCHE)
+    + SearchVector('contenu', weight='C', config=CONFIG_RECHERCHE)
+)
+
+
+def _joindre(*valeurs):
+    return ' · '.join(str(valeur) for valeur in valeurs if valeur)
+
+
+# ---------------------------------------------------------------------------
+# Types indexés : modèle, permission de consultation, relations à charger,
+# document (titre, détail, contenu) d'un objet et URL d'un résultat
+# ---------------------------------------------------------------------------
+
+SOURCES = {
+    'client': {
+        'modele': 'clients.Client',
+        'permission': 'clients.view',
+        'select_related': (),
+        'document': lambda client: (
+            client.nom_complet,
+            _joindre(client.telephone.strip(), client.email),
+            _joindre(client.get_type_client_display(), client.adresse, client.pays, client.telephone_normalise),
+        ),
+        'url': lambda pk, titre: reverse('clients:client_detail', args=[pk]),
+    },
+    'fournisseur': {
+        'modele': 'fournisseurs.Fournisseur',
+        'permission': 'fournisseurs.view',
+        'select_related': (),
+        'document': lambda fournisseur: (
+            fournisseur.nom_complet,
+            _joindre(fournisseur.contact_principal, fournisseur.telephone.strip(), fournisseur.email),
+            _joindre(
+                fournisseur.get_type_fournisseur_display(), fournisseur.adresse, fournisseur.ville,
+                fournisseur.pays, fournisseur.telephone_normalise,
+            ),
+        ),
+        'url': lambda pk, titre: reverse('fournisseurs:fournisseur_detail', args=[pk]),
+    },
+    'article': {
+        'modele': 'articles.Article',
+        'permission': 'articles.view',
+        'select_related': ('categorie',),
+        'document': lambda article: (article.designation, article.categorie.libelle, ''),
+        # Pas de page de détail : la liste des articles filtrée sur la désignation
+        'url': lambda pk, titre: reverse('articles:article_list') + '?' + urlencode({'search': titre}),
+    },
+    'devis': {
+        'modele': 'devis.Devis',
+        'permission': 'devis.view',
+        'select_related': ('client',),
+        'document': lambda devis: (
+            f"Devis {devis.numero}",
+            _joindre(devis.client.nom_complet, devis.objet),
+            _joindre(devis.get_statut_display(), devis.description, devis.notes),
+        ),
+        'url': lambda pk, titre: reverse('devis:devis_detail', args=[pk]),
+    },
+    'facture': {
+        'modele': 'factures.Facture',
+        'permission': 'factures.view',
+        'select_related': ('fournisseur',),
+        'document': lambda facture: (
+            f"Facture {facture.numero}",
+            _joindre(facture.fournisseur.nom_complet, facture.objet),
+            _joindre(facture.get_statut_display(), facture.description),
+        ),
+        'url': lambda pk, titre: reverse('factures:facture_detail', args=[pk]),
+    },
+    'commande': {
+        'modele': 'commandes.BonCommande',
+        'permission': 'commandes.view',
+        'select_related': ('client', 'fournisseur'),
+        'document': lambda commande: (
+            f"Commande {commande.numero}",
+            _joindre(
+                commande.client.nom_complet if commande.client else None,
+                commande.fournisseur.nom_complet if commande.fournisseur else None,
+                commande.objet,
+            ),
+            _joindre(commande.get_statut_display(), commande.description),
+        ),
+        'url': lambda pk, titre: reverse('commandes:commande_detail', args=[pk]),
+    },
+}
+
+
+def modele_source(type_objet):
+    return apps.get_model(SOURCES[type_objet]['modele'])
+
+
+def type_du_modele(modele):
+    """Type indexé correspondant à un modèle (None s'il n'est pas indexé)"""
+    label = modele._meta.label
+    return next((type_objet for type_objet, source in SOURCES.items() if source['modele'] == label), None)
+
+
+# ---------------------------------------------------------------------------
+# Indexation
+# ---------------------------------------------------------------------------
+
+def _indexer_morceau(type_objet, objets):
+    document = SOURCES[type_objet]['document']
+    documents = []
+    for objet in objets:
+        titre, detail, contenu = document(objet)
+        documents.append(DocumentRecherche(
+            type_objet=type_objet,
+            objet_id=objet.pk,
+            titre=titre[:255],
+            detail=detail[:255],
+            contenu=contenu,
+        ))
+    if not documents:
+        return 0
+
+    with transaction.atomic():
+        DocumentRecherche.objects.bulk_create(
+            documents,
+            update_conflicts=True,
+            unique_fields=['type_objet', 'objet_id'],
+            update_fields=['titre', 'detail', 'contenu', 'date_maj'],
+        )
+        if connection.vendor == 'postgresql':
+            DocumentRecherche.objects.filter(
+                type_objet=type_objet, objet_id__in=[objet.pk for objet in objets]
+            ).update(vecteur=VECTEUR)
+    return len(documents)
+
+
+def indexer(type_objet, queryset=None, apres_morceau=None):
+    """
+    (Ré)indexe les objets d'un type, par morceaux de TAILLE_MORCEAU
+
+    Sans queryset, tous les objets du type sont indexés. `apres_morceau`
+    est appelé (sans argument) après chaque morceau écrit. Retourne le
+    nombre de documents écrits.
+    """
+    source = SOURCES[type_objet]
+    if queryset is None:
+        queryset = modele_source(type_objet)._default_manager.all()
+    queryset = queryset.select_related(*source['select_related']).order_by('pk')
+
+    total = 0
+    dernier = None
+    while True:
+        morceau = queryset if dernier is None else queryset.filter(pk__gt=dernier)
+        objets = list(morceau[:TAILLE_MORCEAU])
+        if not objets:
+            return total
+        total += _indexer_morceau(type_objet, objets)
+        dernier = objets[-1].pk
+        if apres_morceau:
+            apres_morceau()
+
+
+def indexer_objet(objet):
+    type_objet = type_du_modele(type(objet))
+    if type_objet:
+        indexer(type_objet, type(objet)._default_manager.filter(pk=objet.pk))
+
+
+def desindexer_objet(objet):
+    type_objet = type_du_modele(type(objet))
+    if type_objet:
+        DocumentRecherche.objects.filter(type_objet=type_objet, objet_id=objet.pk).delete()
+
+
+# ---------------------------------------------------------------------------
+# Recherche
+# ---------------------------------------------------------------------------
+
+def types_autorises(user):
+    """Types indexés que l'utilisateur peut consulter"""
+    return [type_objet for type_objet, source in SOURCES.items() if user_has_permission(user, source['permission'])]
+
+
+def rechercher_partout(user, terme, limite=NOMBRE_RESULTATS):
+    """
+    Documents correspondant au terme, les plus pertinents d'abord
+
+    Chaque mot est cherché comme préfixe (« électr » trouve
+    « Électricité »). Retourne une liste de dictionnaires (type, libellé
+    du type, titre, détail, url, rang).
+    """
+    mots = _MOTS.findall(terme or '')
+    types = types_autorises(user)
+    if not mots or not types:
+        return []
+
+    documents = DocumentRecherche.objects.filter(type_objet__in=types)
+    if connection.vendor == 'postgresql':
+        requete = SearchQuery(' & '.join(f'{mot}:*' for mot in mots), config=CONFIG_RECHERCHE, search_type='raw')
+        documents = documents.filter(vecteur=requete).annotate(
+            rang=SearchRank(F('vecteur'), requete)
+        ).order_by('-rang', '-date_maj')
+    else:
+        for mot in mots:
+            documents = documents.filter(
+                Q(titre__icontains=mot) | Q(detail__icontains=mot) | Q(contenu__icontains=mot)
+            )
+        documents = documents.order_by('-date_maj')
+
+    libelles = dict(DocumentRecherche.TYPE_CHOICES)
+    return [
+        {
+            'type': document.type_objet,
+            'type_display': libelles[document.type_objet],
+            'titre': document.titre,
+            'detail': document.detail,
+            'url': SOURCES[document.type_objet]['url'](document.objet_id, document.titre),
+            'rang': getattr(document, 'rang', None),
+        }
+        for document in documents.only('type_objet', 'objet_id', 'titre', 'detail')[:limite]
+    ]
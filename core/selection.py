@@ -0,0 +1,156 @@
+"""
+Sélection distante de clients et de fournisseurs
+
+Les formulaires (devis, commandes, factures) n'embarquent plus la liste
+complète des clients ou fournisseurs actifs : le widget SelectionDistante
+ne rend que l'option sélectionnée, et le script de base.html charge les
+suivantes depuis l'API de recherche du modèle (clients:client_api,
+fournisseurs:fournisseur_api) au fil de la saisie et du défilement.
+
+Les API paginent par clé (keyset) sur (nom_complet, id) : chaque page est
+une lecture d'index à partir du curseur de la précédente, quel que soit
+le rang de la page. Leurs réponses portent un ETag construit sur une
+génération du modèle gardée en base (core.generations, commune à tous les
+processus, renouvelée par les signaux et les chargements en masse) : une
+requête déjà vue est revalidée en 304 sans interroger la table du modèle.
+"""
+import base64
+import copy
+import json
+from functools import wraps
+
+from django import forms
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.forms.models import ModelChoiceIterator
+from django.views.decorators.http import condition
+
+from . import generations
+from .recherche import rechercher
+
+
+TAILLE_PAGE = 20
+TAILLE_PAGE_MAX = 100
+
+
+# ---------------------------------------------------------------------------
+# Génération (ETag)
+# ---------------------------------------------------------------------------
+
+def _cle_generation(modele):
+    return f'selection:{modele._meta.label_lower}:generation'
+
+
+def generation(modele):
+    return generations.generation(_cle_generation(modele))
+
+
+def invalider(modele):
+    """À appeler après toute modification des objets du modèle"""
+    generations.invalider(_cle_generation(modele))
+
+
+def reponse_conditionnelle(modele):
+    """
+    Décorateur de vue : ETag sur la génération du modèle et les paramètres
+
+    Les réponses sont à revalider à chaque usage (no-cache) : le
+    navigateur renvoie l'ETag et reçoit un 304 si rien n'a changé.
+    """
+    def etag(request, *args, **kwargs):
+        return f"{generation(modele)}:{request.GET.urlencode()}"
+
+    def decorateur(vue):
+        vue_conditionnelle = condition(etag_func=etag)(vue)
+
+        @wraps(vue)
+        def envelopper(request, *args, **kwargs):
+            response = vue_conditionnelle(request, *args, **kwargs)
+            response['Cache-Control'] = 'private, no-cache'
+            return response
+
+        return envelopper
+
+    return decorateur
+
+
+# ---------------------------------------------------------------------------
+# Pagination par clé
+# ---------------------------------------------------------------------------
+
+def _encoder_curseur(objet, champ):
+    donnees = json.dumps([getattr(objet, champ), objet.pk]).encode('utf-8')
+    return base64.urlsafe_b64encode(donnees).decode('ascii')
+
+
+def _decoder_curseur(curseur):
+    """(valeur, pk) du curseur, None s'il est absent ou illisible"""
+    if not curseur:
+        return None
+    try:
+        valeur, pk = json.loads(base64.urlsafe_b64decode(curseur.encode('ascii')))
+        return str(valeur), int(pk)
+    except (ValueError, TypeError):
+        return None
+
+
+def page_selection(request, queryset, termes, champ='nom_complet'):
+    """
+    Page d'objets pour une sélection distante
+
+    `termes` est passé à core.recherche.rechercher ; les paramètres de la
+    requête sont `apres` (curseur de la page précédente) et `limite`
+    (TAILLE_PAGE par défaut, TAILLE_PAGE_MAX au plus). Retourne
+    (objets, curseur de la page suivante ou None).
+    """
+    try:
+        limite = int(request.GET.get('limite', TAILLE_PAGE))
+    except ValueError:
+        limite = TAILLE_PAGE
+    limite = max(1, min(limite, TAILLE_PAGE_MAX))
+
+    queryset = rechercher(queryset, termes).order_by(champ, 'pk')
+    curseur = _decoder_curseur(request.GET.get('apres'))
+    if curseur:
+        valeur, pk = curseur
+        queryset = queryset.filter(Q(**{f'{champ}__gt': valeur}) | Q(**{champ: valeur, 'pk__gt': pk}))
+
+    objets = list(queryset[:limite + 1])
+    if len(objets) > limite:
+        return objets[:limite], _encoder_curseur(objets[limite - 1], champ)
+    return objets, None
+
+
+# ---------------------------------------------------------------------------
+# Widget
+# ---------------------------------------------------------------------------
+
+class SelectionDistante(forms.Select):
+    """
+    Liste déroulante dont les options sont chargées depuis une API
+
+    Seule l'option sélectionnée est rendue ; `url` est l'API de recherche
+    et `cle` la clé de la liste d'objets dans sa réponse JSON.
+    """
+
+    def __init__(self, url, cle, attrs=None):
+        attrs = dict(attrs or {})
+        attrs['data-selection-url'] = url
+        attrs['data-selection-cle'] = cle
+        super().__init__(attrs)
+
+    def optgroups(self, name, value, attrs=None):
+        choix = self.choices
+        if isinstance(choix, ModelChoiceIterator):
+            champ_pk = choix.queryset.model._meta.pk
+            try:
+                valeurs = [champ_pk.to_python(valeur) for valeur in value if valeur not in (None, '')]
+            except ValidationError:
+                valeurs = []
+            restreint = copy.copy(choix)
+            restreint.queryset = choix.queryset.filter(pk__in=valeurs)
+            self.choices = restreint
+        try:
+            return super().optgroups(name, value, attrs)
+        finally:
+            self.choices = choix
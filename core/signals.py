@@ -0,0 +1,107 @@
+from django.apps import apps
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_save
+
+from .recherche_globale import SOURCES, desindexer_objet, indexer, indexer_objet
+from .selection import invalider
+
+
+# Modèles proposés par les sélections distantes des formulaires (core.selection)
+MODELES_SELECTION = ('clients.Client', 'fournisseurs.Fournisseur')
+
+
+def _indexer(sender, instance, **kwargs):
+    """Met à jour le document de recherche d'un objet enregistré"""
+    try:
+        indexer_objet(instance)
+    except Exception as e:
+        print(f"Erreur lors de l'indexation de {sender.__name__} {instance.pk}: {e}")
+
+
+def _desindexer(sender, instance, **kwargs):
+    try:
+        desindexer_objet(instance)
+    except Exception as e:
+        print(f"Erreur lors de la désindexation de {sender.__name__} {instance.pk}: {e}")
+
+
+def _memoriser_nom(sender, instance, raw=False, **kwargs):
+    """Retient le nom enregistré en base avant modification (voir _nom_modifie)"""
+    if raw or instance.pk is None:
+        instance._nom_complet_enregistre = None
+        return
+    instance._nom_complet_enregistre = sender.objects.filter(pk=instance.pk).values_list(
+        'nom_complet', flat=True
+    ).first()
+
+
+def _nom_modifie(instance, created):
+    """Vrai si un objet existant vient de changer de nom"""
+    avant = getattr(instance, '_nom_complet_enregistre', None)
+    return not created and avant is not None and avant != instance.nom_complet
+
+
+def _indexer_documents_client(sender, instance, created, **kwargs):
+    """
+    Le nom du client figure dans les documents de ses devis et commandes
+
+    Ils ne sont réindexés que si le nom a changé, après la transaction.
+    """
+    if not _nom_modifie(instance, created):
+        return
+    pk = instance.pk
+
+    def reindexer():
+        try:
+            indexer('devis', apps.get_model('devis', 'Devis').objects.filter(client_id=pk))
+            indexer('commande', apps.get_model('commandes', 'BonCommande').objects.filter(client_id=pk))
+        except Exception as e:
+            print(f"Erreur lors de l'indexation des documents du client {pk}: {e}")
+
+    transaction.on_commit(reindexer)
+
+
+def _indexer_documents_fournisseur(sender, instance, created, **kwargs):
+    """
+    Le nom du fournisseur figure dans les documents de ses factures et commandes
+
+    Ils ne sont réindexés que si le nom a changé, après la transaction.
+    """
+    if not _nom_modifie(instance, created):
+        return
+    pk = instance.pk
+
+    def reindexer():
+        try:
+            indexer('facture', apps.get_model('factures', 'Facture').objects.filter(fournisseur_id=pk))
+            indexer('commande', apps.get_model('commandes', 'BonCommande').objects.filter(fournisseur_id=pk))
+        except Exception as e:
+            print(f"Erreur lors de l'indexation des documents du fournisseur {pk}: {e}")
+
+    transaction.on_commit(reindexer)
+
+
+def _invalider_selection(sender, **kwargs):
+    """Renouvelle l'ETag des réponses de l'API de sélection du modèle"""
+    invalider(sender)
+
+
+def connecter():
+    """Branche les signaux de la recherche globale et des sélections (appelé par CoreConfig.ready)"""
+    for source in SOURCES.values():
+        modele = apps.get_model(source['modele'])
+        post_save.connect(_indexer, sender=modele, dispatch_uid=f"recherche_indexer_{modele._meta.label}")
+        post_delete.connect(_desindexer, sender=modele, dispatch_uid=f"recherche_desindexer_{modele._meta.label}")
+
+    for label, indexer_documents in (
+        ('clients.Client', _indexer_documents_client),
+        ('fournisseurs.Fournisseur', _indexer_documents_fournisseur),
+    ):
+        modele = apps.get_model(label)
+        pre_save.connect(_memoriser_nom, sender=modele, dispatch_uid=f"recherche_nom_{label}")
+        post_save.connect(indexer_documents, sender=modele, dispatch_uid=f"recherche_documents_{label}")
+
+    for label in MODELES_SELECTION:
+        modele = apps.get_model(label)
+        post_save.connect(_invalider_selection, sender=modele, dispatch_uid=f"selection_save_{label}")
+        post_delete.connect(_invalider_selection, sender=modele, dispatch_uid=f"selection_delete_{label}")
@@ -0,0 +1,163 @@
+"""
+Diffusion des fichiers générés (rapports, exports)
+
+Le fichier n'est jamais chargé entièrement en mémoire :
+- par défaut, Django le lit par morceaux (FileResponse) et répond aux
+  requêtes partielles `Range: bytes=debut-fin` (reprise de téléchargement) ;
+- avec FICHIERS_DIFFUSION = 'x-accel-redirect' (nginx) ou 'x-sendfile'
+  (Apache mod_xsendfile, lighttpd), la vue ne renvoie que les en-têtes et le
+  serveur frontal envoie les octets, ce qui libère le worker Django.
+
+Configuration (settings.py) :
+    FICHIERS_DIFFUSION = None | 'x-accel-redirect' | 'x-sendfile'
+    FICHIERS_ACCEL_PREFIXE = '/media-protege/'   # location `internal` nginx
+"""
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.http import http_date, parse_http_date_safe
+
+
+# Taille des morceaux lus pour une réponse partielle
+TAILLE_BLOC = 64 * 1024
+
+PLAGE_OCTETS = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def type_contenu(nom_fichier):
+    """Type MIME d'un fichier d'après son extension"""
+    if nom_fichier.endswith('.xlsx'):
+        return 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    return mimetypes.guess_type(nom_fichier)[0] or 'application/octet-stream'
+
+
+def analyser_plage(entete, taille):
+    """
+    Interprète un en-tête Range portant sur une seule plage d'octets
+
+    Retourne (debut, fin) inclusifs, None si l'en-tête est absent ou non
+    géré (plusieurs plages : le fichier entier est envoyé), ou False si la
+    plage est hors du fichier (réponse 416).
+    """
+    if not entete:
+        return None
+    correspondance = PLAGE_OCTETS.match(entete.strip())
+    if not correspondance:
+        return None
+    debut, fin = correspondance.groups()
+    if not debut and not fin:
+        return None
+
+    if not debut:
+        # bytes=-N : les N derniers octets
+        longueur = int(fin)
+        if longueur == 0:
+            return False
+        return max(taille - longueur, 0), taille - 1
+
+    debut = int(debut)
+    fin = int(fin) if fin else taille - 1
+    if debut >= taille or fin < debut:
+        return False
+    return debut, min(fin, taille - 1)
+
+
+def _lire_plage(fichier, debut, longueur):
+    """Lit `longueur` octets à partir de `debut` puis ferme le fichier"""
+    try:
+        fichier.seek(debut)
+        while longueur > 0:
+            bloc = fichier.read(min(TAILLE_BLOC, longueur))
+            if not bloc:
+                break
+            longueur -= len(bloc)
+            yield bloc
+    finally:
+        fichier.close()
+
+
+def _disposition(nom_fichier, as_attachment):
+    """Valeur de l'en-tête Content-Disposition (noms accentués compris)"""
+    type_disposition = 'attachment' if as_attachment else 'inline'
+    try:
+        nom_fichier.encode('ascii')
+        return f'{type_disposition}; filename="{nom_fichier}"'
+    except UnicodeEncodeError:
+        return f"{type_disposition}; filename*=utf-8''{quote(nom_fichier)}"
+
+
+def _reponse_frontal(mode, champ_fichier, nom_fichier, content_type, as_attachment):
+    """Réponse vide déléguant l'envoi du fichier au serveur frontal"""
+    response = HttpResponse(content_type=content_type)
+    if mode == 'x-accel-redirect':
+        prefixe = getattr(settings, 'FICHIERS_ACCEL_PREFIXE', '/media-protege/')
+        response['X-Accel-Redirect'] = quote(prefixe.rstrip('/') + '/' + champ_fichier.name.replace(os.sep, '/'))
+    else:
+        response['X-Sendfile'] = champ_fichier.path
+    response['Content-Disposition'] = _disposition(nom_fichier, as_attachment)
+    return response
+
+
+def reponse_fichier(request, champ_fichier, nom_fichier=None, content_type=None, as_attachment=True):
+    """
+    Réponse HTTP diffusant un FieldFile sans le charger en mémoire
+
+    Gère les requêtes Range (206 / 416) et If-Range ; délègue l'envoi au
+    serveur frontal si FICHIERS_DIFFUSION est configuré.
+    """
+    nom_fichier = nom_fichier or os.path.basename(champ_fichier.name)
+    content_type = content_type or type_contenu(nom_fichier)
+
+    mode = getattr(settings, 'FICHIERS_DIFFUSION', None)
+    if mode in ('x-accel-redirect', 'x-sendfile'):
+        return _reponse_frontal(mode, champ_fichier, nom_fichier, content_type, as_attachment)
+
+    storage = champ_fichier.storage
+    taille = champ_fichier.size
+    try:
+        derniere_modification = http_date(storage.get_modified_time(champ_fichier.name).timestamp())
+    except (NotImplementedError, OSError):
+        derniere_modification = None
+
+    plage = analyser_plage(request.headers.get('Range'), taille)
+
+    # If-Range : la plage n'est valable que si le fichier n'a pas changé
+    if_range = request.headers.get('If-Range')
+    if plage and if_range and (
+        not derniere_modification
+        or parse_http_date_safe(if_range) != parse_http_date_safe(derniere_modification)
+    ):
+        plage = None
+
+    if plage is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{taille}'
+        return response
+
+    fichier = storage.open(champ_fichier.name, 'rb')
+    if plage:
+        debut, fin = plage
+        response = StreamingHttpResponse(
+            _lire_plage(fichier, debut, fin - debut + 1),
+            status=206,
+            content_type=content_type
+        )
+        response['Content-Length'] = str(fin - debut + 1)
+        response['Content-Range'] = f'bytes {debut}-{fin}/{taille}'
+        response['Content-Disposition'] = _disposition(nom_fichier, as_attachment)
+    else:
+        response = FileResponse(
+            fichier,
+            as_attachment=as_attachment,
+            filename=nom_fichier,
+            content_type=content_type
+        )
+
+    response['Accept-Ranges'] = 'bytes'
+    if derniere_modification:
+        response['Last-Modified'] = derniere_modification
+    return response
@@ -1,3 +1,286 @@
-from django.test import TestCase
+import base64
+import datetime
+import io
+import zipfile
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.test import RequestFactory, TestCase
+from django.utils import timezone
+
+from clients.models import Client
+from devis.models import Devis
+from . import doublons
+from .chargement import _echapper, charger_en_masse
+from .export_pdf import par_lots, reponse_export_lot
+from .models import Generation
+from .pdf import LignesTamponnees, tableau_pagine
+from .pagination import _decoder_curseur, _encoder_curseur, compter, paginer_par_cle
+
+
+class PaginationParCleTests(TestCase):
+    """Curseurs et pages de la pagination par clé (core.pagination)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        client = Client.objects.create(nom_complet="Client test", telephone="620000000")
+        maintenant = timezone.now()
+        validite = maintenant.date() + timedelta(days=30)
+        # Trois devis partagent la même date de création : l'ordre est
+        # départagé par l'id
+        dates = [maintenant - timedelta(days=jours) for jours in (0, 1, 1, 1, 2, 3, 4)]
+        for numero, date_creation in enumerate(dates):
+            devis = Devis.objects.create(
+                numero=f"D-{numero}", client=client, objet="Test", date_validite=validite
+            )
+            Devis.objects.filter(pk=devis.pk).update(date_creation=date_creation)
+        cls.ordre = list(Devis.objects.order_by('-date_creation', '-pk').values_list('pk', flat=True))
+
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def _page(self, lien='', taille=2):
+        request = self.factory.get(f'/devis/{lien}')
+        return paginer_par_cle(request, Devis.objects.all(), taille)
+
+    def test_curseur_aller_retour(self):
+        devis = Devis.objects.first()
+        curseur = _encoder_curseur(devis, 'date_creation')
+        self.assertEqual(_decoder_curseur(curseur, Devis, 'date_creation'), (devis.date_creation, devis.pk))
+
+    def test_curseur_illisible(self):
+        date_invalide = base64.urlsafe_b64encode(b'["pas une date", 1]').decode('ascii')
+        for curseur in ('', None, 'pas-du-base64', date_invalide):
+            with self.subTest(curseur=curseur):
+                self.assertIsNone(_decoder_curseur(curseur, Devis, 'date_creation'))
+
+    def test_pages_suivantes_puis_precedentes(self):
+        page = self._page()
+        self.assertFalse(page.has_previous())
+        pages = [page]
+        while page.has_next():
+            page = self._page(page.lien_suivant)
+            pages.append(page)
+        self.assertEqual([devis.pk for page in pages for devis in page], self.ordre)
+        self.assertEqual([len(page) for page in pages], [2, 2, 2, 1])
+
+        # Retour en arrière depuis la dernière page : mêmes pages, dans l'ordre inverse
+        retour = [page]
+        while page.has_previous():
+            page = self._page(page.lien_precedent)
+            retour.append(page)
+        self.assertEqual(
+            [[devis.pk for devis in page] for page in reversed(retour)],
+            [[devis.pk for devis in page] for page in pages]
+        )
+
+    def test_curseur_invalide_donne_la_premiere_page(self):
+        page = self._page('?apres=illisible')
+        self.assertEqual([devis.pk for devis in page], self.ordre[:2])
+        self.assertFalse(page.has_previous())
+
+    def test_comptage_exact_hors_postgresql(self):
+        self.assertEqual(compter(Devis.objects.all(), estime=True), len(self.ordre))
+
+
+class DoublonsTests(TestCase):
+    """Clés de blocage et comparaison des fiches (core.doublons)"""
+
+    def fiche(self, pk, nom, telephone='', email=''):
+        return dict(pk=pk, nom_complet=nom, email=email, **doublons.cles_doublons(nom, telephone, email))
+
+    def test_cle_phonetique(self):
+        # Accents, casse, forme juridique et ordre des mots sans effet
+        self.assertEqual(doublons.cle_phonetique("Ets Touré Mamadou"), doublons.cle_phonetique("Mamadou TOUREY"))
+        self.assertEqual(doublons.cle_phonetique("SARL Diallo & Fils"), "dialo fil")
+        self.assertEqual(doublons.cle_phonetique(""), "")
+        self.assertNotEqual(doublons.cle_phonetique("Kaba Fatou"), doublons.cle_phonetique("Camara Fatou"))
+
+    def test_cle_telephone(self):
+        self.assertEqual(doublons.cle_telephone("+224 626 40 20 00"), "26402000")
+        self.assertEqual(doublons.cle_telephone("626402000"), "26402000")
+        # Trop peu de chiffres pour distinguer qui que ce soit
+        self.assertEqual(doublons.cle_telephone("12 34"), "")
+        self.assertEqual(doublons.cle_telephone(None), "")
+
+    def test_domaine_email(self):
+        self.assertEqual(doublons.domaine_email("contact@Societe.GN"), "societe.gn")
+        self.assertEqual(doublons.domaine_email("quelquun@gmail.com"), "")
+        self.assertEqual(doublons.domaine_email(None), "")
+
+    def test_comparer_doublon_certain(self):
+        a = self.fiche(1, "Ets Touré Mamadou", "+224 626 40 20 00", "m@touresa.gn")
+        b = self.fiche(2, "Mamadou TOUREY", "626402000", "M@TOURESA.GN")
+        score, raisons = doublons.comparer(a, b)
+        self.assertEqual(score, 1.0)
+        self.assertEqual(raisons, ['nom', 'téléphone', 'email'])
+
+    def test_comparer_fiches_distinctes(self):
+        a = self.fiche(1, "Ets Touré Mamadou", "+224 626 40 20 00", "m@touresa.gn")
+        b = self.fiche(2, "Bah Alpha", "", "a@touresa.gn")
+        score, raisons = doublons.comparer(a, b)
+        self.assertLess(score, doublons.SEUIL_DOUBLON)
+        self.assertEqual(raisons, ['domaine'])
+
+    def test_detecter_doublons(self):
+        toure = Client.objects.create(nom_complet="Ets Touré Mamadou", telephone="+224 626 40 20 00")
+        tourey = Client.objects.create(nom_complet="Mamadou TOUREY", telephone="626402000")
+        Client.objects.create(nom_complet="Kaba Fatou", telephone="620 11 22 33")
+        paires, blocs_ignores = doublons.detecter_doublons(Client.objects.all())
+        self.assertEqual([{paire['a']['pk'], paire['b']['pk']} for paire in paires], [{toure.pk, tourey.pk}])
+        self.assertEqual(blocs_ignores, [])
+
+    def test_bloc_trop_commun_ignore(self):
+        for numero in range(3):
+            Client.objects.create(nom_complet=f"Client {numero}", telephone="626402000")
+        paires, blocs_ignores = doublons.detecter_doublons(Client.objects.all(), taille_bloc_max=2)
+        self.assertEqual(paires, [])
+        self.assertEqual(blocs_ignores, [('telephone_cle', '26402000', 3)])
+
+    def test_doublons_probables(self):
+        existant = Client.objects.create(nom_complet="Mamadou TOUREY", telephone="626402000")
+        resultats = doublons.doublons_probables(Client, "Ets Touré Mamadou", "+224 626 40 20 00", "")
+        self.assertEqual([resultat['pk'] for resultat in resultats], [existant.pk])
+        # La fiche modifiée n'est pas son propre doublon
+        self.assertEqual(
+            doublons.doublons_probables(Client, "Mamadou TOUREY", "626402000", "", exclure_pk=existant.pk), []
+        )
+
+
+class ChargementTests(TestCase):
+    """Échappement CSV pour COPY et chargement en masse (core.chargement)"""
+
+    def test_echapper_null_et_scalaires(self):
+        self.assertEqual(_echapper(None), '')
+        self.assertEqual(_echapper(True), 't')
+        self.assertEqual(_echapper(False), 'f')
+        self.assertEqual(_echapper(42), '42')
+        self.assertEqual(_echapper(1.5), '1.5')
+
+    def test_echapper_texte(self):
+        # Toujours entre guillemets : une chaîne vide n'est pas NULL
+        self.assertEqual(_echapper(''), '""')
+        self.assertEqual(_echapper('Diallo, "Fils"'), '"Diallo, ""Fils"""')
+        self.assertEqual(_echapper('ligne 1\nligne 2'), '"ligne 1\nligne 2"')
+        self.assertEqual(_echapper('\\N'), '"\\N"')
+
+    def test_echapper_dates_et_decimaux(self):
+        self.assertEqual(_echapper(datetime.date(2025, 1, 31)), '"2025-01-31"')
+        self.assertEqual(
+            _echapper(datetime.datetime(2025, 1, 31, 8, 30, tzinfo=datetime.timezone.utc)),
+            '"2025-01-31T08:30:00+00:00"'
+        )
+        self.assertEqual(_echapper(Decimal('12.50')), '"12.50"')
+
+    def test_charger_en_masse_par_lots(self):
+        objets = (Generation(nom=f'test-{numero}', valeur=numero) for numero in range(25))
+        self.assertEqual(charger_en_masse(Generation, objets, taille_lot=10), 25)
+        self.assertEqual(Generation.objects.filter(nom__startswith='test-').count(), 25)
+        self.assertEqual(charger_en_masse(Generation, []), 0)
+
+
+class ExportLotTests(TestCase):
+    """Export par lot : erreurs de rendu et découpage en lots (core.export_pdf)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        client = Client.objects.create(nom_complet="Client test", telephone="620000000")
+        validite = timezone.now().date() + timedelta(days=30)
+        cls.devis = [
+            Devis.objects.create(numero=f"D-{numero}", client=client, objet="Test", date_validite=validite)
+            for numero in range(3)
+        ]
+
+    def _rendu(self, en_erreur):
+        def rendre(type_document, pk):
+            if pk in en_erreur:
+                raise ValueError("rendu impossible")
+            return f"devis_{pk}.pdf", b"%PDF"
+        return mock.patch('core.export_pdf.rendre_document', side_effect=rendre)
+
+    def test_document_en_erreur_signale_dans_l_archive(self):
+        queryset = Devis.objects.order_by('pk')
+        with self._rendu({self.devis[1].pk}):
+            response = reponse_export_lot('devis', queryset)
+            contenu = b''.join(response.streaming_content)
+        noms = zipfile.ZipFile(io.BytesIO(contenu)).namelist()
+        self.assertEqual(noms, [
+            f"devis_{self.devis[0].pk}.pdf",
+            f"ERREUR_devis_{self.devis[1].pk}.txt",
+            f"devis_{self.devis[2].pk}.pdf",
+        ])
+
+    def test_erreur_sur_le_premier_document_avant_la_reponse(self):
+        with self._rendu({devis.pk for devis in self.devis}):
+            with self.assertRaises(ValueError):
+                reponse_export_lot('devis', Devis.objects.order_by('pk'))
+
+    def test_par_lots(self):
+        self.assertEqual([list(lot) for lot in par_lots(range(5), 2)], [[0, 1], [2, 3], [4]])
+        self.assertEqual(list(par_lots([], 2)), [])
+
+
+class TableauPagineTests(TestCase):
+    """Grand tableau PDF alimenté par un générateur (core.pdf)"""
+
+    def test_lignes_lues_page_par_page(self):
+        from reportlab.lib.pagesizes import A4
+        from reportlab.platypus import SimpleDocTemplate
+
+        lues = []
+
+        def lignes():
+            for numero in range(2000):
+                lues.append(numero)
+                yield [str(numero), f"Article {numero}"]
+
+        tableau = tableau_pagine(['N°', 'Désignation'], lignes(), [60, 300], [], pied=['', 'TOTAL'])
+        # Rien n'est lu avant la mise en page
+        self.assertEqual(lues, [])
+        doc = SimpleDocTemplate(io.BytesIO(), pagesize=A4)
+        doc.build([tableau])
+        self.assertEqual(len(lues), 2000)
+        self.assertGreater(doc.page, 1)
+        # Seules les lignes de la dernière page restent en mémoire
+        self.assertLess(len(tableau.lignes._tampon), 100)
+
+    def test_lignes_tamponnees(self):
+        lignes = LignesTamponnees(iter(range(5)))
+        self.assertEqual(lignes.tranche(0, 3), [0, 1, 2])
+        self.assertFalse(lignes.terminees(4))
+        lignes.liberer(2)
+        self.assertEqual(lignes.tranche(2, 10), [2, 3, 4])
+        self.assertTrue(lignes.terminees(5))
+
+
+class IndexationDocumentsClientTests(TestCase):
+    """Réindexation des devis d'un client renommé (core.signals)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.client_devis = Client.objects.create(nom_complet="Ancien nom", telephone="620000001")
+        Devis.objects.create(
+            numero="D-IDX", client=cls.client_devis, objet="Test",
+            date_validite=timezone.now().date() + timedelta(days=30),
+        )
+
+    def _document_devis(self):
+        from .models import DocumentRecherche
+        document = DocumentRecherche.objects.get(type_objet='devis')
+        return f"{document.titre} {document.detail} {document.contenu}"
+
+    def test_enregistrement_sans_changement_de_nom(self):
+        self.client_devis.adresse = "Kaloum"
+        with mock.patch('core.signals.indexer') as indexer:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client_devis.save()
+        indexer.assert_not_called()
+
+    def test_renommage_reindexe_apres_la_transaction(self):
+        self.client_devis.nom_complet = "Nouveau nom"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client_devis.save()
+            # Rien n'est réindexé avant la fin de la transaction
+            self.assertNotIn("Nouveau nom", self._document_devis())
+        self.assertIn("Nouveau nom", self._document_devis())
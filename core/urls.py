@@ -8,4 +8,5 @@ urlpatterns = [
     path('logout/', views.logout_view, name='logout'),
     path('dashboard/', views.dashboard, name='dashboard'),
     path('ajax-login/', views.ajax_login, name='ajax_login'),
+    path('recherche/', views.recherche, name='recherche'),
 ] 
\ No newline at end of file
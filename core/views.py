@@ -226,3 +226,20 @@ def ajax_login(request):
         'success': False,
         'message': 'Méthode non autorisée.'
     })
+
+
+@login_required
+def recherche(request):
+    """Recherche globale (page de résultats, ou JSON pour les requêtes AJAX)"""
+    from .recherche_globale import rechercher_partout
+
+    terme = request.GET.get('q', '').strip()
+    resultats = rechercher_partout(request.user, terme) if terme else []
+
+    if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+        return JsonResponse({'q': terme, 'resultats': resultats})
+
+    return render(request, 'core/recherche.html', {
+        'terme': terme,
+        'resultats': resultats,
+    })
@@ -149,6 +149,18 @@ STATICFILES_DIRS = [
 MEDIA_URL = 'media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Diffusion des fichiers générés (rapports) : None (Django, par morceaux),
+# 'x-accel-redirect' (nginx) ou 'x-sendfile' (Apache / lighttpd)
+FICHIERS_DIFFUSION = None
+# Location nginx `internal` pointant sur MEDIA_ROOT (mode x-accel-redirect)
+FICHIERS_ACCEL_PREFIXE = '/media-protege/'
+
+# Listes (devis, factures, commandes, clients) : pagination par clé sur
+# (date_creation, id) au lieu d'OFFSET, et totaux estimés par le
+# planificateur PostgreSQL au lieu de COUNT(*) (voir core/pagination.py)
+PAGINATION_PAR_CLE = False
+PAGINATION_COMPTAGE_ESTIME = False
+
 # Configuration pour l'interface d'administration personnalisée
 ADMIN_SITE_HEADER = "DEVDRECO SOFT - Administration"
 ADMIN_SITE_TITLE = "DEVDRECO SOFT Admin"
@@ -55,6 +55,11 @@ class DevisAdmin(admin.ModelAdmin):
         """Optimise les requêtes avec select_related"""
         return super().get_queryset(request).select_related('client')
     
+    def save_related(self, request, form, formsets, change):
+        """Refait l'instantané d'un devis envoyé après modification de ses lignes"""
+        super().save_related(request, form, formsets, change)
+        form.instance.actualiser_instantane()
+    
     def montant_ttc_colore(self, obj):
         """Affiche le montant TTC avec une couleur selon le statut"""
         if obj.statut == 'accepte':
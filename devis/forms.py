@@ -1,7 +1,9 @@
 from django import forms
 from django.forms import inlineformset_factory
+from django.urls import reverse_lazy
 from .models import Devis, LigneDevis
 from clients.models import Client
+from core.selection import SelectionDistante
 
 class DevisForm(forms.ModelForm):
     """Formulaire pour la création et modification des devis"""
@@ -17,8 +19,9 @@ class DevisForm(forms.ModelForm):
                 'class': 'form-control',
                 'placeholder': 'Numéro de devis'
             }),
-            'client': forms.Select(attrs={
-                'class': 'form-control'
+            'client': SelectionDistante(reverse_lazy('clients:client_api'), 'clients', attrs={
+                'class': 'form-control',
+                'data-placeholder': 'Rechercher un client'
             }),
             'statut': forms.Select(attrs={
                 'class': 'form-control'
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.4 on 2026-10-19 07:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0004_client_cles_doublons'),
+        ('devis', '0005_devis_index_trigrammes'),
+    ]
+
+    operations = [
+        # Index composites créés avant de retirer les index simples des clés
+        # étrangères qu'ils remplacent
+        migrations.AddIndex(
+            model_name='devis',
+            index=models.Index(fields=['date_creation', 'id'], name='devis_creation_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='devis',
+            index=models.Index(fields=['statut', 'date_creation', 'id'], name='devis_statut_creation_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='devis',
+            index=models.Index(fields=['client', 'date_creation', 'id'], name='devis_client_creation_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='devis',
+            index=models.Index(condition=models.Q(('statut__in', ['brouillon', 'envoye'])), fields=['date_validite'], name='devis_ouverts_validite_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lignedevis',
+            index=models.Index(fields=['devis'], include=('description', 'quantite', 'montant_ht'), name='lignedevis_devis_idx'),
+        ),
+        migrations.AlterField(
+            model_name='devis',
+            name='client',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='clients.client', verbose_name='Client'),
+        ),
+        migrations.AlterField(
+            model_name='lignedevis',
+            name='devis',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='lignes', to='devis.devis', verbose_name='Devis'),
+        ),
+    ]
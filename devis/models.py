@@ -15,10 +15,15 @@ class Devis(models.Model):
         ('expire', 'Expiré'),
     ]
     
+    # Statuts d'un devis envoyé : son rendu vient de l'instantané
+    STATUTS_FIGES = ('envoye', 'accepte', 'refuse', 'expire')
+    
     numero = models.CharField(max_length=20, unique=True, verbose_name="Numéro")
     client = models.ForeignKey(
         Client, 
         on_delete=models.CASCADE, 
+        # Recherches par client servies par devis_client_creation_idx
+        db_index=False,
         verbose_name="Client"
     )
     objet = models.CharField(max_length=200, verbose_name="Objet")
@@ -71,6 +76,19 @@ class Devis(models.Model):
         verbose_name = "Devis"
         verbose_name_plural = "Devis"
         ordering = ['-date_creation']
+        indexes = [
+            # Liste des devis : tri (et pagination par clé) sur la date de
+            # création, seule ou après un filtre par statut ou par client
+            models.Index(fields=['date_creation', 'id'], name='devis_creation_idx'),
+            models.Index(fields=['statut', 'date_creation', 'id'], name='devis_statut_creation_idx'),
+            models.Index(fields=['client', 'date_creation', 'id'], name='devis_client_creation_idx'),
+            # Devis en retard : seuls les devis encore ouverts sont indexés
+            models.Index(
+                fields=['date_validite'],
+                condition=models.Q(statut__in=['brouillon', 'envoye']),
+                name='devis_ouverts_validite_idx'
+            ),
+        ]
     
     def __str__(self):
         return f"Devis {self.numero} - {self.client.nom_complet}"
@@ -137,11 +155,31 @@ class Devis(models.Model):
             self.save(update_fields=['montant_ht', 'montant_tva', 'montant_ttc'])
     
     def envoyer(self):
-        """Marque le devis comme envoyé"""
+        """Marque le devis comme envoyé et fige son contenu"""
         from django.utils import timezone
         self.statut = 'envoye'
         self.date_envoi = timezone.now()
         self.save()
+        self.figer()
+    
+    def figer(self):
+        """Enregistre l'instantané du devis tel qu'envoyé (rendu PDF et aperçu, voir core.instantanes)"""
+        from core.instantanes import figer_document
+        from .utils import get_societe_info
+        return figer_document(InstantaneDevis, self, self.client, self.lignes.all(), get_societe_info())
+    
+    def actualiser_instantane(self):
+        """
+        Suit une correction du devis enregistrée par le formulaire de modification
+
+        Un devis envoyé peut encore être corrigé : l'instantané est refait pour que
+        le PDF suive la correction (conservé si le contenu rendu est inchangé),
+        ou supprimé si le statut n'est plus figé. N'est jamais appelé à l'affichage.
+        """
+        if self.statut in self.STATUTS_FIGES:
+            return self.figer()
+        InstantaneDevis.objects.filter(devis=self).delete()
+        return None
     
     def accepter(self):
         """Marque le devis comme accepté"""
@@ -164,6 +202,8 @@ class LigneDevis(models.Model):
         Devis, 
         on_delete=models.CASCADE, 
         related_name='lignes',
+        # Recherches par devis servies par lignedevis_devis_idx
+        db_index=False,
         verbose_name="Devis"
     )
     description = models.CharField(max_length=200, verbose_name="Description")
@@ -190,6 +230,15 @@ class LigneDevis(models.Model):
     class Meta:
         verbose_name = "Ligne de devis"
         verbose_name_plural = "Lignes de devis"
+        indexes = [
+            # Lignes d'un devis ; colonnes incluses pour les cumuls des
+            # rapports (parcours de l'index seul sous PostgreSQL)
+            models.Index(
+                fields=['devis'],
+                include=['description', 'quantite', 'montant_ht'],
+                name='lignedevis_devis_idx'
+            ),
+        ]
     
     def __str__(self):
         return f"{self.description} - {self.quantite} {self.unite}"
@@ -230,3 +279,34 @@ class LigneDevis(models.Model):
             self.prix_unitaire_ht = Decimal('0.00')
             self.montant_ht = Decimal('0.00')
             super().save(*args, **kwargs)
+
+
+class InstantaneDevis(models.Model):
+    """Copie figée d'un devis au moment de son envoi"""
+    
+    devis = models.OneToOneField(
+        Devis,
+        on_delete=models.CASCADE,
+        related_name='instantane',
+        verbose_name="Devis"
+    )
+    donnees = models.JSONField(verbose_name="Données figées")
+    empreinte = models.CharField(max_length=40, verbose_name="Empreinte")
+    version_parametres = models.CharField(
+        max_length=32,
+        blank=True,
+        verbose_name="Version des paramètres société"
+    )
+    date_creation = models.DateTimeField(auto_now_add=True, verbose_name="Date de création")
+    
+    class Meta:
+        verbose_name = "Instantané de devis"
+        verbose_name_plural = "Instantanés de devis"
+    
+    def __str__(self):
+        return f"Instantané {self.devis_id} - {self.empreinte[:8]}"
+    
+    def restaurer(self):
+        """Retourne (devis, lignes, societe) reconstruits depuis l'instantané"""
+        from core.instantanes import restaurer_document
+        return restaurer_document(self.donnees, self.devis_id, Devis, Client, 'client', LigneDevis)
@@ -1,3 +1,103 @@
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock, skipUnless
+
+from django.db import connection
 from django.test import TestCase
+from django.utils import timezone
+
+from clients.models import Client
+from core.management.commands.verifier_index import index_utilises, requetes_listes
+from .models import Devis, InstantaneDevis, LigneDevis
+from .utils import devis_en_retard, donnees_rendu_devis, filtrer_devis
+
+
+class DevisEnRetardTests(TestCase):
+    """Filtre des devis en retard (validité dépassée sans réponse)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.client_devis = Client.objects.create(nom_complet="Client test", telephone="620000000")
+        hier = timezone.now().date() - timedelta(days=1)
+        demain = timezone.now().date() + timedelta(days=1)
+        cls.en_retard = cls._devis('D-1', 'envoye', hier)
+        cls.brouillon_en_retard = cls._devis('D-2', 'brouillon', hier)
+        cls._devis('D-3', 'accepte', hier)
+        cls._devis('D-4', 'envoye', demain)
+
+    @classmethod
+    def _devis(cls, numero, statut, date_validite):
+        return Devis.objects.create(
+            numero=numero, client=cls.client_devis, objet="Test",
+            statut=statut, date_validite=date_validite
+        )
+
+    def test_seuls_les_devis_ouverts_hors_validite_sont_retenus(self):
+        self.assertEqual(
+            set(devis_en_retard(Devis.objects.all())),
+            {self.en_retard, self.brouillon_en_retard}
+        )
+
+    def test_filtre_de_la_liste(self):
+        self.assertEqual(
+            set(filtrer_devis(Devis.objects.all(), {'statut': 'en_retard'})),
+            {self.en_retard, self.brouillon_en_retard}
+        )
+
+
+@skipUnless(connection.vendor == 'postgresql', "Plans d'exécution PostgreSQL uniquement")
+class IndexListesDevisTests(TestCase):
+    """Les requêtes de la liste des devis passent par leurs index (EXPLAIN)"""
+
+    def setUp(self):
+        # Parcours séquentiels découragés : l'index doit être utilisable
+        # même sur la base de test presque vide (réglage limité au test)
+        with connection.cursor() as curseur:
+            curseur.execute("SET LOCAL enable_seqscan = off")
+
+    def test_requetes_des_listes(self):
+        for libelle, queryset, index in requetes_listes():
+            if queryset.model not in (Devis, LigneDevis):
+                continue
+            with self.subTest(libelle):
+                self.assertIn(index, index_utilises(queryset))
+
+
+class InstantaneDevisTests(TestCase):
+    """Instantané d'un devis envoyé (core.instantanes)"""
+
+    def setUp(self):
+        client = Client.objects.create(nom_complet="Client test", telephone="620000000")
+        self.devis = Devis.objects.create(
+            numero="D-INST", client=client, objet="Test",
+            date_validite=timezone.now().date() + timedelta(days=30)
+        )
+        self.ligne = LigneDevis.objects.create(
+            devis=self.devis, description="Ciment", quantite=Decimal('2'), prix_unitaire_ht=Decimal('100')
+        )
+
+    def test_refiger_sans_changement_conserve_l_instantane(self):
+        with mock.patch('core.instantanes._horodatage', return_value='01/01/2024 à 08:00'):
+            self.devis.envoyer()
+        premier = InstantaneDevis.objects.get(devis=self.devis)
+
+        # Enregistrement du formulaire sans modification du contenu
+        self.devis.save()
+        instantane = self.devis.actualiser_instantane()
+        self.assertEqual(instantane.pk, premier.pk)
+        self.assertEqual(instantane.empreinte, premier.empreinte)
+        self.assertEqual(instantane.donnees['societe']['date_generation'], '01/01/2024 à 08:00')
+
+    def test_correction_refait_l_instantane(self):
+        self.devis.envoyer()
+        empreinte = InstantaneDevis.objects.get(devis=self.devis).empreinte
+        self.ligne.quantite = Decimal('3')
+        self.ligne.save()
+        self.assertNotEqual(self.devis.actualiser_instantane().empreinte, empreinte)
 
-# Create your tests here.
+    def test_affichage_sans_ecriture(self):
+        # Statut figé sans passer par envoyer() : aucun instantané créé au rendu
+        Devis.objects.filter(pk=self.devis.pk).update(statut='envoye')
+        devis, lignes, societe, empreinte = donnees_rendu_devis(self.devis.pk)
+        self.assertIsNone(empreinte)
+        self.assertFalse(InstantaneDevis.objects.exists())
@@ -22,6 +22,8 @@ urlpatterns = [
     path('<int:pk>/imprimer/', views.devis_imprimer, name='devis_imprimer'),
     path('<int:pk>/telecharger/', views.devis_telecharger, name='devis_telecharger'),
     path('<int:pk>/apercu/', views.devis_apercu_ecran, name='devis_apercu_ecran'),
+    path('export-pdf/', views.devis_export_lot, name='devis_export_lot'),
+    path('export-csv/', views.devis_export_csv, name='devis_export_csv'),
     
     # Tableau de bord
     path('tableau-de-bord/', views.devis_dashboard, name='devis_dashboard'),
@@ -20,6 +20,9 @@ def get_societe_info():
                 'logo': societe.logo.url if societe.logo else None,
                 'en_tete_document': societe.en_tete_document,
                 'pied_page_document': societe.pied_page_document,
+                'bandeau_entete': societe.bandeau_entete.name if societe.bandeau_entete else None,
+                'bandeau_pied': societe.bandeau_pied.name if societe.bandeau_pied else None,
+                'version': societe.date_modification.strftime('%Y%m%d%H%M%S'),
             }
     except Exception:
         pass
@@ -35,8 +38,80 @@ def get_societe_info():
         'logo': None,
         'en_tete_document': None,
         'pied_page_document': None,
+        'bandeau_entete': None,
+        'bandeau_pied': None,
+        'version': None,
     }
 
+def donnees_rendu_devis(pk):
+    """
+    Retourne (devis, lignes, societe, empreinte) à utiliser pour le rendu
+
+    Devis envoyé (ou accepté, refusé, expiré) : tout vient de l'instantané (une seule
+    lecture) ; sinon les données vivantes sont lues et l'empreinte vaut
+    None. Aucun instantané n'est écrit ici (appelé lors des affichages).
+    """
+    from django.shortcuts import get_object_or_404
+    from .models import Devis, InstantaneDevis
+
+    instantane = InstantaneDevis.objects.filter(
+        devis_id=pk, devis__statut__in=Devis.STATUTS_FIGES
+    ).first()
+    if instantane:
+        devis, lignes, societe = instantane.restaurer()
+        return devis, lignes, societe, instantane.empreinte
+
+    # Brouillon, ou statut figé hors des vues sans instantané : données vivantes
+    devis = get_object_or_404(Devis.objects.select_related('client'), pk=pk)
+    return devis, devis.lignes.all(), get_societe_info(), None
+
+def devis_en_retard(queryset):
+    """
+    Devis dont la date de validité est dépassée sans réponse du client
+
+    Filtre servi par l'index partiel devis_ouverts_validite_idx (mêmes
+    statuts que sa condition).
+    """
+    from django.utils import timezone
+    return queryset.filter(date_validite__lt=timezone.now().date(), statut__in=['brouillon', 'envoye'])
+
+def filtrer_devis(queryset, params):
+    """
+    Applique les filtres de la liste des devis (statut, client, dates, recherche)
+
+    `params` est un QueryDict (request.GET) ou un simple dictionnaire.
+    """
+    from core.recherche import rechercher
+
+    # Filtre par statut
+    statut = params.get('statut')
+    if statut == 'en_retard':
+        queryset = devis_en_retard(queryset)
+    elif statut:
+        queryset = queryset.filter(statut=statut)
+
+    # Filtre par client
+    client_id = params.get('client')
+    if client_id:
+        queryset = queryset.filter(client_id=client_id)
+
+    # Filtre par date de début
+    date_debut = params.get('date_debut')
+    if date_debut:
+        queryset = queryset.filter(date_creation__gte=date_debut)
+
+    # Filtre par date de fin
+    date_fin = params.get('date_fin')
+    if date_fin:
+        queryset = queryset.filter(date_creation__lte=date_fin)
+
+    # Recherche textuelle (index trigrammes sur PostgreSQL, voir core.recherche)
+    q = params.get('q')
+    if q:
+        queryset = rechercher(queryset, {'numero': q, 'client__nom_complet': q, 'objet': q})
+
+    return queryset
+
 def format_montant(montant, devise=None):
     """
     Formate un montant avec la devise dynamique
@@ -164,9 +239,13 @@ def exporter_devis_excel(devis):
     
     return None, "Export Excel non encore implémenté"
 
-def generer_pdf_reportlab(devis, lignes, societe, mode='inline'):
+def generer_pdf_reportlab(devis, lignes, societe, mode='inline', grand_document=None, fichier=False):
     """
     Génère un PDF avec ReportLab basé sur l'image de référence devis.png
+
+    Au-delà de SEUIL_GRAND_DOCUMENT lignes (ou si grand_document=True), le
+    tableau des articles est rendu en LongTable découpées par page.
+    Avec fichier=True, retourne le fichier temporaire du PDF au lieu des bytes.
     """
     from reportlab.lib.pagesizes import A4
     from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
@@ -174,11 +253,11 @@ def generer_pdf_reportlab(devis, lignes, societe, mode='inline'):
     from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
     from reportlab.lib import colors
     from reportlab.lib.enums import TA_CENTER, TA_RIGHT, TA_LEFT
-    from io import BytesIO
     from datetime import datetime
+    from core.pdf import compter_lignes, est_grand_document, tampon_pdf, terminer_pdf
     
-    # Créer un buffer pour le PDF
-    buffer = BytesIO()
+    # Créer un buffer pour le PDF (bascule sur disque pour les gros documents)
+    buffer = tampon_pdf()
     
     # Créer le document PDF
     doc = SimpleDocTemplate(
@@ -187,7 +266,9 @@ def generer_pdf_reportlab(devis, lignes, societe, mode='inline'):
         rightMargin=2*cm,
         leftMargin=2*cm,
         topMargin=2*cm,
-        bottomMargin=2*cm
+        bottomMargin=2*cm,
+        # Rendu depuis un instantané : sortie identique octet pour octet
+        invariant=bool(societe.get('date_generation'))
     )
     
     # Styles basés sur l'image de référence
@@ -251,12 +332,11 @@ def generer_pdf_reportlab(devis, lignes, societe, mode='inline'):
     def draw_header(canvas, doc):
         canvas.saveState()
         try:
-            from parametres.models import InformationsSociete
-            soc = InformationsSociete.objects.first()
-            if soc and hasattr(soc, 'bandeau_entete') and soc.bandeau_entete:
+            if societe.get('bandeau_entete'):
                 try:
                     from reportlab.lib.utils import ImageReader
-                    img = ImageReader(soc.bandeau_entete.path)
+                    from parametres.images import chemin_image_pdf
+                    img = ImageReader(chemin_image_pdf('bandeau_entete', societe['bandeau_entete']))
                     # Dessiner l'image en haut de la page (pleine largeur, hauteur 100px)
                     canvas.drawImage(img, 0, A4[1] - 100, width=A4[0], height=100, preserveAspectRatio=False, mask='auto')
                 except Exception:
@@ -269,16 +349,14 @@ def generer_pdf_reportlab(devis, lignes, societe, mode='inline'):
     def draw_footer(canvas, doc):
         canvas.saveState()
         try:
-            from parametres.models import InformationsSociete
             from reportlab.lib.utils import ImageReader
+            from parametres.images import chemin_image_pdf, chemin_cachet_pdf
             import os
             
-            soc = InformationsSociete.objects.first()
-            
             # Dessiner le bandeau de pied de page s'il existe
-            if soc and hasattr(soc, 'bandeau_pied') and soc.bandeau_pied:
+            if societe.get('bandeau_pied'):
                 try:
-                    img = ImageReader(soc.bandeau_pied.path)
+                    img = ImageReader(chemin_image_pdf('bandeau_pied', societe['bandeau_pied']))
                     # Dessiner l'image en bas de la page (pleine largeur, hauteur 80px)
                     canvas.drawImage(img, 0, 0, width=A4[0], height=80, preserveAspectRatio=False, mask='auto')
                 except Exception:
@@ -286,10 +364,8 @@ def generer_pdf_reportlab(devis, lignes, societe, mode='inline'):
             
             # Ajouter le cachet DEVDRECO
             try:
-                # Chemin absolu vers l'image du cachet
-                from django.conf import settings
-                media_root = getattr(settings, 'MEDIA_ROOT', 'media')
-                cachet_path = os.path.join(media_root, 'cachets_signatures', 'cachet_devdreco.png')
+                # Chemin absolu vers l'image du cachet (variante préparée si disponible)
+                cachet_path = chemin_cachet_pdf()
                 
                 # Dimensions du cachet (encore plus grande)
                 cachet_width = 6*cm
@@ -408,7 +484,10 @@ def generer_pdf_reportlab(devis, lignes, societe, mode='inline'):
     story.append(Spacer(1, 20))
     
     # Tableau des articles (sans lignes de catégories)
-    if lignes:
+    nombre_lignes = compter_lignes(lignes)
+    grand = est_grand_document(nombre_lignes, grand_document)
+    
+    if nombre_lignes and not grand:
         # En-têtes du tableau avec retours à la ligne
         # Créer un style spécial pour les en-têtes
         header_style = ParagraphStyle(
@@ -461,7 +540,8 @@ def generer_pdf_reportlab(devis, lignes, societe, mode='inline'):
             ])
         
         # Ligne TOTAL générale avec cellule fusionnée
-        total_general = sum(ligne.montant_ht for ligne in lignes)
+        # Le total HT est déjà calculé sur le devis
+        total_general = devis.montant_ht
         total_formate = f"{total_general:,.0f}".replace(',', '.')
         
         # Style pour le montant total en gras et centré
@@ -542,6 +622,91 @@ def generer_pdf_reportlab(devis, lignes, societe, mode='inline'):
         story.append(article_table)
         story.append(Spacer(1, 20))
     
+    elif nombre_lignes:
+        # Mode grand document : tableau découpé aux sauts de page, en-tête répété,
+        # Paragraph réservé aux cellules qui doivent passer à la ligne
+        from core.pdf import cellule, tableau_pagine, valeurs_lignes
+        
+        header_style = ParagraphStyle(
+            'HeaderStyle',
+            parent=normal_style,
+            fontSize=9,
+            textColor=colors.white,
+            alignment=TA_CENTER,
+            fontName='Helvetica-Bold'
+        )
+        center_style = ParagraphStyle(
+            'CenterStyle',
+            parent=normal_style,
+            alignment=TA_CENTER
+        )
+        
+        en_tete = [
+            Paragraph('Désignation', header_style),
+            Paragraph('Quantité', header_style),
+            Paragraph('Unité', header_style),
+            Paragraph('Prix unitaire HT<br/>(GNF)', header_style),
+            Paragraph('Montant total HT<br/>(GNF)', header_style)
+        ]
+        
+        def formater(valeur):
+            return f"{valeur:,.0f}".replace(',', '.')
+        
+        # Police des cellules en texte brut (FONTNAME / FONTSIZE du tableau)
+        police_lignes, taille_lignes = 'Helvetica', 10
+        
+        # Largeur utile des colonnes texte (padding gauche + droite = 6)
+        donnees = (
+            [
+                cellule(description, normal_style, 6*cm - 6, police_lignes, taille_lignes),
+                formater(quantite),
+                cellule(unite, center_style, 2*cm - 6, police_lignes, taille_lignes),
+                formater(prix_unitaire),
+                formater(montant)
+            ]
+            for description, quantite, unite, prix_unitaire, montant in valeurs_lignes(lignes)
+        )
+        
+        pied = ['TOTAL', formater(devis.montant_ht), '', '', '']
+        
+        style_lignes = [
+            # En-tête (fond noir, texte blanc)
+            ('BACKGROUND', (0, 0), (-1, 0), colors.black),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
+            ('TOPPADDING', (0, 0), (-1, 0), 8),
+            
+            # Articles
+            ('FONTNAME', (0, 1), (-1, -1), police_lignes),
+            ('FONTSIZE', (0, 1), (-1, -1), taille_lignes),
+            ('ALIGN', (1, 1), (2, -1), 'CENTER'),
+            ('ALIGN', (3, 1), (4, -1), 'RIGHT'),
+            
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('LEFTPADDING', (0, 0), (-1, -1), 3),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 3),
+            ('TOPPADDING', (0, 1), (-1, -1), 3),
+            ('BOTTOMPADDING', (0, 1), (-1, -1), 3),
+        ]
+        
+        style_pied = [
+            ('TEXTCOLOR', (0, -1), (0, -1), orange_primary),
+            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, -1), (-1, -1), 11),
+            ('ALIGN', (0, -1), (-1, -1), 'CENTER'),
+            ('SPAN', (1, -1), (4, -1)),
+        ]
+        
+        story.append(tableau_pagine(
+            en_tete,
+            donnees,
+            [6*cm, 2*cm, 2*cm, 3.5*cm, 3.5*cm],
+            style_lignes,
+            pied=pied,
+            style_pied=style_pied
+        ))
+        story.append(Spacer(1, 20))
+    
     # Section totaux (style de l'image de référence)
     story.append(Spacer(1, 20))
     
@@ -588,7 +753,8 @@ def generer_pdf_reportlab(devis, lignes, societe, mode='inline'):
     
     # Pied de page (si pas d'image)
     if not societe.get('pied_page_document'):
-        footer_text = f"Devis généré le {datetime.now().strftime('%d/%m/%Y à %H:%M')} - {societe['nom']}"
+        date_generation = societe.get('date_generation') or datetime.now().strftime('%d/%m/%Y à %H:%M')
+        footer_text = f"Devis généré le {date_generation} - {societe['nom']}"
         story.append(Paragraph(footer_text, normal_style))
     
     # Construire le PDF avec en-têtes et pieds de page
@@ -598,8 +764,5 @@ def generer_pdf_reportlab(devis, lignes, societe, mode='inline'):
     
     doc.build(story, onFirstPage=on_page, onLaterPages=on_page)
     
-    # Récupérer le contenu du PDF
-    pdf_content = buffer.getvalue()
-    buffer.close()
-    
-    return pdf_content
\ No newline at end of file
+    # Récupérer le PDF (fichier temporaire ou contenu)
+    return terminer_pdf(buffer, fichier)
\ No newline at end of file
@@ -4,8 +4,7 @@ from django.contrib.auth.mixins import LoginRequiredMixin
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
 from django.urls import reverse_lazy
 from django.contrib import messages
-from django.db.models import Q
-from django.http import JsonResponse, HttpResponse
+from django.http import JsonResponse, HttpResponse, HttpResponseNotModified
 from django.utils import timezone
 from django.template.loader import render_to_string
 from django.conf import settings
@@ -13,15 +12,17 @@ from datetime import timedelta, date, datetime
 from decimal import Decimal, InvalidOperation
 from .models import Devis, LigneDevis
 from .forms import DevisForm, LigneDevisFormSet
-from .utils import get_societe_info
+from .utils import filtrer_devis, donnees_rendu_devis, devis_en_retard
 from clients.models import Client
 from utilisateurs.decorators import permission_required, class_permission_required
 from utilisateurs.utils import filter_queryset_by_permissions
+from core.instantanes import appliquer_cache, non_modifie
+from core.pagination import PaginationParCleMixin, compter
 import os
 import tempfile
 
 @class_permission_required('devis.view')
-class DevisListView(LoginRequiredMixin, ListView):
+class DevisListView(LoginRequiredMixin, PaginationParCleMixin, ListView):
     """Vue pour lister tous les devis"""
     model = Devis
     template_name = 'devis/devis_list.html'
@@ -36,36 +37,10 @@ class DevisListView(LoginRequiredMixin, ListView):
         
         # Filtrer selon les permissions utilisateur
         queryset = filter_queryset_by_permissions(self.request.user, queryset, 'devis')
-        
-        # Filtre par statut
-        statut = self.request.GET.get('statut')
-        if statut:
-            queryset = queryset.filter(statut=statut)
-        
-        # Filtre par client
-        client_id = self.request.GET.get('client')
-        if client_id:
-            queryset = queryset.filter(client_id=client_id)
-        
-        # Filtre par date de début
-        date_debut = self.request.GET.get('date_debut')
-        if date_debut:
-            queryset = queryset.filter(date_creation__gte=date_debut)
-        
-        # Filtre par date de fin
-        date_fin = self.request.GET.get('date_fin')
-        if date_fin:
-            queryset = queryset.filter(date_creation__lte=date_fin)
-        
-        # Recherche textuelle
-        q = self.request.GET.get('q')
-        if q:
-            queryset = queryset.filter(
-                Q(numero__icontains=q) |
-                Q(client__nom_complet__icontains=q) |
-                Q(objet__icontains=q)
-            )
-        
+
+        # Filtres de la liste (partagés avec l'export par lot)
+        queryset = filtrer_devis(queryset, self.request.GET)
+
         return queryset.order_by('-date_creation')
     
     def get_context_data(self, **kwargs):
@@ -82,31 +57,31 @@ class DevisListView(LoginRequiredMixin, ListView):
         try:
             # Statistiques avec gestion d'erreur robuste
             try:
-                context['total_devis'] = Devis.objects.count()
+                context['total_devis'] = compter(Devis.objects.all())
             except Exception as e:
                 print(f"Erreur lors du comptage total des devis: {e}")
                 context['total_devis'] = 0
                 
             try:
-                context['devis_brouillon'] = Devis.objects.filter(statut='brouillon').count()
+                context['devis_brouillon'] = compter(Devis.objects.filter(statut='brouillon'))
             except Exception as e:
                 print(f"Erreur lors du comptage des devis brouillon: {e}")
                 context['devis_brouillon'] = 0
                 
             try:
-                context['devis_en_attente'] = Devis.objects.filter(statut='en_attente').count()
+                context['devis_en_attente'] = compter(Devis.objects.filter(statut='en_attente'))
             except Exception as e:
                 print(f"Erreur lors du comptage des devis en attente: {e}")
                 context['devis_en_attente'] = 0
                 
             try:
-                context['devis_acceptes'] = Devis.objects.filter(statut='accepte').count()
+                context['devis_acceptes'] = compter(Devis.objects.filter(statut='accepte'))
             except Exception as e:
                 print(f"Erreur lors du comptage des devis acceptés: {e}")
                 context['devis_acceptes'] = 0
                 
             try:
-                context['devis_refuses'] = Devis.objects.filter(statut='refuse').count()
+                context['devis_refuses'] = compter(Devis.objects.filter(statut='refuse'))
             except Exception as e:
                 print(f"Erreur lors du comptage des devis refusés: {e}")
                 context['devis_refuses'] = 0
@@ -448,6 +423,9 @@ class DevisUpdateView(LoginRequiredMixin, UpdateView):
                 messages.error(self.request, f'Erreur lors du traitement des articles: {str(e)}')
                 return self.form_invalid(form)
         
+        # Devis envoyé modifié : instantané refait (ou supprimé selon le statut)
+        self.object.actualiser_instantane()
+        
         messages.success(self.request, 'Devis modifié avec succès.')
         # Redirection FORCÉE vers la liste des devis
         return redirect('devis:devis_list')
@@ -524,39 +502,30 @@ def devis_dashboard(request):
         'devis_acceptes': Devis.objects.filter(statut='accepte').count(),
         'devis_refuses': Devis.objects.filter(statut='refuse').count(),
         'devis_recent': Devis.objects.all()[:10],
-        'devis_en_retard': Devis.objects.filter(
-            date_validite__lt=timezone.now().date(),
-            statut__in=['brouillon', 'envoye']
-        ),
+        'devis_en_retard': devis_en_retard(Devis.objects.all()),
     }
     return render(request, 'devis/devis_dashboard.html', context)
 
 @login_required
 def devis_imprimer(request, pk):
     """Vue pour imprimer un devis en PDF"""
-    devis = get_object_or_404(Devis, pk=pk)
-    
-    # Récupérer les lignes du devis
-    lignes = devis.lignes.all()
-    
-    # Contexte pour le template
-    context = {
-        'devis': devis,
-        'lignes': lignes,
-        'societe': get_societe_info()
-    }
+    # Document figé : rendu depuis son instantané (revalidé par son ETag)
+    devis, lignes, societe, empreinte = donnees_rendu_devis(pk)
+    if empreinte and non_modifie(request, f"{empreinte}-inline"):
+        return HttpResponseNotModified()
     
     try:
         # Générer le PDF avec ReportLab
         from .utils import generer_pdf_reportlab
+        from core.pdf import reponse_pdf
         
         # Générer le PDF
-        pdf_content = generer_pdf_reportlab(devis, lignes, get_societe_info(), mode='inline')
-        
-        # Réponse HTTP avec le PDF
-        response = HttpResponse(pdf_content, content_type='application/pdf')
-        response['Content-Disposition'] = f'inline; filename="devis_{devis.numero}.pdf"'
+        pdf_fichier = generer_pdf_reportlab(devis, lignes, societe, mode='inline', fichier=True)
         
+        # Réponse HTTP diffusant le PDF
+        response = reponse_pdf(pdf_fichier, f"devis_{devis.numero}.pdf", mode='inline')
+        if empreinte:
+            appliquer_cache(response, f"{empreinte}-inline")
         return response
         
     except Exception as e:
@@ -566,48 +535,66 @@ def devis_imprimer(request, pk):
 @login_required
 def devis_telecharger(request, pk):
     """Vue pour télécharger un devis en PDF"""
-    devis = get_object_or_404(Devis, pk=pk)
-    
-    # Récupérer les lignes du devis
-    lignes = devis.lignes.all()
-    
-    # Contexte pour le template
-    context = {
-        'devis': devis,
-        'lignes': lignes,
-        'societe': get_societe_info()
-    }
+    # Document figé : rendu depuis son instantané (revalidé par son ETag)
+    devis, lignes, societe, empreinte = donnees_rendu_devis(pk)
+    if empreinte and non_modifie(request, f"{empreinte}-attachment"):
+        return HttpResponseNotModified()
     
     try:
         # Générer le PDF avec ReportLab
         from .utils import generer_pdf_reportlab
+        from core.pdf import reponse_pdf
         
         # Générer le PDF
-        pdf_content = generer_pdf_reportlab(devis, lignes, get_societe_info(), mode='attachment')
-        
-        # Réponse HTTP avec le PDF en téléchargement
-        response = HttpResponse(pdf_content, content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="devis_{devis.numero}.pdf"'
+        pdf_fichier = generer_pdf_reportlab(devis, lignes, societe, mode='attachment', fichier=True)
         
+        # Réponse HTTP diffusant le PDF en téléchargement
+        response = reponse_pdf(pdf_fichier, f"devis_{devis.numero}.pdf", mode='attachment')
+        if empreinte:
+            appliquer_cache(response, f"{empreinte}-attachment")
         return response
         
     except Exception as e:
         messages.error(request, f'Erreur lors de la génération du PDF: {str(e)}')
         return redirect('devis:devis_detail', pk=pk)
 
+@login_required
+@permission_required('devis.export')
+def devis_export_lot(request):
+    """Vue pour exporter en PDF (ZIP ou PDF fusionné) les devis filtrés de la liste"""
+    from core.export_pdf import documents_filtres, reponse_export_lot
+    
+    queryset = filter_queryset_by_permissions(request.user, Devis.objects.all(), 'devis')
+    queryset = documents_filtres('devis', request.GET, queryset)
+    
+    try:
+        return reponse_export_lot('devis', queryset, request.GET.get('format', 'zip'))
+    except Exception as e:
+        messages.error(request, f'Erreur lors de l\'export des PDF: {str(e)}')
+        return redirect('devis:devis_list')
+
+@login_required
+@permission_required('devis.export')
+def devis_export_csv(request):
+    """Vue pour exporter en CSV (diffusé en flux) les devis filtrés de la liste"""
+    from core.export_csv import reponse_export_csv
+    
+    queryset = filter_queryset_by_permissions(request.user, Devis.objects.all(), 'devis')
+    return reponse_export_csv('devis', request.GET, queryset)
+
 @login_required
 def devis_apercu_ecran(request, pk):
     """Vue pour l'aperçu PDF d'un devis dans l'éditeur PDF du navigateur"""
-    devis = get_object_or_404(Devis, pk=pk)
-    
-    # Récupérer les lignes du devis
-    lignes = devis.lignes.all()
+    # Devis envoyé : aperçu depuis l'instantané figé
+    devis, lignes, societe, empreinte = donnees_rendu_devis(pk)
+    if empreinte and non_modifie(request, f"{empreinte}-html"):
+        return HttpResponseNotModified()
     
     # Contexte pour le template
     context = {
         'devis': devis,
         'lignes': lignes,
-        'societe': get_societe_info(),
+        'societe': societe,
         'document_type': 'Devis'
     }
     
@@ -617,6 +604,8 @@ def devis_apercu_ecran(request, pk):
     # Créer une réponse avec le contenu HTML
     response = HttpResponse(html_content, content_type='text/html')
     response['Content-Disposition'] = f'inline; filename="devis_{devis.numero}.html"'
+    if empreinte:
+        appliquer_cache(response, f"{empreinte}-html")
     
     return response
 
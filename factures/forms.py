@@ -1,6 +1,8 @@
 from django import forms
 from django.forms import inlineformset_factory
+from django.urls import reverse_lazy
 from .models import Facture, LigneFacture
+from core.selection import SelectionDistante
 from fournisseurs.models import Fournisseur
 
 class FactureForm(forms.ModelForm):
@@ -17,8 +19,9 @@ class FactureForm(forms.ModelForm):
                 'class': 'form-control',
                 'placeholder': 'Numéro de facture'
             }),
-            'fournisseur': forms.Select(attrs={
-                'class': 'form-control'
+            'fournisseur': SelectionDistante(reverse_lazy('fournisseurs:fournisseur_api'), 'fournisseurs', attrs={
+                'class': 'form-control',
+                'data-placeholder': 'Rechercher un fournisseur'
             }),
             'statut': forms.Select(attrs={
                 'class': 'form-control'
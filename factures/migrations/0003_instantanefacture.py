@@ -0,0 +1,29 @@
+# Generated by Django 5.2.4 on 2026-10-19 06:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('factures', '0002_add_date_reception'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InstantaneFacture',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('donnees', models.JSONField(verbose_name='Données figées')),
+                ('empreinte', models.CharField(max_length=40, verbose_name='Empreinte')),
+                ('version_parametres', models.CharField(blank=True, max_length=32, verbose_name='Version des paramètres société')),
+                ('date_creation', models.DateTimeField(auto_now_add=True, verbose_name='Date de création')),
+                ('facture', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='instantane', to='factures.facture', verbose_name='Facture')),
+            ],
+            options={
+                'verbose_name': 'Instantané de facture',
+                'verbose_name_plural': 'Instantanés de facture',
+            },
+        ),
+    ]
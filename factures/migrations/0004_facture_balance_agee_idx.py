@@ -0,0 +1,15 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('factures', '0003_instantanefacture'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='facture',
+            index=models.Index(fields=['statut', 'date_echeance'], include=('fournisseur', 'montant_ttc'), name='facture_balance_agee_idx'),
+        ),
+    ]
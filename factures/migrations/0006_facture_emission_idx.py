@@ -0,0 +1,20 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('factures', '0005_facture_index_trigrammes'),
+    ]
+
+    operations = [
+        # L'index composite remplace l'index simple sur la date d'émission
+        migrations.AddIndex(
+            model_name='facture',
+            index=models.Index(fields=['date_emission', 'id'], name='facture_emission_idx'),
+        ),
+        migrations.RemoveIndex(
+            model_name='facture',
+            name='factures_fa_date_em_123456_idx',
+        ),
+    ]
@@ -15,6 +15,9 @@ class Facture(models.Model):
         ('annulee', 'Annulée'),
     ]
     
+    # Statuts d'une facture validée : son rendu vient de l'instantané
+    STATUTS_FIGES = ('validee', 'payee', 'annulee')
+    
     # Informations de base
     numero = models.CharField(
         max_length=50, 
@@ -125,8 +128,16 @@ class Facture(models.Model):
         indexes = [
             models.Index(fields=['numero']),
             models.Index(fields=['fournisseur']),
-            models.Index(fields=['date_emission']),
+            # Liste des factures : tri (et pagination par clé) sur la date d'émission
+            models.Index(fields=['date_emission', 'id'], name='facture_emission_idx'),
             models.Index(fields=['statut']),
+            # Balance âgée : filtre sur le statut, tranches sur l'échéance
+            # (colonnes incluses pour un parcours de l'index seul sous PostgreSQL)
+            models.Index(
+                fields=['statut', 'date_echeance'],
+                include=['fournisseur', 'montant_ttc'],
+                name='facture_balance_agee_idx'
+            ),
         ]
     
     def __str__(self):
@@ -207,9 +218,29 @@ class Facture(models.Model):
             super().save(update_fields=['montant_ht', 'montant_tva', 'montant_ttc'])
     
     def valider(self):
-        """Marque la facture comme validée"""
+        """Marque la facture comme validée et fige son contenu"""
         self.statut = 'validee'
         self.save()
+        self.figer()
+    
+    def figer(self):
+        """Enregistre l'instantané de la facture telle que validée (rendu PDF et aperçu, voir core.instantanes)"""
+        from core.instantanes import figer_document
+        from .utils import get_societe_info
+        return figer_document(InstantaneFacture, self, self.fournisseur, self.lignes.all(), get_societe_info())
+    
+    def actualiser_instantane(self):
+        """
+        Suit une correction du facture enregistrée par le formulaire de modification
+
+        Une facture validée peut encore être corrigée : l'instantané est refait pour que
+        le PDF suive la correction (conservé si le contenu rendu est inchangé),
+        ou supprimé si le statut n'est plus figé. N'est jamais appelé à l'affichage.
+        """
+        if self.statut in self.STATUTS_FIGES:
+            return self.figer()
+        InstantaneFacture.objects.filter(facture=self).delete()
+        return None
     
     def payer(self):
         """Marque la facture comme payée"""
@@ -344,4 +375,35 @@ class LigneFacture(models.Model):
             try:
                 facture.calculer_montants()
             except Exception as e:
-                print(f"Erreur lors du recalcul des montants après suppression: {e}")
\ No newline at end of file
+                print(f"Erreur lors du recalcul des montants après suppression: {e}")
+
+
+class InstantaneFacture(models.Model):
+    """Copie figée d'une facture au moment de sa validation"""
+    
+    facture = models.OneToOneField(
+        Facture,
+        on_delete=models.CASCADE,
+        related_name='instantane',
+        verbose_name="Facture"
+    )
+    donnees = models.JSONField(verbose_name="Données figées")
+    empreinte = models.CharField(max_length=40, verbose_name="Empreinte")
+    version_parametres = models.CharField(
+        max_length=32,
+        blank=True,
+        verbose_name="Version des paramètres société"
+    )
+    date_creation = models.DateTimeField(auto_now_add=True, verbose_name="Date de création")
+    
+    class Meta:
+        verbose_name = "Instantané de facture"
+        verbose_name_plural = "Instantanés de facture"
+    
+    def __str__(self):
+        return f"Instantané {self.facture_id} - {self.empreinte[:8]}"
+    
+    def restaurer(self):
+        """Retourne (facture, lignes, societe) reconstruits depuis l'instantané"""
+        from core.instantanes import restaurer_document
+        return restaurer_document(self.donnees, self.facture_id, Facture, Fournisseur, 'fournisseur', LigneFacture)
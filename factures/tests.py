@@ -1,3 +1,39 @@
+from datetime import date, timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
 from django.test import TestCase
+from django.urls import reverse
+
+from fournisseurs.models import Fournisseur
+from .models import Facture
+
+
+class FactureListeOrdreTests(TestCase):
+    """La liste des factures garde le même ordre quel que soit le mode de pagination"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.utilisateur = User.objects.create_superuser('admin', 'admin@example.com', 'motdepasse')
+        fournisseur = Fournisseur.objects.create(nom_complet="Fournisseur test", telephone="620000000")
+        # Ordre de création différent de l'ordre d'émission
+        for numero, jours in enumerate((5, 1, 3, 1, 8)):
+            emission = date(2025, 1, 20) - timedelta(days=jours)
+            Facture.objects.create(
+                numero=f"F-{numero}", fournisseur=fournisseur, objet="Test",
+                date_emission=emission, date_echeance=emission + timedelta(days=30)
+            )
+
+    def setUp(self):
+        self.client.force_login(self.utilisateur)
+
+    def _ordre(self, par_cle):
+        with mock.patch('core.pagination.PAGINATION_PAR_CLE', par_cle):
+            response = self.client.get(reverse('factures:facture_list'))
+        self.assertEqual(response.status_code, 200)
+        return [facture.pk for facture in response.context['factures_list']]
 
-# Create your tests here.
+    def test_meme_ordre_par_page_ou_par_cle(self):
+        attendu = list(Facture.objects.order_by('-date_emission', '-id').values_list('pk', flat=True))
+        self.assertEqual(self._ordre(False), attendu)
+        self.assertEqual(self._ordre(True), attendu)
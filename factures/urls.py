@@ -31,4 +31,13 @@ urlpatterns = [
     # Impression et téléchargement PDF
     path('<int:pk>/imprimer/', views.facture_imprimer, name='facture_imprimer'),
     path('<int:pk>/telecharger/', views.facture_telecharger, name='facture_telecharger'),
+    
+    # Balance âgée des factures à payer
+    path('balance-agee/', views.facture_balance_agee, name='facture_balance_agee'),
+    path('balance-agee/json/', views.facture_balance_agee_json, name='facture_balance_agee_json'),
+    path('balance-agee/export/', views.facture_balance_agee_export, name='facture_balance_agee_export'),
+    
+    # Export PDF par lot (mêmes filtres que la liste)
+    path('export-pdf/', views.facture_export_lot, name='facture_export_lot'),
+    path('export-csv/', views.facture_export_csv, name='facture_export_csv'),
 ]
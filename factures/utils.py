@@ -20,6 +20,9 @@ def get_societe_info():
                 'logo': societe.logo.url if societe.logo else None,
                 'en_tete_document': societe.en_tete_document,
                 'pied_page_document': societe.pied_page_document,
+                'bandeau_entete': societe.bandeau_entete.name if societe.bandeau_entete else None,
+                'bandeau_pied': societe.bandeau_pied.name if societe.bandeau_pied else None,
+                'version': societe.date_modification.strftime('%Y%m%d%H%M%S'),
             }
     except Exception:
         pass
@@ -35,11 +38,129 @@ def get_societe_info():
         'logo': None,
         'en_tete_document': None,
         'pied_page_document': None,
+        'bandeau_entete': None,
+        'bandeau_pied': None,
+        'version': None,
     }
 
-def generer_pdf_facture(facture, lignes, societe, mode='inline'):
+def donnees_rendu_facture(pk):
+    """
+    Retourne (facture, lignes, societe, empreinte) à utiliser pour le rendu
+
+    Facture validée (ou payée, annulée) : tout vient de l'instantané (une seule
+    lecture) ; sinon les données vivantes sont lues et l'empreinte vaut
+    None. Aucun instantané n'est écrit ici (appelé lors des affichages).
+    """
+    from django.shortcuts import get_object_or_404
+    from .models import Facture, InstantaneFacture
+
+    instantane = InstantaneFacture.objects.filter(
+        facture_id=pk, facture__statut__in=Facture.STATUTS_FIGES
+    ).first()
+    if instantane:
+        facture, lignes, societe = instantane.restaurer()
+        return facture, lignes, societe, instantane.empreinte
+
+    # Brouillon, ou statut figé hors des vues sans instantané : données vivantes
+    facture = get_object_or_404(Facture.objects.select_related('fournisseur'), pk=pk)
+    return facture, facture.lignes.all(), get_societe_info(), None
+
+def filtrer_factures(queryset, params):
+    """
+    Applique les filtres de la liste des factures (statut, fournisseur, dates, recherche)
+
+    `params` est un QueryDict (request.GET) ou un simple dictionnaire.
+    """
+    from core.recherche import rechercher
+
+    # Filtre par statut
+    statut = params.get('statut')
+    if statut:
+        queryset = queryset.filter(statut=statut)
+
+    # Filtre par fournisseur
+    fournisseur_id = params.get('fournisseur')
+    if fournisseur_id:
+        queryset = queryset.filter(fournisseur_id=fournisseur_id)
+
+    # Filtre par date de début
+    date_debut = params.get('date_debut')
+    if date_debut:
+        queryset = queryset.filter(date_emission__gte=date_debut)
+
+    # Filtre par date de fin
+    date_fin = params.get('date_fin')
+    if date_fin:
+        queryset = queryset.filter(date_emission__lte=date_fin)
+
+    # Recherche textuelle (index trigrammes sur PostgreSQL, voir core.recherche)
+    q = params.get('q')
+    if q:
+        queryset = rechercher(queryset, {'numero': q, 'fournisseur__nom_complet': q, 'objet': q})
+
+    return queryset
+
+# Statuts des factures restant à payer
+STATUTS_A_PAYER = ['en_attente', 'validee']
+
+# Tranches de la balance âgée : (clé, libellé, retard minimal, retard maximal) en jours
+TRANCHES_BALANCE = [
+    ('non_echu', 'Non échu', None, -1),
+    ('jours_0_30', '0-30 jours', 0, 30),
+    ('jours_31_60', '31-60 jours', 31, 60),
+    ('jours_61_90', '61-90 jours', 61, 90),
+    ('jours_90_plus', '+90 jours', 91, None),
+]
+
+def balance_agee(queryset=None, date_reference=None):
+    """
+    Balance âgée des factures à payer, par fournisseur
+
+    Une seule requête : les factures en attente ou validées sont regroupées
+    par fournisseur et chaque tranche de retard (date de référence moins
+    date d'échéance) est une somme conditionnelle (SUM(CASE WHEN ...)).
+    Retourne (lignes, totaux) ; chaque ligne porte fournisseur_id,
+    fournisseur_nom, nombre, total et une clé par tranche.
+    """
+    from datetime import timedelta
+    from decimal import Decimal
+    from django.db.models import Case, Count, DecimalField, F, Sum, Value, When
+    from django.utils import timezone
+    from .models import Facture
+
+    date_reference = date_reference or timezone.localdate()
+    if queryset is None:
+        queryset = Facture.objects.all()
+
+    zero = Value(Decimal('0.00'), output_field=DecimalField(max_digits=18, decimal_places=2))
+    tranches = {}
+    for cle, libelle, retard_min, retard_max in TRANCHES_BALANCE:
+        # retard = date_reference - date_echeance, comparé via les dates seuils
+        conditions = {}
+        if retard_min is not None:
+            conditions['date_echeance__lte'] = date_reference - timedelta(days=retard_min)
+        if retard_max is not None:
+            conditions['date_echeance__gte'] = date_reference - timedelta(days=retard_max)
+        tranches[cle] = Sum(Case(When(then=F('montant_ttc'), **conditions), default=zero))
+
+    lignes = list(
+        queryset.filter(statut__in=STATUTS_A_PAYER)
+        .values('fournisseur_id', fournisseur_nom=F('fournisseur__nom_complet'))
+        .annotate(nombre=Count('id'), total=Sum('montant_ttc'), **tranches)
+        .order_by('-total', 'fournisseur_nom')
+    )
+
+    champs = ['nombre', 'total'] + [cle for cle, *_ in TRANCHES_BALANCE]
+    totaux = {champ: sum((ligne[champ] or 0 for ligne in lignes), Decimal('0.00')) for champ in champs}
+    totaux['nombre'] = int(totaux['nombre'])
+    return lignes, totaux
+
+def generer_pdf_facture(facture, lignes, societe, mode='inline', grand_document=None, fichier=False):
     """
     Génère un PDF avec ReportLab pour une facture
+
+    Les documents volumineux sont rendus en tableau découpé aux sauts de page (voir core.pdf).
+    Avec fichier=True, retourne le fichier temporaire du PDF au lieu des bytes.
     """
     from reportlab.lib.pagesizes import A4
     from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
@@ -47,11 +168,14 @@ def generer_pdf_facture(facture, lignes, societe, mode='inline'):
     from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
     from reportlab.lib import colors
     from reportlab.lib.enums import TA_CENTER, TA_RIGHT, TA_LEFT
-    from io import BytesIO
     from datetime import datetime
+    from core.pdf import (
+        compter_lignes, est_grand_document, tableau_pagine, valeurs_lignes,
+        tampon_pdf, terminer_pdf
+    )
     
-    # Créer un buffer pour le PDF
-    buffer = BytesIO()
+    # Créer un buffer pour le PDF (bascule sur disque pour les gros documents)
+    buffer = tampon_pdf()
     
     # Créer le document PDF
     doc = SimpleDocTemplate(
@@ -60,7 +184,9 @@ def generer_pdf_facture(facture, lignes, societe, mode='inline'):
         rightMargin=2*cm,
         leftMargin=2*cm,
         topMargin=2*cm,
-        bottomMargin=2*cm
+        bottomMargin=2*cm,
+        # Rendu depuis un instantané : sortie identique octet pour octet
+        invariant=bool(societe.get('date_generation'))
     )
     
     # Styles basés sur l'image de référence
@@ -124,12 +250,11 @@ def generer_pdf_facture(facture, lignes, societe, mode='inline'):
     def draw_header(canvas, doc):
         canvas.saveState()
         try:
-            from parametres.models import InformationsSociete
-            soc = InformationsSociete.objects.first()
-            if soc and hasattr(soc, 'bandeau_entete') and soc.bandeau_entete:
+            if societe.get('bandeau_entete'):
                 try:
                     from reportlab.lib.utils import ImageReader
-                    img = ImageReader(soc.bandeau_entete.path)
+                    from parametres.images import chemin_image_pdf
+                    img = ImageReader(chemin_image_pdf('bandeau_entete', societe['bandeau_entete']))
                     # Dessiner l'image en haut de la page (pleine largeur, hauteur 100px)
                     canvas.drawImage(img, 0, A4[1] - 100, width=A4[0], height=100, preserveAspectRatio=False, mask='auto')
                 except Exception:
@@ -142,16 +267,14 @@ def generer_pdf_facture(facture, lignes, societe, mode='inline'):
     def draw_footer(canvas, doc):
         canvas.saveState()
         try:
-            from parametres.models import InformationsSociete
             from reportlab.lib.utils import ImageReader
+            from parametres.images import chemin_image_pdf, chemin_cachet_pdf
             import os
             
-            soc = InformationsSociete.objects.first()
-            
             # Dessiner le bandeau de pied de page s'il existe
-            if soc and hasattr(soc, 'bandeau_pied') and soc.bandeau_pied:
+            if societe.get('bandeau_pied'):
                 try:
-                    img = ImageReader(soc.bandeau_pied.path)
+                    img = ImageReader(chemin_image_pdf('bandeau_pied', societe['bandeau_pied']))
                     # Dessiner l'image en bas de la page (pleine largeur, hauteur 80px)
                     canvas.drawImage(img, 0, 0, width=A4[0], height=80, preserveAspectRatio=False, mask='auto')
                 except Exception:
@@ -159,10 +282,8 @@ def generer_pdf_facture(facture, lignes, societe, mode='inline'):
             
             # Ajouter le cachet DEVDRECO
             try:
-                # Chemin absolu vers l'image du cachet
-                from django.conf import settings
-                media_root = getattr(settings, 'MEDIA_ROOT', 'media')
-                cachet_path = os.path.join(media_root, 'cachets_signatures', 'cachet_devdreco.png')
+                # Chemin absolu vers l'image du cachet (variante préparée si disponible)
+                cachet_path = chemin_cachet_pdf()
                 
                 # Dimensions du cachet (encore plus grande)
                 cachet_width = 6*cm
@@ -276,23 +397,25 @@ def generer_pdf_facture(facture, lignes, societe, mode='inline'):
     story.append(Spacer(1, 10))
     
     # Tableau des lignes de facture
-    if lignes:
+    nombre_lignes = compter_lignes(lignes)
+    
+    if nombre_lignes:
         # En-têtes du tableau
-        table_data = [['Description', 'Quantité', 'Unité', 'Prix unitaire HT', 'Montant HT']]
+        en_tete = ['Description', 'Quantité', 'Unité', 'Prix unitaire HT', 'Montant HT']
         
         # Lignes de données
-        for ligne in lignes:
-            table_data.append([
-                ligne.description,
-                str(ligne.quantite),
-                ligne.unite,
-                f"{ligne.prix_unitaire_ht:.2f}",
-                f"{ligne.montant_ht:.2f}"
-            ])
+        table_data = (
+            [
+                description,
+                str(quantite),
+                unite,
+                f"{prix_unitaire:.2f}",
+                f"{montant:.2f}"
+            ]
+            for description, quantite, unite, prix_unitaire, montant in valeurs_lignes(lignes)
+        )
         
-        # Créer le tableau
-        table = Table(table_data, colWidths=[6*cm, 2*cm, 2*cm, 3*cm, 3*cm])
-        table.setStyle(TableStyle([
+        style_lignes = [
             # Style général
             ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#f8f9fa')),
             ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
@@ -305,9 +428,21 @@ def generer_pdf_facture(facture, lignes, societe, mode='inline'):
             ('TOPPADDING', (0, 0), (-1, 0), 12),
             ('GRID', (0, 0), (-1, -1), 1, colors.black),
             ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ]))
+        ]
         
-        story.append(table)
+        if est_grand_document(nombre_lignes, grand_document):
+            # Grand document : tableau découpé aux sauts de page, en-tête répété
+            story.append(tableau_pagine(
+                en_tete,
+                table_data,
+                [6*cm, 2*cm, 2*cm, 3*cm, 3*cm],
+                style_lignes
+            ))
+        else:
+            # Créer le tableau
+            table = Table([en_tete] + list(table_data), colWidths=[6*cm, 2*cm, 2*cm, 3*cm, 3*cm])
+            table.setStyle(TableStyle(style_lignes))
+            story.append(table)
     else:
         story.append(Paragraph('<i>Aucune ligne de facture</i>', normal_style))
     
@@ -352,7 +487,8 @@ def generer_pdf_facture(facture, lignes, societe, mode='inline'):
     
     # Pied de page (si pas d'image)
     if not societe.get('pied_page_document'):
-        footer_text = f"Facture générée le {datetime.now().strftime('%d/%m/%Y à %H:%M')} - {societe['nom']}"
+        date_generation = societe.get('date_generation') or datetime.now().strftime('%d/%m/%Y à %H:%M')
+        footer_text = f"Facture générée le {date_generation} - {societe['nom']}"
         story.append(Paragraph(footer_text, normal_style))
     
     # Construire le PDF avec en-têtes et pieds de page
@@ -362,8 +498,5 @@ def generer_pdf_facture(facture, lignes, societe, mode='inline'):
     
     doc.build(story, onFirstPage=on_page, onLaterPages=on_page)
     
-    # Récupérer le contenu du PDF
-    pdf_content = buffer.getvalue()
-    buffer.close()
-    
-    return pdf_content
+    # Récupérer le PDF (fichier temporaire ou contenu)
+    return terminer_pdf(buffer, fichier)
@@ -4,8 +4,7 @@ from django.contrib.auth.mixins import LoginRequiredMixin
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
 from django.urls import reverse_lazy
 from django.contrib import messages
-from django.db.models import Q
-from django.http import JsonResponse, HttpResponse
+from django.http import JsonResponse, HttpResponse, HttpResponseNotModified
 from django.utils import timezone
 from django.template.loader import render_to_string
 from django.conf import settings
@@ -13,19 +12,24 @@ from datetime import timedelta, date, datetime
 from decimal import Decimal, InvalidOperation
 from .models import Facture, LigneFacture
 from .forms import FactureForm, LigneFactureFormSet
+from .utils import filtrer_factures, donnees_rendu_facture
 from fournisseurs.models import Fournisseur
 from utilisateurs.decorators import permission_required, class_permission_required
 from utilisateurs.utils import filter_queryset_by_permissions
+from core.instantanes import appliquer_cache, non_modifie
+from core.pagination import PaginationParCleMixin, compter
 import os
 import tempfile
 
 @class_permission_required('factures.view')
-class FactureListView(LoginRequiredMixin, ListView):
+class FactureListView(LoginRequiredMixin, PaginationParCleMixin, ListView):
     """Vue pour lister toutes les factures"""
     model = Facture
     template_name = 'factures/facture_list.html'
     context_object_name = 'factures_list'
     paginate_by = 20
+    # Même ordre en pagination par clé qu'en pagination classique
+    champ_pagination = 'date_emission'
     
     def get_queryset(self):
         """Filtre les factures selon les paramètres de recherche"""
@@ -35,36 +39,10 @@ class FactureListView(LoginRequiredMixin, ListView):
         # Filtrer selon les permissions utilisateur
         queryset = filter_queryset_by_permissions(self.request.user, queryset, 'factures')
         
-        # Filtre par statut
-        statut = self.request.GET.get('statut')
-        if statut:
-            queryset = queryset.filter(statut=statut)
-        
-        # Filtre par fournisseur
-        fournisseur_id = self.request.GET.get('fournisseur')
-        if fournisseur_id:
-            queryset = queryset.filter(fournisseur_id=fournisseur_id)
-        
-        # Filtre par date de début
-        date_debut = self.request.GET.get('date_debut')
-        if date_debut:
-            queryset = queryset.filter(date_emission__gte=date_debut)
-        
-        # Filtre par date de fin
-        date_fin = self.request.GET.get('date_fin')
-        if date_fin:
-            queryset = queryset.filter(date_emission__lte=date_fin)
-        
-        # Recherche textuelle
-        q = self.request.GET.get('q')
-        if q:
-            queryset = queryset.filter(
-                Q(numero__icontains=q) |
-                Q(fournisseur__nom__icontains=q) |
-                Q(objet__icontains=q)
-            )
-        
-        return queryset.order_by('-date_emission')
+        # Filtres de la liste (partagés avec l'export par lot)
+        queryset = filtrer_factures(queryset, self.request.GET)
+
+        return queryset.order_by('-date_emission', '-id')
     
     def get_context_data(self, **kwargs):
         """Ajoute les statistiques et données supplémentaires au contexte"""
@@ -74,37 +52,37 @@ class FactureListView(LoginRequiredMixin, ListView):
         try:
             # Statistiques avec gestion d'erreur robuste
             try:
-                context['total_factures'] = Facture.objects.count()
+                context['total_factures'] = compter(Facture.objects.all())
             except Exception as e:
                 print(f"Erreur lors du comptage total des factures: {e}")
                 context['total_factures'] = 0
                 
             try:
-                context['factures_brouillon'] = Facture.objects.filter(statut='brouillon').count()
+                context['factures_brouillon'] = compter(Facture.objects.filter(statut='brouillon'))
             except Exception as e:
                 print(f"Erreur lors du comptage des factures brouillon: {e}")
                 context['factures_brouillon'] = 0
                 
             try:
-                context['factures_en_attente'] = Facture.objects.filter(statut='en_attente').count()
+                context['factures_en_attente'] = compter(Facture.objects.filter(statut='en_attente'))
             except Exception as e:
                 print(f"Erreur lors du comptage des factures en attente: {e}")
                 context['factures_en_attente'] = 0
                 
             try:
-                context['factures_validees'] = Facture.objects.filter(statut='validee').count()
+                context['factures_validees'] = compter(Facture.objects.filter(statut='validee'))
             except Exception as e:
                 print(f"Erreur lors du comptage des factures validées: {e}")
                 context['factures_validees'] = 0
                 
             try:
-                context['factures_payees'] = Facture.objects.filter(statut='payee').count()
+                context['factures_payees'] = compter(Facture.objects.filter(statut='payee'))
             except Exception as e:
                 print(f"Erreur lors du comptage des factures payées: {e}")
                 context['factures_payees'] = 0
                 
             try:
-                context['factures_annulees'] = Facture.objects.filter(statut='annulee').count()
+                context['factures_annulees'] = compter(Facture.objects.filter(statut='annulee'))
             except Exception as e:
                 print(f"Erreur lors du comptage des factures annulées: {e}")
                 context['factures_annulees'] = 0
@@ -229,6 +207,9 @@ class FactureUpdateView(LoginRequiredMixin, UpdateView):
             self.object.refresh_from_db()
             self.object.calculer_montants()
             
+            # Facture validée modifiée : instantané refait (ou supprimé selon le statut)
+            self.object.actualiser_instantane()
+            
             messages.success(self.request, f'Facture "{self.object.numero}" modifiée avec succès.')
             return redirect('factures:facture_detail', pk=self.object.pk)
         else:
@@ -249,48 +230,45 @@ class FactureDeleteView(LoginRequiredMixin, DeleteView):
 @login_required
 def facture_apercu_ecran(request, pk):
     """Vue pour l'aperçu HTML d'une facture dans le navigateur"""
-    facture = get_object_or_404(Facture, pk=pk)
-    
-    # Récupérer les lignes de la facture
-    lignes = facture.lignes.all()
+    # Facture validée : aperçu depuis l'instantané figé
+    facture, lignes, societe, empreinte = donnees_rendu_facture(pk)
+    if empreinte and non_modifie(request, f"{empreinte}-html"):
+        return HttpResponseNotModified()
     
     # Contexte pour le template
     context = {
         'facture': facture,
         'lignes': lignes,
-        'societe': get_societe_info(),
+        'societe': societe,
         'document_type': 'Facture'
     }
     
     # Utiliser le nouveau template HTML pour l'aperçu
-    return render(request, 'factures/facture_print.html', context)
+    response = render(request, 'factures/facture_print.html', context)
+    if empreinte:
+        appliquer_cache(response, f"{empreinte}-html")
+    return response
 
 @login_required
 def facture_imprimer(request, pk):
     """Vue pour imprimer une facture en PDF"""
-    facture = get_object_or_404(Facture, pk=pk)
-    
-    # Récupérer les lignes de la facture
-    lignes = facture.lignes.all()
-    
-    # Contexte pour le template
-    context = {
-        'facture': facture,
-        'lignes': lignes,
-        'societe': get_societe_info()
-    }
+    # Document figé : rendu depuis son instantané (revalidé par son ETag)
+    facture, lignes, societe, empreinte = donnees_rendu_facture(pk)
+    if empreinte and non_modifie(request, f"{empreinte}-inline"):
+        return HttpResponseNotModified()
     
     try:
         # Générer le PDF avec ReportLab
         from .utils import generer_pdf_facture
+        from core.pdf import reponse_pdf
         
         # Générer le PDF
-        pdf_content = generer_pdf_facture(facture, lignes, get_societe_info(), mode='inline')
-        
-        # Réponse HTTP avec le PDF
-        response = HttpResponse(pdf_content, content_type='application/pdf')
-        response['Content-Disposition'] = f'inline; filename="facture_{facture.numero}.pdf"'
+        pdf_fichier = generer_pdf_facture(facture, lignes, societe, mode='inline', fichier=True)
         
+        # Réponse HTTP diffusant le PDF
+        response = reponse_pdf(pdf_fichier, f"facture_{facture.numero}.pdf", mode='inline')
+        if empreinte:
+            appliquer_cache(response, f"{empreinte}-inline")
         return response
         
     except Exception as e:
@@ -300,46 +278,52 @@ def facture_imprimer(request, pk):
 @login_required
 def facture_telecharger(request, pk):
     """Vue pour télécharger une facture en PDF"""
-    facture = get_object_or_404(Facture, pk=pk)
-    
-    # Récupérer les lignes de la facture
-    lignes = facture.lignes.all()
-    
-    # Contexte pour le template
-    context = {
-        'facture': facture,
-        'lignes': lignes,
-        'societe': get_societe_info()
-    }
+    # Document figé : rendu depuis son instantané (revalidé par son ETag)
+    facture, lignes, societe, empreinte = donnees_rendu_facture(pk)
+    if empreinte and non_modifie(request, f"{empreinte}-attachment"):
+        return HttpResponseNotModified()
     
     try:
         # Générer le PDF avec ReportLab
         from .utils import generer_pdf_facture
+        from core.pdf import reponse_pdf
         
         # Générer le PDF
-        pdf_content = generer_pdf_facture(facture, lignes, get_societe_info(), mode='attachment')
-        
-        # Réponse HTTP avec le PDF en téléchargement
-        response = HttpResponse(pdf_content, content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="facture_{facture.numero}.pdf"'
+        pdf_fichier = generer_pdf_facture(facture, lignes, societe, mode='attachment', fichier=True)
         
+        # Réponse HTTP diffusant le PDF en téléchargement
+        response = reponse_pdf(pdf_fichier, f"facture_{facture.numero}.pdf", mode='attachment')
+        if empreinte:
+            appliquer_cache(response, f"{empreinte}-attachment")
         return response
         
     except Exception as e:
         messages.error(request, f'Erreur lors de la génération du PDF: {str(e)}')
         return redirect('factures:facture_detail', pk=pk)
 
-def get_societe_info():
-    """Retourne les informations de l'entreprise"""
-    return {
-        'nom': 'DEVDRECO SOFT',
-        'adresse': '123 Avenue des Affaires',
-        'ville': 'Lomé, Togo',
-        'telephone': '+228 90 12 34 56',
-        'email': 'contact@devdreco-soft.com',
-        'site_web': 'www.devdreco-soft.com',
-        'logo': None,
-    }
+@login_required
+@permission_required('factures.export')
+def facture_export_lot(request):
+    """Vue pour exporter en PDF (ZIP ou PDF fusionné) les factures filtrées de la liste"""
+    from core.export_pdf import documents_filtres, reponse_export_lot
+    
+    queryset = filter_queryset_by_permissions(request.user, Facture.objects.all(), 'factures')
+    queryset = documents_filtres('factures', request.GET, queryset)
+    
+    try:
+        return reponse_export_lot('factures', queryset, request.GET.get('format', 'zip'))
+    except Exception as e:
+        messages.error(request, f'Erreur lors de l\'export des PDF: {str(e)}')
+        return redirect('factures:facture_list')
+
+@login_required
+@permission_required('factures.export')
+def facture_export_csv(request):
+    """Vue pour exporter en CSV (diffusé en flux) les factures filtrées de la liste"""
+    from core.export_csv import reponse_export_csv
+    
+    queryset = filter_queryset_by_permissions(request.user, Facture.objects.all(), 'factures')
+    return reponse_export_csv('factures', request.GET, queryset)
 
 @login_required
 @permission_required('factures.delete')
@@ -404,4 +388,123 @@ def facture_toggle_status(request, pk):
     return JsonResponse({
         'success': False,
         'message': 'Méthode non autorisée.'
-    })
\ No newline at end of file
+    })
+
+
+def _balance_agee_demandee(request):
+    """Balance âgée selon la date de référence (?date=AAAA-MM-JJ) et les permissions"""
+    from .utils import balance_agee
+
+    date_reference = None
+    if request.GET.get('date'):
+        try:
+            date_reference = datetime.strptime(request.GET['date'], '%Y-%m-%d').date()
+        except ValueError:
+            date_reference = None
+    date_reference = date_reference or timezone.localdate()
+
+    queryset = filter_queryset_by_permissions(request.user, Facture.objects.all(), 'factures')
+    lignes, totaux = balance_agee(queryset, date_reference)
+    return lignes, totaux, date_reference
+
+@login_required
+@permission_required('factures.view')
+def facture_balance_agee(request):
+    """Vue de la balance âgée des factures fournisseurs"""
+    from .utils import TRANCHES_BALANCE
+
+    try:
+        lignes, totaux, date_reference = _balance_agee_demandee(request)
+    except Exception as e:
+        print(f"Erreur lors du calcul de la balance âgée: {e}")
+        messages.error(request, f'Erreur lors du calcul de la balance âgée: {str(e)}')
+        return redirect('factures:facture_list')
+
+    tranches = [(cle, libelle) for cle, libelle, *_ in TRANCHES_BALANCE]
+    context = {
+        'lignes': [
+            {**ligne, 'montants': [ligne[cle] for cle, _ in tranches]}
+            for ligne in lignes
+        ],
+        'totaux': totaux,
+        'totaux_tranches': [totaux[cle] for cle, _ in tranches],
+        'tranches': tranches,
+        'date_reference': date_reference,
+    }
+    return render(request, 'factures/balance_agee.html', context)
+
+@login_required
+@permission_required('factures.view')
+def facture_balance_agee_json(request):
+    """Balance âgée au format JSON"""
+    try:
+        lignes, totaux, date_reference = _balance_agee_demandee(request)
+    except Exception as e:
+        return JsonResponse({'success': False, 'message': str(e)}, status=500)
+
+    def montants(valeurs):
+        return {cle: str(valeur) if isinstance(valeur, Decimal) else valeur for cle, valeur in valeurs.items()}
+
+    return JsonResponse({
+        'success': True,
+        'date_reference': date_reference.isoformat(),
+        'fournisseurs': [montants(ligne) for ligne in lignes],
+        'totaux': montants(totaux),
+    })
+
+@login_required
+@permission_required('factures.export')
+def facture_balance_agee_export(request):
+    """Export de la balance âgée (CSV ou Excel selon ?format=)"""
+    from .utils import TRANCHES_BALANCE
+
+    try:
+        lignes, totaux, date_reference = _balance_agee_demandee(request)
+    except Exception as e:
+        messages.error(request, f'Erreur lors de l\'export de la balance âgée: {str(e)}')
+        return redirect('factures:facture_balance_agee')
+
+    cles = [cle for cle, *_ in TRANCHES_BALANCE]
+    en_tete = ['Fournisseur', 'Factures'] + [libelle for _, libelle, *_ in TRANCHES_BALANCE] + ['Total TTC']
+    contenu = [
+        [ligne['fournisseur_nom'], ligne['nombre']] + [ligne[cle] for cle in cles] + [ligne['total']]
+        for ligne in lignes
+    ]
+    contenu.append(['TOTAL', totaux['nombre']] + [totaux[cle] for cle in cles] + [totaux['total']])
+    nom_fichier = f"balance_agee_{date_reference.strftime('%Y%m%d')}"
+
+    if request.GET.get('format') == 'excel':
+        import io
+        import openpyxl
+        from openpyxl.styles import Font
+
+        wb = openpyxl.Workbook()
+        ws = wb.active
+        ws.title = 'Balance âgée'
+        ws.append([f"Balance âgée au {date_reference.strftime('%d/%m/%Y')}"])
+        ws.append(en_tete)
+        for cellule in ws[2]:
+            cellule.font = Font(bold=True)
+        for ligne in contenu:
+            ws.append(ligne)
+        for cellule in ws[ws.max_row]:
+            cellule.font = Font(bold=True)
+        ws.column_dimensions['A'].width = 40
+
+        buffer = io.BytesIO()
+        wb.save(buffer)
+        response = HttpResponse(
+            buffer.getvalue(),
+            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        )
+        response['Content-Disposition'] = f'attachment; filename="{nom_fichier}.xlsx"'
+        return response
+
+    import csv
+    response = HttpResponse(content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{nom_fichier}.csv"'
+    response.write('\ufeff')
+    writer = csv.writer(response, delimiter=';')
+    writer.writerow(en_tete)
+    writer.writerows(contenu)
+    return response
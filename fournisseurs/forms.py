@@ -3,6 +3,7 @@ from django.core.validators import EmailValidator
 from django.core.exceptions import ValidationError
 from .models import Fournisseur, ProduitFournisseur
 from articles.models import Article
+from core.doublons import controler_doublons
 import re
 
 
@@ -123,6 +124,13 @@ class FournisseurForm(forms.ModelForm):
         })
     )
     
+    # Confirmation demandée quand un fournisseur ressemblant existe déjà
+    confirmer_doublon = forms.BooleanField(
+        required=False,
+        label="Enregistrer même si un fournisseur ressemblant existe",
+        widget=forms.CheckboxInput(attrs={'class': 'form-check-input'})
+    )
+    
     class Meta:
         model = Fournisseur
         fields = [
@@ -236,6 +244,8 @@ class FournisseurForm(forms.ModelForm):
             country = f'+{country}'
         cleaned['telephone'] = f"{country} {number_value}".strip()
         
+        # Doublons probables (téléphone, nom phonétique, domaine email)
+        controler_doublons(self, Fournisseur, "Fournisseur", ('nom_complet', 'email', 'phone_country_code', 'phone_number'))
         return cleaned
     
     def save(self, commit=True):
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.4 on 2026-10-19 07:00
+
+import re
+
+from django.db import migrations, models
+
+
+def remplir_telephone_normalise(apps, schema_editor):
+    Fournisseur = apps.get_model('fournisseurs', 'Fournisseur')
+    fournisseurs = list(Fournisseur.objects.only('id', 'telephone'))
+    for fournisseur in fournisseurs:
+        fournisseur.telephone_normalise = re.sub(r'[^\d]', '', fournisseur.telephone or '')
+    Fournisseur.objects.bulk_update(fournisseurs, ['telephone_normalise'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fournisseurs', '0002_alter_fournisseur_pays_alter_fournisseur_telephone'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fournisseur',
+            name='telephone_normalise',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, help_text='Chiffres uniquement pour recherche', max_length=32),
+        ),
+        migrations.AddIndex(
+            model_name='fournisseur',
+            index=models.Index(fields=['email'], name='fournisseur_email_97f379_idx'),
+        ),
+        migrations.RunPython(remplir_telephone_normalise, migrations.RunPython.noop),
+    ]
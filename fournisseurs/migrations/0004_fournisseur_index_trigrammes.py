@@ -0,0 +1,16 @@
+# Generated by Django 5.2.4 on 2026-10-19 07:20
+
+from django.db import migrations
+
+from core.recherche import IndexTrigrammes
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fournisseurs', '0003_fournisseur_telephone_normalise'),
+    ]
+
+    operations = [
+        IndexTrigrammes('fournisseur', ['nom_complet', 'email', 'telephone_normalise', 'contact_principal', 'ville']),
+    ]
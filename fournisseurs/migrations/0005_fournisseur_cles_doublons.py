@@ -0,0 +1,106 @@
+# Generated by Django 5.2.4 on 2026-10-19 07:17
+
+import re
+import unicodedata
+
+from django.db import migrations, models
+
+
+# Clés de blocage telles que définies à la création de ces colonnes (copie
+# figée de core.doublons : une évolution des règles ne modifie pas cette
+# migration)
+CHIFFRES_TELEPHONE = 8
+
+MOTS_IGNORES = frozenset("""
+    sarl sarlu sa sas sasu suarl eurl sci gie snc ets etablissement etablissements
+    ste societe cie compagnie et de du des la le les l d
+""".split())
+
+DOMAINES_GENERIQUES = frozenset("""
+    gmail.com googlemail.com yahoo.com yahoo.fr ymail.com hotmail.com hotmail.fr
+    outlook.com outlook.fr live.com live.fr msn.com icloud.com me.com aol.com
+    orange.fr wanadoo.fr free.fr sfr.fr laposte.net gmx.fr gmx.com
+    protonmail.com proton.me
+""".split())
+
+REGLES_PHONETIQUES = [(re.compile(motif), remplacement) for motif, remplacement in (
+    (r'gu(?=[eiy])', 'G'),
+    (r'ph', 'f'),
+    (r'dj', 'j'),
+    (r'sch', 'ch'),
+    (r'ck|qu|q', 'k'),
+    (r'c(?=[eiy])', 's'),
+    (r'c', 'k'),
+    (r'g(?=[eiy])', 'j'),
+    (r'w', 'ou'),
+    (r'y', 'i'),
+    (r'eau|au', 'o'),
+    (r'ou', 'u'),
+    (r'ai|ei', 'e'),
+    (r'x', 'ks'),
+    (r'z', 's'),
+    (r'h', ''),
+    (r'(.)\1+', r'\1'),
+    (r'(?<=...)[stdx]$', ''),
+    (r'(?<=..)e$', ''),
+)]
+
+
+def cles_doublons(nom, telephone, email):
+    decompose = unicodedata.normalize('NFKD', (nom or '').casefold())
+    texte = ''.join(c for c in decompose if not unicodedata.combining(c))
+    mots = set()
+    for mot in re.split(r'[^a-z0-9]+', texte):
+        if not mot or mot in MOTS_IGNORES or (len(mot) < 2 and not mot.isdigit()):
+            continue
+        for motif, remplacement in REGLES_PHONETIQUES:
+            mot = motif.sub(remplacement, mot)
+        if mot:
+            mots.add(mot.lower())
+
+    chiffres = re.sub(r'[^\d]', '', telephone or '')
+    domaine = (email or '').rpartition('@')[2].strip().lower()
+    return {
+        'telephone_cle': chiffres[-CHIFFRES_TELEPHONE:] if len(chiffres) >= CHIFFRES_TELEPHONE else '',
+        'nom_phonetique': ' '.join(sorted(mots))[:100],
+        'domaine_email': '' if domaine in DOMAINES_GENERIQUES else domaine[:100],
+    }
+
+
+def remplir_cles_doublons(apps, schema_editor):
+    Fournisseur = apps.get_model('fournisseurs', 'Fournisseur')
+    lot = []
+    for objet in Fournisseur.objects.only('id', 'nom_complet', 'telephone', 'email').iterator(chunk_size=1000):
+        for champ, valeur in cles_doublons(objet.nom_complet, objet.telephone, objet.email).items():
+            setattr(objet, champ, valeur)
+        lot.append(objet)
+        if len(lot) == 1000:
+            Fournisseur.objects.bulk_update(lot, ['telephone_cle', 'nom_phonetique', 'domaine_email'])
+            lot = []
+    Fournisseur.objects.bulk_update(lot, ['telephone_cle', 'nom_phonetique', 'domaine_email'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fournisseurs', '0004_fournisseur_index_trigrammes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fournisseur',
+            name='domaine_email',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='fournisseur',
+            name='nom_phonetique',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='fournisseur',
+            name='telephone_cle',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=32),
+        ),
+        migrations.RunPython(remplir_cles_doublons, migrations.RunPython.noop),
+    ]
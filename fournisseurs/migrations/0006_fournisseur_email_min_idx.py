@@ -0,0 +1,16 @@
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fournisseurs', '0005_fournisseur_cles_doublons'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='fournisseur',
+            index=models.Index(django.db.models.functions.text.Lower('email'), name='fournisseur_email_min_idx'),
+        ),
+    ]
@@ -1,7 +1,10 @@
 from django.db import models
+from django.db.models.functions import Lower
 from django.core.validators import EmailValidator, RegexValidator
 from django.core.exceptions import ValidationError
 from articles.models import Article
+from core.doublons import cles_doublons
+from core.recherche import chiffres
 import re
 
 
@@ -38,6 +41,15 @@ class Fournisseur(models.Model):
         help_text="Numéro de téléphone avec indicatif pays"
     )
     
+    telephone_normalise = models.CharField(
+        max_length=32,
+        editable=False,
+        blank=True,
+        default='',
+        help_text="Chiffres uniquement pour recherche",
+        db_index=True,
+    )
+    
     email = models.EmailField(
         max_length=100,
         blank=True,
@@ -46,6 +58,11 @@ class Fournisseur(models.Model):
         validators=[EmailValidator()]
     )
     
+    # Clés de blocage de la détection des doublons (voir core.doublons)
+    telephone_cle = models.CharField(max_length=32, editable=False, blank=True, default='', db_index=True)
+    nom_phonetique = models.CharField(max_length=100, editable=False, blank=True, default='', db_index=True)
+    domaine_email = models.CharField(max_length=100, editable=False, blank=True, default='', db_index=True)
+    
     adresse = models.TextField(
         blank=True,
         null=True,
@@ -132,6 +149,9 @@ class Fournisseur(models.Model):
         ordering = ['nom_complet']
         indexes = [
             models.Index(fields=['nom_complet']),
+            models.Index(fields=['email']),
+            # Doublons (import, validation) : email comparé sans tenir compte de la casse
+            models.Index(Lower('email'), name='fournisseur_email_min_idx'),
             models.Index(fields=['type_fournisseur']),
             models.Index(fields=['actif']),
         ]
@@ -139,6 +159,17 @@ class Fournisseur(models.Model):
     def __str__(self):
         return self.nom_complet
     
+    def calculer_cles_doublons(self):
+        """Renseigne les clés de blocage (à appeler aussi avant un chargement en masse)"""
+        for champ, valeur in cles_doublons(self.nom_complet, self.telephone, self.email).items():
+            setattr(self, champ, valeur)
+    
+    def save(self, *args, **kwargs):
+        # Met à jour le champ normalisé
+        self.telephone_normalise = chiffres(self.telephone)
+        self.calculer_cles_doublons()
+        super().save(*args, **kwargs)
+    
     def clean(self):
         super().clean()
         
@@ -148,8 +179,10 @@ class Fournisseur(models.Model):
         
         # Validation de l'email si fourni
         if self.email:
-            # Vérifier l'unicité de l'email
-            queryset = Fournisseur.objects.filter(email=self.email)
+            # Vérifier l'unicité de l'email (sans tenir compte de la casse)
+            queryset = Fournisseur.objects.annotate(email_minuscule=Lower('email')).filter(
+                email_minuscule=self.email.lower()
+            )
             if self.pk:
                 queryset = queryset.exclude(pk=self.pk)
             if queryset.exists():
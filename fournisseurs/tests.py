@@ -1,3 +1,35 @@
+from django.core.exceptions import ValidationError
 from django.test import TestCase
 
-# Create your tests here.
+from .models import Fournisseur
+from .utils import analyser_lignes_fournisseurs
+
+
+class ImportDoublonsTests(TestCase):
+    """Doublons écartés à l'import des fournisseurs (fournisseurs.utils)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.fournisseur = Fournisseur.objects.create(
+            nom_complet="Sogeco", telephone="+224 620 00 00 02", email="Contact@Sogeco.gn"
+        )
+
+    def test_email_existant_avec_une_autre_casse(self):
+        valides, erreurs = analyser_lignes_fournisseurs(['Nom', 'Email'], [
+            ['Sogeco Conakry', 'contact@sogeco.gn'],
+            ['Batimat', 'ventes@batimat.gn'],
+            ['Batimat Kaloum', 'VENTES@batimat.gn'],
+        ])
+        self.assertEqual([fournisseur.nom_complet for fournisseur in valides], ['Batimat'])
+        self.assertEqual(erreurs, [
+            "Ligne 2: doublon, l'email contact@sogeco.gn existe déjà",
+            "Ligne 4: doublon, l'email VENTES@batimat.gn existe déjà",
+        ])
+
+    def test_telephone_normalise(self):
+        self.assertEqual(self.fournisseur.telephone_normalise, '224620000002')
+
+    def test_clean_email_sans_casse(self):
+        fournisseur = Fournisseur(nom_complet="Autre", telephone="+224 620 00 00 03", email="contact@SOGECO.gn")
+        with self.assertRaises(ValidationError):
+            fournisseur.clean()
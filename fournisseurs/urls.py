@@ -24,6 +24,12 @@ urlpatterns = [
     
     # Aperçu de la liste des fournisseurs
     path('liste-print/', views.fournisseur_liste_print, name='fournisseur_liste_print'),
+    
+    # Export CSV de la liste (mêmes filtres que la liste)
+    path('export/', views.fournisseur_export, name='fournisseur_export'),
+    
+    # Import de fournisseurs (Excel / CSV, en arrière-plan)
+    path('import/', views.fournisseur_import, name='fournisseur_import'),
 ]
 
 
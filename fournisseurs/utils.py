@@ -0,0 +1,186 @@
+"""
+Utilitaires pour la gestion des fournisseurs
+"""
+from django.db import transaction
+
+from clients.utils import LONGUEUR_MIN_TELEPHONE, normaliser_telephones
+from core.chargement import charger_en_masse
+from core.recherche import chiffres, rechercher
+from core.selection import invalider as invalider_selection
+from core.import_fichiers import (
+    avec_email_minuscule, email_valide, reperer_colonnes, texte_cellule, valeur_booleenne, valeur_choix, valeurs_existantes,
+)
+
+
+# Colonnes des fichiers importés : champ -> libellés acceptés
+COLONNES_FOURNISSEURS = {
+    'nom_complet': ('Nom complet/Raison sociale', 'Nom complet', 'Raison sociale', 'Nom'),
+    'type_fournisseur': ('Type', 'Type de fournisseur'),
+    'telephone': ('Téléphone', 'Telephone', 'Tél', 'Tel'),
+    'email': ('Email', 'E-mail', 'Adresse e-mail', 'Courriel'),
+    'contact_principal': ('Contact principal', 'Contact'),
+    'adresse': ('Adresse',),
+    'ville': ('Ville',),
+    'pays': ('Pays',),
+    'actif': ('Statut', 'Actif'),
+}
+COLONNES_REQUISES_FOURNISSEURS = ('nom_complet',)
+
+
+def filtrer_fournisseurs(queryset, params):
+    """
+    Applique les filtres de la liste des fournisseurs (recherche, type, statut)
+
+    `params` est un QueryDict (request.GET) ou un simple dictionnaire ; les
+    valeurs sont validées par FournisseurSearchForm comme dans la liste.
+    Le tri reste à la charge de l'appelant.
+    """
+    from .forms import FournisseurSearchForm
+
+    form = FournisseurSearchForm(params)
+    if not form.is_valid():
+        return queryset
+
+    search = (form.cleaned_data.get('search') or '').strip()
+    type_fournisseur = form.cleaned_data.get('type_fournisseur')
+    actif = form.cleaned_data.get('actif')
+
+    # Recherche textuelle (index trigrammes sur PostgreSQL, voir core.recherche) ;
+    # le téléphone est comparé en chiffres seulement, comme pour les clients
+    if search:
+        queryset = rechercher(queryset, {
+            'nom_complet': search,
+            'email': search,
+            'telephone_normalise': chiffres(search),
+            'contact_principal': search,
+            'ville': search,
+        })
+
+    # Filtre par type
+    if type_fournisseur:
+        queryset = queryset.filter(type_fournisseur=type_fournisseur)
+
+    # Filtre par statut
+    if actif == 'true':
+        queryset = queryset.filter(actif=True)
+    elif actif == 'false':
+        queryset = queryset.filter(actif=False)
+
+    return queryset
+
+
+def analyser_lignes_fournisseurs(en_tetes, lignes, premiere_ligne=2):
+    """
+    Valide les lignes d'un fichier de fournisseurs
+
+    Comme pour les clients, les téléphones du lot sont normalisés en une
+    passe et les doublons (nom, email ou téléphone déjà présents dans le
+    fichier ou en base) écartés avec une seule requête par lot. Le nom et
+    l'email sont uniques comme dans Fournisseur.clean(). Retourne
+    (fournisseurs à créer, erreurs).
+    """
+    from .models import Fournisseur
+
+    colonnes = reperer_colonnes(en_tetes, COLONNES_FOURNISSEURS)
+    longueurs = {
+        champ: Fournisseur._meta.get_field(champ).max_length
+        for champ in ('nom_complet', 'telephone', 'email', 'contact_principal', 'ville', 'pays')
+    }
+
+    erreurs = []
+    candidats = []
+    for numero, ligne in enumerate(lignes, premiere_ligne):
+        valeurs = {champ: texte_cellule(ligne, indice) for champ, indice in colonnes.items()}
+        nom_complet = valeurs.get('nom_complet', '')
+        if not any(valeurs.values()):
+            continue
+        if not nom_complet:
+            erreurs.append(f"Ligne {numero}: nom manquant")
+            continue
+
+        type_fournisseur = valeur_choix(
+            valeurs.get('type_fournisseur'), Fournisseur.TYPE_FOURNISSEUR_CHOICES, 'entreprise'
+        )
+        email = valeurs.get('email') or None
+        trop_long = next(
+            (champ for champ, longueur in longueurs.items() if len(valeurs.get(champ) or '') > longueur),
+            None
+        )
+        if type_fournisseur is None:
+            erreurs.append(f"Ligne {numero}: type de fournisseur inconnu « {valeurs['type_fournisseur']} »")
+        elif trop_long:
+            erreurs.append(f"Ligne {numero}: {trop_long} trop long ({longueurs[trop_long]} caractères maximum)")
+        elif email and not email_valide(email):
+            erreurs.append(f"Ligne {numero}: adresse e-mail invalide « {email} »")
+        else:
+            actif = valeur_booleenne(valeurs.get('actif'))
+            candidats.append((numero, Fournisseur(
+                nom_complet=nom_complet,
+                type_fournisseur=type_fournisseur,
+                telephone=valeurs.get('telephone') or '+224 ',
+                email=email,
+                contact_principal=valeurs.get('contact_principal') or None,
+                adresse=valeurs.get('adresse') or None,
+                ville=valeurs.get('ville') or None,
+                pays=valeurs.get('pays') or 'Guinée',
+                actif=True if actif is None else actif,
+            )))
+
+    normalises = normaliser_telephones(fournisseur.telephone for _, fournisseur in candidats)
+    for (_, fournisseur), telephone_normalise in zip(candidats, normalises):
+        fournisseur.telephone_normalise = telephone_normalise
+
+    existants = valeurs_existantes(avec_email_minuscule(Fournisseur.objects.all()), {
+        'nom_complet': {fournisseur.nom_complet for _, fournisseur in candidats},
+        'telephone_normalise': {
+            fournisseur.telephone_normalise for _, fournisseur in candidats
+            if len(fournisseur.telephone_normalise) >= LONGUEUR_MIN_TELEPHONE
+        },
+        'email_minuscule': {fournisseur.email.lower() for _, fournisseur in candidats if fournisseur.email},
+    })
+    noms_vus = existants['nom_complet']
+    telephones_vus = existants['telephone_normalise']
+    emails_vus = existants['email_minuscule']
+
+    valides = []
+    for numero, fournisseur in candidats:
+        telephone = fournisseur.telephone_normalise
+        if len(telephone) < LONGUEUR_MIN_TELEPHONE:
+            telephone = None
+        if fournisseur.nom_complet in noms_vus:
+            erreurs.append(f"Ligne {numero}: doublon, le fournisseur « {fournisseur.nom_complet} » existe déjà")
+        elif telephone and telephone in telephones_vus:
+            erreurs.append(f"Ligne {numero}: doublon, le téléphone {fournisseur.telephone} existe déjà")
+        elif fournisseur.email and fournisseur.email.lower() in emails_vus:
+            erreurs.append(f"Ligne {numero}: doublon, l'email {fournisseur.email} existe déjà")
+        else:
+            noms_vus.add(fournisseur.nom_complet)
+            if telephone:
+                telephones_vus.add(telephone)
+            if fournisseur.email:
+                emails_vus.add(fournisseur.email.lower())
+            valides.append(fournisseur)
+
+    return valides, erreurs
+
+
+def enregistrer_fournisseurs(valides):
+    """Crée les fournisseurs validés en masse (COPY sur PostgreSQL). Retourne (créés, mis à jour)."""
+    from .models import Fournisseur
+
+    for fournisseur in valides:
+        fournisseur.calculer_cles_doublons()
+    crees = charger_en_masse(Fournisseur, valides)
+    # Chargement sans signaux : les réponses de l'API de sélection sont invalidées ici
+    transaction.on_commit(lambda: invalider_selection(Fournisseur))
+    return crees, 0
+
+
+# Traitements d'import fournis par ce module (voir articles/imports.py) :
+# type -> (colonnes, colonnes requises, analyse, enregistrement)
+TRAITEMENTS_IMPORT = {
+    'fournisseurs': (
+        COLONNES_FOURNISSEURS, COLONNES_REQUISES_FOURNISSEURS,
+        analyser_lignes_fournisseurs, enregistrer_fournisseurs,
+    ),
+}
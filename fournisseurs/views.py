@@ -2,7 +2,7 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.http import JsonResponse, HttpResponse
 from django.contrib import messages
-from django.db.models import Q, Count, Avg
+from django.db.models import Count, Avg
 from django.core.paginator import Paginator
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
@@ -10,7 +10,13 @@ import json
 
 from .models import Fournisseur, ProduitFournisseur
 from .forms import FournisseurForm, ProduitFournisseurForm, FournisseurSearchForm
+from .utils import filtrer_fournisseurs
+from core.recherche import chiffres
 from articles.models import Article
+from utilisateurs.decorators import permission_required
+from core.export_csv import reponse_export_csv
+from core.selection import page_selection, reponse_conditionnelle
+from articles.imports import demarrer_import
 
 
 @login_required
@@ -21,38 +27,12 @@ def fournisseur_list(request):
     # Base queryset
     fournisseurs = Fournisseur.objects.all()
     
-    # Appliquer les filtres
-    if form.is_valid():
-        search = form.cleaned_data.get('search', '').strip()
-        type_fournisseur = form.cleaned_data.get('type_fournisseur')
-        actif = form.cleaned_data.get('actif')
-        tri = form.cleaned_data.get('tri', 'nom_complet')
-        
-        # Recherche textuelle
-        if search:
-            fournisseurs = fournisseurs.filter(
-                Q(nom_complet__icontains=search) |
-                Q(email__icontains=search) |
-                Q(telephone__icontains=search) |
-                Q(contact_principal__icontains=search) |
-                Q(ville__icontains=search)
-            )
-        
-        # Filtre par type
-        if type_fournisseur:
-            fournisseurs = fournisseurs.filter(type_fournisseur=type_fournisseur)
-        
-        # Filtre par statut
-        if actif == 'true':
-            fournisseurs = fournisseurs.filter(actif=True)
-        elif actif == 'false':
-            fournisseurs = fournisseurs.filter(actif=False)
-        
-        # Tri
-        if tri:
-            fournisseurs = fournisseurs.order_by(tri)
-        else:
-            fournisseurs = fournisseurs.order_by('nom_complet')
+    # Appliquer les filtres (partagés avec l'export)
+    fournisseurs = filtrer_fournisseurs(fournisseurs, request.GET)
+    
+    # Tri
+    tri = form.cleaned_data.get('tri') if form.is_valid() else None
+    fournisseurs = fournisseurs.order_by(tri or 'nom_complet')
     
     # Pagination
     paginator = Paginator(fournisseurs, 20)
@@ -92,28 +72,8 @@ def fournisseur_liste_print(request):
     fournisseurs = Fournisseur.objects.all()
     
     # Appliquer les filtres (même logique que fournisseur_list)
-    if form.is_valid():
-        search = form.cleaned_data.get('search', '').strip()
-        type_fournisseur = form.cleaned_data.get('type_fournisseur')
-        actif = form.cleaned_data.get('actif')
-        
-        # Recherche textuelle
-        if search:
-            fournisseurs = fournisseurs.filter(
-                Q(nom_complet__icontains=search) |
-                Q(email__icontains=search) |
-                Q(telephone__icontains=search) |
-                Q(contact_principal__icontains=search) |
-                Q(ville__icontains=search)
-            )
-        
-        # Filtres
-        if type_fournisseur:
-            fournisseurs = fournisseurs.filter(type_fournisseur=type_fournisseur)
-        if actif == 'true':
-            fournisseurs = fournisseurs.filter(actif=True)
-        elif actif == 'false':
-            fournisseurs = fournisseurs.filter(actif=False)
+    fournisseurs = filtrer_fournisseurs(fournisseurs, request.GET)
+    type_fournisseur = form.cleaned_data.get('type_fournisseur') if form.is_valid() else None
     
     # Tri par défaut
     fournisseurs = fournisseurs.order_by('type_fournisseur', 'nom_complet')
@@ -139,6 +99,20 @@ def fournisseur_liste_print(request):
     
     return render(request, 'fournisseurs/liste_fournisseurs_print.html', context)
 
+@login_required
+@permission_required('fournisseurs.export')
+def fournisseur_export(request):
+    """Export CSV (diffusé en flux) de la liste des fournisseurs filtrée"""
+    return reponse_export_csv('fournisseurs', request.GET)
+
+
+@login_required
+@permission_required('fournisseurs.add')
+def fournisseur_import(request):
+    """Import (en arrière-plan) de fournisseurs depuis un fichier Excel ou CSV"""
+    return demarrer_import(request, 'fournisseurs', 'fournisseurs:fournisseur_list')
+
+
 def get_societe_info():
     """Retourne les informations de l'entreprise"""
     return {
@@ -401,10 +375,21 @@ def fournisseur_create_popup(request):
 
 
 @login_required
+@reponse_conditionnelle(Fournisseur)
 def fournisseur_api(request):
-    """API pour récupérer la liste des fournisseurs (AJAX)"""
-    fournisseurs = Fournisseur.objects.filter(actif=True).order_by('nom_complet')
-    
+    """
+    API de recherche des fournisseurs actifs (AJAX, sélections des formulaires)
+
+    Paramètres : `q` (nom, email ou téléphone), `limite` et `apres`
+    (curseur `suivant` de la page précédente), voir core.selection.
+    """
+    terme = request.GET.get('q', '').strip()
+    fournisseurs, suivant = page_selection(
+        request,
+        Fournisseur.objects.filter(actif=True),
+        {'nom_complet': terme, 'email': terme, 'telephone_normalise': chiffres(terme)},
+    )
+
     data = []
     for fournisseur in fournisseurs:
         data.append({
@@ -414,5 +399,5 @@ def fournisseur_api(request):
             'telephone': fournisseur.get_telephone_formate(),
             'email': fournisseur.email or '',
         })
-    
-    return JsonResponse({'fournisseurs': data})
\ No newline at end of file
+
+    return JsonResponse({'fournisseurs': data, 'suivant': suivant})
\ No newline at end of file
@@ -5,3 +5,7 @@ class ParametresConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'parametres'
     verbose_name = 'Paramètres'
+    
+    def ready(self):
+        """Import des signaux lors du démarrage de l'application"""
+        import parametres.signals
@@ -1,4 +1,5 @@
 from .models import ParametresGeneraux, InformationsSociete
+from .images import url_logo_web
 
 def parametres_globaux(request):
     """
@@ -47,6 +48,7 @@ def parametres_globaux(request):
                 'pays': infos_societe.pays,
                 'url_site': infos_societe.url_site,
                 'logo': infos_societe.logo,
+                'logo_web': url_logo_web(infos_societe.logo),
                 'en_tete_document': infos_societe.en_tete_document,
                 'pied_page_document': infos_societe.pied_page_document,
                 'numero_registre_commerce': infos_societe.numero_registre_commerce,
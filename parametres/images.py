@@ -0,0 +1,199 @@
+"""
+Préparation des images de la société (logo, bandeaux, cachet)
+
+Chaque image envoyée est déclinée une seule fois en variantes adaptées à
+leur usage, enregistrées dans un sous-dossier `variantes/` à côté de
+l'original :
+- bandeaux : redimensionnés à la taille d'impression (150 DPI), en JPEG ;
+- logo : vignette web pour l'en-tête de l'application ;
+- cachet : recadré sur sa partie visible et réduit, en PNG RGBA.
+
+Le module n'importe que Pillow au chargement, pour rester utilisable par
+les scripts autonomes (process_cachet_signature.py).
+"""
+import os
+
+from PIL import Image
+
+
+# Résolution des images insérées dans les PDF
+DPI_PDF = 150
+
+# Dossier des variantes, relatif au dossier de l'image originale
+DOSSIER_VARIANTES = 'variantes'
+
+
+def _points_en_pixels(points):
+    """Convertit une dimension ReportLab (points) en pixels à DPI_PDF"""
+    return int(round(points / 72 * DPI_PDF))
+
+
+# champ: (variante, (largeur, hauteur) en pixels, format, recadrage exact)
+# Les bandeaux sont dessinés sur toute la largeur A4 (595 pt) avec une
+# hauteur fixe de 100 pt (en-tête) et 80 pt (pied), sans conserver le ratio.
+VARIANTES_SOCIETE = {
+    'bandeau_entete': ('pdf', (_points_en_pixels(595), _points_en_pixels(100)), 'JPEG', True),
+    'bandeau_pied': ('pdf', (_points_en_pixels(595), _points_en_pixels(80)), 'JPEG', True),
+    'logo': ('web', (160, 64), 'PNG', False),
+}
+
+# Le cachet est dessiné dans un carré de 6 cm
+TAILLE_CACHET = (_points_en_pixels(6 / 2.54 * 72),) * 2
+
+EXTENSIONS = {'JPEG': 'jpg', 'PNG': 'png'}
+
+
+def chemin_variante(chemin_original, variante, format_image):
+    """Chemin de la variante d'une image (ex. bandeaux/variantes/entete_pdf.jpg)"""
+    dossier, nom = os.path.split(chemin_original)
+    racine = os.path.splitext(nom)[0]
+    return os.path.join(dossier, DOSSIER_VARIANTES, f"{racine}_{variante}.{EXTENSIONS[format_image]}")
+
+
+def _est_a_jour(chemin_source, chemin_cible):
+    """Indique si la variante existe et est plus récente que l'original"""
+    return (
+        os.path.exists(chemin_cible)
+        and os.path.getmtime(chemin_cible) >= os.path.getmtime(chemin_source)
+    )
+
+
+def _enregistrer(img, chemin_cible, format_image):
+    """Enregistre l'image optimisée dans le dossier des variantes"""
+    os.makedirs(os.path.dirname(chemin_cible), exist_ok=True)
+    if format_image == 'JPEG':
+        img.save(chemin_cible, 'JPEG', quality=85, optimize=True, progressive=True)
+    else:
+        img.save(chemin_cible, 'PNG', optimize=True)
+
+
+def _aplatir(img, fond=(255, 255, 255)):
+    """Fusionne la transparence sur un fond uni (le JPEG n'a pas de canal alpha)"""
+    if img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info):
+        img = img.convert('RGBA')
+        fond_img = Image.new('RGB', img.size, fond)
+        fond_img.paste(img, mask=img.split()[-1])
+        return fond_img
+    return img.convert('RGB')
+
+
+def generer_variante(chemin_source, variante, taille, format_image, recadrage_exact=False):
+    """
+    Produit la variante d'une image si elle est absente ou périmée
+
+    Retourne le chemin de la variante.
+    """
+    chemin_cible = chemin_variante(chemin_source, variante, format_image)
+    if _est_a_jour(chemin_source, chemin_cible):
+        return chemin_cible
+
+    with Image.open(chemin_source) as img:
+        img.load()
+        if format_image == 'JPEG':
+            img = _aplatir(img)
+        elif img.mode not in ('RGB', 'RGBA'):
+            img = img.convert('RGBA')
+
+        if recadrage_exact:
+            # Taille finale fixe : l'image est étirée comme dans le PDF
+            img = img.resize(taille, Image.LANCZOS)
+        else:
+            img.thumbnail(taille, Image.LANCZOS)
+
+        _enregistrer(img, chemin_cible, format_image)
+
+    return chemin_cible
+
+
+def preparer_cachet(chemin_source):
+    """
+    Produit la variante PDF du cachet : RGBA recadré sur la partie visible,
+    réduit à la taille d'impression
+
+    Retourne le chemin de la variante.
+    """
+    chemin_cible = chemin_variante(chemin_source, 'pdf', 'PNG')
+    if _est_a_jour(chemin_source, chemin_cible):
+        return chemin_cible
+
+    with Image.open(chemin_source) as img:
+        img = img.convert('RGBA')
+
+        # Supprimer les marges transparentes
+        cadre = img.getchannel('A').getbbox()
+        if cadre:
+            img = img.crop(cadre)
+
+        img.thumbnail(TAILLE_CACHET, Image.LANCZOS)
+        _enregistrer(img, chemin_cible, 'PNG')
+
+    return chemin_cible
+
+
+def chemin_cachet():
+    """Chemin du cachet produit par process_cachet_signature.py"""
+    from django.conf import settings
+    media_root = getattr(settings, 'MEDIA_ROOT', 'media')
+    return os.path.join(media_root, 'cachets_signatures', 'cachet_devdreco.png')
+
+
+def generer_variantes_societe(societe):
+    """Génère les variantes manquantes des images de la société et du cachet"""
+    generees = []
+    for champ, (variante, taille, format_image, recadrage_exact) in VARIANTES_SOCIETE.items():
+        fichier = getattr(societe, champ, None) if societe else None
+        if not fichier:
+            continue
+        try:
+            generees.append(generer_variante(fichier.path, variante, taille, format_image, recadrage_exact))
+        except Exception as e:
+            print(f"Erreur lors de la préparation de l'image {champ}: {e}")
+
+    cachet = chemin_cachet()
+    if os.path.exists(cachet):
+        try:
+            generees.append(preparer_cachet(cachet))
+        except Exception as e:
+            print(f"Erreur lors de la préparation du cachet: {e}")
+
+    return generees
+
+
+def chemin_image_pdf(champ, nom):
+    """
+    Chemin à utiliser dans les PDF pour une image de la société
+
+    `nom` est le nom du fichier relatif à MEDIA_ROOT (FieldFile.name) ;
+    la variante PDF est retournée si elle a été générée.
+    """
+    from django.core.files.storage import default_storage
+    chemin = default_storage.path(nom)
+    definition = VARIANTES_SOCIETE.get(champ)
+    if definition and definition[0] == 'pdf':
+        chemin_pdf = chemin_variante(chemin, definition[0], definition[2])
+        if os.path.exists(chemin_pdf):
+            return chemin_pdf
+    return chemin
+
+
+def chemin_cachet_pdf():
+    """Chemin du cachet à utiliser dans les PDF (variante si disponible)"""
+    cachet = chemin_cachet()
+    chemin = chemin_variante(cachet, 'pdf', 'PNG')
+    if os.path.exists(chemin):
+        return chemin
+    return cachet
+
+
+def url_logo_web(logo):
+    """URL de la vignette web du logo (ou du logo original à défaut)"""
+    if not logo:
+        return None
+    variante, taille, format_image, recadrage_exact = VARIANTES_SOCIETE['logo']
+    try:
+        if os.path.exists(chemin_variante(logo.path, variante, format_image)):
+            nom = chemin_variante(logo.name, variante, format_image).replace(os.sep, '/')
+            return logo.storage.url(nom)
+    except Exception:
+        pass
+    return logo.url
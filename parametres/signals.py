@@ -0,0 +1,10 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from .models import InformationsSociete
+from .images import generer_variantes_societe
+
+
+@receiver(post_save, sender=InformationsSociete)
+def preparer_images_societe(sender, instance, **kwargs):
+    """Génère les variantes optimisées des images envoyées (une seule fois par fichier)"""
+    generer_variantes_societe(instance)
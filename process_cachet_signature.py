@@ -64,7 +64,12 @@ def process_cachet_signature():
         cachet_path = os.path.join(output_dir, "cachet_devdreco.png")
         cachet_img.save(cachet_path, "PNG")
         print(f"✅ Cachet sauvegardé: {cachet_path}")
-        
+
+        # Préparer la variante PDF du cachet (recadrée et réduite)
+        from parametres.images import preparer_cachet
+        cachet_pdf_path = preparer_cachet(cachet_path)
+        print(f"✅ Cachet optimisé pour les PDF: {cachet_pdf_path}")
+
         # Sauvegarder la signature
         signature_path = os.path.join(output_dir, "signature_devdreco.png")
         signature_img.save(signature_path, "PNG")
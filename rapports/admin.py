@@ -1,16 +1,28 @@
 from django.contrib import admin
-from .models import RapportVentes, RapportClients, RapportArticles, RapportFinancier, ConfigurationRapport
+from .models import (
+    RapportVentes, RapportClients, RapportArticles, RapportFinancier, ConfigurationRapport,
+    ExecutionPlanifiee,
+)
 
 
 @admin.register(RapportVentes)
 class RapportVentesAdmin(admin.ModelAdmin):
-    list_display = ['nom', 'type_rapport', 'date_debut', 'date_fin', 'format_sortie', 'creer_par', 'date_creation']
-    list_filter = ['type_rapport', 'format_sortie', 'date_creation', 'creer_par']
+    list_display = ['nom', 'type_rapport', 'date_debut', 'date_fin', 'format_sortie', 'recurrent', 'creer_par', 'date_creation']
+    list_filter = ['type_rapport', 'format_sortie', 'recurrent', 'date_creation', 'creer_par']
     search_fields = ['nom', 'creer_par__username', 'creer_par__first_name', 'creer_par__last_name']
     readonly_fields = ['date_creation', 'fichier_genere']
     ordering = ['-date_creation']
 
 
+@admin.register(ExecutionPlanifiee)
+class ExecutionPlanifieeAdmin(admin.ModelAdmin):
+    list_display = ['modele', 'periode_debut', 'periode_fin', 'statut', 'tentatives', 'duree', 'date_debut']
+    list_filter = ['statut', 'date_debut']
+    search_fields = ['modele__nom']
+    readonly_fields = ['date_debut', 'date_fin', 'duree', 'message_erreur']
+    ordering = ['-date_debut']
+
+
 @admin.register(RapportClients)
 class RapportClientsAdmin(admin.ModelAdmin):
     list_display = ['nom', 'type_rapport', 'periode_debut', 'periode_fin', 'format_sortie', 'creer_par', 'date_creation']
@@ -0,0 +1,243 @@
+"""
+Cache des résultats de rapports et agrégats mensuels des périodes closes
+
+Deux niveaux de réutilisation :
+- résultat complet : les sections d'un rapport entièrement agrégé sont mises
+  en cache sous une clé calculée à partir de ses paramètres normalisés (sans
+  nom, format ni auteur). Deux rapports identiques ne sont calculés qu'une fois ;
+- agrégats mensuels : pour les sommes et comptes par mois (ventes groupées,
+  rapports financiers), chaque mois clos est calculé une seule fois et
+  enregistré (AgregatMensuel). Un rapport « 24 derniers mois » ne recalcule
+  alors que le mois en cours et les bords partiels de la période.
+
+Toute modification d'un devis, d'une facture ou d'une commande (signaux,
+voir signals.py) invalide les résultats en cache et les agrégats du mois
+concerné. Les clés des résultats contiennent une génération gardée en base
+(core.generations) : une invalidation faite par un processus est vue par
+tous les autres, planificateur compris, même si le cache Django est propre
+à chaque processus. Les mises à jour en masse (QuerySet.update) ne passent pas par les
+signaux : utiliser `generer_rapports --vider-cache` après un import.
+
+Configuration (settings.py, optionnelle) :
+    RAPPORTS_MOIS_OUVERTS = 1    # mois récents toujours recalculés (au moins 1)
+    RAPPORTS_CACHE_DUREE = 600   # durée du cache des résultats (0 : désactivé)
+"""
+import calendar
+import hashlib
+import json
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from core import generations
+
+from .models import AgregatMensuel
+
+
+# Nombre de mois récents (mois courant compris) jamais figés
+MOIS_OUVERTS = max(getattr(settings, 'RAPPORTS_MOIS_OUVERTS', 1), 1)
+
+# Durée de conservation des résultats complets (secondes)
+DUREE_CACHE = getattr(settings, 'RAPPORTS_CACHE_DUREE', 600)
+
+CLE_GENERATION = 'rapports:generation'
+
+# Champs d'un rapport sans effet sur son contenu
+CHAMPS_HORS_PARAMETRES = {
+    'id', 'nom', 'format_sortie', 'creer_par', 'date_creation', 'fichier_genere',
+    'statut_generation', 'date_generation', 'duree_generation', 'nombre_lignes', 'message_erreur',
+}
+
+
+# ---------------------------------------------------------------------------
+# Découpage des périodes
+# ---------------------------------------------------------------------------
+
+def debut_mois(jour):
+    """Premier jour du mois"""
+    return jour.replace(day=1)
+
+
+def fin_mois(jour):
+    """Dernier jour du mois"""
+    return jour.replace(day=calendar.monthrange(jour.year, jour.month)[1])
+
+
+def mois_suivant(jour):
+    """Premier jour du mois suivant"""
+    return fin_mois(jour) + timedelta(days=1)
+
+
+def premier_mois_ouvert():
+    """Premier jour du plus ancien mois encore ouvert (non figé)"""
+    mois = debut_mois(timezone.localdate())
+    for _ in range(MOIS_OUVERTS - 1):
+        mois = debut_mois(mois - timedelta(days=1))
+    return mois
+
+
+def est_mois_clos(mois):
+    """Indique si le mois est clos (ses agrégats peuvent être figés)"""
+    return debut_mois(mois) < premier_mois_ouvert()
+
+
+def decouper_periode(debut, fin):
+    """
+    Sépare la période en mois clos complets et en plages à calculer
+
+    Retourne (mois_clos, plages) : la liste des premiers jours des mois
+    clos entièrement couverts, et les plages (debut, fin) restantes (bord
+    de début de période, mois ouverts et bord de fin).
+    """
+    limite = premier_mois_ouvert()
+    mois = debut_mois(debut)
+    if mois < debut:
+        mois = mois_suivant(mois)
+
+    mois_clos = []
+    while mois < limite and fin_mois(mois) <= fin:
+        mois_clos.append(mois)
+        mois = mois_suivant(mois)
+
+    if not mois_clos:
+        return [], [(debut, fin)]
+
+    plages = []
+    if debut < mois_clos[0]:
+        plages.append((debut, mois_clos[0] - timedelta(days=1)))
+    apres = mois_suivant(mois_clos[-1])
+    if apres <= fin:
+        plages.append((apres, fin))
+    return mois_clos, plages
+
+
+# ---------------------------------------------------------------------------
+# Agrégats mensuels
+# ---------------------------------------------------------------------------
+
+def _mois_de(valeur):
+    """Mois retourné par TruncMonth (date ou datetime selon le champ)"""
+    if isinstance(valeur, datetime):
+        return valeur.date()
+    return valeur
+
+
+def _encoder(ligne, champs):
+    """Ligne agrégée en JSON (les montants Decimal sont conservés en texte)"""
+    return {
+        cle: str(valeur) if cle in champs and isinstance(valeur, Decimal) else valeur
+        for cle, valeur in ligne.items() if cle != 'mois'
+    }
+
+
+def _decoder(ligne, mois, champs):
+    """Ligne agrégée relue depuis AgregatMensuel"""
+    ligne = {
+        cle: Decimal(valeur) if cle in champs and isinstance(valeur, str) else valeur
+        for cle, valeur in ligne.items()
+    }
+    ligne['mois'] = mois
+    return ligne
+
+
+def agreger_par_mois(source, debut, fin, calcul, champs):
+    """
+    Lignes agrégées de `calcul` sur la période, en réutilisant les mois clos
+
+    `calcul(debut, fin)` retourne des dictionnaires values().annotate()
+    regroupés par mois (clé 'mois', TruncMonth) ; `champs` sont les totaux
+    additifs (Sum, Count) de chaque ligne. Les mois clos absents sont
+    calculés en une seule requête puis enregistrés sous `source`.
+    """
+    mois_clos, plages = decouper_periode(debut, fin)
+    lignes = []
+
+    if mois_clos:
+        stockes = {
+            agregat.mois: agregat.lignes
+            for agregat in AgregatMensuel.objects.filter(source=source, mois__in=mois_clos)
+        }
+        manquants = [mois for mois in mois_clos if mois not in stockes]
+        if manquants:
+            calcules = {mois: [] for mois in manquants}
+            for ligne in calcul(manquants[0], fin_mois(manquants[-1])):
+                mois = _mois_de(ligne['mois'])
+                if mois in calcules:
+                    calcules[mois].append(_encoder(ligne, champs))
+            AgregatMensuel.objects.bulk_create(
+                [AgregatMensuel(source=source, mois=mois, lignes=contenu) for mois, contenu in calcules.items()],
+                ignore_conflicts=True
+            )
+            stockes.update(calcules)
+
+        for mois in mois_clos:
+            lignes.extend(_decoder(ligne, mois, champs) for ligne in stockes[mois])
+
+    for plage_debut, plage_fin in plages:
+        for ligne in calcul(plage_debut, plage_fin):
+            ligne = dict(ligne)
+            ligne['mois'] = _mois_de(ligne['mois'])
+            lignes.append(ligne)
+
+    return lignes
+
+
+# ---------------------------------------------------------------------------
+# Cache des résultats
+# ---------------------------------------------------------------------------
+
+def cle_parametres(type_rapport, rapport):
+    """Empreinte des paramètres qui déterminent le contenu du rapport"""
+    parametres = {
+        champ.name: champ.value_from_object(rapport)
+        for champ in rapport._meta.concrete_fields
+        if champ.name not in CHAMPS_HORS_PARAMETRES
+    }
+    contenu = json.dumps([type_rapport, parametres], sort_keys=True, cls=DjangoJSONEncoder)
+    return hashlib.sha1(contenu.encode('utf-8')).hexdigest()
+
+
+def _generation():
+    """Numéro de génération du cache (change à chaque invalidation)"""
+    return generations.generation(CLE_GENERATION)
+
+
+def collecter_avec_cache(type_rapport, rapport, collecteur):
+    """
+    Sections du rapport, depuis le cache si un rapport identique a déjà été calculé
+
+    Seuls les résultats entièrement agrégés (listes) sont mis en cache ; les
+    listes détaillées lues par morceaux sont toujours relues en base.
+    """
+    if not DUREE_CACHE:
+        return collecteur(rapport)
+
+    cle = f"rapports:resultat:{_generation()}:{cle_parametres(type_rapport, rapport)}"
+    sections = cache.get(cle)
+    if sections is not None:
+        return sections
+
+    sections = collecteur(rapport)
+    if all(isinstance(sec['lignes'], list) for sec in sections):
+        cache.set(cle, sections, DUREE_CACHE)
+    return sections
+
+
+def invalider(mois=()):
+    """
+    Invalide les résultats en cache et les agrégats des mois indiqués
+
+    Sans argument, seuls les résultats complets sont invalidés ; avec
+    mois=None, tous les agrégats mensuels sont supprimés.
+    """
+    generations.invalider(CLE_GENERATION)
+    if mois is None:
+        AgregatMensuel.objects.all().delete()
+        return
+    mois_clos = {debut_mois(m) for m in mois if m and est_mois_clos(m)}
+    if mois_clos:
+        AgregatMensuel.objects.filter(mois__in=mois_clos).delete()
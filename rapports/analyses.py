@@ -0,0 +1,292 @@
+"""
+Analyses vectorisées (NumPy) pour les rapports de ventes et financiers
+
+Les colonnes utiles sont lues en une passe (values_list().iterator()) puis
+converties en tableaux NumPy ; les regroupements, cumuls glissants et
+percentiles sont ensuite calculés sans boucle Python par ligne.
+
+Les montants sont lus en base directement en entiers mis à l'échelle
+(centimes, int64) : pas de conversion Decimal par ligne en Python, les
+sommes restent exactes, et les percentiles retournent une valeur
+réellement observée (méthode « inférieure ») plutôt qu'une interpolation.
+
+NumPy est optionnel : sans lui, les rapports sont produits sans les
+sections d'analyse (voir disponible()).
+"""
+import importlib.util
+from datetime import datetime
+from decimal import Decimal
+
+from django.db.models import BigIntegerField, F, Value
+from django.db.models.functions import Cast, Coalesce, Round, TruncMonth
+
+
+# Les montants ont deux décimales dans tous les modèles
+DECIMALES = 2
+
+TAILLE_MORCEAU = 5000
+
+# Percentiles affichés dans les rapports
+PERCENTILES = (10, 25, 50, 75, 90)
+
+
+def disponible():
+    """Indique si NumPy est installé"""
+    return importlib.util.find_spec('numpy') is not None
+
+
+def en_entier_sql(champ):
+    """
+    Expression du montant `champ` en entier mis à l'échelle (centimes), calculée en base
+
+    Round avant Cast : SQLite garde les décimaux en flottants, et le
+    produit (ex. 0.29 * 100 = 28.999…) serait tronqué par CAST.
+    """
+    return Coalesce(
+        Cast(Round(F(champ) * 10 ** DECIMALES), BigIntegerField()),
+        Value(0),
+        output_field=BigIntegerField(),
+    )
+
+
+def en_decimal(entier):
+    """Entier mis à l'échelle en montant Decimal"""
+    return Decimal(int(entier)).scaleb(-DECIMALES)
+
+
+def _mois(valeur):
+    """Mois retourné par TruncMonth (date ou datetime selon le champ)"""
+    return valeur.date() if isinstance(valeur, datetime) else valeur
+
+
+# ---------------------------------------------------------------------------
+# Chargement des colonnes
+# ---------------------------------------------------------------------------
+
+def charger(queryset, cle, montants, champ_mois=None):
+    """
+    Charge une colonne de regroupement et des colonnes de montants
+
+    `cle` est le champ de regroupement (ou None), `montants` les champs
+    Decimal, lus en centimes (en_entier_sql), `champ_mois` un champ
+    date/datetime tronqué au mois en base. Retourne un dictionnaire de
+    tableaux NumPy : 'cle' (objets), 'mois' (datetime64[M]) et un tableau
+    int64 par montant.
+    """
+    import numpy as np
+
+    queryset = queryset.annotate(**{
+        f'{champ}_centimes': en_entier_sql(champ) for champ in montants
+    })
+    champs = [f'{champ}_centimes' for champ in montants]
+    if cle:
+        champs.insert(0, cle)
+    if champ_mois:
+        queryset = queryset.annotate(mois_analyse=TruncMonth(champ_mois))
+        champs.append('mois_analyse')
+
+    colonnes = [[] for _ in champs]
+    for ligne in queryset.values_list(*champs).iterator(chunk_size=TAILLE_MORCEAU):
+        for colonne, valeur in zip(colonnes, ligne):
+            colonne.append(valeur)
+
+    resultat = {}
+    if cle:
+        resultat['cle'] = np.array([valeur or '-' for valeur in colonnes.pop(0)], dtype=object)
+    if champ_mois:
+        resultat['mois'] = np.array([_mois(valeur) for valeur in colonnes.pop()], dtype='datetime64[M]')
+    for champ, colonne in zip(montants, colonnes):
+        resultat[champ] = np.array(colonne, dtype=np.int64)
+    return resultat
+
+
+def concatener(*tableaux):
+    """Concatène des résultats de charger() ayant les mêmes colonnes"""
+    import numpy as np
+
+    tableaux = [t for t in tableaux if t]
+    if not tableaux:
+        return {}
+    return {champ: np.concatenate([t[champ] for t in tableaux]) for champ in tableaux[0]}
+
+
+# ---------------------------------------------------------------------------
+# Calculs
+# ---------------------------------------------------------------------------
+
+def regrouper(cles):
+    """Valeurs distinctes et indice de groupe de chaque ligne"""
+    import numpy as np
+    return np.unique(cles, return_inverse=True)
+
+
+def sommes_par_groupe(codes, nombre_groupes, valeurs):
+    """Somme exacte (int64) des valeurs de chaque groupe"""
+    import numpy as np
+
+    sommes = np.zeros(nombre_groupes, dtype=np.int64)
+    np.add.at(sommes, codes, valeurs)
+    return sommes
+
+
+def percentiles_par_groupe(codes, nombre_groupes, valeurs, percentiles=PERCENTILES):
+    """
+    Percentiles des valeurs de chaque groupe (matrice groupes x percentiles)
+
+    Les lignes sont triées par (groupe, valeur) ; le rang de chaque
+    percentile est calculé à partir du début et de la taille des groupes.
+    """
+    import numpy as np
+
+    ordre = np.lexsort((valeurs, codes))
+    tries = valeurs[ordre]
+    tailles = np.bincount(codes, minlength=nombre_groupes)
+    debuts = np.concatenate(([0], np.cumsum(tailles)[:-1]))
+
+    fractions = np.asarray(percentiles, dtype=np.float64) / 100
+    rangs = debuts[:, None] + np.floor(fractions[None, :] * (np.maximum(tailles, 1)[:, None] - 1)).astype(np.int64)
+    resultat = tries[np.minimum(rangs, len(tries) - 1)] if len(tries) else np.zeros(rangs.shape, dtype=np.int64)
+    resultat[tailles == 0] = 0
+    return resultat
+
+
+def serie_mensuelle(mois, valeurs, debut, fin):
+    """Sommes par mois sur tous les mois de la période (mois sans données à 0)"""
+    import numpy as np
+
+    calendrier = np.arange(np.datetime64(debut, 'M'), np.datetime64(fin, 'M') + 1)
+    sommes = np.zeros(len(calendrier), dtype=np.int64)
+    if len(mois):
+        positions = (mois - calendrier[0]).astype(np.int64)
+        dans_periode = (positions >= 0) & (positions < len(calendrier))
+        np.add.at(sommes, positions[dans_periode], valeurs[dans_periode])
+    return calendrier, sommes
+
+
+def cumul_glissant(serie, fenetre):
+    """Somme glissante sur `fenetre` éléments (fenêtre tronquée au début)"""
+    import numpy as np
+
+    cumul = np.cumsum(serie)
+    resultat = cumul.copy()
+    resultat[fenetre:] = cumul[fenetre:] - cumul[:-fenetre]
+    return resultat
+
+
+# ---------------------------------------------------------------------------
+# Sections de rapports
+# ---------------------------------------------------------------------------
+
+def section_montants_par_cle(titre, libelle_cle, donnees, champ):
+    """Section : nombre, total, médiane, P90 et maximum de `champ` par clé"""
+    import numpy as np
+    from .moteur import section
+
+    if not donnees or not len(donnees[champ]):
+        return section(titre, [libelle_cle, 'Nombre', 'Total', 'Médiane', 'P90', 'Maximum'], [])
+
+    cles, codes = regrouper(donnees['cle'])
+    valeurs = donnees[champ]
+    sommes = sommes_par_groupe(codes, len(cles), valeurs)
+    tailles = np.bincount(codes, minlength=len(cles))
+    quantiles = percentiles_par_groupe(codes, len(cles), valeurs, (50, 90, 100))
+
+    lignes = [
+        [cles[i], int(tailles[i]), en_decimal(sommes[i]),
+         en_decimal(quantiles[i, 0]), en_decimal(quantiles[i, 1]), en_decimal(quantiles[i, 2])]
+        for i in sommes.argsort()[::-1]
+    ]
+    return section(titre, [libelle_cle, 'Nombre', 'Total', 'Médiane', 'P90', 'Maximum'], lignes)
+
+
+def analyser_ventes(rapport):
+    """Sections d'analyse d'un rapport de ventes (selon les regroupements demandés)"""
+    from devis.models import Devis, LigneDevis
+    from factures.models import LigneFacture
+    from commandes.models import BonCommande, LigneCommande
+
+    periode = (rapport.date_debut, rapport.date_fin)
+    sections = []
+
+    if rapport.groupe_par_client:
+        sources = []
+        if rapport.inclure_devis:
+            sources.append(charger(
+                Devis.objects.filter(date_creation__date__range=periode),
+                'client__nom_complet', ['montant_ttc']
+            ))
+        if rapport.inclure_commandes:
+            sources.append(charger(
+                BonCommande.objects.filter(date_creation__range=periode, client__isnull=False),
+                'client__nom_complet', ['montant_ttc']
+            ))
+        sections.append(section_montants_par_cle(
+            'Montants TTC des documents par client', 'Client', concatener(*sources), 'montant_ttc'
+        ))
+
+    if rapport.groupe_par_article:
+        sources = []
+        if rapport.inclure_devis:
+            sources.append(charger(
+                LigneDevis.objects.filter(devis__date_creation__date__range=periode),
+                'description', ['prix_unitaire_ht']
+            ))
+        if rapport.inclure_factures:
+            sources.append(charger(
+                LigneFacture.objects.filter(facture__date_emission__range=periode),
+                'description', ['prix_unitaire_ht']
+            ))
+        if rapport.inclure_commandes:
+            sources.append(charger(
+                LigneCommande.objects.filter(commande__date_creation__range=periode),
+                'description', ['prix_unitaire_ht']
+            ))
+        sections.append(section_montants_par_cle(
+            'Prix unitaires HT par article', 'Article', concatener(*sources), 'prix_unitaire_ht'
+        ))
+
+    return sections
+
+
+def analyser_financier(rapport):
+    """Sections d'analyse d'un rapport financier : tendance du CA et répartition des devis"""
+    import numpy as np
+    from devis.models import Devis
+    from .moteur import section
+
+    if rapport.type_rapport not in ('ca', 'complet'):
+        return []
+
+    donnees = charger(
+        Devis.objects.filter(date_creation__date__range=(rapport.date_debut, rapport.date_fin), statut='accepte'),
+        None, ['montant_ht', 'montant_ttc'], champ_mois='date_creation'
+    )
+
+    calendrier, ca = serie_mensuelle(donnees['mois'], donnees['montant_ht'], rapport.date_debut, rapport.date_fin)
+    cumul_3 = cumul_glissant(ca, 3)
+    cumul_12 = cumul_glissant(ca, 12)
+    tendance = [
+        [mois.astype(object).strftime('%m/%Y'), en_decimal(ca[i]), en_decimal(cumul_3[i]), en_decimal(cumul_12[i])]
+        for i, mois in enumerate(calendrier)
+    ]
+
+    montants = np.sort(donnees['montant_ttc'])
+    repartition = [['Devis acceptés', len(montants)]]
+    if len(montants):
+        rangs = np.floor(np.asarray(PERCENTILES) / 100 * (len(montants) - 1)).astype(np.int64)
+        repartition += [[f'P{p}' if p != 50 else 'Médiane', en_decimal(montants[r])] for p, r in zip(PERCENTILES, rangs)]
+        repartition += [
+            ['Minimum', en_decimal(montants[0])],
+            ['Maximum', en_decimal(montants[-1])],
+            ['Moyenne', en_decimal((montants.sum() + len(montants) // 2) // len(montants))],
+        ]
+
+    return [
+        section(
+            "Tendance du chiffre d'affaires HT",
+            ['Mois', 'CA HT', 'Cumul 3 mois', 'Cumul 12 mois'],
+            tendance
+        ),
+        section('Répartition des devis acceptés (TTC)', ['Indicateur', 'Valeur'], repartition),
+    ]
+
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class RapportsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'rapports'
+    
+    def ready(self):
+        """Import des signaux lors du démarrage de l'application"""
+        import rapports.signals
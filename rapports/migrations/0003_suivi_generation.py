@@ -0,0 +1,113 @@
+# Generated by Django 5.2.4 on 2026-10-19 06:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rapports', '0002_alter_configurationrapport_devise'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='rapportarticles',
+            name='date_generation',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Date de génération'),
+        ),
+        migrations.AddField(
+            model_name='rapportarticles',
+            name='duree_generation',
+            field=models.FloatField(blank=True, null=True, verbose_name='Durée de génération (s)'),
+        ),
+        migrations.AddField(
+            model_name='rapportarticles',
+            name='message_erreur',
+            field=models.TextField(blank=True, verbose_name="Message d'erreur"),
+        ),
+        migrations.AddField(
+            model_name='rapportarticles',
+            name='nombre_lignes',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='Nombre de lignes'),
+        ),
+        migrations.AddField(
+            model_name='rapportarticles',
+            name='statut_generation',
+            field=models.CharField(choices=[('en_attente', 'En attente'), ('en_cours', 'En cours'), ('termine', 'Terminé'), ('erreur', 'Erreur')], default='en_attente', max_length=20, verbose_name='Statut de génération'),
+        ),
+        migrations.AddField(
+            model_name='rapportclients',
+            name='date_generation',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Date de génération'),
+        ),
+        migrations.AddField(
+            model_name='rapportclients',
+            name='duree_generation',
+            field=models.FloatField(blank=True, null=True, verbose_name='Durée de génération (s)'),
+        ),
+        migrations.AddField(
+            model_name='rapportclients',
+            name='message_erreur',
+            field=models.TextField(blank=True, verbose_name="Message d'erreur"),
+        ),
+        migrations.AddField(
+            model_name='rapportclients',
+            name='nombre_lignes',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='Nombre de lignes'),
+        ),
+        migrations.AddField(
+            model_name='rapportclients',
+            name='statut_generation',
+            field=models.CharField(choices=[('en_attente', 'En attente'), ('en_cours', 'En cours'), ('termine', 'Terminé'), ('erreur', 'Erreur')], default='en_attente', max_length=20, verbose_name='Statut de génération'),
+        ),
+        migrations.AddField(
+            model_name='rapportfinancier',
+            name='date_generation',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Date de génération'),
+        ),
+        migrations.AddField(
+            model_name='rapportfinancier',
+            name='duree_generation',
+            field=models.FloatField(blank=True, null=True, verbose_name='Durée de génération (s)'),
+        ),
+        migrations.AddField(
+            model_name='rapportfinancier',
+            name='message_erreur',
+            field=models.TextField(blank=True, verbose_name="Message d'erreur"),
+        ),
+        migrations.AddField(
+            model_name='rapportfinancier',
+            name='nombre_lignes',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='Nombre de lignes'),
+        ),
+        migrations.AddField(
+            model_name='rapportfinancier',
+            name='statut_generation',
+            field=models.CharField(choices=[('en_attente', 'En attente'), ('en_cours', 'En cours'), ('termine', 'Terminé'), ('erreur', 'Erreur')], default='en_attente', max_length=20, verbose_name='Statut de génération'),
+        ),
+        migrations.AddField(
+            model_name='rapportventes',
+            name='date_generation',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Date de génération'),
+        ),
+        migrations.AddField(
+            model_name='rapportventes',
+            name='duree_generation',
+            field=models.FloatField(blank=True, null=True, verbose_name='Durée de génération (s)'),
+        ),
+        migrations.AddField(
+            model_name='rapportventes',
+            name='message_erreur',
+            field=models.TextField(blank=True, verbose_name="Message d'erreur"),
+        ),
+        migrations.AddField(
+            model_name='rapportventes',
+            name='nombre_lignes',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='Nombre de lignes'),
+        ),
+        migrations.AddField(
+            model_name='rapportventes',
+            name='statut_generation',
+            field=models.CharField(choices=[('en_attente', 'En attente'), ('en_cours', 'En cours'), ('termine', 'Terminé'), ('erreur', 'Erreur')], default='en_attente', max_length=20, verbose_name='Statut de génération'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.4 on 2026-10-19 06:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rapports', '0003_suivi_generation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AgregatMensuel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=50, verbose_name='Source')),
+                ('mois', models.DateField(verbose_name='Mois')),
+                ('lignes', models.JSONField(default=list, verbose_name='Lignes agrégées')),
+                ('date_calcul', models.DateTimeField(auto_now=True, verbose_name='Date de calcul')),
+            ],
+            options={
+                'verbose_name': 'Agrégat mensuel',
+                'verbose_name_plural': 'Agrégats mensuels',
+                'ordering': ['source', 'mois'],
+                'unique_together': {('source', 'mois')},
+            },
+        ),
+    ]
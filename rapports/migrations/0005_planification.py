@@ -0,0 +1,55 @@
+# Generated by Django 5.2.4 on 2026-10-19 06:42
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rapports', '0004_agregatmensuel'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VerrouPlanificateur',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nom', models.CharField(max_length=50, unique=True, verbose_name='Nom')),
+                ('detenteur', models.CharField(blank=True, max_length=100, verbose_name='Détenteur')),
+                ('expire_le', models.DateTimeField(verbose_name='Expire le')),
+            ],
+            options={
+                'verbose_name': 'Verrou du planificateur',
+                'verbose_name_plural': 'Verrous du planificateur',
+            },
+        ),
+        migrations.AddField(
+            model_name='rapportventes',
+            name='recurrent',
+            field=models.BooleanField(default=False, help_text='Régénéré automatiquement pour chaque période échue (journalier, hebdomadaire, mensuel, annuel)', verbose_name='Rapport récurrent'),
+        ),
+        migrations.CreateModel(
+            name='ExecutionPlanifiee',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('periode_debut', models.DateField(verbose_name='Période début')),
+                ('periode_fin', models.DateField(verbose_name='Période fin')),
+                ('statut', models.CharField(choices=[('en_cours', 'En cours'), ('termine', 'Terminé'), ('erreur', 'Erreur')], default='en_cours', max_length=20)),
+                ('date_debut', models.DateTimeField(default=django.utils.timezone.now, verbose_name="Début d'exécution")),
+                ('date_fin', models.DateTimeField(blank=True, null=True, verbose_name="Fin d'exécution")),
+                ('duree', models.FloatField(blank=True, null=True, verbose_name='Durée (s)')),
+                ('tentatives', models.PositiveIntegerField(default=1, verbose_name='Tentatives')),
+                ('message_erreur', models.TextField(blank=True, verbose_name="Message d'erreur")),
+                ('modele', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='executions', to='rapports.rapportventes', verbose_name='Rapport récurrent')),
+                ('rapport', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='rapports.rapportventes', verbose_name='Rapport généré')),
+            ],
+            options={
+                'verbose_name': 'Exécution planifiée',
+                'verbose_name_plural': 'Exécutions planifiées',
+                'ordering': ['-date_debut'],
+                'unique_together': {('modele', 'periode_debut', 'periode_fin')},
+            },
+        ),
+    ]
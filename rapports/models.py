@@ -4,7 +4,31 @@ from django.utils import timezone
 from datetime import datetime, date
 
 
-class RapportVentes(models.Model):
+class SuiviGeneration(models.Model):
+    """Suivi de la génération du fichier d'un rapport (champs communs)"""
+    STATUT_GENERATION_CHOICES = [
+        ('en_attente', 'En attente'),
+        ('en_cours', 'En cours'),
+        ('termine', 'Terminé'),
+        ('erreur', 'Erreur'),
+    ]
+    
+    statut_generation = models.CharField(
+        max_length=20,
+        choices=STATUT_GENERATION_CHOICES,
+        default='en_attente',
+        verbose_name="Statut de génération"
+    )
+    date_generation = models.DateTimeField(blank=True, null=True, verbose_name="Date de génération")
+    duree_generation = models.FloatField(blank=True, null=True, verbose_name="Durée de génération (s)")
+    nombre_lignes = models.PositiveIntegerField(blank=True, null=True, verbose_name="Nombre de lignes")
+    message_erreur = models.TextField(blank=True, verbose_name="Message d'erreur")
+    
+    class Meta:
+        abstract = True
+
+
+class RapportVentes(SuiviGeneration):
     """Rapport de ventes par période"""
     TYPE_RAPPORT_CHOICES = [
         ('journalier', 'Journalier'),
@@ -30,6 +54,11 @@ class RapportVentes(models.Model):
     inclure_commandes = models.BooleanField(default=True, verbose_name="Inclure les commandes")
     groupe_par_client = models.BooleanField(default=False, verbose_name="Grouper par client")
     groupe_par_article = models.BooleanField(default=False, verbose_name="Grouper par article")
+    recurrent = models.BooleanField(
+        default=False,
+        verbose_name="Rapport récurrent",
+        help_text="Régénéré automatiquement pour chaque période échue (journalier, hebdomadaire, mensuel, annuel)"
+    )
     creer_par = models.ForeignKey(User, on_delete=models.CASCADE, verbose_name="Créé par")
     date_creation = models.DateTimeField(auto_now_add=True)
     fichier_genere = models.FileField(upload_to='rapports/ventes/', blank=True, null=True)
@@ -43,7 +72,7 @@ class RapportVentes(models.Model):
         return f"{self.nom} - {self.get_type_rapport_display()} ({self.date_debut} à {self.date_fin})"
 
 
-class RapportClients(models.Model):
+class RapportClients(SuiviGeneration):
     """Rapport sur les clients"""
     TYPE_RAPPORT_CHOICES = [
         ('actifs', 'Clients actifs'),
@@ -79,7 +108,7 @@ class RapportClients(models.Model):
         return f"{self.nom} - {self.get_type_rapport_display()}"
 
 
-class RapportArticles(models.Model):
+class RapportArticles(SuiviGeneration):
     """Rapport sur les articles"""
     TYPE_RAPPORT_CHOICES = [
         ('stock', 'État des stocks'),
@@ -116,7 +145,7 @@ class RapportArticles(models.Model):
         return f"{self.nom} - {self.get_type_rapport_display()}"
 
 
-class RapportFinancier(models.Model):
+class RapportFinancier(SuiviGeneration):
     """Rapport financier global"""
     TYPE_RAPPORT_CHOICES = [
         ('ca', 'Chiffre d\'affaires'),
@@ -174,4 +203,75 @@ class ConfigurationRapport(models.Model):
         if not self.pk and ConfigurationRapport.objects.exists():
             # Si c'est un nouvel objet et qu'il existe déjà une configuration, ne pas créer
             return
-        super().save(*args, **kwargs)
\ No newline at end of file
+        super().save(*args, **kwargs)
+
+class AgregatMensuel(models.Model):
+    """Agrégat partiel d'un mois clos, réutilisé par les rapports de ventes et financiers"""
+    source = models.CharField(max_length=50, verbose_name="Source")
+    mois = models.DateField(verbose_name="Mois")
+    lignes = models.JSONField(default=list, verbose_name="Lignes agrégées")
+    date_calcul = models.DateTimeField(auto_now=True, verbose_name="Date de calcul")
+    
+    class Meta:
+        verbose_name = "Agrégat mensuel"
+        verbose_name_plural = "Agrégats mensuels"
+        unique_together = ['source', 'mois']
+        ordering = ['source', 'mois']
+    
+    def __str__(self):
+        return f"{self.source} - {self.mois.strftime('%m/%Y')}"
+
+
+class ExecutionPlanifiee(models.Model):
+    """Historique des exécutions du planificateur de rapports récurrents"""
+    STATUT_CHOICES = [
+        ('en_cours', 'En cours'),
+        ('termine', 'Terminé'),
+        ('erreur', 'Erreur'),
+    ]
+    
+    modele = models.ForeignKey(
+        RapportVentes,
+        on_delete=models.CASCADE,
+        related_name='executions',
+        verbose_name="Rapport récurrent"
+    )
+    rapport = models.ForeignKey(
+        RapportVentes,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name='+',
+        verbose_name="Rapport généré"
+    )
+    periode_debut = models.DateField(verbose_name="Période début")
+    periode_fin = models.DateField(verbose_name="Période fin")
+    statut = models.CharField(max_length=20, choices=STATUT_CHOICES, default='en_cours')
+    date_debut = models.DateTimeField(default=timezone.now, verbose_name="Début d'exécution")
+    date_fin = models.DateTimeField(blank=True, null=True, verbose_name="Fin d'exécution")
+    duree = models.FloatField(blank=True, null=True, verbose_name="Durée (s)")
+    tentatives = models.PositiveIntegerField(default=1, verbose_name="Tentatives")
+    message_erreur = models.TextField(blank=True, verbose_name="Message d'erreur")
+    
+    class Meta:
+        verbose_name = "Exécution planifiée"
+        verbose_name_plural = "Exécutions planifiées"
+        unique_together = ['modele', 'periode_debut', 'periode_fin']
+        ordering = ['-date_debut']
+    
+    def __str__(self):
+        return f"{self.modele.nom} ({self.periode_debut} à {self.periode_fin}) - {self.get_statut_display()}"
+
+
+class VerrouPlanificateur(models.Model):
+    """Verrou empêchant deux planificateurs de traiter les mêmes échéances"""
+    nom = models.CharField(max_length=50, unique=True, verbose_name="Nom")
+    detenteur = models.CharField(max_length=100, blank=True, verbose_name="Détenteur")
+    expire_le = models.DateTimeField(verbose_name="Expire le")
+    
+    class Meta:
+        verbose_name = "Verrou du planificateur"
+        verbose_name_plural = "Verrous du planificateur"
+    
+    def __str__(self):
+        return f"{self.nom} ({self.detenteur or 'libre'})"
@@ -0,0 +1,580 @@
+"""
+Moteur de génération des rapports (ventes, clients, articles, financiers)
+
+Chaque rapport est traduit en une ou plusieurs sections (titre, colonnes,
+lignes). Les agrégations sont faites en base (values/annotate) et les
+listes détaillées sont parcourues par morceaux avec iterator(), puis
+écrites directement dans le fichier de sortie (PDF, Excel ou CSV).
+
+Le serveur web ne génère rien : lancer_generation met le rapport « en
+attente » et la commande `generer_rapports --continu`, lancée comme worker
+dans un processus séparé, le réserve puis le génère (voir core/arriere_plan.py).
+
+Les totaux mensuels des périodes closes et les résultats agrégés sont
+réutilisés d'un rapport à l'autre (voir agregats.py) ; les percentiles et
+cumuls glissants sont calculés avec NumPy quand il est installé
+(voir analyses.py).
+"""
+import csv
+import io
+import tempfile
+import time
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.files import File
+from django.db.models import Count, Sum, Min, Max, Avg, Q, F, Value, CharField
+from django.db.models.functions import Coalesce, TruncMonth
+from django.utils import timezone
+
+from .models import RapportVentes, RapportClients, RapportArticles, RapportFinancier
+from . import analyses
+from .agregats import agreger_par_mois, collecter_avec_cache
+
+
+MODELES_RAPPORTS = {
+    'ventes': RapportVentes,
+    'clients': RapportClients,
+    'articles': RapportArticles,
+    'financiers': RapportFinancier,
+}
+
+# Taille des morceaux lus en base pour les listes détaillées
+TAILLE_MORCEAU = 2000
+
+# Nombre de rapports générés simultanément par un worker
+WORKERS_RAPPORTS = getattr(settings, 'RAPPORTS_WORKERS', 2)
+
+EXTENSIONS = {'pdf': 'pdf', 'excel': 'xlsx', 'csv': 'csv'}
+
+
+def section(titre, colonnes, lignes):
+    """Section d'un rapport : un tableau avec son titre"""
+    return {'titre': titre, 'colonnes': colonnes, 'lignes': lignes}
+
+
+# ---------------------------------------------------------------------------
+# Collecte des données
+# ---------------------------------------------------------------------------
+
+def _fusionner_groupes(groupes, cle, champs):
+    """Additionne des résultats values().annotate() de plusieurs sources par `cle`"""
+    totaux = {}
+    for lignes in groupes:
+        for ligne in lignes:
+            courant = totaux.setdefault(ligne[cle] or '-', {champ: 0 for champ in champs})
+            for champ in champs:
+                courant[champ] += ligne[champ] or 0
+    return totaux
+
+
+def collecter_ventes(rapport):
+    """Devis, factures et commandes de la période, en détail ou regroupés"""
+    from devis.models import Devis, LigneDevis
+    from factures.models import Facture, LigneFacture
+    from commandes.models import BonCommande, LigneCommande
+
+    periode = (rapport.date_debut, rapport.date_fin)
+    devis = Devis.objects.filter(date_creation__date__range=periode)
+    factures = Facture.objects.filter(date_emission__range=periode)
+    commandes = BonCommande.objects.filter(date_creation__range=periode)
+
+    def par_mois(source, calcul, champs):
+        return agreger_par_mois(source, rapport.date_debut, rapport.date_fin, calcul, champs)
+
+    sections = []
+
+    if rapport.groupe_par_client:
+        champs = ('nombre', 'total_ht', 'total_ttc')
+        groupes = []
+        if rapport.inclure_devis:
+            groupes.append(par_mois('ventes_client_devis', lambda debut, fin: (
+                Devis.objects.filter(date_creation__date__range=(debut, fin))
+                .annotate(mois=TruncMonth('date_creation')).values('mois', tiers=F('client__nom_complet'))
+                .annotate(nombre=Count('id'), total_ht=Sum('montant_ht'), total_ttc=Sum('montant_ttc'))
+            ), champs))
+        if rapport.inclure_commandes:
+            groupes.append(par_mois('ventes_client_commandes', lambda debut, fin: (
+                BonCommande.objects.filter(date_creation__range=(debut, fin), client__isnull=False)
+                .annotate(mois=TruncMonth('date_creation')).values('mois', tiers=F('client__nom_complet'))
+                .annotate(nombre=Count('id'), total_ht=Sum('montant_ht'), total_ttc=Sum('montant_ttc'))
+            ), champs))
+        totaux = _fusionner_groupes(groupes, 'tiers', champs)
+        lignes = sorted(
+            ([client, t['nombre'], t['total_ht'], t['total_ttc']] for client, t in totaux.items()),
+            key=lambda ligne: ligne[3], reverse=True
+        )
+        sections.append(section(
+            'Ventes par client', ['Client', 'Documents', 'Total HT', 'Total TTC'], lignes
+        ))
+
+    if rapport.groupe_par_article:
+        champs = ('quantite', 'montant')
+        groupes = []
+        if rapport.inclure_devis:
+            groupes.append(par_mois('ventes_article_devis', lambda debut, fin: (
+                LigneDevis.objects.filter(devis__date_creation__date__range=(debut, fin))
+                .annotate(mois=TruncMonth('devis__date_creation')).values('mois', 'description')
+                .annotate(quantite=Sum('quantite'), montant=Sum('montant_ht'))
+            ), champs))
+        if rapport.inclure_factures:
+            groupes.append(par_mois('ventes_article_factures', lambda debut, fin: (
+                LigneFacture.objects.filter(facture__date_emission__range=(debut, fin))
+                .annotate(mois=TruncMonth('facture__date_emission')).values('mois', 'description')
+                .annotate(quantite=Sum('quantite'), montant=Sum('montant_ht'))
+            ), champs))
+        if rapport.inclure_commandes:
+            groupes.append(par_mois('ventes_article_commandes', lambda debut, fin: (
+                LigneCommande.objects.filter(commande__date_creation__range=(debut, fin))
+                .annotate(mois=TruncMonth('commande__date_creation')).values('mois', 'description')
+                .annotate(quantite=Sum('quantite'), montant=Sum('montant_ht'))
+            ), champs))
+        totaux = _fusionner_groupes(groupes, 'description', champs)
+        lignes = sorted(
+            ([article, t['quantite'], t['montant']] for article, t in totaux.items()),
+            key=lambda ligne: ligne[2], reverse=True
+        )
+        sections.append(section(
+            'Ventes par article', ['Article', 'Quantité', 'Montant HT'], lignes
+        ))
+
+    if sections and analyses.disponible():
+        sections.extend(analyses.analyser_ventes(rapport))
+
+    if not sections:
+        # Liste détaillée, lue par morceaux
+        def lignes_detail():
+            if rapport.inclure_devis:
+                for ligne in devis.order_by('date_creation').values_list(
+                    'numero', 'date_creation', 'client__nom_complet', 'statut', 'montant_ht', 'montant_ttc'
+                ).iterator(chunk_size=TAILLE_MORCEAU):
+                    yield ['Devis', *ligne]
+            if rapport.inclure_factures:
+                for ligne in factures.order_by('date_emission').values_list(
+                    'numero', 'date_emission', 'fournisseur__nom_complet', 'statut', 'montant_ht', 'montant_ttc'
+                ).iterator(chunk_size=TAILLE_MORCEAU):
+                    yield ['Facture', *ligne]
+            if rapport.inclure_commandes:
+                for ligne in commandes.order_by('date_creation').annotate(
+                    tiers=Coalesce('client__nom_complet', 'fournisseur__nom_complet')
+                ).values_list(
+                    'numero', 'date_creation', 'tiers', 'statut', 'montant_ht', 'montant_ttc'
+                ).iterator(chunk_size=TAILLE_MORCEAU):
+                    yield ['Commande', *ligne]
+
+        sections.append(section(
+            'Détail des documents',
+            ['Type', 'Numéro', 'Date', 'Client / Fournisseur', 'Statut', 'Montant HT', 'Montant TTC'],
+            lignes_detail()
+        ))
+
+    return sections
+
+
+def collecter_clients(rapport):
+    """Clients selon le type de rapport, avec leurs statistiques de devis"""
+    from clients.models import Client
+
+    clients = Client.objects.all()
+    filtre_devis = Q()
+    if rapport.periode_debut:
+        filtre_devis &= Q(devis__date_creation__date__gte=rapport.periode_debut)
+    if rapport.periode_fin:
+        filtre_devis &= Q(devis__date_creation__date__lte=rapport.periode_fin)
+
+    if rapport.type_rapport == 'actifs':
+        clients = clients.filter(actif=True)
+    elif rapport.type_rapport == 'inactifs':
+        clients = clients.filter(actif=False)
+    elif rapport.type_rapport == 'nouveaux':
+        if rapport.periode_debut:
+            clients = clients.filter(date_creation__date__gte=rapport.periode_debut)
+        if rapport.periode_fin:
+            clients = clients.filter(date_creation__date__lte=rapport.periode_fin)
+
+    colonnes = ['Client', 'Téléphone', 'Email', 'Actif', 'Date de création']
+    champs = ['nom_complet', 'telephone', 'email', 'actif', 'date_creation']
+
+    if rapport.inclure_statistiques or rapport.type_rapport == 'fideles':
+        clients = clients.annotate(
+            nombre_devis=Count('devis', filter=filtre_devis),
+            devis_acceptes=Count('devis', filter=filtre_devis & Q(devis__statut='accepte')),
+            total_ttc=Sum('devis__montant_ttc', filter=filtre_devis & Q(devis__statut='accepte')),
+        )
+        colonnes += ['Devis', 'Devis acceptés', 'CA TTC accepté']
+        champs += ['nombre_devis', 'devis_acceptes', 'total_ttc']
+        if rapport.type_rapport == 'fideles':
+            clients = clients.filter(devis_acceptes__gte=2).order_by('-total_ttc')
+
+    if rapport.type_rapport != 'fideles':
+        clients = clients.order_by('nom_complet')
+
+    sections = [section(
+        'Clients',
+        colonnes,
+        clients.values_list(*champs).iterator(chunk_size=TAILLE_MORCEAU)
+    )]
+
+    if rapport.inclure_historique_achats:
+        from devis.models import Devis
+        devis = Devis.objects.filter(client__in=clients.values('pk'))
+        if rapport.periode_debut:
+            devis = devis.filter(date_creation__date__gte=rapport.periode_debut)
+        if rapport.periode_fin:
+            devis = devis.filter(date_creation__date__lte=rapport.periode_fin)
+        sections.append(section(
+            'Historique des devis',
+            ['Client', 'Numéro', 'Date', 'Statut', 'Montant TTC'],
+            devis.order_by('client__nom_complet', 'date_creation').values_list(
+                'client__nom_complet', 'numero', 'date_creation', 'statut', 'montant_ttc'
+            ).iterator(chunk_size=TAILLE_MORCEAU)
+        ))
+
+    return sections
+
+
+def collecter_articles(rapport):
+    """Articles : catalogue, ventes (lignes de devis) ou analyse des prix"""
+    from articles.models import Article
+    from devis.models import LigneDevis
+
+    lignes_devis = LigneDevis.objects.all()
+    if rapport.periode_debut:
+        lignes_devis = lignes_devis.filter(devis__date_creation__date__gte=rapport.periode_debut)
+    if rapport.periode_fin:
+        lignes_devis = lignes_devis.filter(devis__date_creation__date__lte=rapport.periode_fin)
+
+    if rapport.type_rapport in ('ventes', 'moins_vendus'):
+        ordre = '-quantite' if rapport.type_rapport == 'ventes' else 'quantite'
+        colonnes = ['Article', 'Quantité', 'Nombre de lignes']
+        valeurs = ['description', 'quantite', 'nombre']
+        if rapport.inclure_prix:
+            colonnes.append('Montant HT')
+            valeurs.append('montant')
+        lignes = lignes_devis.values('description').annotate(
+            quantite=Sum('quantite'), nombre=Count('id'), montant=Sum('montant_ht')
+        ).order_by(ordre).values_list(*valeurs)
+        titre = 'Articles les plus vendus' if rapport.type_rapport == 'ventes' else 'Articles les moins vendus'
+        return [section(titre, colonnes, lignes.iterator(chunk_size=TAILLE_MORCEAU))]
+
+    if rapport.type_rapport == 'prix':
+        lignes = lignes_devis.values('description').annotate(
+            prix_min=Min('prix_unitaire_ht'), prix_moyen=Avg('prix_unitaire_ht'),
+            prix_max=Max('prix_unitaire_ht'), nombre=Count('id')
+        ).order_by('description').values_list('description', 'prix_min', 'prix_moyen', 'prix_max', 'nombre')
+        return [section(
+            'Analyse des prix',
+            ['Article', 'Prix min', 'Prix moyen', 'Prix max', 'Nombre de lignes'],
+            lignes.iterator(chunk_size=TAILLE_MORCEAU)
+        )]
+
+    if rapport.type_rapport == 'categorie':
+        lignes = Article.objects.values(
+            libelle=Coalesce('categorie__libelle', Value('Sans catégorie', output_field=CharField()))
+        ).annotate(
+            total=Count('id'), actifs=Count('id', filter=Q(actif=True))
+        ).order_by('libelle').values_list('libelle', 'total', 'actifs')
+        return [section('Articles par catégorie', ['Catégorie', 'Articles', 'Actifs'], lignes)]
+
+    # État du catalogue (les articles n'ont pas de quantité en stock)
+    colonnes = ['Désignation', 'Actif', 'Date de création']
+    champs = ['designation', 'actif', 'date_creation']
+    if rapport.inclure_categories:
+        colonnes.insert(1, 'Catégorie')
+        champs.insert(1, 'categorie__libelle')
+    sections = [section(
+        'Catalogue des articles',
+        colonnes,
+        Article.objects.order_by('designation').values_list(*champs).iterator(chunk_size=TAILLE_MORCEAU)
+    )]
+    if rapport.inclure_statistiques:
+        stats = Article.objects.aggregate(total=Count('id'), actifs=Count('id', filter=Q(actif=True)))
+        sections.insert(0, section(
+            'Statistiques', ['Indicateur', 'Valeur'],
+            [['Articles', stats['total']], ['Articles actifs', stats['actifs']]]
+        ))
+    return sections
+
+
+def collecter_financier(rapport):
+    """Chiffre d'affaires, achats et trésorerie par mois"""
+    from devis.models import Devis
+    from factures.models import Facture
+
+    periode = (rapport.date_debut, rapport.date_fin)
+
+    ventes = {
+        ligne['mois']: ligne
+        for ligne in agreger_par_mois('financier_ventes', rapport.date_debut, rapport.date_fin, lambda debut, fin: (
+            Devis.objects.filter(date_creation__date__range=(debut, fin), statut='accepte')
+            .annotate(mois=TruncMonth('date_creation')).values('mois')
+            .annotate(ht=Sum('montant_ht'), ttc=Sum('montant_ttc'), nombre=Count('id'))
+        ), ('ht', 'ttc', 'nombre'))
+    }
+    achats = {
+        ligne['mois']: ligne
+        for ligne in agreger_par_mois('financier_achats', rapport.date_debut, rapport.date_fin, lambda debut, fin: (
+            Facture.objects.filter(date_emission__range=(debut, fin)).exclude(statut='annulee')
+            .annotate(mois=TruncMonth('date_emission')).values('mois')
+            .annotate(
+                ht=Sum('montant_ht'), ttc=Sum('montant_ttc'),
+                payees=Sum('montant_ttc', filter=Q(statut='payee')),
+                en_attente=Sum('montant_ttc', filter=~Q(statut='payee')),
+            )
+        ), ('ht', 'ttc', 'payees', 'en_attente'))
+    }
+    mois = sorted(set(ventes) | set(achats))
+    zero = Decimal('0.00')
+
+    def v(source, m, champ):
+        return (source.get(m) or {}).get(champ) or zero
+
+    sections = []
+    if rapport.type_rapport in ('ca', 'complet'):
+        sections.append(section(
+            "Chiffre d'affaires (devis acceptés)",
+            ['Mois', 'Devis acceptés', 'CA HT', 'CA TTC'],
+            [[m.strftime('%m/%Y'), (ventes.get(m) or {}).get('nombre', 0), v(ventes, m, 'ht'), v(ventes, m, 'ttc')]
+             for m in mois]
+        ))
+    if rapport.type_rapport in ('benefices', 'complet'):
+        sections.append(section(
+            'Marge brute (CA - achats)',
+            ['Mois', 'CA HT', 'Achats HT', 'Marge HT'],
+            [[m.strftime('%m/%Y'), v(ventes, m, 'ht'), v(achats, m, 'ht'), v(ventes, m, 'ht') - v(achats, m, 'ht')]
+             for m in mois]
+        ))
+    if rapport.type_rapport in ('tresorerie', 'complet'):
+        sections.append(section(
+            'Trésorerie fournisseurs',
+            ['Mois', 'Factures TTC', 'Payées', 'Restant à payer'],
+            [[m.strftime('%m/%Y'), v(achats, m, 'ttc'), v(achats, m, 'payees'), v(achats, m, 'en_attente')]
+             for m in mois]
+        ))
+    if analyses.disponible():
+        sections.extend(analyses.analyser_financier(rapport))
+    if rapport.inclure_details:
+        sections.append(section(
+            'Factures de la période',
+            ['Numéro', 'Date', 'Fournisseur', 'Statut', 'Montant TTC'],
+            Facture.objects.filter(date_emission__range=periode).order_by('date_emission').values_list(
+                'numero', 'date_emission', 'fournisseur__nom_complet', 'statut', 'montant_ttc'
+            ).iterator(chunk_size=TAILLE_MORCEAU)
+        ))
+    return sections
+
+
+COLLECTEURS = {
+    'ventes': collecter_ventes,
+    'clients': collecter_clients,
+    'articles': collecter_articles,
+    'financiers': collecter_financier,
+}
+
+
+# ---------------------------------------------------------------------------
+# Écriture des fichiers
+# ---------------------------------------------------------------------------
+
+def formater_valeur(valeur):
+    """Valeur d'une cellule sous forme de texte (PDF)"""
+    if valeur is None:
+        return ''
+    if isinstance(valeur, bool):
+        return 'Oui' if valeur else 'Non'
+    if isinstance(valeur, (Decimal, float)):
+        return f"{valeur:,.2f}".replace(',', ' ')
+    if isinstance(valeur, datetime):
+        return timezone.localtime(valeur).strftime('%d/%m/%Y') if timezone.is_aware(valeur) else valeur.strftime('%d/%m/%Y')
+    if isinstance(valeur, date):
+        return valeur.strftime('%d/%m/%Y')
+    return str(valeur)
+
+
+def _valeur_tableur(valeur):
+    """Valeur d'une cellule pour CSV/Excel (dates sans fuseau)"""
+    if isinstance(valeur, datetime) and timezone.is_aware(valeur):
+        return timezone.localtime(valeur).replace(tzinfo=None)
+    return valeur
+
+
+def ecrire_csv(fichier, rapport, sections):
+    """Écrit les sections en CSV (séparées par une ligne vide) ; retourne le nombre de lignes"""
+    texte = io.TextIOWrapper(fichier, encoding='utf-8-sig', newline='')
+    writer = csv.writer(texte)
+    total = 0
+    for index, sec in enumerate(sections):
+        if index:
+            writer.writerow([])
+        if len(sections) > 1:
+            writer.writerow([sec['titre']])
+        writer.writerow(sec['colonnes'])
+        for ligne in sec['lignes']:
+            writer.writerow([_valeur_tableur(valeur) for valeur in ligne])
+            total += 1
+    texte.flush()
+    texte.detach()
+    return total
+
+
+def ecrire_excel(fichier, rapport, sections):
+    """Écrit une feuille par section (openpyxl en écriture seule) ; retourne le nombre de lignes"""
+    from openpyxl import Workbook
+
+    classeur = Workbook(write_only=True)
+    total = 0
+    for sec in sections:
+        feuille = classeur.create_sheet(title=sec['titre'][:31].replace('/', '-'))
+        feuille.append(sec['colonnes'])
+        for ligne in sec['lignes']:
+            feuille.append([_valeur_tableur(valeur) for valeur in ligne])
+            total += 1
+    classeur.save(fichier)
+    return total
+
+
+def ecrire_pdf(fichier, rapport, sections):
+    """Écrit le rapport en PDF paysage (tableau découpé aux sauts de page) ; retourne le nombre de lignes"""
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.lib.units import cm
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+    from core.pdf import tableau_pagine
+
+    styles = getSampleStyleSheet()
+    doc = SimpleDocTemplate(
+        fichier,
+        pagesize=landscape(A4),
+        rightMargin=1.5*cm,
+        leftMargin=1.5*cm,
+        topMargin=1.5*cm,
+        bottomMargin=1.5*cm,
+        title=rapport.nom
+    )
+    largeur = landscape(A4)[0] - 3*cm
+
+    story = [
+        Paragraph(rapport.nom, styles['Title']),
+        Paragraph(f"Généré le {timezone.localtime().strftime('%d/%m/%Y à %H:%M')}", styles['Normal']),
+        Spacer(1, 12),
+    ]
+
+    style_tableau = [
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#f8f9fa')),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), 8),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ]
+
+    compteur = {'total': 0}
+
+    def lignes_formatees(lignes):
+        for ligne in lignes:
+            compteur['total'] += 1
+            yield [formater_valeur(valeur) for valeur in ligne]
+
+    for sec in sections:
+        story.append(Paragraph(sec['titre'], styles['Heading2']))
+        largeur_colonne = largeur / len(sec['colonnes'])
+        story.append(tableau_pagine(
+            sec['colonnes'],
+            lignes_formatees(sec['lignes']),
+            [largeur_colonne] * len(sec['colonnes']),
+            style_tableau
+        ))
+        story.append(Spacer(1, 12))
+
+    doc.build(story)
+    return compteur['total']
+
+
+ECRIVAINS = {
+    'pdf': ecrire_pdf,
+    'excel': ecrire_excel,
+    'csv': ecrire_csv,
+}
+
+
+# ---------------------------------------------------------------------------
+# Exécution
+# ---------------------------------------------------------------------------
+
+def type_rapport_de(rapport):
+    """Clé du type de rapport ('ventes', 'clients', ...) d'une instance"""
+    for cle, modele in MODELES_RAPPORTS.items():
+        if isinstance(rapport, modele):
+            return cle
+    raise ValueError(f"Rapport inconnu: {rapport!r}")
+
+
+def generer_rapport(rapport):
+    """
+    Exécute le rapport et enregistre son fichier dans `fichier_genere`
+
+    Le statut, la durée et le nombre de lignes sont enregistrés sur le
+    rapport, y compris en cas d'erreur.
+    """
+    type_rapport = type_rapport_de(rapport)
+    rapport.statut_generation = 'en_cours'
+    rapport.message_erreur = ''
+    rapport.save(update_fields=['statut_generation', 'message_erreur'])
+
+    debut = time.monotonic()
+    try:
+        sections = collecter_avec_cache(type_rapport, rapport, COLLECTEURS[type_rapport])
+        with tempfile.TemporaryFile() as fichier:
+            rapport.nombre_lignes = ECRIVAINS[rapport.format_sortie](fichier, rapport, sections)
+            fichier.seek(0)
+
+            if rapport.fichier_genere:
+                rapport.fichier_genere.delete(save=False)
+            horodatage = timezone.now().strftime('%Y%m%d_%H%M%S')
+            nom = f"{type_rapport}_{rapport.pk}_{horodatage}.{EXTENSIONS[rapport.format_sortie]}"
+            rapport.fichier_genere.save(nom, File(fichier), save=False)
+
+        rapport.statut_generation = 'termine'
+    except Exception as e:
+        print(f"Erreur lors de la génération du rapport {type_rapport} {rapport.pk}: {e}")
+        rapport.statut_generation = 'erreur'
+        rapport.message_erreur = str(e)
+
+    rapport.duree_generation = round(time.monotonic() - debut, 3)
+    rapport.date_generation = timezone.now()
+    rapport.save(update_fields=[
+        'statut_generation', 'message_erreur', 'fichier_genere',
+        'nombre_lignes', 'duree_generation', 'date_generation',
+    ])
+    return rapport
+
+
+def reserver_rapport(type_rapport, rapport_id, statuts=('en_attente',)):
+    """
+    Passe le rapport « en cours » s'il est encore dans l'un des `statuts`
+
+    La mise à jour conditionnelle garantit qu'un rapport n'est pris que par
+    un seul worker. Retourne le rapport, ou None s'il a déjà été pris.
+    """
+    modele = MODELES_RAPPORTS[type_rapport]
+    reserve = modele.objects.filter(pk=rapport_id, statut_generation__in=statuts).update(
+        statut_generation='en_cours'
+    )
+    return modele.objects.get(pk=rapport_id) if reserve else None
+
+
+def lancer_generation(rapport):
+    """
+    Met le rapport en attente de génération par le worker `generer_rapports`
+
+    Avec RAPPORTS_GENERATION_SYNCHRONE = True, le rapport est généré
+    immédiatement (utile en développement, sans worker).
+    """
+    rapport.statut_generation = 'en_attente'
+    rapport.message_erreur = ''
+    rapport.save(update_fields=['statut_generation', 'message_erreur'])
+
+    if getattr(settings, 'RAPPORTS_GENERATION_SYNCHRONE', False):
+        return generer_rapport(rapport)
+    return rapport
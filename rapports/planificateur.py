@@ -0,0 +1,228 @@
+"""
+Planificateur des rapports de ventes récurrents
+
+Un rapport de ventes marqué « récurrent » sert de modèle : à chaque
+période échue (veille, semaine, mois ou année précédente selon son type),
+une copie couvrant cette période est créée puis générée. Chaque exécution
+est tracée dans ExecutionPlanifiee, dont la contrainte d'unicité
+(modèle, période) garantit qu'une période n'est produite qu'une fois.
+
+La commande `planifier_rapports` exécute les échéances pendant la plage
+horaire creuse (RAPPORTS_PLANIFICATION_HEURES), avec un nombre borné de
+générations simultanées. Un verrou en base (VerrouPlanificateur) empêche
+deux planificateurs lancés en parallèle de traiter les mêmes échéances ;
+s'il n'est pas renouvelé (processus arrêté), il expire.
+"""
+import os
+import socket
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from core.arriere_plan import executer_en_parallele
+from .models import RapportVentes, ExecutionPlanifiee, VerrouPlanificateur
+from .moteur import WORKERS_RAPPORTS, generer_rapport
+
+
+NOM_VERROU = 'rapports_recurrents'
+
+# Plage horaire creuse [début, fin[ (heures locales, peut passer minuit)
+HEURES_CREUSES = getattr(settings, 'RAPPORTS_PLANIFICATION_HEURES', (1, 6))
+
+# Durée de validité du verrou sans renouvellement
+DUREE_VERROU = timedelta(minutes=30)
+
+# Nombre maximal de tentatives pour une période en erreur
+TENTATIVES_MAX = 3
+
+
+def identifiant_processus():
+    """Identifiant du planificateur courant (hôte et PID)"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def en_heures_creuses(moment=None):
+    """Indique si l'heure locale est dans la plage creuse"""
+    heure = timezone.localtime(moment).hour
+    debut, fin = HEURES_CREUSES
+    if debut <= fin:
+        return debut <= heure < fin
+    return heure >= debut or heure < fin
+
+
+def periode_echue(type_rapport, aujourd_hui):
+    """
+    Dernière période complète avant `aujourd_hui` pour un type de rapport
+
+    Retourne (debut, fin) ou None pour les périodes personnalisées.
+    """
+    if type_rapport == 'journalier':
+        hier = aujourd_hui - timedelta(days=1)
+        return hier, hier
+    if type_rapport == 'hebdomadaire':
+        lundi = aujourd_hui - timedelta(days=aujourd_hui.weekday() + 7)
+        return lundi, lundi + timedelta(days=6)
+    if type_rapport == 'mensuel':
+        fin = aujourd_hui.replace(day=1) - timedelta(days=1)
+        return fin.replace(day=1), fin
+    if type_rapport == 'annuel':
+        annee = aujourd_hui.year - 1
+        return aujourd_hui.replace(year=annee, month=1, day=1), aujourd_hui.replace(year=annee, month=12, day=31)
+    return None
+
+
+# ---------------------------------------------------------------------------
+# Verrou
+# ---------------------------------------------------------------------------
+
+def acquerir_verrou(detenteur, nom=NOM_VERROU, duree=DUREE_VERROU):
+    """
+    Prend (ou renouvelle) le verrou s'il est libre, expiré ou déjà détenu
+
+    La prise se fait par un UPDATE conditionnel : une seule requête
+    concurrente peut le remporter.
+    """
+    maintenant = timezone.now()
+    try:
+        VerrouPlanificateur.objects.get_or_create(
+            nom=nom, defaults={'expire_le': maintenant - timedelta(seconds=1)}
+        )
+    except IntegrityError:
+        pass
+    return VerrouPlanificateur.objects.filter(
+        Q(expire_le__lt=maintenant) | Q(detenteur=detenteur), nom=nom
+    ).update(detenteur=detenteur, expire_le=maintenant + duree) == 1
+
+
+@contextmanager
+def verrou_entretenu(detenteur, nom=NOM_VERROU, duree=DUREE_VERROU):
+    """
+    Renouvelle le verrou en arrière-plan tant que le bloc s'exécute
+
+    Le renouvellement a lieu toutes les `duree` / 3 : un rapport plus long
+    que DUREE_VERROU ne laisse pas expirer le verrou (et un autre
+    planificateur reprendre les exécutions en cours).
+    """
+    arret = threading.Event()
+
+    def entretenir():
+        try:
+            while not arret.wait(duree.total_seconds() / 3):
+                if not acquerir_verrou(detenteur, nom, duree):
+                    print(f"Verrou {nom} perdu par {detenteur}")
+        finally:
+            connections.close_all()
+
+    fil = threading.Thread(target=entretenir, name='planificateur-verrou', daemon=True)
+    fil.start()
+    try:
+        yield
+    finally:
+        arret.set()
+        fil.join()
+
+
+def liberer_verrou(detenteur, nom=NOM_VERROU):
+    """Libère le verrou s'il est détenu par `detenteur`"""
+    VerrouPlanificateur.objects.filter(nom=nom, detenteur=detenteur).update(
+        detenteur='', expire_le=timezone.now()
+    )
+
+
+# ---------------------------------------------------------------------------
+# Échéances
+# ---------------------------------------------------------------------------
+
+def reserver_echeances(aujourd_hui=None):
+    """
+    Crée les exécutions des périodes échues non encore produites
+
+    Les exécutions en erreur, ou restées en cours après l'arrêt d'un
+    planificateur (le verrou garantit qu'aucune autre n'est active), sont
+    reprises jusqu'à TENTATIVES_MAX. Retourne la liste des exécutions à traiter.
+    """
+    aujourd_hui = aujourd_hui or timezone.localdate()
+    executions = []
+    for modele in RapportVentes.objects.filter(recurrent=True).select_related('creer_par'):
+        periode = periode_echue(modele.type_rapport, aujourd_hui)
+        if not periode:
+            continue
+        try:
+            with transaction.atomic():
+                execution, creee = ExecutionPlanifiee.objects.get_or_create(
+                    modele=modele, periode_debut=periode[0], periode_fin=periode[1]
+                )
+        except IntegrityError:
+            continue
+
+        if not creee:
+            if execution.statut == 'termine' or execution.tentatives >= TENTATIVES_MAX:
+                continue
+            execution.statut = 'en_cours'
+            execution.tentatives += 1
+            execution.date_debut = timezone.now()
+            execution.message_erreur = ''
+            execution.save(update_fields=['statut', 'tentatives', 'date_debut', 'message_erreur'])
+        executions.append(execution)
+    return executions
+
+
+def executer(execution):
+    """Crée la copie du rapport pour la période de l'exécution et la génère"""
+    modele = execution.modele
+    debut = time.monotonic()
+    try:
+        rapport = execution.rapport
+        if rapport is None:
+            rapport = RapportVentes.objects.create(
+                nom=f"{modele.nom} ({execution.periode_debut:%d/%m/%Y} - {execution.periode_fin:%d/%m/%Y})",
+                type_rapport=modele.type_rapport,
+                date_debut=execution.periode_debut,
+                date_fin=execution.periode_fin,
+                format_sortie=modele.format_sortie,
+                inclure_devis=modele.inclure_devis,
+                inclure_factures=modele.inclure_factures,
+                inclure_commandes=modele.inclure_commandes,
+                groupe_par_client=modele.groupe_par_client,
+                groupe_par_article=modele.groupe_par_article,
+                creer_par=modele.creer_par
+            )
+            execution.rapport = rapport
+
+        generer_rapport(rapport)
+        if rapport.statut_generation == 'termine':
+            execution.statut = 'termine'
+        else:
+            execution.statut = 'erreur'
+            execution.message_erreur = rapport.message_erreur
+    except Exception as e:
+        print(f"Erreur lors de l'exécution planifiée {execution.pk}: {e}")
+        execution.statut = 'erreur'
+        execution.message_erreur = str(e)
+
+    execution.date_fin = timezone.now()
+    execution.duree = round(time.monotonic() - debut, 3)
+    execution.save(update_fields=['rapport', 'statut', 'message_erreur', 'date_fin', 'duree'])
+    return execution
+
+
+def executer_echeances(workers=None, aujourd_hui=None, detenteur=None):
+    """
+    Réserve puis génère les échéances avec au plus `workers` générations simultanées
+
+    Le verrou de `detenteur` est renouvelé périodiquement pendant les
+    générations (verrou_entretenu). Retourne la liste des exécutions traitées.
+    """
+    executions = reserver_echeances(aujourd_hui)
+    traitees = []
+    if not executions:
+        return traitees
+    with verrou_entretenu(detenteur) if detenteur else nullcontext():
+        traitees.extend(executer_en_parallele(executer, executions, workers or WORKERS_RAPPORTS, 'planificateur'))
+    return traitees
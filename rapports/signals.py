@@ -0,0 +1,141 @@
+"""
+Invalidation des rapports quand les documents changent (voir agregats.py)
+
+Les mois touchés sont regroupés par transaction : une seule invalidation
+(génération et agrégats mensuels) est faite à la validation, quel que soit
+le nombre de documents et de lignes enregistrés. Une ligne réenregistrée
+sans changement des valeurs reprises par les rapports n'invalide rien.
+"""
+from django.db import transaction
+from django.db.models.signals import post_init, pre_save, post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from devis.models import Devis, LigneDevis
+from factures.models import Facture, LigneFacture
+from commandes.models import BonCommande, LigneCommande
+from .agregats import invalider
+
+
+# Champs d'une ligne repris par les rapports (ventes par article, analyse des prix)
+CHAMPS_LIGNE = ('description', 'quantite', 'prix_unitaire_ht', 'montant_ht')
+
+# Document parent de chaque modèle de ligne
+PARENTS_LIGNES = {LigneDevis: 'devis', LigneFacture: 'facture', LigneCommande: 'commande'}
+
+
+class _MoisAInvalider:
+    """Rappel on_commit d'une transaction : invalide en une fois les mois collectés"""
+
+    def __init__(self):
+        self.mois = set()
+        # Un rappel exécuté n'est plus complété (il resterait sinon dans la
+        # liste d'une transaction de test, jamais validée)
+        self.execute = False
+
+    def __call__(self):
+        self.execute = True
+        invalider(self.mois)
+
+
+def _invalider_a_la_validation(mois):
+    """
+    Ajoute les mois à invalider à la fin de la transaction en cours
+
+    Le rappel déjà enregistré dans la transaction est réutilisé ; il
+    disparaît avec elle si elle est annulée. Hors transaction, les mois
+    sont invalidés immédiatement. Sans mois connu, seuls les résultats en
+    cache sont invalidés.
+    """
+    mois = {m for m in mois if m}
+    for _, rappel, _ in transaction.get_connection().run_on_commit:
+        if isinstance(rappel, _MoisAInvalider) and not rappel.execute:
+            rappel.mois.update(mois)
+            return
+    rappel = _MoisAInvalider()
+    rappel.mois.update(mois)
+    transaction.on_commit(rappel)
+
+
+def _mois_devis(devis):
+    if devis and devis.date_creation:
+        return timezone.localdate(devis.date_creation) if timezone.is_aware(devis.date_creation) else devis.date_creation.date()
+    return None
+
+
+def _parent(ligne, champ):
+    """Document d'une ligne (absent si supprimé en cascade)"""
+    try:
+        return getattr(ligne, champ)
+    except Exception:
+        return None
+
+
+def _valeurs_ligne(ligne):
+    """Valeurs d'une ligne reprises par les rapports (sans charger les champs différés)"""
+    champ_parent = PARENTS_LIGNES[type(ligne)]
+    return tuple(ligne.__dict__.get(champ) for champ in (f'{champ_parent}_id',) + CHAMPS_LIGNE)
+
+
+@receiver(post_init, sender=LigneDevis)
+@receiver(post_init, sender=LigneFacture)
+@receiver(post_init, sender=LigneCommande)
+def memoriser_valeurs_ligne(sender, instance, **kwargs):
+    instance._valeurs_rapport = _valeurs_ligne(instance)
+
+
+def _ligne_modifiee(instance, kwargs):
+    """Vrai si la ligne est nouvelle, supprimée ou si une valeur reprise a changé"""
+    if kwargs.get('signal') is post_delete or kwargs.get('created'):
+        return True
+    valeurs = _valeurs_ligne(instance)
+    if valeurs == getattr(instance, '_valeurs_rapport', None):
+        return False
+    instance._valeurs_rapport = valeurs
+    return True
+
+
+@receiver([post_save, post_delete], sender=Devis)
+def invalider_devis(sender, instance, **kwargs):
+    """Un devis modifié invalide les rapports de son mois"""
+    _invalider_a_la_validation([_mois_devis(instance)])
+
+
+@receiver([post_save, post_delete], sender=LigneDevis)
+def invalider_ligne_devis(sender, instance, **kwargs):
+    if _ligne_modifiee(instance, kwargs):
+        _invalider_a_la_validation([_mois_devis(_parent(instance, 'devis'))])
+
+
+@receiver(pre_save, sender=Facture)
+def memoriser_date_facture(sender, instance, **kwargs):
+    """La date d'émission est modifiable : l'ancien mois est aussi invalidé"""
+    instance._date_emission_precedente = None
+    if instance.pk:
+        instance._date_emission_precedente = (
+            Facture.objects.filter(pk=instance.pk).values_list('date_emission', flat=True).first()
+        )
+
+
+@receiver([post_save, post_delete], sender=Facture)
+def invalider_facture(sender, instance, **kwargs):
+    _invalider_a_la_validation([instance.date_emission, getattr(instance, '_date_emission_precedente', None)])
+
+
+@receiver([post_save, post_delete], sender=LigneFacture)
+def invalider_ligne_facture(sender, instance, **kwargs):
+    if _ligne_modifiee(instance, kwargs):
+        facture = _parent(instance, 'facture')
+        _invalider_a_la_validation([facture.date_emission if facture else None])
+
+
+@receiver([post_save, post_delete], sender=BonCommande)
+def invalider_commande(sender, instance, **kwargs):
+    _invalider_a_la_validation([instance.date_creation])
+
+
+@receiver([post_save, post_delete], sender=LigneCommande)
+def invalider_ligne_commande(sender, instance, **kwargs):
+    if _ligne_modifiee(instance, kwargs):
+        commande = _parent(instance, 'commande')
+        _invalider_a_la_validation([commande.date_creation if commande else None])
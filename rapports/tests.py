@@ -1,3 +1,224 @@
+import datetime
+from decimal import Decimal
+from unittest import skipUnless
+
+from django.contrib.auth.models import User
 from django.test import TestCase
+from django.utils import timezone
+
+from clients.models import Client
+from devis.models import Devis, LigneDevis
+from . import analyses
+from .models import AgregatMensuel, ExecutionPlanifiee, RapportVentes, VerrouPlanificateur
+from .planificateur import (
+    TENTATIVES_MAX, acquerir_verrou, liberer_verrou, periode_echue, reserver_echeances,
+)
+from .signals import _MoisAInvalider
+
+
+class InvalidationTests(TestCase):
+    """Invalidation des agrégats regroupée par transaction (rapports.signals)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        with cls.captureOnCommitCallbacks(execute=True):
+            cls.creer_donnees()
+
+    @classmethod
+    def creer_donnees(cls):
+        client = Client.objects.create(nom_complet="Client test", telephone="620000000")
+        cls.devis = Devis.objects.create(
+            numero="D-1", client=client, objet="Test", date_validite=datetime.date(2024, 4, 10)
+        )
+        # Devis d'un mois clos
+        Devis.objects.filter(pk=cls.devis.pk).update(
+            date_creation=timezone.make_aware(datetime.datetime(2024, 3, 10, 12))
+        )
+        cls.lignes = [
+            LigneDevis.objects.create(
+                devis_id=cls.devis.pk, description=f"Article {numero}",
+                quantite=Decimal('1'), prix_unitaire_ht=Decimal('100'),
+            )
+            for numero in range(3)
+        ]
+
+    def setUp(self):
+        AgregatMensuel.objects.create(source='ventes_article_devis', mois=datetime.date(2024, 3, 1))
+
+    def _invalidations(self, rappels):
+        return [rappel for rappel in rappels if isinstance(rappel, _MoisAInvalider)]
+
+    def test_une_invalidation_par_transaction(self):
+        with self.captureOnCommitCallbacks(execute=True) as rappels:
+            for ligne in LigneDevis.objects.filter(devis_id=self.devis.pk):
+                ligne.quantite = Decimal('2')
+                ligne.save()
+            # Rien n'est supprimé avant la validation
+            self.assertEqual(AgregatMensuel.objects.count(), 1)
+        invalidations = self._invalidations(rappels)
+        self.assertEqual(len(invalidations), 1)
+        self.assertEqual(invalidations[0].mois, {datetime.date(2024, 3, 10)})
+        self.assertEqual(AgregatMensuel.objects.count(), 0)
+
+    def test_ligne_inchangee_n_invalide_rien(self):
+        with self.captureOnCommitCallbacks(execute=True) as rappels:
+            for ligne in LigneDevis.objects.filter(devis_id=self.devis.pk):
+                ligne.save()
+        self.assertEqual(self._invalidations(rappels), [])
+        self.assertEqual(AgregatMensuel.objects.count(), 1)
+
+    def test_suppression_de_ligne(self):
+        with self.captureOnCommitCallbacks(execute=True) as rappels:
+            LigneDevis.objects.get(pk=self.lignes[0].pk).delete()
+        self.assertEqual(len(self._invalidations(rappels)), 1)
+        self.assertEqual(AgregatMensuel.objects.count(), 0)
+
+
+@skipUnless(analyses.disponible(), "NumPy n'est pas installé")
+class ChargementAnalysesTests(TestCase):
+    """Montants lus en centimes par la base (rapports.analyses.charger)"""
+
+    def test_montants_en_centimes(self):
+        client = Client.objects.create(nom_complet="Client test", telephone="620000000")
+        devis = Devis.objects.create(
+            numero="D-A", client=client, objet="Test", date_validite=datetime.date(2024, 4, 10)
+        )
+        montants = ['0.29', '1234.56', '0.00']
+        for numero, montant in enumerate(montants):
+            LigneDevis.objects.create(
+                devis_id=devis.pk, description=f"Article {numero}",
+                quantite=Decimal('1'), prix_unitaire_ht=Decimal(montant),
+            )
+        donnees = analyses.charger(
+            LigneDevis.objects.filter(devis=devis).order_by('pk'), 'description', ['prix_unitaire_ht']
+        )
+        self.assertEqual(donnees['prix_unitaire_ht'].tolist(), [29, 123456, 0])
+        self.assertEqual(donnees['cle'].tolist(), ['Article 0', 'Article 1', 'Article 2'])
+
+
+class PeriodeEchueTests(TestCase):
+    """Période échue de chaque type de rapport récurrent (dates fixes)"""
+
+    def test_journalier_au_changement_d_annee(self):
+        self.assertEqual(
+            periode_echue('journalier', datetime.date(2025, 1, 1)),
+            (datetime.date(2024, 12, 31), datetime.date(2024, 12, 31))
+        )
+
+    def test_hebdomadaire(self):
+        # Lundi : la semaine précédente complète, à cheval sur deux années
+        self.assertEqual(
+            periode_echue('hebdomadaire', datetime.date(2025, 1, 6)),
+            (datetime.date(2024, 12, 30), datetime.date(2025, 1, 5))
+        )
+        # Dimanche : la semaine en cours n'est pas terminée
+        self.assertEqual(
+            periode_echue('hebdomadaire', datetime.date(2025, 1, 5)),
+            (datetime.date(2024, 12, 23), datetime.date(2024, 12, 29))
+        )
+
+    def test_mensuel(self):
+        for jour in (datetime.date(2025, 1, 1), datetime.date(2025, 1, 31)):
+            self.assertEqual(
+                periode_echue('mensuel', jour),
+                (datetime.date(2024, 12, 1), datetime.date(2024, 12, 31))
+            )
+        # Février d'une année bissextile
+        self.assertEqual(
+            periode_echue('mensuel', datetime.date(2024, 3, 1)),
+            (datetime.date(2024, 2, 1), datetime.date(2024, 2, 29))
+        )
+
+    def test_annuel(self):
+        for jour in (datetime.date(2025, 1, 1), datetime.date(2025, 12, 31)):
+            self.assertEqual(
+                periode_echue('annuel', jour),
+                (datetime.date(2024, 1, 1), datetime.date(2024, 12, 31))
+            )
+        self.assertEqual(
+            periode_echue('annuel', datetime.date(2024, 2, 29)),
+            (datetime.date(2023, 1, 1), datetime.date(2023, 12, 31))
+        )
+
+    def test_personnalise(self):
+        self.assertIsNone(periode_echue('personnalise', datetime.date(2025, 1, 1)))
+
+
+class ReservationEcheancesTests(TestCase):
+    """Réservation des échéances et reprises (rapports.planificateur)"""
+
+    AUJOURD_HUI = datetime.date(2025, 1, 1)
+    DECEMBRE = (datetime.date(2024, 12, 1), datetime.date(2024, 12, 31))
+
+    @classmethod
+    def setUpTestData(cls):
+        utilisateur = User.objects.create_user('planificateur')
+        cls.modele = RapportVentes.objects.create(
+            nom="Ventes mensuelles", type_rapport='mensuel', recurrent=True,
+            date_debut=datetime.date(2024, 1, 1), date_fin=datetime.date(2024, 1, 31),
+            creer_par=utilisateur,
+        )
+        # Rapport non récurrent : jamais planifié
+        RapportVentes.objects.create(
+            nom="Ponctuel", type_rapport='mensuel',
+            date_debut=datetime.date(2024, 1, 1), date_fin=datetime.date(2024, 1, 31),
+            creer_par=utilisateur,
+        )
+
+    def _execution(self, statut, tentatives):
+        return ExecutionPlanifiee.objects.create(
+            modele=self.modele, periode_debut=self.DECEMBRE[0], periode_fin=self.DECEMBRE[1],
+            statut=statut, tentatives=tentatives,
+        )
+
+    def test_nouvelle_periode(self):
+        executions = reserver_echeances(self.AUJOURD_HUI)
+        self.assertEqual(len(executions), 1)
+        execution = executions[0]
+        self.assertEqual((execution.modele, execution.periode_debut, execution.periode_fin),
+                         (self.modele, *self.DECEMBRE))
+        self.assertEqual((execution.statut, execution.tentatives), ('en_cours', 1))
+        # Période déjà réservée (en cours) : reprise comme une nouvelle tentative
+        self.assertEqual(reserver_echeances(self.AUJOURD_HUI)[0].tentatives, 2)
+
+    def test_periode_terminee_ignoree(self):
+        self._execution('termine', 1)
+        self.assertEqual(reserver_echeances(self.AUJOURD_HUI), [])
+
+    def test_nouvelle_tentative_apres_erreur(self):
+        self._execution('erreur', 1)
+        execution, = reserver_echeances(self.AUJOURD_HUI)
+        self.assertEqual((execution.statut, execution.tentatives), ('en_cours', 2))
+
+    def test_tentatives_epuisees(self):
+        self._execution('erreur', TENTATIVES_MAX)
+        self.assertEqual(reserver_echeances(self.AUJOURD_HUI), [])
+
+    def test_periode_suivante(self):
+        self._execution('termine', 1)
+        execution, = reserver_echeances(datetime.date(2025, 2, 1))
+        self.assertEqual((execution.periode_debut, execution.periode_fin),
+                         (datetime.date(2025, 1, 1), datetime.date(2025, 1, 31)))
+
+
+class VerrouPlanificateurTests(TestCase):
+    """Verrou en base des planificateurs (prise, renouvellement, expiration)"""
+
+    def test_verrou_exclusif_jusqu_a_expiration(self):
+        self.assertTrue(acquerir_verrou('hote:1'))
+        self.assertFalse(acquerir_verrou('hote:2'))
+        # Renouvellement par son détenteur
+        self.assertTrue(acquerir_verrou('hote:1'))
+
+        # Détenteur arrêté sans libérer : le verrou expire
+        VerrouPlanificateur.objects.update(expire_le=timezone.now() - datetime.timedelta(seconds=1))
+        self.assertTrue(acquerir_verrou('hote:2'))
+        self.assertFalse(acquerir_verrou('hote:1'))
 
-# Create your tests here.
+    def test_liberation(self):
+        self.assertTrue(acquerir_verrou('hote:1'))
+        # Seul le détenteur libère le verrou
+        liberer_verrou('hote:2')
+        self.assertFalse(acquerir_verrou('hote:2'))
+        liberer_verrou('hote:1')
+        self.assertTrue(acquerir_verrou('hote:2'))
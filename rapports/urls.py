@@ -20,6 +20,10 @@ urlpatterns = [
     # Rapports financiers
     path('financiers/', views.rapports_financiers, name='rapports_financiers'),
     
+    # Génération
+    path('generer/<str:rapport_type>/<int:rapport_id>/', views.generer_rapport, name='generer_rapport'),
+    path('statut/<str:rapport_type>/<int:rapport_id>/', views.statut_rapport, name='statut_rapport'),
+    
     # Téléchargement
     path('telecharger/<str:rapport_type>/<int:rapport_id>/', views.telecharger_rapport, name='telecharger_rapport'),
 ]
@@ -11,6 +11,8 @@ import io
 from decimal import Decimal
 
 from .models import RapportVentes, RapportClients, RapportArticles, RapportFinancier, ConfigurationRapport
+from .moteur import MODELES_RAPPORTS, lancer_generation
+from core.telechargements import reponse_fichier
 from clients.models import Client
 from devis.models import Devis, LigneDevis
 # from factures.models import Facture  # Temporairement commenté
@@ -103,10 +105,19 @@ def creer_rapport_ventes(request):
             date_debut=date_debut,
             date_fin=date_fin,
             format_sortie=format_sortie,
+            inclure_devis='inclure_devis' in request.POST,
+            inclure_factures='inclure_factures' in request.POST,
+            inclure_commandes='inclure_commandes' in request.POST,
+            groupe_par_client='groupe_par_client' in request.POST,
+            groupe_par_article='groupe_par_article' in request.POST,
+            recurrent='recurrent' in request.POST and type_rapport != 'personnalise',
             creer_par=request.user
         )
         
-        messages.success(request, f"Rapport '{nom}' créé avec succès!")
+        # Mettre le fichier en attente de génération par le worker
+        lancer_generation(rapport)
+        
+        messages.success(request, f"Rapport '{nom}' créé avec succès! Le fichier va être généré en arrière-plan.")
         return redirect('rapports:rapports_ventes')
     
     return render(request, 'rapports/creer_rapport_ventes.html')
@@ -148,6 +159,41 @@ def rapports_financiers(request):
     return render(request, 'rapports/rapports_financiers.html', context)
 
 
+@login_required
+def generer_rapport(request, rapport_type, rapport_id):
+    """(Re)lancer la génération du fichier d'un rapport"""
+    if rapport_type not in MODELES_RAPPORTS:
+        return HttpResponse("Type de rapport invalide", status=400)
+    rapport = get_object_or_404(MODELES_RAPPORTS[rapport_type], id=rapport_id, creer_par=request.user)
+    
+    if request.method == 'POST':
+        if rapport.statut_generation == 'en_cours':
+            messages.warning(request, f"Le rapport '{rapport.nom}' est déjà en cours de génération.")
+        else:
+            lancer_generation(rapport)
+            messages.success(request, f"Génération du rapport '{rapport.nom}' mise en file d'attente.")
+    
+    return redirect(f'rapports:rapports_{rapport_type}')
+
+
+@login_required
+def statut_rapport(request, rapport_type, rapport_id):
+    """API pour suivre la génération d'un rapport"""
+    if rapport_type not in MODELES_RAPPORTS:
+        return JsonResponse({'success': False, 'message': 'Type de rapport invalide'}, status=400)
+    rapport = get_object_or_404(MODELES_RAPPORTS[rapport_type], id=rapport_id, creer_par=request.user)
+    
+    return JsonResponse({
+        'success': True,
+        'statut': rapport.statut_generation,
+        'statut_display': rapport.get_statut_generation_display(),
+        'duree': rapport.duree_generation,
+        'nombre_lignes': rapport.nombre_lignes,
+        'message_erreur': rapport.message_erreur,
+        'fichier': bool(rapport.fichier_genere),
+    })
+
+
 @login_required
 def telecharger_rapport(request, rapport_type, rapport_id):
     """Télécharger un rapport généré"""
@@ -162,20 +208,8 @@ def telecharger_rapport(request, rapport_type, rapport_id):
     else:
         return HttpResponse("Type de rapport invalide", status=400)
     
-    if not rapport.fichier_genere:
+    if not rapport.fichier_genere or not rapport.fichier_genere.storage.exists(rapport.fichier_genere.name):
         messages.error(request, "Le fichier du rapport n'a pas été généré.")
         return redirect('rapports:dashboard')
     
-    # Déterminer le type MIME
-    if rapport.fichier_genere.name.endswith('.pdf'):
-        content_type = 'application/pdf'
-    elif rapport.fichier_genere.name.endswith('.xlsx'):
-        content_type = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-    elif rapport.fichier_genere.name.endswith('.csv'):
-        content_type = 'text/csv'
-    else:
-        content_type = 'application/octet-stream'
-    
-    response = HttpResponse(rapport.fichier_genere.read(), content_type=content_type)
-    response['Content-Disposition'] = f'attachment; filename="{rapport.fichier_genere.name}"'
-    return response
\ No newline at end of file
+    return reponse_fichier(request, rapport.fichier_genere)
\ No newline at end of file